@@ -3,9 +3,12 @@
 namespace App\Http\Controllers\Api;
 
 use App\Http\Controllers\Controller;
+use App\Models\ExecutionLog;
 use App\Models\Strategy;
 use Illuminate\Http\JsonResponse;
 use Illuminate\Http\Request;
+use Illuminate\Http\Response;
+use Illuminate\Support\Facades\Cache;
 use Illuminate\Support\Facades\Storage;
 use Illuminate\Support\Facades\Log;
 use Carbon\Carbon;
@@ -21,9 +24,15 @@ class ActiveStrategyController extends Controller
     /**
      * Get all active strategies for automated trading
      *
-     * @return JsonResponse
+     * Supports incremental sync: the response carries an ETag, so a client
+     * sending it back in If-None-Match gets an empty 304 while nothing has
+     * changed. Passing `since` (the `meta.version` of a previous response)
+     * returns only strategies changed since then, plus `meta.ids` listing
+     * every active strategy so the client can drop removed ones.
+     *
+     * @return JsonResponse|Response
      */
-    public function index(Request $request): JsonResponse
+    public function index(Request $request): JsonResponse|Response
     {
         try {
             // Log API access for monitoring
@@ -33,32 +42,38 @@ public function index(Request $request): JsonResponse
                 'timestamp' => Carbon::now()->toISOString()
             ]);
 
-            // Get active strategies with script files
-            $activeStrategies = Strategy::where('is_active', true)
-                                      ->whereNotNull('script_file')
-                                      ->where('script_file', '!=', '')
-                                      ->select(['id', 'name', 'script_file', 'params_json', 'user_id'])
-                                      ->get()
-                                      ->map(function ($strategy) {
-                                          return $this->formatStrategyForApi($strategy);
-                                      })
-                                      ->filter() // Remove any null results from invalid files
-                                      ->values(); // Re-index array
-
-            Log::info('Active strategies retrieved', [
-                'count' => $activeStrategies->count(),
-                'strategy_ids' => $activeStrategies->pluck('id')->toArray()
-            ]);
+            $manifest = Cache::rememberForever(Strategy::ACTIVE_MANIFEST_CACHE_KEY, function () {
+                return $this->buildManifest();
+            });
+
+            $etag = '"' . $manifest['etag'] . '"';
+
+            if (in_array($etag, $request->getETags(), true)) {
+                return response('', 304)->header('ETag', $etag);
+            }
+
+            $strategies = collect($manifest['strategies']);
+            $since = $request->query('since');
+            $isDelta = is_numeric($since);
+
+            if ($isDelta) {
+                // Versions have one-second resolution, so resend the boundary second
+                $strategies = $strategies->filter(function ($strategy) use ($since) {
+                    return $strategy['version'] >= (int) $since;
+                })->values();
+            }
 
             return response()->json([
                 'success' => true,
-                'data' => $activeStrategies,
+                'data' => $strategies,
                 'meta' => [
-                    'count' => $activeStrategies->count(),
+                    'count' => $strategies->count(),
                     'timestamp' => Carbon::now()->toISOString(),
-                    'version' => '1.0'
+                    'version' => $manifest['version'],
+                    'delta' => $isDelta,
+                    'ids' => $manifest['ids']
                 ]
-            ], 200);
+            ], 200)->header('ETag', $etag);
 
         } catch (\Exception $e) {
             Log::error('Error retrieving active strategies', [
@@ -74,6 +89,41 @@ public function index(Request $request): JsonResponse
         }
     }
 
+    /**
+     * Build the active strategy manifest
+     *
+     * Runs only when the cached manifest has been invalidated by a strategy
+     * being saved or deleted, so script files are stat-ed once per change
+     * rather than on every poll.
+     *
+     * @return array
+     */
+    private function buildManifest(): array
+    {
+        $activeStrategies = Strategy::where('is_active', true)
+                                  ->whereNotNull('script_file')
+                                  ->where('script_file', '!=', '')
+                                  ->select(['id', 'name', 'script_file', 'params_json', 'user_id', 'updated_at'])
+                                  ->get()
+                                  ->map(function ($strategy) {
+                                      return $this->formatStrategyForApi($strategy);
+                                  })
+                                  ->filter() // Remove any null results from invalid files
+                                  ->values(); // Re-index array
+
+        Log::info('Active strategies manifest rebuilt', [
+            'count' => $activeStrategies->count(),
+            'strategy_ids' => $activeStrategies->pluck('id')->toArray()
+        ]);
+
+        return [
+            'etag' => sha1(json_encode($activeStrategies)),
+            'version' => (int) $activeStrategies->max('version'),
+            'ids' => $activeStrategies->pluck('id')->all(),
+            'strategies' => $activeStrategies->all()
+        ];
+    }
+
     /**
      * Format strategy data for API consumption
      *
@@ -109,14 +159,17 @@ private function formatStrategyForApi(Strategy $strategy): ?array
                 }
             }
 
+            $lastModified = Storage::lastModified($strategy->script_file);
+
             return [
                 'id' => $strategy->id,
                 'name' => $strategy->name,
                 'script_path' => $scriptPath,
                 'params' => $params,
                 'user_id' => $strategy->user_id,
-                'last_modified' => Storage::lastModified($strategy->script_file),
-                'file_size' => Storage::size($strategy->script_file)
+                'last_modified' => $lastModified,
+                'file_size' => Storage::size($strategy->script_file),
+                'version' => max($lastModified, $strategy->updated_at?->getTimestamp() ?? 0)
             ];
 
         } catch (\Exception $e) {
@@ -146,39 +199,53 @@ public function health(): JsonResponse
     /**
      * Get strategy execution logs (for monitoring)
      *
+     * Reads the execution journal uploaded by the runner, newest first.
+     * Filters: `strategy_id`, `kind` (execution, signal, order) and
+     * `since` (epoch seconds or a date string); `limit` caps at 1000.
+     *
      * @param Request $request
      * @return JsonResponse
      */
     public function logs(Request $request): JsonResponse
     {
         try {
-            $limit = min($request->get('limit', 100), 1000); // Max 1000 logs
+            $limit = max(1, min((int) $request->get('limit', 100), 1000)); // Max 1000 logs
             $strategyId = $request->get('strategy_id');
+            $kind = $request->get('kind');
+            $since = $request->get('since');
 
-            // This would typically read from a dedicated logs table
-            // For now, return recent log entries from Laravel logs
-            $logFile = storage_path('logs/trading.log');
-            $logs = [];
-
-            if (file_exists($logFile)) {
-                $logContent = file_get_contents($logFile);
-                $logLines = array_slice(explode("\n", $logContent), -$limit);
-
-                foreach ($logLines as $line) {
-                    if (!empty(trim($line))) {
-                        $logs[] = [
-                            'content' => $line,
-                            'timestamp' => Carbon::now()->toISOString() // In real implementation, parse from log
-                        ];
-                    }
-                }
+            $query = ExecutionLog::query()->latestRecorded()->limit($limit);
+
+            if ($strategyId !== null) {
+                $query->forStrategy((int) $strategyId);
             }
+            if ($kind !== null) {
+                $query->where('kind', $kind);
+            }
+            if ($since !== null) {
+                $query->where('recorded_at', '>=', is_numeric($since)
+                    ? Carbon::createFromTimestamp((int) $since)
+                    : Carbon::parse($since));
+            }
+
+            $logs = $query->get()->map(function (ExecutionLog $log) {
+                return [
+                    'id' => $log->record_id,
+                    'kind' => $log->kind,
+                    'strategy_id' => $log->strategy_id,
+                    'account_id' => $log->account_id,
+                    'status' => $log->status,
+                    'message' => $log->message,
+                    'data' => $log->data,
+                    'timestamp' => $log->recorded_at->toISOString()
+                ];
+            });
 
             return response()->json([
                 'success' => true,
                 'data' => $logs,
                 'meta' => [
-                    'count' => count($logs),
+                    'count' => $logs->count(),
                     'limit' => $limit
                 ]
             ]);
@@ -0,0 +1,119 @@
+<?php
+
+namespace App\Http\Controllers\Api;
+
+use App\Http\Controllers\Controller;
+use App\Models\Strategy;
+use App\Models\UserBrokerAccount;
+use Illuminate\Http\JsonResponse;
+use Illuminate\Http\Request;
+use Illuminate\Support\Facades\Log;
+use Carbon\Carbon;
+
+/**
+ * BrokerAccountController
+ *
+ * Provides the automation runner with the Angel One accounts of users who
+ * own active strategies, so each strategy can trade on its owner's account.
+ */
+class BrokerAccountController extends Controller
+{
+    /**
+     * Broker code of the accounts the runner can trade on
+     */
+    private const BROKER_CODE = 'angel';
+
+    /**
+     * Get active Angel One accounts for users with active strategies
+     *
+     * @return JsonResponse
+     */
+    public function index(Request $request): JsonResponse
+    {
+        try {
+            $userIds = Strategy::active()->distinct()->pluck('user_id');
+
+            $accounts = UserBrokerAccount::active()
+                ->whereIn('user_id', $userIds)
+                ->whereHas('broker', function ($query) {
+                    $query->where('code', self::BROKER_CODE)->where('is_active', true);
+                })
+                ->get()
+                ->map(function (UserBrokerAccount $account) {
+                    return $this->formatAccountForApi($account);
+                })
+                ->values();
+
+            Log::info('Broker accounts retrieved', [
+                'count' => $accounts->count(),
+                'account_ids' => $accounts->pluck('id')->toArray()
+            ]);
+
+            return response()->json([
+                'success' => true,
+                'data' => $accounts,
+                'meta' => [
+                    'count' => $accounts->count(),
+                    'timestamp' => Carbon::now()->toISOString()
+                ]
+            ]);
+
+        } catch (\Exception $e) {
+            Log::error('Error retrieving broker accounts', [
+                'error' => $e->getMessage()
+            ]);
+
+            return response()->json([
+                'success' => false,
+                'error' => 'Failed to retrieve broker accounts'
+            ], 500);
+        }
+    }
+
+    /**
+     * Store tokens refreshed by the runner
+     *
+     * @param Request $request
+     * @param UserBrokerAccount $account
+     * @return JsonResponse
+     */
+    public function updateTokens(Request $request, UserBrokerAccount $account): JsonResponse
+    {
+        $validated = $request->validate([
+            'access_token' => 'required|string',
+            'refresh_token' => 'nullable|string',
+            'token_expiry' => 'nullable|integer'
+        ]);
+
+        $account->update([
+            'access_token' => $validated['access_token'],
+            'refresh_token' => $validated['refresh_token'] ?? $account->refresh_token,
+            'token_expiry' => isset($validated['token_expiry'])
+                ? Carbon::createFromTimestamp($validated['token_expiry'])
+                : null
+        ]);
+
+        Log::info('Broker account tokens updated', ['account_id' => $account->id]);
+
+        return response()->json(['success' => true]);
+    }
+
+    /**
+     * Format account credentials for the runner
+     *
+     * @param UserBrokerAccount $account
+     * @return array
+     */
+    private function formatAccountForApi(UserBrokerAccount $account): array
+    {
+        return [
+            'id' => $account->id,
+            'user_id' => $account->user_id,
+            'client_code' => $account->client_code,
+            'api_key' => $account->api_key,
+            'access_token' => $account->access_token,
+            'refresh_token' => $account->refresh_token,
+            'token_expiry' => $account->token_expiry?->getTimestamp()
+        ];
+    }
+}
@@ -0,0 +1,110 @@
+<?php
+
+namespace App\Http\Controllers\Api;
+
+use App\Http\Controllers\Controller;
+use App\Models\ExecutionLog;
+use Illuminate\Http\JsonResponse;
+use Illuminate\Http\Request;
+use Illuminate\Support\Facades\Log;
+use Illuminate\Support\Facades\Validator;
+use Carbon\Carbon;
+
+/**
+ * ExecutionLogController
+ *
+ * Bulk ingest of the execution journal kept by the automation runner.
+ * Records are read back through ActiveStrategyController::logs.
+ */
+class ExecutionLogController extends Controller
+{
+    /**
+     * Most records accepted in one batch
+     */
+    private const MAX_BATCH = 1000;
+
+    /**
+     * Rows per insert statement
+     */
+    private const INSERT_CHUNK = 250;
+
+    /**
+     * Store a batch of journal records
+     *
+     * The body is `{"records": [...]}`, optionally gzip-compressed with
+     * `Content-Encoding: gzip`. Records already stored (same `record_id`)
+     * are ignored, so the runner can safely resend a batch.
+     *
+     * @param Request $request
+     * @return JsonResponse
+     */
+    public function store(Request $request): JsonResponse
+    {
+        $body = $request->getContent();
+        if (strtolower((string) $request->header('Content-Encoding')) === 'gzip') {
+            $body = @gzdecode($body);
+            if ($body === false) {
+                return response()->json([
+                    'success' => false,
+                    'error' => 'Invalid gzip body'
+                ], 400);
+            }
+        }
+
+        $payload = json_decode($body, true);
+
+        $validator = Validator::make(is_array($payload) ? $payload : [], [
+            'records' => 'required|array|max:' . self::MAX_BATCH,
+            'records.*.record_id' => 'required|string|max:32',
+            'records.*.kind' => 'required|string|in:' . implode(',', ExecutionLog::KINDS),
+            'records.*.strategy_id' => 'nullable|integer',
+            'records.*.account_id' => 'nullable|integer',
+            'records.*.status' => 'nullable|string|max:32',
+            'records.*.message' => 'nullable|string',
+            'records.*.data' => 'nullable|array',
+            'records.*.recorded_at' => 'required|numeric'
+        ]);
+
+        if ($validator->fails()) {
+            return response()->json([
+                'success' => false,
+                'error' => 'Invalid journal batch',
+                'errors' => $validator->errors()
+            ], 422);
+        }
+
+        $now = Carbon::now();
+        $rows = array_map(function (array $record) use ($now) {
+            return [
+                'record_id' => $record['record_id'],
+                'kind' => $record['kind'],
+                'strategy_id' => $record['strategy_id'] ?? null,
+                'account_id' => $record['account_id'] ?? null,
+                'status' => $record['status'] ?? null,
+                'message' => $record['message'] ?? null,
+                'data' => isset($record['data']) ? json_encode($record['data']) : null,
+                'recorded_at' => Carbon::createFromFormat('U.u', sprintf('%.6F', $record['recorded_at']))
+                    ->setTimezone(config('app.timezone'))
+                    ->format('Y-m-d H:i:s.u'),
+                'created_at' => $now,
+                'updated_at' => $now
+            ];
+        }, $validator->validated()['records']);
+
+        $inserted = 0;
+        foreach (array_chunk($rows, self::INSERT_CHUNK) as $chunk) {
+            $inserted += ExecutionLog::insertOrIgnore($chunk);
+        }
+
+        Log::info('Execution journal batch stored', [
+            'received' => count($rows),
+            'inserted' => $inserted
+        ]);
+
+        return response()->json([
+            'success' => true,
+            'accepted' => count($rows),
+            'inserted' => $inserted
+        ]);
+    }
+}
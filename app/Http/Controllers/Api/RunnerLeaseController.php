@@ -0,0 +1,199 @@
+<?php
+
+namespace App\Http\Controllers\Api;
+
+use App\Http\Controllers\Controller;
+use App\Models\RunnerNode;
+use App\Models\StrategyLease;
+use Illuminate\Http\JsonResponse;
+use Illuminate\Http\Request;
+use Illuminate\Support\Facades\DB;
+use Illuminate\Support\Facades\Log;
+use Illuminate\Support\Str;
+use Carbon\Carbon;
+
+/**
+ * RunnerLeaseController
+ *
+ * Membership and strategy leases for sharded automation runners. Expiry
+ * times use this server's clock, so runners never compare clocks with each
+ * other. Leases are granted by conditional updates, so two runners asking
+ * for the same strategy at once cannot both get it.
+ */
+class RunnerLeaseController extends Controller
+{
+    /**
+     * Most leases requested in one call
+     */
+    private const MAX_LEASES = 1000;
+
+    /**
+     * Runners whose heartbeat expired this long ago are removed
+     */
+    private const NODE_RETENTION_SECONDS = 3600;
+
+    /**
+     * Renew a runner's heartbeat and list the live runners
+     *
+     * @param Request $request
+     * @return JsonResponse
+     */
+    public function heartbeat(Request $request): JsonResponse
+    {
+        $validated = $request->validate([
+            'node_id' => 'required|string|max:128',
+            'ttl' => 'required|numeric|min:1|max:3600'
+        ]);
+
+        $now = Carbon::now();
+        RunnerNode::upsert([[
+            'node_id' => $validated['node_id'],
+            'expires_at' => $this->timestamp($now->copy()->addMilliseconds((int) round($validated['ttl'] * 1000))),
+            'created_at' => $now,
+            'updated_at' => $now
+        ]], ['node_id'], ['expires_at', 'updated_at']);
+
+        RunnerNode::where('expires_at', '<', $this->timestamp($now->copy()->subSeconds(self::NODE_RETENTION_SECONDS)))
+            ->delete();
+
+        return response()->json([
+            'success' => true,
+            'nodes' => RunnerNode::live($this->timestamp($now))->orderBy('node_id')->pluck('node_id')
+        ]);
+    }
+
+    /**
+     * Remove a runner and release its leases
+     *
+     * @param Request $request
+     * @return JsonResponse
+     */
+    public function leave(Request $request): JsonResponse
+    {
+        $validated = $request->validate([
+            'node_id' => 'required|string|max:128'
+        ]);
+
+        DB::transaction(function () use ($validated) {
+            RunnerNode::where('node_id', $validated['node_id'])->delete();
+            StrategyLease::where('holder', $validated['node_id'])
+                ->update(['holder' => null, 'token' => null, 'expires_at' => null]);
+        });
+
+        Log::info('Runner left the shard', ['node_id' => $validated['node_id']]);
+
+        return response()->json(['success' => true]);
+    }
+
+    /**
+     * Lease strategies to a runner
+     *
+     * A lease is granted when the strategy is free, already held by the
+     * runner, or its lease expired, and it has not been executed for the
+     * requested `run_key` yet.
+     *
+     * @param Request $request
+     * @return JsonResponse
+     */
+    public function acquire(Request $request): JsonResponse
+    {
+        $validated = $this->validateLeases($request, [
+            'ttl' => 'required|numeric|min:1|max:86400'
+        ]);
+
+        $nodeId = $validated['node_id'];
+        $now = Carbon::now();
+        $expiresAt = $this->timestamp($now->copy()->addMilliseconds((int) round($validated['ttl'] * 1000)));
+        $token = (string) Str::uuid();
+        $leases = collect($validated['leases']);
+
+        DB::transaction(function () use ($leases, $nodeId, $now, $expiresAt, $token) {
+            StrategyLease::insertOrIgnore($leases->pluck('strategy_id')->unique()->map(fn ($id) => [
+                'strategy_id' => $id,
+                'created_at' => $now,
+                'updated_at' => $now
+            ])->values()->all());
+
+            // One conditional update per distinct run key (usually one per bar interval)
+            $leases->groupBy(fn ($lease) => $lease['run_key'] ?? '')->each(
+                function ($group, $runKey) use ($nodeId, $now, $expiresAt, $token) {
+                    StrategyLease::whereIn('strategy_id', $group->pluck('strategy_id'))
+                        ->availableTo($nodeId, $this->timestamp($now))
+                        ->when($runKey !== '', fn ($query) => $query->notRunFor((string) $runKey))
+                        ->update([
+                            'holder' => $nodeId,
+                            'token' => $token,
+                            'expires_at' => $expiresAt,
+                            'updated_at' => $now
+                        ]);
+                }
+            );
+        });
+
+        return response()->json([
+            'success' => true,
+            'granted' => StrategyLease::where('token', $token)->orderBy('strategy_id')->pluck('strategy_id')
+        ]);
+    }
+
+    /**
+     * Release a runner's leases after a run and record the run keys
+     *
+     * @param Request $request
+     * @return JsonResponse
+     */
+    public function complete(Request $request): JsonResponse
+    {
+        $validated = $this->validateLeases($request);
+        $nodeId = $validated['node_id'];
+
+        $released = 0;
+        DB::transaction(function () use ($validated, $nodeId, &$released) {
+            collect($validated['leases'])->groupBy(fn ($lease) => $lease['run_key'] ?? '')->each(
+                function ($group, $runKey) use ($nodeId, &$released) {
+                    $values = ['holder' => null, 'token' => null, 'expires_at' => null];
+                    if ($runKey !== '') {
+                        $values['last_run_key'] = (string) $runKey;
+                    }
+
+                    $released += StrategyLease::whereIn('strategy_id', $group->pluck('strategy_id'))
+                        ->where('holder', $nodeId)
+                        ->update($values);
+                }
+            );
+        });
+
+        return response()->json([
+            'success' => true,
+            'released' => $released
+        ]);
+    }
+
+    /**
+     * Validate a runner's list of strategy leases
+     *
+     * @param Request $request
+     * @param array $rules
+     * @return array
+     */
+    private function validateLeases(Request $request, array $rules = []): array
+    {
+        return $request->validate(array_merge([
+            'node_id' => 'required|string|max:128',
+            'leases' => 'required|array|max:' . self::MAX_LEASES,
+            'leases.*.strategy_id' => 'required|integer',
+            'leases.*.run_key' => 'nullable|string|max:32'
+        ], $rules));
+    }
+
+    /**
+     * Lease times are stored with microseconds
+     *
+     * @param Carbon $time
+     * @return string
+     */
+    private function timestamp(Carbon $time): string
+    {
+        return $time->format('Y-m-d H:i:s.u');
+    }
+}
@@ -0,0 +1,70 @@
+<?php
+
+namespace App\Models;
+
+use Illuminate\Database\Eloquent\Model;
+use Illuminate\Database\Eloquent\Relations\BelongsTo;
+
+/**
+ * ExecutionLog Model
+ *
+ * A strategy execution, signal or order recorded by the automation runner's
+ * local journal and uploaded in batches.
+ */
+class ExecutionLog extends Model
+{
+    /**
+     * Record kinds written by the runner.
+     */
+    public const KINDS = ['execution', 'signal', 'order'];
+
+    /**
+     * The attributes that are mass assignable.
+     *
+     * @var array<int, string>
+     */
+    protected $fillable = [
+        'record_id',
+        'kind',
+        'strategy_id',
+        'account_id',
+        'status',
+        'message',
+        'data',
+        'recorded_at',
+    ];
+
+    /**
+     * The attributes that should be cast.
+     *
+     * @var array<string, string>
+     */
+    protected $casts = [
+        'data' => 'array',
+        'recorded_at' => 'datetime',
+    ];
+
+    /**
+     * Get the strategy the record belongs to.
+     */
+    public function strategy(): BelongsTo
+    {
+        return $this->belongsTo(Strategy::class);
+    }
+
+    /**
+     * Scope to filter records by strategy.
+     */
+    public function scopeForStrategy($query, $strategyId)
+    {
+        return $query->where('strategy_id', $strategyId);
+    }
+
+    /**
+     * Scope to order records newest first, matching the recorded_at indexes.
+     */
+    public function scopeLatestRecorded($query)
+    {
+        return $query->orderByDesc('recorded_at')->orderByDesc('id');
+    }
+}
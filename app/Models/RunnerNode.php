@@ -0,0 +1,41 @@
+<?php
+
+namespace App\Models;
+
+use Illuminate\Database\Eloquent\Model;
+
+/**
+ * RunnerNode Model
+ *
+ * An automation runner taking part in sharded execution. A runner is live
+ * while its heartbeat has not expired.
+ */
+class RunnerNode extends Model
+{
+    /**
+     * The attributes that are mass assignable.
+     *
+     * @var array<int, string>
+     */
+    protected $fillable = [
+        'node_id',
+        'expires_at',
+    ];
+
+    /**
+     * The attributes that should be cast.
+     *
+     * @var array<string, string>
+     */
+    protected $casts = [
+        'expires_at' => 'datetime',
+    ];
+
+    /**
+     * Scope to runners whose heartbeat is still valid.
+     */
+    public function scopeLive($query, string $now)
+    {
+        return $query->where('expires_at', '>=', $now);
+    }
+}
@@ -5,6 +5,7 @@
 use Illuminate\Database\Eloquent\Factories\HasFactory;
 use Illuminate\Database\Eloquent\Model;
 use Illuminate\Database\Eloquent\Relations\BelongsTo;
+use Illuminate\Support\Facades\Cache;
 use Illuminate\Support\Facades\Storage;
 
 /**
@@ -17,6 +18,11 @@ class Strategy extends Model
 {
     use HasFactory;
 
+    /**
+     * Cache key of the active strategy manifest served to the automation runner.
+     */
+    public const ACTIVE_MANIFEST_CACHE_KEY = 'active_strategies_manifest';
+
     /**
      * The attributes that are mass assignable.
      *
@@ -136,7 +142,8 @@ public function hasScriptFile()
     }
 
     /**
-     * Delete the associated script file when deleting the strategy.
+     * Delete the associated script file when deleting the strategy, and
+     * invalidate the cached active strategy manifest on every change.
      */
     protected static function booted()
     {
@@ -145,5 +152,13 @@ protected static function booted()
                 Storage::delete($strategy->script_file);
             }
         });
+
+        static::saved(function () {
+            Cache::forget(self::ACTIVE_MANIFEST_CACHE_KEY);
+        });
+
+        static::deleted(function () {
+            Cache::forget(self::ACTIVE_MANIFEST_CACHE_KEY);
+        });
     }
 }
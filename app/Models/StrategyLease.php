@@ -0,0 +1,69 @@
+<?php
+
+namespace App\Models;
+
+use Illuminate\Database\Eloquent\Model;
+use Illuminate\Database\Eloquent\Relations\BelongsTo;
+
+/**
+ * StrategyLease Model
+ *
+ * Time-limited right of one automation runner to execute a strategy, plus
+ * the last bar (run key) the strategy was executed for.
+ */
+class StrategyLease extends Model
+{
+    /**
+     * The attributes that are mass assignable.
+     *
+     * @var array<int, string>
+     */
+    protected $fillable = [
+        'strategy_id',
+        'holder',
+        'token',
+        'expires_at',
+        'last_run_key',
+    ];
+
+    /**
+     * The attributes that should be cast.
+     *
+     * @var array<string, string>
+     */
+    protected $casts = [
+        'expires_at' => 'datetime',
+    ];
+
+    /**
+     * Get the leased strategy.
+     */
+    public function strategy(): BelongsTo
+    {
+        return $this->belongsTo(Strategy::class);
+    }
+
+    /**
+     * Scope to leases another runner may take over: free, already held by
+     * the runner, or expired.
+     */
+    public function scopeAvailableTo($query, string $nodeId, string $now)
+    {
+        return $query->where(function ($query) use ($nodeId, $now) {
+            $query->whereNull('holder')
+                  ->orWhere('holder', $nodeId)
+                  ->orWhere('expires_at', '<', $now);
+        });
+    }
+
+    /**
+     * Scope to strategies not yet executed for a run key.
+     */
+    public function scopeNotRunFor($query, string $runKey)
+    {
+        return $query->where(function ($query) use ($runKey) {
+            $query->whereNull('last_run_key')
+                  ->orWhere('last_run_key', '!=', $runKey);
+        });
+    }
+}
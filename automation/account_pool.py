@@ -0,0 +1,201 @@
+"""
+Smart Hedge - Broker Account Pool
+=================================
+
+Live Angel One sessions for every user broker account the runner trades on.
+
+- Accounts (``UserBrokerAccount`` rows for users with active strategies)
+  are fetched from the Laravel API; each gets its own session manager,
+  seeded with the stored access/refresh tokens and refreshed in the
+  background, and its own order router, since Angel One rate limits apply
+  per account.
+- Refreshed tokens are written back to Laravel so the stored credentials
+  stay current.
+- Accounts are isolated: a failed connection puts only that account into a
+  back-off period, during which its strategies are skipped without
+  retrying the broker, while every other account keeps running.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import requests
+
+from order_router import OrderRouter
+from session_manager import AngelSession, AngelSessionManager
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BrokerAccount:
+    """Angel One credentials of one user broker account"""
+    id: int
+    user_id: int
+    client_code: str
+    api_key: str
+    access_token: Optional[str] = None
+    refresh_token: Optional[str] = None
+    token_expiry: Optional[float] = None
+
+    @classmethod
+    def from_api(cls, data: Dict[str, Any]) -> 'BrokerAccount':
+        return cls(
+            id=data['id'],
+            user_id=data['user_id'],
+            client_code=data['client_code'],
+            api_key=data['api_key'],
+            access_token=data.get('access_token'),
+            refresh_token=data.get('refresh_token'),
+            token_expiry=data.get('token_expiry')
+        )
+
+    def credentials(self):
+        return (self.client_code, self.api_key)
+
+
+@dataclass
+class AccountSession:
+    """Live state of one account"""
+    account: BrokerAccount
+    manager: AngelSessionManager
+    order_router: OrderRouter
+    failed_until: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def smart_api(self):
+        return self.manager.smart_api
+
+    @property
+    def session_token(self) -> Optional[str]:
+        return self.manager.session_token
+
+
+class BrokerAccountClient:
+    """Reads accounts from and writes refreshed tokens to the Laravel API"""
+
+    def __init__(self, base_url: str, session: requests.Session, timeout: float = 30):
+        self.base_url = base_url.rstrip('/')
+        self.session = session
+        self.timeout = timeout
+
+    def fetch(self) -> List[BrokerAccount]:
+        response = self.session.get(f"{self.base_url}/broker-accounts", timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        if not data.get('success'):
+            raise ValueError(data.get('error', 'Unknown error'))
+        return [BrokerAccount.from_api(account) for account in data.get('data') or []]
+
+    def update_tokens(self, account_id: int, session: AngelSession) -> None:
+        response = self.session.post(
+            f"{self.base_url}/broker-accounts/{account_id}/tokens",
+            json={
+                'access_token': session.jwt_token,
+                'refresh_token': session.refresh_token or None,
+                'token_expiry': int(session.expires_at)
+            },
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+
+class AccountPool:
+    """One session manager and order router per broker account"""
+
+    def __init__(self, smart_connect_factory: Callable[..., Any],
+                 order_router_factory: Callable[..., OrderRouter],
+                 on_tokens: Optional[Callable[[int, AngelSession], None]] = None,
+                 refresh_margin: int = 600, failure_backoff: float = 300):
+        self.smart_connect_factory = smart_connect_factory
+        self.order_router_factory = order_router_factory
+        self.on_tokens = on_tokens
+        self.refresh_margin = refresh_margin
+        self.failure_backoff = failure_backoff
+
+        self.sessions: Dict[int, AccountSession] = {}
+        self._by_user: Dict[Any, List[AccountSession]] = {}
+        self._lock = threading.Lock()
+
+    def sync(self, accounts: Iterable[BrokerAccount]) -> None:
+        """Add new accounts, rebuild ones whose credentials changed, drop removed ones"""
+        with self._lock:
+            current = {}
+            for account in accounts:
+                existing = self.sessions.get(account.id)
+                if existing and existing.account.credentials() == account.credentials():
+                    existing.account = account
+                    current[account.id] = existing
+                else:
+                    if existing:
+                        self._close(existing)
+                    current[account.id] = self._open(account)
+
+            for account_id, session in self.sessions.items():
+                if account_id not in current:
+                    self._close(session)
+
+            self.sessions = current
+            self._by_user = {}
+            for session in current.values():
+                self._by_user.setdefault(str(session.account.user_id), []).append(session)
+
+        logger.info(f"Account pool holds {len(self.sessions)} broker accounts")
+
+    def for_user(self, user_id: Any) -> List[AccountSession]:
+        with self._lock:
+            return list(self._by_user.get(str(user_id), []))
+
+    def connect(self, session: AccountSession) -> bool:
+        """Make sure the account has a live session; False while backing off"""
+        with session.lock:
+            if time.monotonic() < session.failed_until:
+                return False
+            try:
+                if session.manager.get_session() and session.session_token:
+                    return True
+                error = 'no session established'
+            except Exception as e:
+                error = str(e)
+
+            session.failed_until = time.monotonic() + self.failure_backoff
+            logger.error(f"Account {session.account.id} ({session.account.client_code}) unavailable, "
+                         f"retrying in {self.failure_backoff:.0f}s: {error}")
+            return False
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for session in self.sessions.values():
+                self._close(session)
+            self.sessions, self._by_user = {}, {}
+
+    def _open(self, account: BrokerAccount) -> AccountSession:
+        manager = AngelSessionManager(
+            api_key=account.api_key,
+            client_id=account.client_code,
+            mpin='',
+            totp_secret='',
+            smart_connect_factory=self.smart_connect_factory,
+            refresh_margin=self.refresh_margin,
+            retry_delay=self.failure_backoff,
+            on_session=self._token_callback(account.id)
+        )
+        if account.access_token:
+            manager.seed(account.access_token, account.refresh_token or '', expires_at=account.token_expiry)
+        manager.start_background_refresh()
+
+        return AccountSession(account, manager,
+                              self.order_router_factory(lambda: manager.smart_api, manager.invalidate))
+
+    def _close(self, session: AccountSession) -> None:
+        session.manager.stop()
+        session.order_router.shutdown(wait=False)
+
+    def _token_callback(self, account_id: int) -> Optional[Callable[[AngelSession], None]]:
+        if not self.on_tokens:
+            return None
+        return lambda session: self.on_tokens(account_id, session)
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Smart Hedge - Vectorized Backtesting Engine
+===========================================
+
+Replays stored candles through a strategy's signal logic and accounts for
+fills, stop-loss/take-profit exits and PnL, then sweeps parameter grids
+across a process pool.
+
+Strategies opt in by exposing a module-level function::
+
+    def signal_array(candles: Candles, params: dict) -> np.ndarray:
+        # +1 = BUY, -1 = SELL, 0 = HOLD for every bar
+        ...
+
+Fill model (mirrors the live example strategy):
+
+- A BUY/SELL signal opens a position at that bar's close, with stop-loss and
+  take-profit at ``stop_loss_percent``/``take_profit_percent`` from entry.
+- The position is closed at the stop or target on the first later bar whose
+  low/high reaches it (the stop wins if both are hit in one bar), or at the
+  close of the next opposite signal, which also opens the reverse position.
+- Anything still open is closed at the final bar.
+
+Signals and exits are computed with array operations; the only Python loop
+runs once per trade, not once per bar.
+
+Usage:
+    python backtest.py --strategy strategies/example_strategy.py \\
+        --exchange NSE --symbol SBIN-EQ --interval ONE_MINUTE \\
+        --grid short_ma_period=5,10,20 --grid long_ma_period=50,100,200
+"""
+
+import argparse
+import importlib.util
+import itertools
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from candle_store import COLUMNS, Candles, CandleStore
+
+logger = logging.getLogger(__name__)
+
+SIGNAL_FUNCTION = 'signal_array'
+
+# Exit reasons recorded per trade
+EXIT_STOP, EXIT_TARGET, EXIT_SIGNAL, EXIT_END = 'stop_loss', 'take_profit', 'signal', 'end_of_data'
+
+
+@dataclass
+class Trade:
+    direction: int  # +1 long, -1 short
+    entry_index: int
+    exit_index: int
+    entry_price: float
+    exit_price: float
+    quantity: float
+    pnl: float
+    exit_reason: str
+
+
+@dataclass
+class BacktestResult:
+    params: Dict[str, Any]
+    trades: int
+    wins: int
+    total_pnl: float
+    win_rate: float
+    profit_factor: float
+    max_drawdown: float
+
+    @classmethod
+    def from_trades(cls, params: Dict[str, Any], trades: List[Trade]) -> 'BacktestResult':
+        pnl = np.array([trade.pnl for trade in trades], dtype=np.float64)
+        gains = pnl[pnl > 0].sum()
+        losses = -pnl[pnl < 0].sum()
+        equity = np.concatenate([[0.0], np.cumsum(pnl)])
+
+        return cls(
+            params=params,
+            trades=len(trades),
+            wins=int((pnl > 0).sum()),
+            total_pnl=float(pnl.sum()),
+            win_rate=float((pnl > 0).mean()) if len(pnl) else 0.0,
+            profit_factor=float(gains / losses) if losses > 0 else float('inf') if gains > 0 else 0.0,
+            max_drawdown=float((np.maximum.accumulate(equity) - equity).max())
+        )
+
+
+def _next_position(signs: np.ndarray, direction: int) -> np.ndarray:
+    """For each position k, the first position >= k whose sign is ``direction``
+
+    Has one extra trailing entry; ``len(signs)`` means there is none.
+    """
+    positions = np.where(signs == direction, np.arange(len(signs)), len(signs))
+    positions = np.append(positions, len(signs))
+    return np.minimum.accumulate(positions[::-1])[::-1]
+
+
+def simulate(candles: Candles, signals: np.ndarray, params: Dict[str, Any]) -> List[Trade]:
+    """Turn a per-bar signal array into trades with SL/TP exits"""
+    stop_fraction = float(params.get('stop_loss_percent', 0)) / 100
+    target_fraction = float(params.get('take_profit_percent', 0)) / 100
+    quantity = float(params.get('quantity', 1))
+    cost = float(params.get('cost_per_trade', 0))
+
+    high, low, close = candles.high, candles.low, candles.close
+    last_bar = len(close) - 1
+
+    signal_bars = np.flatnonzero(signals)
+    signal_signs = np.sign(signals[signal_bars])
+    next_of_sign = {direction: _next_position(signal_signs, direction) for direction in (1, -1)}
+    trades: List[Trade] = []
+    cursor = 0  # Position in signal_bars of the next candidate entry
+
+    while cursor < len(signal_bars):
+        entry = int(signal_bars[cursor])
+        direction = int(np.sign(signals[entry]))
+        entry_price = float(close[entry])
+
+        # The next opposite signal bounds how far this trade can run
+        opposite = next_of_sign[-direction][cursor + 1]
+        has_opposite = opposite < len(signal_bars)
+        window_end = int(signal_bars[opposite]) if has_opposite else last_bar
+
+        exit_index, exit_price, reason = window_end, float(close[window_end]), (
+            EXIT_SIGNAL if has_opposite else EXIT_END
+        )
+
+        if window_end > entry and (stop_fraction or target_fraction):
+            bars = slice(entry + 1, window_end + 1)
+            if direction > 0:
+                stop = entry_price * (1 - stop_fraction)
+                target = entry_price * (1 + target_fraction)
+                stop_hit = low[bars] <= stop if stop_fraction else np.zeros(window_end - entry, bool)
+                target_hit = high[bars] >= target if target_fraction else np.zeros(window_end - entry, bool)
+            else:
+                stop = entry_price * (1 + stop_fraction)
+                target = entry_price * (1 - target_fraction)
+                stop_hit = high[bars] >= stop if stop_fraction else np.zeros(window_end - entry, bool)
+                target_hit = low[bars] <= target if target_fraction else np.zeros(window_end - entry, bool)
+
+            hit = stop_hit | target_hit
+            if hit.any():
+                offset = int(np.argmax(hit))
+                exit_index = entry + 1 + offset
+                if stop_hit[offset]:
+                    exit_price, reason = stop, EXIT_STOP
+                else:
+                    exit_price, reason = target, EXIT_TARGET
+
+        pnl = (exit_price - entry_price) * direction * quantity - 2 * cost
+        trades.append(Trade(direction, entry, exit_index, entry_price, exit_price, quantity, pnl, reason))
+
+        # Re-enter on the opposite signal, or on the first signal after the exit
+        if reason == EXIT_SIGNAL:
+            cursor = int(np.searchsorted(signal_bars, exit_index))
+        else:
+            cursor = int(np.searchsorted(signal_bars, exit_index, side='right'))
+
+    return trades
+
+
+def backtest(candles: Candles, signal_function: Callable[[Candles, Dict[str, Any]], np.ndarray],
+             params: Dict[str, Any]) -> BacktestResult:
+    """Backtest one parameter set"""
+    signals = np.asarray(signal_function(candles, params))
+    return BacktestResult.from_trades(params, simulate(candles, signals, params))
+
+
+def load_signal_function(strategy_file: str) -> Callable[[Candles, Dict[str, Any]], np.ndarray]:
+    """Import ``signal_array`` from a strategy script"""
+    spec = importlib.util.spec_from_file_location('backtest_strategy', strategy_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    function = getattr(module, SIGNAL_FUNCTION, None)
+    if not callable(function):
+        raise ValueError(f"Strategy {strategy_file} does not define {SIGNAL_FUNCTION}()")
+    return function
+
+
+def expand_grid(grid: Dict[str, Iterable[Any]], base_params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Cartesian product of a parameter grid merged over base parameters"""
+    names = list(grid)
+    return [
+        {**(base_params or {}), **dict(zip(names, values))}
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+# Per-worker state, loaded once by the pool initializer
+_worker_candles: Optional[Candles] = None
+_worker_signal_function = None
+
+
+def _init_worker(candles: Candles, strategy_file: str) -> None:
+    global _worker_candles, _worker_signal_function
+    _worker_candles = candles
+    _worker_signal_function = load_signal_function(strategy_file)
+
+
+def _run_one(params: Dict[str, Any]) -> BacktestResult:
+    return backtest(_worker_candles, _worker_signal_function, params)
+
+
+def sweep(candles: Candles, strategy_file: str, grid: Dict[str, Iterable[Any]],
+          base_params: Optional[Dict[str, Any]] = None, processes: Optional[int] = None) -> List[BacktestResult]:
+    """Backtest every grid combination across a process pool
+
+    Candles and the strategy module are shipped to each worker once; each
+    task then only carries its parameter dict. Results keep grid order.
+    """
+    combinations = expand_grid(grid, base_params)
+    processes = processes or os.cpu_count() or 1
+    chunksize = max(1, len(combinations) // (processes * 4))
+
+    logger.info(f"Sweeping {len(combinations)} parameter sets across {processes} processes")
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                             initargs=(candles, strategy_file)) as executor:
+        return list(executor.map(_run_one, combinations, chunksize=chunksize))
+
+
+def parse_grid(values: List[str]) -> Dict[str, List[Any]]:
+    """Parse ``name=v1,v2,...`` arguments into a grid"""
+    grid = {}
+    for item in values:
+        name, _, raw = item.partition('=')
+        grid[name] = [json.loads(value) for value in raw.split(',')]
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest a strategy over cached candles')
+    parser.add_argument('--strategy', required=True, help='Strategy file defining signal_array()')
+    parser.add_argument('--store', default=os.getenv('CANDLE_STORE_DIR', '.cache/candles'))
+    parser.add_argument('--exchange', default='NSE')
+    parser.add_argument('--symbol', required=True)
+    parser.add_argument('--interval', default='ONE_DAY')
+    parser.add_argument('--params', default='{}', help='Base parameters as JSON')
+    parser.add_argument('--grid', action='append', default=[], help='name=v1,v2,... (repeatable)')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    candles = CandleStore(args.store).read(args.exchange, args.symbol, args.interval)
+    if candles is None or len(candles) == 0:
+        print(f"No cached candles for {args.exchange}:{args.symbol} ({args.interval})")
+        sys.exit(1)
+
+    # Copy out of the memory map so workers receive plain arrays
+    candles = Candles(*(np.array(getattr(candles, name)) for name, _ in COLUMNS))
+
+    results = sweep(candles, args.strategy, parse_grid(args.grid), json.loads(args.params), args.processes)
+    for result in sorted(results, key=lambda r: r.total_pnl, reverse=True)[:args.top]:
+        print(json.dumps(asdict(result)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""
+Smart Hedge - Runner Benchmarks
+===============================
+
+Reproducible performance measurements of the automation runner against a
+local stand-in for the Laravel API and a mock SmartConnect, so no live
+Angel One credentials are needed. Run with ``python -m benchmarks``.
+"""
@@ -0,0 +1,82 @@
+"""
+Run the runner benchmarks.
+
+Usage (from the automation directory):
+    python -m benchmarks                                  # run and print
+    python -m benchmarks --save benchmarks/baselines/local.json
+    python -m benchmarks --compare benchmarks/baselines/local.json --tolerance 0.25
+
+``--compare`` exits with status 1 when any metric regressed beyond the
+tolerance. Baselines are machine-specific; record one per machine.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Make the runner's modules importable regardless of the working directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.harness import EXECUTION_MODES, BenchmarkSettings, compare, load, run_all, save  # noqa: E402
+
+
+def main():
+    defaults = BenchmarkSettings()
+    parser = argparse.ArgumentParser(description='Benchmark the automation runner against mocked services')
+    parser.add_argument('--strategies', type=int, default=defaults.strategies)
+    parser.add_argument('--cycles', type=int, default=defaults.cycles)
+    parser.add_argument('--work', type=int, default=defaults.work, help='Loop iterations per strategy')
+    parser.add_argument('--workers', type=int, default=defaults.workers)
+    parser.add_argument('--modes', default=','.join(EXECUTION_MODES))
+    parser.add_argument('--broker-latency-ms', type=float, default=defaults.broker_latency * 1000)
+    parser.add_argument('--api-latency-ms', type=float, default=defaults.api_latency * 1000)
+    parser.add_argument('--orders', type=int, default=defaults.orders)
+    parser.add_argument('--order-rate', type=float, default=defaults.order_rate)
+    parser.add_argument('--ticks', type=int, default=defaults.ticks, help='Recorded ticks to replay')
+    parser.add_argument('--save', help='Write results as a JSON baseline')
+    parser.add_argument('--compare', help='Baseline JSON to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown')
+    args = parser.parse_args()
+
+    settings = BenchmarkSettings(
+        strategies=args.strategies,
+        cycles=args.cycles,
+        work=args.work,
+        workers=args.workers,
+        modes=tuple(mode.strip() for mode in args.modes.split(',') if mode.strip()),
+        broker_latency=args.broker_latency_ms / 1000,
+        api_latency=args.api_latency_ms / 1000,
+        orders=args.orders,
+        order_rate=args.order_rate,
+        ticks=args.ticks
+    )
+
+    report = run_all(settings)
+    for metric, value in sorted(report['results'].items()):
+        print(f"{metric:45s} {value:12.4f}")
+
+    if args.save:
+        save(report, args.save)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        baseline = load(args.compare)
+        if baseline is None:
+            print(f"Baseline {args.compare} not found")
+            sys.exit(2)
+
+        if baseline['meta'].get('settings') != json.loads(json.dumps(report['meta']['settings'])):
+            print("Warning: baseline was recorded with different settings; results may not be comparable")
+
+        regressions = compare(report['results'], baseline['results'], args.tolerance)
+        if regressions:
+            print("Performance regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+Benchmark scenarios, JSON baselines and regression checks.
+
+Every scenario runs in a freshly spawned process so its timings, metrics
+and peak memory are not polluted by earlier scenarios.
+
+Result keys are ``<scenario>.<metric>``. Metrics ending in ``_per_s`` are
+better when higher; all others (times, memory, rejections) are better when
+lower.
+"""
+
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pyotp
+
+from benchmarks.mock_api import MockLaravelApi
+from benchmarks.mock_broker import MockBroker
+from benchmarks.synthetic import write_strategies, write_ticks
+
+EXECUTION_MODES = ('subprocess', 'forkserver', 'inprocess')
+
+
+@dataclass
+class BenchmarkSettings:
+    strategies: int = 20
+    cycles: int = 3
+    work: int = 10000  # Loop iterations of pure-Python work per strategy
+    workers: int = 4
+    modes: Tuple[str, ...] = EXECUTION_MODES
+    broker_latency: float = 0.02  # Seconds per mocked SmartConnect call
+    api_latency: float = 0.0  # Seconds per mocked Laravel request
+    orders: int = 200
+    order_rate: float = 10.0  # Runner-side orders per second
+    manifest_polls: int = 50
+    ticks: int = 1000000  # Recorded ticks replayed per tick scenario pass
+    brackets: int = 1000  # Open SL/TP brackets while replaying ticks
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process plus its largest child, in MB"""
+    scale = 1024 * 1024 if platform.system() == 'Darwin' else 1024
+    self_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return (self_peak + children_peak) / scale
+
+
+def cycle_scenario(mode: str, settings: BenchmarkSettings) -> Dict[str, float]:
+    """Full runner cycles over N synthetic strategies in one execution mode"""
+    import metrics
+    from runner import Config, TradingAutomation
+
+    workdir = Path(tempfile.mkdtemp(prefix='smart-hedge-bench-'))
+    os.chdir(workdir)
+
+    strategies = write_strategies(str(workdir / 'strategies'), settings.strategies, work=settings.work)
+    api = MockLaravelApi(strategies, latency=settings.api_latency).start()
+    broker = MockBroker(latency=settings.broker_latency)
+
+    config = Config(
+        api_base_url=api.url,
+        api_token=api.api_token,
+        angel_api_key='benchmark',
+        angel_client_id='BENCH01',
+        angel_mpin='0000',
+        angel_totp_secret=pyotp.random_base32(),
+        log_level='WARNING',
+        session_cache_file=str(workdir / 'session.enc'),
+        manifest_cache_file='',
+        candle_store_dir='',
+        instrument_index_dir='',
+        execution_mode=mode,
+        max_workers=settings.workers
+    )
+    automation = TradingAutomation(config, smart_connect_factory=broker.factory)
+
+    durations = []
+    for _ in range(settings.cycles):
+        start = time.perf_counter()
+        automation.run_automation_cycle()
+        durations.append(time.perf_counter() - start)
+
+    api.stop()
+    warm = statistics.median(durations[1:]) if len(durations) > 1 else durations[0]
+    executions = metrics.STAGE_SECONDS.count(stage='execute_strategy')
+    successes = sum(metrics.STRATEGY_RUNS.value(strategy_id=s['id'], result='success') for s in strategies)
+
+    results = {
+        'cold_cycle_s': durations[0],
+        'warm_cycle_s': warm,
+        'strategy_overhead_ms': metrics.STAGE_SECONDS.total(stage='execute_strategy') / max(executions, 1) * 1000,
+        'strategies_per_s': settings.strategies / warm,
+        'failed_runs': executions - successes,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    spawns = metrics.STAGE_SECONDS.count(stage='spawn_strategy')
+    if spawns:
+        results['spawn_ms'] = metrics.STAGE_SECONDS.total(stage='spawn_strategy') / spawns * 1000
+    return results
+
+
+def order_scenario(settings: BenchmarkSettings) -> Dict[str, float]:
+    """Burst of orders through the rate-limited router"""
+    from order_router import OrderRouter
+
+    broker = MockBroker(latency=settings.broker_latency)
+    client = broker.factory('benchmark')
+    router = OrderRouter(lambda: client, rate_per_second=settings.order_rate, max_workers=8)
+
+    params = {'variety': 'NORMAL', 'tradingsymbol': 'SBIN-EQ', 'symboltoken': '3045', 'transactiontype': 'BUY',
+              'exchange': 'NSE', 'ordertype': 'MARKET', 'producttype': 'INTRADAY', 'quantity': '1'}
+
+    start = time.perf_counter()
+    results = [future.result() for future in [router.submit(dict(params)) for _ in range(settings.orders)]]
+    wall = time.perf_counter() - start
+    router.shutdown()
+
+    summary = router.latency_summary()
+    return {
+        'wall_s': wall,
+        'orders_per_s': sum(result.placed for result in results) / wall,
+        'latency_p50_ms': summary['p50_ms'],
+        'latency_p99_ms': summary['p99_ms'],
+        'broker_rejections': broker.rejected['placeOrder'],
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def manifest_scenario(settings: BenchmarkSettings) -> Dict[str, float]:
+    """Cost of an initial manifest download versus idle (304) polls"""
+    from strategy_manifest import ManifestSync
+
+    workdir = tempfile.mkdtemp(prefix='smart-hedge-bench-')
+    strategies = write_strategies(workdir, settings.strategies, work=settings.work)
+    api = MockLaravelApi(strategies, latency=settings.api_latency).start()
+    sync = ManifestSync(api.url, api.api_token)
+
+    start = time.perf_counter()
+    sync.fetch()
+    full = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(settings.manifest_polls):
+        sync.fetch()
+    idle = (time.perf_counter() - start) / settings.manifest_polls
+    api.stop()
+
+    return {'full_fetch_ms': full * 1000, 'idle_poll_ms': idle * 1000}
+
+
+def tick_scenario(settings: BenchmarkSettings) -> Dict[str, float]:
+    """Recorded-tick replay, batched and per-message, into the trigger monitor and candle aggregator"""
+    from candle_aggregator import CandleAggregator
+    from tick_feed import LTP_MODE, TickFile, TickReplay, quotes_from_ticks
+    from triggers import Bracket, TriggerMonitor
+
+    path = write_ticks(os.path.join(tempfile.mkdtemp(prefix='smart-hedge-bench-'), 'ticks.bin'), settings.ticks)
+    tick_file = TickFile(path)
+
+    def replay(**callbacks) -> float:
+        feed = TickReplay(tick_file, speed=0)
+        feed.on_open = lambda ws: ws.subscribe('bench', LTP_MODE, tick_file.token_list())
+        for name, callback in callbacks.items():
+            setattr(feed, name, callback)
+        start = time.perf_counter()
+        feed.connect()
+        return feed.delivered / (time.perf_counter() - start)
+
+    # Levels far from the market: measures the per-tick cost of watching, not of exits
+    monitor = TriggerMonitor()
+    for index in range(settings.brackets):
+        monitor.add(Bracket(index, {'exchange': 'NSE', 'symboltoken': str(1001 + index % 50),
+                                    'transactiontype': 'BUY'}, 1, stop_loss=1.0, take_profit=1e6,
+                            submit=lambda params, key: None))
+
+    aggregator = CandleAggregator()
+    for index in range(50):
+        aggregator.track('NSE', f"SYM{index}", str(1001 + index))
+
+    return {
+        'batch_ticks_per_s': replay(on_ticks=lambda ws, ticks: None),
+        'message_ticks_per_s': replay(on_data=lambda ws, message: None),
+        'trigger_ticks_per_s': replay(on_ticks=lambda ws, ticks: monitor.on_quotes(quotes_from_ticks(ticks))),
+        'aggregate_ticks_per_s': replay(on_ticks=lambda ws, ticks: aggregator.on_ticks(ticks)),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def _child(queue, function: Callable, args: tuple) -> None:
+    try:
+        queue.put(('ok', function(*args)))
+    except Exception as e:
+        queue.put(('error', f"{type(e).__name__}: {e}"))
+
+
+def run_isolated(function: Callable, *args) -> Dict[str, float]:
+    """Run a scenario in a fresh interpreter and return its results"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_child, args=(queue, function, args))
+    process.start()
+    status, payload = queue.get()
+    process.join()
+    if status != 'ok':
+        raise RuntimeError(payload)
+    return payload
+
+
+def run_all(settings: BenchmarkSettings, log: Callable[[str], None] = print) -> Dict[str, Any]:
+    """Run every scenario and return results with environment metadata"""
+    results: Dict[str, float] = {}
+
+    scenarios = [(f"cycle_{mode}", cycle_scenario, (mode, settings)) for mode in settings.modes]
+    scenarios += [('orders', order_scenario, (settings,)), ('manifest', manifest_scenario, (settings,)),
+                  ('ticks', tick_scenario, (settings,))]
+
+    for name, function, args in scenarios:
+        log(f"Running {name}...")
+        for metric, value in run_isolated(function, *args).items():
+            results[f"{name}.{metric}"] = value
+
+    return {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'settings': asdict(settings),
+        },
+        'results': results,
+    }
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith('_per_s')
+
+
+def compare(current: Dict[str, float], baseline: Dict[str, float], tolerance: float = 0.25) -> List[str]:
+    """Describe every metric that regressed by more than ``tolerance``"""
+    regressions = []
+    for metric, base in sorted(baseline.items()):
+        value = current.get(metric)
+        if value is None or not base:
+            continue
+        change = (value - base) / abs(base)
+        if higher_is_better(metric):
+            change = -change
+        if change > tolerance:
+            regressions.append(f"{metric}: {base:.4g} -> {value:.4g} ({change:+.0%} worse)")
+    return regressions
+
+
+def save(report: Dict[str, Any], path: str) -> None:
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+
+
+def load(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,135 @@
+"""
+Local stand-in for the Laravel API used by the runner.
+
+Serves ``/api/health``, ``/api/active-strategies`` (with the same ETag,
+``If-None-Match`` and ``since`` semantics as ``ActiveStrategyController``)
+``/api/broker-accounts`` and the ``/api/logs/batch`` journal ingest, with
+an optional artificial latency.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+class MockLaravelApi:
+    """Threaded HTTP server answering the runner's API calls"""
+
+    def __init__(self, strategies: List[Dict[str, Any]], api_token: str = 'benchmark-token',
+                 accounts: Optional[List[Dict[str, Any]]] = None, latency: float = 0.0):
+        self.strategies = strategies
+        self.accounts = accounts or []
+        self.api_token = api_token
+        self.latency = latency
+        self.requests = 0
+        self.not_modified = 0
+        self.journal_records = 0
+        self._lock = threading.Lock()
+
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, like the real server behind nginx
+            disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+            def do_GET(self):
+                api.handle(self)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                self.body = self.rfile.read(length)
+                api.handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/api"
+
+    def start(self) -> 'MockLaravelApi':
+        self._thread = threading.Thread(target=self.server.serve_forever, name='mock-api', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def manifest(self):
+        body = json.dumps(self.strategies, sort_keys=True)
+        return f'"{hashlib.sha1(body.encode()).hexdigest()}"', max((s['version'] for s in self.strategies), default=0)
+
+    def handle(self, request: BaseHTTPRequestHandler) -> None:
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+
+        if request.headers.get('Authorization') != f'Bearer {self.api_token}':
+            return self._send(request, 401, {'success': False, 'error': 'Invalid API token'})
+
+        url = urlparse(request.path)
+        if url.path == '/api/health':
+            return self._send(request, 200, {'status': 'healthy'})
+
+        if url.path == '/api/broker-accounts':
+            return self._send(request, 200, {'success': True, 'data': self.accounts})
+
+        if url.path == '/api/logs/batch':
+            body = request.body
+            if request.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+            records = json.loads(body)['records']
+            with self._lock:
+                self.journal_records += len(records)
+            return self._send(request, 200, {'success': True, 'accepted': len(records)})
+
+        if url.path.startswith('/api/broker-accounts/'):
+            return self._send(request, 200, {'success': True})
+
+        if url.path != '/api/active-strategies':
+            return self._send(request, 404, {'success': False, 'error': 'Endpoint not found'})
+
+        etag, version = self.manifest()
+        if request.headers.get('If-None-Match') == etag:
+            with self._lock:
+                self.not_modified += 1
+            return self._send(request, 304, None, {'ETag': etag})
+
+        since = parse_qs(url.query).get('since', [None])[0]
+        data = self.strategies
+        if since is not None:
+            data = [strategy for strategy in data if strategy['version'] >= int(since)]
+
+        return self._send(request, 200, {
+            'success': True,
+            'data': data,
+            'meta': {
+                'count': len(data),
+                'version': version,
+                'delta': since is not None,
+                'ids': [strategy['id'] for strategy in self.strategies]
+            }
+        }, {'ETag': etag})
+
+    @staticmethod
+    def _send(request: BaseHTTPRequestHandler, status: int, payload: Any,
+              headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode() if payload is not None else b''
+        request.send_response(status)
+        for name, value in (headers or {}).items():
+            request.send_header(name, value)
+        if payload is not None:
+            request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
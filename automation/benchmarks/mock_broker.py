@@ -0,0 +1,146 @@
+"""
+Mock Angel One broker with configurable latency and rate limits.
+
+``MockBroker`` holds the shared broker state (orders, rate-limit windows);
+``MockBroker.factory`` is passed wherever the runner expects the
+``SmartConnect`` class and returns clients bound to it.
+"""
+
+import base64
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+# Angel One's published per-second limits for the endpoints the runner uses
+DEFAULT_RATE_LIMITS = {
+    'generateSession': 1,
+    'generateToken': 1,
+    'placeOrder': 20,
+    'orderBook': 1,
+    'getCandleData': 3,
+    'ltpData': 10,
+    'getMarketData': 10,
+}
+
+RATE_LIMIT_RESPONSE = {
+    'status': False,
+    'message': 'Access denied because of exceeding access rate',
+    'errorcode': '',
+    'data': None,
+}
+
+
+def fake_jwt(client_id: str, lifetime: float = 8 * 3600) -> str:
+    """Unsigned JWT carrying an ``exp`` claim, enough for the session manager"""
+    def encode(payload: Dict[str, Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+    return f"{encode({'alg': 'none'})}.{encode({'sub': client_id, 'exp': int(time.time() + lifetime)})}.sig"
+
+
+class MockBroker:
+    """Shared state of the mocked broker"""
+
+    def __init__(self, latency: float = 0.0, rate_limits: Optional[Dict[str, int]] = None):
+        self.latency = latency
+        self.rate_limits = DEFAULT_RATE_LIMITS if rate_limits is None else rate_limits
+        self.orders = []
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.rejected: Dict[str, int] = defaultdict(int)
+        self._windows: Dict[str, deque] = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def factory(self, api_key: str = '', **kwargs) -> 'MockSmartConnect':
+        return MockSmartConnect(self, api_key, **kwargs)
+
+    def admit(self, endpoint: str) -> bool:
+        """Record a call; False if it exceeds the endpoint's per-second limit"""
+        limit = self.rate_limits.get(endpoint)
+        now = time.monotonic()
+        with self._lock:
+            self.calls[endpoint] += 1
+            if not limit:
+                return True
+            window = self._windows[endpoint]
+            while window and now - window[0] >= 1.0:
+                window.popleft()
+            if len(window) >= limit:
+                self.rejected[endpoint] += 1
+                return False
+            window.append(now)
+            return True
+
+
+class MockSmartConnect:
+    """SmartConnect stand-in exposing the calls the runner makes"""
+
+    def __init__(self, broker: MockBroker, api_key: str = '', access_token: Optional[str] = None,
+                 refresh_token: Optional[str] = None, feed_token: Optional[str] = None, userId: Optional[str] = None):
+        self.broker = broker
+        self.api_key = api_key
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.user_id = userId
+
+    def _call(self, endpoint: str) -> bool:
+        time.sleep(self.broker.latency)
+        return self.broker.admit(endpoint)
+
+    def generateSession(self, clientCode: str, password: str, totp: str):
+        if not self._call('generateSession'):
+            return RATE_LIMIT_RESPONSE
+        self.user_id = clientCode
+        return {'status': True, 'data': {
+            'jwtToken': f"Bearer {fake_jwt(clientCode)}", 'refreshToken': 'refresh', 'feedToken': 'feed'
+        }}
+
+    def generateToken(self, refresh_token: str):
+        if not self._call('generateToken'):
+            return RATE_LIMIT_RESPONSE
+        return {'status': True, 'data': {'jwtToken': fake_jwt(self.user_id or ''), 'refreshToken': refresh_token}}
+
+    def placeOrder(self, params: Dict[str, Any]):
+        if not self._call('placeOrder'):
+            return RATE_LIMIT_RESPONSE
+        with self.broker._lock:
+            order_id = f"MOCK{len(self.broker.orders) + 1:08d}"
+            self.broker.orders.append({**params, 'orderid': order_id})
+        return {'status': True, 'data': {'orderid': order_id}}
+
+    def orderBook(self):
+        if not self._call('orderBook'):
+            return RATE_LIMIT_RESPONSE
+        with self.broker._lock:
+            return {'status': True, 'data': list(self.broker.orders)}
+
+    def ltpData(self, exchange: str, tradingsymbol: str, symboltoken: str):
+        if not self._call('ltpData'):
+            return RATE_LIMIT_RESPONSE
+        return {'status': True, 'data': {'ltp': 100.0 + (hash(symboltoken) % 1000) / 10}}
+
+    def getMarketData(self, mode: str, exchangeTokens: Dict[str, list]):
+        if not self._call('getMarketData'):
+            return RATE_LIMIT_RESPONSE
+        fetched = [
+            {'exchange': exchange, 'symbolToken': token, 'tradingSymbol': f"SYM{token}",
+             'ltp': 100.0 + (hash(token) % 1000) / 10}
+            for exchange, tokens in exchangeTokens.items() for token in tokens
+        ]
+        return {'status': True, 'data': {'fetched': fetched, 'unfetched': []}}
+
+    def getCandleData(self, params: Dict[str, Any]):
+        if not self._call('getCandleData'):
+            return RATE_LIMIT_RESPONSE
+        rng = np.random.default_rng(abs(hash(params.get('symboltoken'))) % 2 ** 32)
+        close = 100 + np.cumsum(rng.normal(0, 1, 375))
+        start = time.time() - 375 * 60
+        rows = [
+            [time.strftime('%Y-%m-%dT%H:%M:%S+05:30', time.localtime(start + i * 60)),
+             price, price + 1, price - 1, price, 1000]
+            for i, price in enumerate(close.tolist())
+        ]
+        return {'status': True, 'data': rows}
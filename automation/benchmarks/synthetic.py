@@ -0,0 +1,111 @@
+"""
+Synthetic strategy scripts and tick recordings for benchmarking.
+
+Each script does a configurable amount of pure-Python work and optionally
+places one order. It supports every execution mode: run as a script it
+reads its parameters from the environment, and in-process it exposes
+``create_strategy(context)`` and routes the order through the context's
+order router.
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+STRATEGY_TEMPLATE = '''\
+import json
+import os
+import sys
+
+
+def compute(iterations):
+    total = 0
+    for i in range(iterations):
+        total += i * i % 7
+    return total
+
+
+class SyntheticStrategy:
+    def __init__(self, context=None):
+        self.context = context
+        self.params = context.parameters if context else json.loads(os.getenv('STRATEGY_PARAMETERS', '{}'))
+
+    def run(self):
+        compute(int(self.params.get('work', 0)))
+        if self.params.get('place_order') and self.context is not None and self.context.order_router:
+            result = self.context.order_router.place({
+                'variety': 'NORMAL',
+                'tradingsymbol': self.params.get('symbol', 'SBIN-EQ'),
+                'symboltoken': self.params.get('symboltoken', '3045'),
+                'transactiontype': 'BUY',
+                'exchange': 'NSE',
+                'ordertype': 'MARKET',
+                'producttype': 'INTRADAY',
+                'duration': 'DAY',
+                'quantity': '1',
+            })
+            return result.placed
+        return True
+
+
+def create_strategy(context):
+    return SyntheticStrategy(context)
+
+
+if __name__ == '__main__':
+    sys.exit(0 if SyntheticStrategy().run() else 1)
+'''
+
+
+def write_strategies(directory: str, count: int, work: int = 10000, place_order: bool = False,
+                     user_id: int = 1) -> List[Dict[str, Any]]:
+    """Write ``count`` strategy scripts and return their API manifest entries"""
+    root = Path(directory)
+    root.mkdir(parents=True, exist_ok=True)
+    version = int(time.time())
+
+    strategies = []
+    for index in range(1, count + 1):
+        path = root / f"synthetic_{index:04d}.py"
+        path.write_text(STRATEGY_TEMPLATE)
+        stat = os.stat(path)
+        strategies.append({
+            'id': index,
+            'name': f"Synthetic {index}",
+            'script_path': str(path.resolve()),
+            'params': {'work': work, 'place_order': place_order, 'symboltoken': str(3000 + index)},
+            'user_id': user_id,
+            'last_modified': int(stat.st_mtime),
+            'file_size': stat.st_size,
+            'version': version,
+        })
+    return strategies
+
+
+def write_ticks(path: str, count: int, instruments: int = 50, ticks_per_second: float = 100000.0,
+                start_us: int = 1753069500000000, seed: int = 7) -> str:
+    """Write a random-walk tick recording on NSE tokens 1001, 1002, ..."""
+    from tick_feed import TICK_DTYPE, TickWriter
+
+    rng = np.random.default_rng(seed)
+    ticks = np.zeros(count, dtype=TICK_DTYPE)
+    ticks['time_us'] = start_us + (np.arange(count) * (1e6 / ticks_per_second)).astype(np.int64)
+    ticks['exchange_timestamp'] = ticks['time_us'] // 1000
+    ticks['exchange_type'] = 1
+    ticks['token'] = 1001 + rng.integers(0, instruments, count)
+    ticks['quantity'] = rng.integers(1, 500, count)
+
+    # One random walk per instrument around Rs 1000, in 5 paise steps
+    steps = rng.choice(np.array([-5, 0, 5]), count)
+    ticks['ltp'] = 100000
+    for token in range(1001, 1001 + instruments):
+        rows = ticks['token'] == token
+        ticks['ltp'][rows] += np.cumsum(steps[rows])
+        ticks['volume'][rows] = np.cumsum(ticks['quantity'][rows])
+
+    with TickWriter(path) as writer:
+        writer.append(ticks)
+    return path
@@ -0,0 +1,418 @@
+"""
+Smart Hedge - Multi-Timeframe Candle Aggregator
+===============================================
+
+Builds every timeframe a strategy may ask for from one input stream per
+symbol, so no strategy resamples bars itself.
+
+- Input is ticks (``on_tick``, or ``on_ticks`` for ``tick_feed`` batches)
+  or closed 1-minute bars (``on_bar``/``on_candles``). Either feeds the
+  finest timeframe; the coarser ones are folded from its closed bars, so a
+  tick costs the same however many timeframes are kept.
+- Bars are aligned to the session open with the scheduler's calendar, the
+  same boundaries the scheduler fires strategies on: 5-minute bars open at
+  09:15, 09:20, ...; hourly bars at 09:15, 10:15, ... with a final partial
+  bar closing at 15:30; the daily bar spans the session. Ticks outside the
+  session are ignored.
+- Closed bars go into fixed-size NumPy ring buffers, one per symbol and
+  timeframe, so memory per symbol is constant.
+- Subscribers get a ``Bar`` event for every bar that closes in their
+  timeframe. A bar closes when the first tick of a later bar arrives, or
+  when ``advance(now)`` passes its end, which the background thread started
+  by ``start`` does every second for symbols that stop trading.
+"""
+
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from candle_store import COLUMNS, Candles
+from scheduler import INTERVAL_MINUTES, IST, MarketCalendar
+from tick_feed import EXCHANGE_TYPES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEFRAMES = ('ONE_MINUTE', 'THREE_MINUTE', 'FIVE_MINUTE', 'FIFTEEN_MINUTE', 'ONE_HOUR', 'ONE_DAY')
+
+SymbolKey = Tuple[str, str]  # (exchange, symbol)
+
+
+@dataclass(frozen=True)
+class Bar:
+    """One closed bar; ``timestamp`` is its open time in epoch seconds"""
+    exchange: str
+    symbol: str
+    timeframe: str
+    timestamp: int
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+class BarRing:
+    """The last ``capacity`` closed bars of one series, in preallocated arrays"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.columns = [np.zeros(capacity, dtype=dtype) for _, dtype in COLUMNS]
+        self.head = 0  # Next slot to write
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def push(self, values: Sequence[float]) -> None:
+        for column, value in zip(self.columns, values):
+            column[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def last_timestamp(self) -> Optional[int]:
+        return int(self.columns[0][self.head - 1]) if self.count else None
+
+    def candles(self) -> Candles:
+        """Closed bars oldest first, as a copy"""
+        start = (self.head - self.count) % self.capacity
+        order = (np.arange(self.count) + start) % self.capacity
+        return Candles(*(column[order] for column in self.columns))
+
+
+class _Forming:
+    """A bar still taking trades: [start, end) plus running OHLCV"""
+    __slots__ = ('start', 'end', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, start: float, end: float, open_: float, high: float, low: float, close: float,
+                 volume: float):
+        self.start, self.end = start, end
+        self.open, self.high, self.low, self.close, self.volume = open_, high, low, close, volume
+
+    def merge(self, high: float, low: float, close: float, volume: float) -> None:
+        if high > self.high:
+            self.high = high
+        if low < self.low:
+            self.low = low
+        self.close = close
+        self.volume += volume
+
+    def values(self) -> Tuple[float, ...]:
+        return self.start, self.open, self.high, self.low, self.close, self.volume
+
+
+class _SymbolBars:
+    __slots__ = ('forming', 'rings')
+
+    def __init__(self, timeframes: Sequence[str], capacity: int):
+        self.forming: Dict[str, Optional[_Forming]] = {timeframe: None for timeframe in timeframes}
+        self.rings = {timeframe: BarRing(capacity) for timeframe in timeframes}
+
+
+@dataclass
+class _Subscription:
+    timeframe: str
+    callback: Callable[[Bar], None]
+    instrument: Optional[SymbolKey]
+
+
+class CandleAggregator:
+    """Session-aligned multi-timeframe bars for every tracked symbol"""
+
+    def __init__(self, calendar: Optional[MarketCalendar] = None, timeframes: Sequence[str] = DEFAULT_TIMEFRAMES,
+                 capacity: int = 500):
+        unknown = [timeframe for timeframe in timeframes if timeframe not in INTERVAL_MINUTES]
+        if unknown or not timeframes:
+            raise ValueError(f"Unknown timeframes: {', '.join(unknown) or 'none given'}")
+
+        self.calendar = calendar or MarketCalendar()
+        self.timeframes = tuple(sorted(set(timeframes), key=INTERVAL_MINUTES.get))
+        self.base = self.timeframes[0]
+        self.steps = {timeframe: INTERVAL_MINUTES[timeframe] * 60 for timeframe in self.timeframes}
+        misaligned = [timeframe for timeframe in self.timeframes if self.steps[timeframe] % self.steps[self.base]]
+        if misaligned:
+            raise ValueError(f"Timeframes {', '.join(misaligned)} are not multiples of {self.base}")
+
+        self.capacity = capacity
+        self._symbols: Dict[SymbolKey, _SymbolBars] = {}
+        self._tokens: Dict[Tuple[int, int], SymbolKey] = {}  # (exchange type, token) -> symbol, for tick batches
+        self._subscriptions: Dict[int, _Subscription] = {}
+        self._ids = itertools.count(1)
+        self._session = (0.0, 0.0, None)  # (day start, day end, (open, close) or None)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._symbols)
+
+    def track(self, exchange: str, symbol: str, token: Optional[str] = None) -> None:
+        """Start keeping bars for a symbol; ``token`` maps ``on_ticks`` records to it"""
+        key = (exchange.upper(), symbol.upper())
+        with self._lock:
+            if key not in self._symbols:
+                self._symbols[key] = _SymbolBars(self.timeframes, self.capacity)
+            if token and exchange.upper() in EXCHANGE_TYPES:
+                self._tokens[(EXCHANGE_TYPES[exchange.upper()], int(token))] = key
+
+    def subscribe(self, timeframe: str, callback: Callable[[Bar], None],
+                  exchange: Optional[str] = None, symbol: Optional[str] = None) -> int:
+        """Call ``callback(bar)`` whenever a bar closes in ``timeframe`` (one symbol, or all)"""
+        if timeframe not in self.steps:
+            raise ValueError(f"Timeframe {timeframe} is not aggregated")
+        instrument = (exchange.upper(), symbol.upper()) if exchange and symbol else None
+        with self._lock:
+            subscription_id = next(self._ids)
+            self._subscriptions[subscription_id] = _Subscription(timeframe, callback, instrument)
+            return subscription_id
+
+    def unsubscribe(self, subscription_id: int) -> bool:
+        with self._lock:
+            return self._subscriptions.pop(subscription_id, None) is not None
+
+    def candles(self, exchange: str, symbol: str, timeframe: str) -> Optional[Candles]:
+        """Closed bars of a tracked symbol, oldest first (``None`` if untracked)"""
+        with self._lock:
+            bars = self._symbols.get((exchange.upper(), symbol.upper()))
+            return bars.rings[timeframe].candles() if bars is not None else None
+
+    def watermark(self, exchange: str, symbol: str) -> Optional[Tuple[Any, ...]]:
+        """Changes whenever a tick or bar is folded into a tracked symbol (``None`` if untracked)
+
+        Every timeframe is built from the base bars, so the last closed base
+        bar plus the one still forming cover them all.
+        """
+        with self._lock:
+            bars = self._symbols.get((exchange.upper(), symbol.upper()))
+            if bars is None:
+                return None
+            ring, forming = bars.rings[self.base], bars.forming[self.base]
+            return ring.last_timestamp(), len(ring), forming.values() if forming is not None else None
+
+    def forming(self, exchange: str, symbol: str, timeframe: str) -> Optional[Bar]:
+        """The bar still open in ``timeframe``, including the current partial base bar"""
+        key = (exchange.upper(), symbol.upper())
+        with self._lock:
+            bars = self._symbols.get(key)
+            if bars is None:
+                return None
+            current, base = bars.forming[timeframe], bars.forming[self.base]
+            if timeframe != self.base and base is not None:
+                if current is None or base.start >= current.end:
+                    current = _Forming(*self._bucket(base.start, timeframe), base.open, base.high, base.low,
+                                       base.close, base.volume)
+                else:
+                    current = _Forming(current.start, current.end, current.open, current.high, current.low,
+                                       current.close, current.volume)
+                    current.merge(base.high, base.low, base.close, base.volume)
+            return self._bar(key, timeframe, current) if current is not None else None
+
+    def on_tick(self, exchange: str, symbol: str, timestamp: float, price: float, quantity: float = 0) -> None:
+        """Fold one trade into a tracked symbol's bars"""
+        closed: List[Bar] = []
+        with self._lock:
+            key = (exchange.upper(), symbol.upper())
+            bars = self._symbols.get(key)
+            if bars is not None:
+                self._tick(key, bars, timestamp, price, quantity, closed)
+        self._publish(closed)
+
+    def on_ticks(self, ticks: np.ndarray) -> None:
+        """Fold a batch of ``tick_feed.TICK_DTYPE`` records into the tracked symbols"""
+        if not len(ticks):
+            return
+        times = np.where(ticks['exchange_timestamp'] > 0, ticks['exchange_timestamp'] / 1e3, ticks['time_us'] / 1e6)
+        closed: List[Bar] = []
+        with self._lock:
+            tokens, symbols = self._tokens, self._symbols
+            for exchange_type, token, timestamp, ltp, quantity in zip(
+                    ticks['exchange_type'].tolist(), ticks['token'].tolist(), times.tolist(),
+                    ticks['ltp'].tolist(), ticks['quantity'].tolist()):
+                key = tokens.get((exchange_type, token))
+                if key is not None:
+                    self._tick(key, symbols[key], timestamp, ltp / 100.0, quantity, closed)
+            self._advance(float(times.max()), closed)
+        self._publish(closed)
+
+    def on_bar(self, exchange: str, symbol: str, timestamp: float, open_: float, high: float, low: float,
+               close: float, volume: float) -> None:
+        """Fold one closed base-timeframe bar (e.g. a broker 1-minute candle)"""
+        closed: List[Bar] = []
+        with self._lock:
+            key = (exchange.upper(), symbol.upper())
+            bars = self._symbols.get(key)
+            if bars is not None:
+                self._fold_bar(key, bars, timestamp, open_, high, low, close, volume, closed)
+        self._publish(closed)
+
+    def on_candles(self, exchange: str, symbol: str, candles: Candles, now: Optional[float] = None) -> int:
+        """Fold base-timeframe candles newer than the last one seen; returns how many were used
+
+        Candles whose bar has not ended by ``now`` are left out, since
+        brokers also return the bar still in progress.
+        """
+        now = time.time() if now is None else now
+        key = (exchange.upper(), symbol.upper())
+        closed: List[Bar] = []
+        with self._lock:
+            bars = self._symbols.get(key)
+            if bars is None:
+                return 0
+            last = bars.rings[self.base].last_timestamp()
+            fresh = candles.after(last) if last is not None else candles
+            used = 0
+            for row in zip(fresh.timestamp.tolist(), fresh.open.tolist(), fresh.high.tolist(),
+                           fresh.low.tolist(), fresh.close.tolist(), fresh.volume.tolist()):
+                if row[0] + self.steps[self.base] > now:
+                    break
+                self._fold_bar(key, bars, *row, closed)
+                used += 1
+            self._advance(now, closed)
+        self._publish(closed)
+        return used
+
+    def advance(self, now: float) -> None:
+        """Close every bar that ended at or before ``now``"""
+        closed: List[Bar] = []
+        with self._lock:
+            self._advance(now, closed)
+        self._publish(closed)
+
+    def start(self, interval: float = 1.0, clock: Callable[[], float] = time.time) -> None:
+        """Advance on the wall clock every ``interval`` seconds"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval, clock),
+                                        name='candle-aggregator', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self, interval: float, clock: Callable[[], float]) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.advance(clock())
+            except Exception as e:
+                logger.error(f"Candle aggregator failed to advance: {e}")
+
+    def _tick(self, key: SymbolKey, bars: _SymbolBars, timestamp: float, price: float, quantity: float,
+              closed: List[Bar]) -> None:
+        current = bars.forming[self.base]
+        if current is not None:
+            if timestamp < current.end:
+                if timestamp >= current.start:
+                    current.merge(price, price, price, quantity)
+                return  # Trades for bars already closed are dropped
+            self._close_base(key, bars, closed)
+
+        bucket = self._bucket(timestamp, self.base)
+        if bucket is None:
+            self._expire(key, bars, timestamp, closed)
+            return
+        self._expire(key, bars, bucket[0], closed)
+        bars.forming[self.base] = _Forming(*bucket, price, price, price, price, quantity)
+
+    def _fold_bar(self, key: SymbolKey, bars: _SymbolBars, timestamp: float, open_: float, high: float,
+                  low: float, close: float, volume: float, closed: List[Bar]) -> None:
+        bucket = self._bucket(timestamp, self.base)
+        last = bars.rings[self.base].last_timestamp()
+        if bucket is None or (last is not None and bucket[0] <= last):
+            return
+        current = bars.forming[self.base]
+        if current is not None and current.start < bucket[0]:
+            self._close_base(key, bars, closed)
+        elif current is not None:
+            return  # Already being built from ticks
+        self._expire(key, bars, bucket[0], closed)
+        bars.forming[self.base] = _Forming(*bucket, open_, high, low, close, volume)
+        self._close_base(key, bars, closed)
+
+    def _close_base(self, key: SymbolKey, bars: _SymbolBars, closed: List[Bar]) -> None:
+        """Close the base bar and fold it into every coarser timeframe"""
+        base = bars.forming[self.base]
+        bars.forming[self.base] = None
+        bars.rings[self.base].push(base.values())
+        closed.append(self._bar(key, self.base, base))
+
+        for timeframe in self.timeframes[1:]:
+            current = bars.forming[timeframe]
+            if current is not None and base.start >= current.end:
+                self._close(key, bars, timeframe, closed)
+                current = None
+            if current is None:
+                bars.forming[timeframe] = current = _Forming(*self._bucket(base.start, timeframe), base.open,
+                                                             base.high, base.low, base.close, base.volume)
+            else:
+                current.merge(base.high, base.low, base.close, base.volume)
+            if base.end >= current.end:
+                self._close(key, bars, timeframe, closed)
+
+    def _close(self, key: SymbolKey, bars: _SymbolBars, timeframe: str, closed: List[Bar]) -> None:
+        current = bars.forming[timeframe]
+        bars.forming[timeframe] = None
+        bars.rings[timeframe].push(current.values())
+        closed.append(self._bar(key, timeframe, current))
+
+    def _expire(self, key: SymbolKey, bars: _SymbolBars, now: float, closed: List[Bar]) -> None:
+        for timeframe in self.timeframes[1:]:
+            current = bars.forming[timeframe]
+            if current is not None and current.end <= now:
+                self._close(key, bars, timeframe, closed)
+
+    def _advance(self, now: float, closed: List[Bar]) -> None:
+        for key, bars in self._symbols.items():
+            base = bars.forming[self.base]
+            if base is not None and base.end <= now:
+                self._close_base(key, bars, closed)
+            self._expire(key, bars, now, closed)
+
+    def _bucket(self, timestamp: float, timeframe: str) -> Optional[Tuple[float, float]]:
+        """[start, end) of the session-aligned bar holding ``timestamp``, or None outside the session"""
+        day_start, day_end, session = self._session
+        if not day_start <= timestamp < day_end:
+            moment = datetime.fromtimestamp(timestamp, IST)
+            day_start = datetime.combine(moment.date(), datetime.min.time(), IST).timestamp()
+            session = None
+            if self.calendar.is_trading_day(moment.date()):
+                session_open, session_close = self.calendar.session(moment.date())
+                session = session_open.timestamp(), session_close.timestamp()
+            day_end = day_start + 86400
+            self._session = (day_start, day_end, session)
+
+        # The session close belongs to the last bar, as it does for the scheduler
+        if session is None or not session[0] <= timestamp <= session[1]:
+            return None
+        step = self.steps[timeframe]
+        start = session[0] + (min(timestamp, session[1] - 1) - session[0]) // step * step
+        return start, min(start + step, session[1])
+
+    def _bar(self, key: SymbolKey, timeframe: str, forming: _Forming) -> Bar:
+        return Bar(key[0], key[1], timeframe, int(forming.start), forming.open, forming.high, forming.low,
+                   forming.close, forming.volume)
+
+    def _publish(self, closed: List[Bar]) -> None:
+        if not closed:
+            return
+        with self._lock:
+            subscriptions = list(self._subscriptions.values())
+        for bar in closed:
+            for subscription in subscriptions:
+                if subscription.timeframe != bar.timeframe:
+                    continue
+                if subscription.instrument is not None and subscription.instrument != (bar.exchange, bar.symbol):
+                    continue
+                try:
+                    subscription.callback(bar)
+                except Exception as e:
+                    logger.error(f"Bar subscriber failed on {bar.exchange}:{bar.symbol} {bar.timeframe}: {e}")
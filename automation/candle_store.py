@@ -0,0 +1,346 @@
+"""
+Smart Hedge - Shared OHLCV Candle Store
+=======================================
+
+Local cache of historical candles shared by the runner and every strategy
+process.
+
+Each (exchange, symbol, interval) series is stored as one flat binary file
+per column (``timestamp``, ``open``, ``high``, ``low``, ``close``,
+``volume``) plus a small ``meta.json``. Readers memory-map the columns, so a
+strategy gets NumPy arrays backed directly by the page cache without
+copying or parsing. The runner appends only the missing tail of each series
+once per cycle, never the bar still in progress, and least-recently-used
+series are evicted to keep disk usage under a configured budget.
+
+Layout::
+
+    <root>/<exchange>/<symbol>/<interval>/timestamp.bin
+                                         /close.bin ...
+                                         /meta.json
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from scheduler import IST, MarketCalendar
+
+# Advisory file locking is only available on POSIX systems
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = (
+    ('timestamp', np.dtype('<i8')),  # epoch seconds, bar open time
+    ('open', np.dtype('<f8')),
+    ('high', np.dtype('<f8')),
+    ('low', np.dtype('<f8')),
+    ('close', np.dtype('<f8')),
+    ('volume', np.dtype('<f8')),
+)
+
+# Angel One interval names and their bar length in seconds
+INTERVAL_SECONDS = {
+    'ONE_MINUTE': 60,
+    'THREE_MINUTE': 180,
+    'FIVE_MINUTE': 300,
+    'TEN_MINUTE': 600,
+    'FIFTEEN_MINUTE': 900,
+    'THIRTY_MINUTE': 1800,
+    'ONE_HOUR': 3600,
+    'ONE_DAY': 86400,
+}
+
+
+@dataclass
+class Candles:
+    """Columnar OHLCV arrays for one series"""
+    timestamp: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def tail(self, count: int) -> 'Candles':
+        """Last ``count`` bars, as views into the same arrays"""
+        return Candles(*(getattr(self, name)[-count:] for name, _ in COLUMNS))
+
+    def after(self, timestamp: int) -> 'Candles':
+        """Bars strictly newer than ``timestamp``"""
+        start = int(np.searchsorted(self.timestamp, timestamp, side='right'))
+        return Candles(*(getattr(self, name)[start:] for name, _ in COLUMNS))
+
+    def closed_by(self, now: float, interval_seconds: int,
+                  calendar: Optional[MarketCalendar] = None) -> 'Candles':
+        """Bars that had ended by ``now``, dropping the one still forming
+
+        With a ``calendar`` no bar runs past its day's session close, so the
+        daily bar and a short last intraday bar are closed at 15:30.
+        """
+        ends = self.timestamp + interval_seconds
+        if calendar is not None and len(self):
+            days = (self.timestamp + int(IST.utcoffset(None).total_seconds())) // 86400
+            closes = {day: calendar.session(datetime.fromtimestamp(int(day) * 86400, timezone.utc).date())[1].timestamp()
+                      for day in np.unique(days)}
+            ends = np.minimum(ends, [closes[day] for day in days])
+        end = int(np.searchsorted(ends, now, side='right'))
+        return Candles(*(getattr(self, name)[:end] for name, _ in COLUMNS))
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Per-bar dicts, for code that still expects the legacy format"""
+        return [
+            {
+                'date': datetime.fromtimestamp(int(ts), IST).strftime('%Y-%m-%d %H:%M:%S'),
+                'open': float(o), 'high': float(h), 'low': float(l),
+                'close': float(c), 'volume': float(v)
+            }
+            for ts, o, h, l, c, v in zip(self.timestamp, self.open, self.high,
+                                         self.low, self.close, self.volume)
+        ]
+
+    @classmethod
+    def empty(cls) -> 'Candles':
+        return cls(*(np.empty(0, dtype=dtype) for _, dtype in COLUMNS))
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[Any]]) -> 'Candles':
+        """Build from Angel One ``getCandleData`` rows: [time, o, h, l, c, v]"""
+        if not rows:
+            return cls.empty()
+
+        timestamps = [
+            int(row[0]) if isinstance(row[0], (int, float)) else int(datetime.fromisoformat(row[0]).timestamp())
+            for row in rows
+        ]
+        values = np.asarray([row[1:6] for row in rows], dtype=np.float64)
+        return cls(np.asarray(timestamps, dtype=np.int64), *values.T.copy())
+
+
+class CandleStore:
+    """Memory-mapped columnar candle cache with incremental refresh and LRU eviction"""
+
+    def __init__(self, root: str, max_bytes: int = 1024 * 1024 * 1024):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def series_path(self, exchange: str, symbol: str, interval: str) -> Path:
+        return self.root / exchange.upper() / symbol.upper() / interval.upper()
+
+    def read(self, exchange: str, symbol: str, interval: str) -> Optional[Candles]:
+        """Zero-copy, read-only view of a cached series (``None`` if not cached)"""
+        path = self.series_path(exchange, symbol, interval)
+        meta = self._read_meta(path)
+        if meta is None:
+            return None
+
+        rows = meta['rows']
+        if rows == 0:
+            return Candles.empty()
+
+        return Candles(*(
+            np.memmap(path / f"{name}.bin", dtype=dtype, mode='r', shape=(rows,))
+            for name, dtype in COLUMNS
+        ))
+
+    def last_timestamp(self, exchange: str, symbol: str, interval: str) -> Optional[int]:
+        candles = self.read(exchange, symbol, interval)
+        if candles is None or len(candles) == 0:
+            return None
+        return int(candles.timestamp[-1])
+
+    def watermark(self, exchange: str, symbol: str, interval: str) -> Optional[Tuple[int, float]]:
+        """(rows, updated_at) of a cached series; changes whenever bars are appended"""
+        meta = self._read_meta(self.series_path(exchange, symbol, interval))
+        if not meta or not meta.get('rows'):
+            return None
+        return meta['rows'], meta.get('updated_at', 0.0)
+
+    def append(self, exchange: str, symbol: str, interval: str, candles: Candles) -> int:
+        """Append bars newer than the cached tail; returns the number of bars added"""
+        path = self.series_path(exchange, symbol, interval)
+        path.mkdir(parents=True, exist_ok=True)
+
+        with self._locked(path):
+            path.mkdir(parents=True, exist_ok=True)  # evict may have removed it while we waited
+            meta = self._read_meta(path) or {'rows': 0}
+            rows = meta['rows']
+
+            if rows:
+                last = np.memmap(path / 'timestamp.bin', dtype=COLUMNS[0][1], mode='r', shape=(rows,))[-1]
+                candles = candles.after(int(last))
+
+            count = len(candles)
+            if count == 0:
+                return 0
+
+            for name, dtype in COLUMNS:
+                column = np.ascontiguousarray(getattr(candles, name), dtype=dtype)
+                with open(path / f"{name}.bin", 'ab') as f:
+                    # Drop any partial write left behind by an interrupted append
+                    f.truncate(rows * dtype.itemsize)
+                    f.write(column.tobytes())
+
+            meta.update(rows=rows + count, updated_at=time.time(), last_access=time.time())
+            self._write_meta(path, meta)
+
+        return count
+
+    def refresh(self, exchange: str, symbol: str, interval: str,
+                fetcher: Callable[[str, str, str, Optional[int]], Candles]) -> int:
+        """Fetch only the missing tail of a series through ``fetcher``
+
+        ``fetcher(exchange, symbol, interval, since)`` must return the bars
+        after the ``since`` timestamp (``None`` when nothing is cached yet).
+        """
+        since = self.last_timestamp(exchange, symbol, interval)
+        added = self.append(exchange, symbol, interval, fetcher(exchange, symbol, interval, since))
+        if added:
+            logger.info(f"Cached {added} new {interval} bars for {exchange}:{symbol}")
+        else:
+            self.touch(exchange, symbol, interval)
+        return added
+
+    def touch(self, exchange: str, symbol: str, interval: str) -> None:
+        """Mark a series as recently used"""
+        path = self.series_path(exchange, symbol, interval)
+        with self._locked(path):
+            meta = self._read_meta(path)
+            if meta is not None:
+                meta['last_access'] = time.time()
+                self._write_meta(path, meta)
+
+    def disk_usage(self) -> int:
+        return sum(f.stat().st_size for f in self.root.rglob('*.bin'))
+
+    def evict(self) -> List[Path]:
+        """Remove least-recently-used series until the store fits ``max_bytes``"""
+        series = []
+        for meta_path in self.root.rglob('meta.json'):
+            path = meta_path.parent
+            meta = self._read_meta(path) or {}
+            size = sum(f.stat().st_size for f in path.glob('*.bin'))
+            series.append((meta.get('last_access', 0), size, path))
+
+        total = sum(size for _, size, _ in series)
+        evicted = []
+        for _, size, path in sorted(series, key=lambda item: item[0]):
+            if total <= self.max_bytes:
+                break
+            # Never remove a series while another process is appending to it
+            with self._locked(path):
+                shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            evicted.append(path)
+
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} candle series from cache")
+        return evicted
+
+    def _read_meta(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path / 'meta.json') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write_meta(self, path: Path, meta: Dict[str, Any]) -> None:
+        tmp_path = path / 'meta.json.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path / 'meta.json')
+
+    def _locked(self, path: Path):
+        return _SeriesLock(path)
+
+
+class _SeriesLock:
+    """Cross-process writer lock for one series directory"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        if fcntl is not None and self.path.exists():
+            self._file = open(self.path / '.lock', 'w')
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+
+
+class AngelCandleFetcher:
+    """Fetches candles through SmartConnect.getCandleData"""
+
+    def __init__(self, smart_api, token_lookup: Callable[[str, str], Optional[str]], history_days: int = 30,
+                 calendar: Optional[MarketCalendar] = None):
+        self.smart_api = smart_api
+        self.token_lookup = token_lookup
+        self.history_days = history_days
+        self.calendar = calendar or MarketCalendar()
+
+    def __call__(self, exchange: str, symbol: str, interval: str, since: Optional[int]) -> Candles:
+        token = self.token_lookup(exchange, symbol)
+        if not token:
+            logger.warning(f"No symbol token for {exchange}:{symbol}; skipping candle fetch")
+            return Candles.empty()
+
+        now = time.time()
+        start = since + INTERVAL_SECONDS.get(interval, 60) if since is not None else now - self.history_days * 86400
+        if start >= now:
+            return Candles.empty()
+
+        response = self.smart_api.getCandleData({
+            'exchange': exchange,
+            'symboltoken': token,
+            'interval': interval,
+            # Angel One reads the window in exchange time, whatever the host's timezone
+            'fromdate': datetime.fromtimestamp(start, IST).strftime('%Y-%m-%d %H:%M'),
+            'todate': datetime.fromtimestamp(now, IST).strftime('%Y-%m-%d %H:%M')
+        })
+
+        if not response or not response.get('status'):
+            logger.error(f"Candle fetch failed for {exchange}:{symbol}: {response}")
+            return Candles.empty()
+
+        # The bar still in progress is left for a later refresh: the cache never rewrites its tail
+        return Candles.from_rows(response.get('data') or []).closed_by(
+            now, INTERVAL_SECONDS.get(interval, 60), self.calendar)
+
+
+def unique_series(strategies: Iterable[Dict[str, Any]], default_interval: str = 'ONE_DAY') -> List[tuple]:
+    """(exchange, symbol, interval) series needed by a set of strategies"""
+    series = set()
+    for strategy in strategies:
+        params = strategy.get('parameters') or {}
+        if isinstance(params, str):
+            try:
+                params = json.loads(params)
+            except json.JSONDecodeError:
+                continue
+        if params.get('symbol'):
+            series.add((
+                params.get('exchange', 'NSE'),
+                params['symbol'],
+                params.get('interval', default_interval)
+            ))
+    return sorted(series)
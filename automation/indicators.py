@@ -0,0 +1,172 @@
+"""
+Smart Hedge - Vectorized Indicator Library
+==========================================
+
+NumPy implementations of the common technical indicators for strategy
+scripts.
+
+All functions take contiguous float arrays and work along the last axis, so
+the same call evaluates one instrument (shape ``(bars,)``) or many at once
+(shape ``(symbols, bars)``). Outputs have the same shape as the input, with
+``NaN`` for the warm-up bars where the indicator is not yet defined.
+
+Example::
+
+    closes = np.vstack([candles.close for candles in universe])
+    fast, slow = sma(closes, 5), sma(closes, 20)
+    signals = crossover(fast, slow)[:, -1]   # +1 buy, -1 sell, 0 hold
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+def _as_float(values) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def _check_period(period: int) -> None:
+    if period < 1:
+        raise ValueError(f"period must be positive, got {period}")
+
+
+def _rolling_sum(values: np.ndarray, period: int) -> np.ndarray:
+    """Windowed sum along the last axis, NaN during warm-up"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] < period:
+        return out
+
+    cumsum = np.cumsum(values, axis=-1)
+    out[..., period - 1] = cumsum[..., period - 1]
+    out[..., period:] = cumsum[..., period:] - cumsum[..., :-period]
+    return out
+
+
+def _rma(values: np.ndarray, period: int, alpha: float) -> np.ndarray:
+    """Recursive moving average seeded with the SMA of the first window
+
+    Loops over bars but is vectorized across symbols, so batching many
+    instruments costs the same number of Python iterations as one.
+    """
+    out = np.full(values.shape, np.nan)
+    length = values.shape[-1]
+    if length < period:
+        return out
+
+    current = values[..., :period].mean(axis=-1)
+    out[..., period - 1] = current
+    for i in range(period, length):
+        current = current + alpha * (values[..., i] - current)
+        out[..., i] = current
+    return out
+
+
+def sma(values, period: int) -> np.ndarray:
+    """Simple moving average"""
+    values = _as_float(values)
+    _check_period(period)
+    return _rolling_sum(values, period) / period
+
+
+def ema(values, period: int) -> np.ndarray:
+    """Exponential moving average (alpha = 2 / (period + 1)), seeded with the SMA"""
+    values = _as_float(values)
+    _check_period(period)
+    return _rma(values, period, 2.0 / (period + 1))
+
+
+def rsi(close, period: int = 14) -> np.ndarray:
+    """Relative Strength Index with Wilder smoothing"""
+    close = _as_float(close)
+    _check_period(period)
+
+    out = np.full(close.shape, np.nan)
+    if close.shape[-1] <= period:
+        return out
+
+    change = np.diff(close, axis=-1)
+    avg_gain = _rma(np.clip(change, 0, None), period, 1.0 / period)
+    avg_loss = _rma(np.clip(-change, 0, None), period, 1.0 / period)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    value = np.where(avg_loss == 0, 100.0, value)
+    value = np.where((avg_loss == 0) & (avg_gain == 0), 50.0, value)
+    value = np.where(np.isnan(avg_gain), np.nan, value)
+
+    out[..., 1:] = value
+    return out
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """True range; the first bar uses high - low"""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    previous_close = np.concatenate([close[..., :1], close[..., :-1]], axis=-1)
+    return np.maximum(high, previous_close) - np.minimum(low, previous_close)
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    """Average True Range with Wilder smoothing"""
+    tr = true_range(high, low, close)
+    _check_period(period)
+    return _rma(tr, period, 1.0 / period)
+
+
+def bollinger(close, period: int = 20, num_std: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bollinger bands (lower, middle, upper) using the population deviation"""
+    close = _as_float(close)
+    _check_period(period)
+
+    # Centre the values before summing squares to limit cancellation error
+    offset = close[..., :1]
+    shifted = close - offset
+    mean = _rolling_sum(shifted, period) / period
+    variance = _rolling_sum(shifted * shifted, period) / period - mean * mean
+    deviation = np.sqrt(np.clip(variance, 0, None))
+
+    middle = mean + offset
+    return middle - num_std * deviation, middle, middle + num_std * deviation
+
+
+def vwap(high, low, close, volume, session: Optional[np.ndarray] = None) -> np.ndarray:
+    """Volume-weighted average price of the typical price
+
+    ``session`` optionally labels each bar (e.g. with its trading date) so
+    the running totals restart at every session boundary.
+    """
+    high, low, close, volume = _as_float(high), _as_float(low), _as_float(close), _as_float(volume)
+    price_volume = (high + low + close) / 3.0 * volume
+
+    cum_pv = np.cumsum(price_volume, axis=-1)
+    cum_volume = np.cumsum(volume, axis=-1)
+
+    if session is not None:
+        session = np.asarray(session)
+        starts = np.concatenate([[True], session[1:] != session[:-1]])
+        # Index of the first bar of the session each bar belongs to
+        first = np.maximum.accumulate(np.where(starts, np.arange(len(session)), 0))
+        before_pv = np.where(first > 0, np.take(cum_pv, first - 1, axis=-1), 0.0)
+        before_volume = np.where(first > 0, np.take(cum_volume, first - 1, axis=-1), 0.0)
+        cum_pv = cum_pv - before_pv
+        cum_volume = cum_volume - before_volume
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(cum_volume > 0, cum_pv / cum_volume, np.nan)
+
+
+def crossover(fast, slow) -> np.ndarray:
+    """+1 where ``fast`` crosses above ``slow``, -1 where it crosses below, else 0
+
+    Matches the example strategy's rule: a cross happens when the previous
+    bar had ``fast <= slow`` (or ``>=``) and the current bar is strictly past.
+    """
+    fast, slow = _as_float(fast), _as_float(slow)
+    out = np.zeros(fast.shape, dtype=np.int8)
+
+    prev_fast, prev_slow = fast[..., :-1], slow[..., :-1]
+    cur_fast, cur_slow = fast[..., 1:], slow[..., 1:]
+
+    out[..., 1:][(prev_fast <= prev_slow) & (cur_fast > cur_slow)] = 1
+    out[..., 1:][(prev_fast >= prev_slow) & (cur_fast < cur_slow)] = -1
+    return out
@@ -0,0 +1,339 @@
+"""
+Smart Hedge - Instrument Index
+==============================
+
+Compact, memory-mapped index of Angel One's scrip master.
+
+The scrip master is a JSON list of every tradable instrument (tens of MB).
+The runner downloads it once per trading day and compiles it into flat
+NumPy files; strategies memory-map those files instead of parsing JSON, so
+every process shares the same page-cache copy.
+
+- ``lookup(exchange, tradingsymbol)`` and ``by_token(exchange, token)``
+  probe open-addressing hash tables stored in the index: O(1), with no
+  per-process setup beyond mapping the files.
+- Options are also kept sorted by (underlying, expiry, strike, type), so
+  ``option_chain`` is a range query answered with binary searches.
+
+Layout::
+
+    <root>/CURRENT                      name of the live build
+    <root>/<build>/instruments.npy      one record per instrument
+                  /symbol_table.npy     hash table over exchange:tradingsymbol
+                  /token_table.npy      hash table over exchange:token
+                  /chain.npy            option rows in chain order
+                  /chain_expiry.npy     expiry of each chain row (YYYYMMDD)
+                  /chain_strike.npy     strike of each chain row
+                  /meta.json            build info and underlying ranges
+
+Builds are written to a new directory and published by replacing
+``CURRENT``, so readers never see a half-written index.
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import requests
+
+logger = logging.getLogger(__name__)
+
+SCRIP_MASTER_URL = 'https://margincalculator.angelbroking.com/OpenAPI_File/files/OpenAPIScripMaster.json'
+
+# Scrip master strikes and tick sizes are in paise
+PRICE_SCALE = 100.0
+
+# Builds kept besides the live one, for readers still mapping them
+KEEP_BUILDS = 1
+
+EMPTY_SLOT = -1
+
+
+@dataclass(frozen=True)
+class Instrument:
+    """One scrip master entry"""
+    token: str
+    symbol: str
+    name: str
+    exchange: str
+    instrument_type: str
+    expiry: Optional[date]
+    strike: float
+    option_type: str  # CE, PE or '' for non-options
+    lot_size: int
+    tick_size: float
+
+
+def _parse_expiry(value: str) -> int:
+    """Scrip master expiry (``25JUL2024``) as YYYYMMDD, 0 when absent"""
+    if not value:
+        return 0
+    return int(datetime.strptime(value, '%d%b%Y').strftime('%Y%m%d'))
+
+
+def _option_type(entry: Dict[str, Any]) -> str:
+    symbol = entry.get('symbol', '')
+    if str(entry.get('instrumenttype', '')).startswith('OPT') and symbol[-2:] in ('CE', 'PE'):
+        return symbol[-2:]
+    return ''
+
+
+def _key_hash(exchange: bytes, key: bytes) -> int:
+    return zlib.crc32(key, zlib.crc32(exchange + b':'))
+
+
+def _hash_table(exchanges: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Open-addressing (linear probing) table of row numbers, at most half full"""
+    size = 1 << max(4, (2 * len(keys) - 1).bit_length())
+    mask = size - 1
+    table = [EMPTY_SLOT] * size
+    seen = set()
+
+    for row, (exchange, key) in enumerate(zip(exchanges.tolist(), keys.tolist())):
+        if (exchange, key) in seen:
+            continue  # first entry wins, as in a dict built in file order
+        seen.add((exchange, key))
+        slot = _key_hash(exchange, key) & mask
+        while table[slot] != EMPTY_SLOT:
+            slot = (slot + 1) & mask
+        table[slot] = row
+    return np.asarray(table, dtype=np.int32)
+
+
+def compile_index(entries: Iterable[Dict[str, Any]], root: str, trading_date: Optional[date] = None) -> Path:
+    """Compile scrip master entries into a new build and make it current"""
+    entries = [entry for entry in entries if entry.get('token') and entry.get('symbol') and entry.get('exch_seg')]
+    trading_date = trading_date or date.today()
+
+    def column(field):
+        return [str(entry.get(field) or '') for entry in entries]
+
+    text = {
+        'token': column('token'),
+        'symbol': column('symbol'),
+        'name': column('name'),
+        'exchange': [value.upper() for value in column('exch_seg')],
+        'instrument_type': column('instrumenttype'),
+        'option_type': [_option_type(entry) for entry in entries],
+    }
+    dtype = [(field, f"S{max([len(value.encode()) for value in values] + [1])}") for field, values in text.items()]
+    dtype += [('expiry', '<i4'), ('strike', '<f8'), ('lot_size', '<i4'), ('tick_size', '<f8')]
+
+    records = np.zeros(len(entries), dtype=dtype)
+    for field, values in text.items():
+        records[field] = [value.encode() for value in values]
+    records['expiry'] = [_parse_expiry(value) for value in column('expiry')]
+    records['strike'] = [max(float(value or 0), 0.0) / PRICE_SCALE for value in column('strike')]  # -1 when none
+    records['lot_size'] = [int(float(value or 0)) for value in column('lotsize')]
+    records['tick_size'] = [float(value or 0) / PRICE_SCALE for value in column('tick_size')]
+
+    # Option rows sorted into chains; each underlying is one contiguous range
+    options = np.flatnonzero(records['option_type'] != b'')
+    order = np.lexsort((records['option_type'][options], records['strike'][options],
+                        records['expiry'][options], records['name'][options], records['exchange'][options]))
+    chain = options[order].astype(np.int32)
+
+    underlyings: Dict[str, List[int]] = {}
+    for position, row in enumerate(chain.tolist()):
+        key = f"{records['exchange'][row].decode()}:{records['name'][row].decode()}"
+        underlyings.setdefault(key, [position, position])[1] = position + 1
+
+    root_path = Path(root)
+    root_path.mkdir(parents=True, exist_ok=True)
+    build = Path(tempfile.mkdtemp(prefix=f"{trading_date:%Y%m%d}-", dir=root_path))
+
+    np.save(build / 'instruments.npy', records)
+    np.save(build / 'symbol_table.npy', _hash_table(records['exchange'], records['symbol']))
+    np.save(build / 'token_table.npy', _hash_table(records['exchange'], records['token']))
+    np.save(build / 'chain.npy', chain)
+    np.save(build / 'chain_expiry.npy', records['expiry'][chain])
+    np.save(build / 'chain_strike.npy', records['strike'][chain])
+    (build / 'meta.json').write_text(json.dumps({
+        'trading_date': trading_date.isoformat(),
+        'built_at': time.time(),
+        'rows': len(records),
+        'underlyings': underlyings,
+    }))
+
+    # Publish atomically, then drop builds nobody should be opening any more
+    pointer = root_path / 'CURRENT.tmp'
+    pointer.write_text(build.name)
+    os.replace(pointer, root_path / 'CURRENT')
+    _prune_builds(root_path, build.name)
+
+    logger.info(f"Compiled instrument index with {len(records)} instruments ({len(chain)} options)")
+    return build
+
+
+def _prune_builds(root: Path, current: str) -> None:
+    builds = sorted((path for path in root.iterdir() if path.is_dir() and path.name != current),
+                    key=lambda path: path.stat().st_mtime, reverse=True)
+    for stale in builds[KEEP_BUILDS:]:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def current_build(root: str) -> Optional[Path]:
+    try:
+        name = (Path(root) / 'CURRENT').read_text().strip()
+    except FileNotFoundError:
+        return None
+    build = Path(root) / name
+    return build if (build / 'meta.json').exists() else None
+
+
+def refresh_index(root: str, url: str = SCRIP_MASTER_URL, session: Optional[requests.Session] = None,
+                  trading_date: Optional[date] = None, timeout: float = 120) -> bool:
+    """Download and compile the scrip master unless today's index already exists
+
+    Returns True when a new index was built. Raises
+    ``requests.RequestException`` on download errors and ``ValueError`` on a
+    malformed scrip master; the previous index stays current in both cases.
+    """
+    trading_date = trading_date or date.today()
+    build = current_build(root)
+    if build is not None:
+        meta = json.loads((build / 'meta.json').read_text())
+        if meta['trading_date'] >= trading_date.isoformat():
+            return False
+
+    logger.info("Downloading Angel One scrip master")
+    response = (session or requests).get(url, timeout=timeout)
+    response.raise_for_status()
+    entries = response.json()
+    if not isinstance(entries, list):
+        raise ValueError("Scrip master is not a JSON list")
+
+    compile_index(entries, root, trading_date)
+    return True
+
+
+class InstrumentIndex:
+    """Read-only view of the current build, shared through the page cache"""
+
+    def __init__(self, build: Path):
+        self.build = build
+        self.meta = json.loads((build / 'meta.json').read_text())
+        self.records = self._map('instruments')
+        self._symbol_table = self._map('symbol_table')
+        self._token_table = self._map('token_table')
+        self._chain = self._map('chain')
+        self._chain_expiry = self._map('chain_expiry')
+        self._chain_strike = self._map('chain_strike')
+        self._fields = {field: self.records[field] for field in ('exchange', 'symbol', 'token')}  # views, no copy
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _map(self, name: str) -> np.ndarray:
+        # Plain ndarray over the mapping: indexing a np.memmap costs several microseconds more
+        return np.asarray(np.load(self.build / f"{name}.npy", mmap_mode='r'))
+
+    @property
+    def trading_date(self) -> date:
+        return date.fromisoformat(self.meta['trading_date'])
+
+    def lookup(self, exchange: str, symbol: str) -> Optional[Instrument]:
+        """Instrument by exchange and trading symbol, e.g. ``('NSE', 'SBIN-EQ')``"""
+        row = self._probe(self._symbol_table, 'symbol', exchange, symbol)
+        return self._instrument(row) if row is not None else None
+
+    def by_token(self, exchange: str, token: str) -> Optional[Instrument]:
+        row = self._probe(self._token_table, 'token', exchange, str(token))
+        return self._instrument(row) if row is not None else None
+
+    def token(self, exchange: str, symbol: str) -> Optional[str]:
+        """Symbol token for order parameters, or None when unknown"""
+        row = self._probe(self._symbol_table, 'symbol', exchange, symbol)
+        return self._fields['token'][row].decode() if row is not None else None
+
+    def expiries(self, underlying: str, exchange: str = 'NFO') -> List[date]:
+        bounds = self.meta['underlyings'].get(f"{exchange.upper()}:{underlying.upper()}")
+        if bounds is None:
+            return []
+        return [_to_date(value) for value in np.unique(self._chain_expiry[bounds[0]:bounds[1]])]
+
+    def option_chain(self, underlying: str, expiry: Optional[date] = None, exchange: str = 'NFO',
+                     min_strike: Optional[float] = None, max_strike: Optional[float] = None) -> List[Instrument]:
+        """Options on ``underlying`` for one expiry (the nearest one from today by default), by strike"""
+        bounds = self.meta['underlyings'].get(f"{exchange.upper()}:{underlying.upper()}")
+        if bounds is None:
+            return []
+        start, end = bounds
+        expiries = self._chain_expiry[start:end]
+
+        if expiry is None:
+            upcoming = int(np.searchsorted(expiries, int(f"{date.today():%Y%m%d}")))
+            if upcoming == len(expiries):
+                return []
+            wanted = int(expiries[upcoming])
+        else:
+            wanted = int(f"{expiry:%Y%m%d}")
+
+        low = start + int(np.searchsorted(expiries, wanted, side='left'))
+        high = start + int(np.searchsorted(expiries, wanted, side='right'))
+
+        strikes = self._chain_strike[low:high]
+        first = int(np.searchsorted(strikes, min_strike, side='left')) if min_strike is not None else 0
+        last = int(np.searchsorted(strikes, max_strike, side='right')) if max_strike is not None else len(strikes)
+
+        return [self._instrument(int(row)) for row in self._chain[low + first:low + last]]
+
+    def _probe(self, table: np.ndarray, field: str, exchange: str, key: str) -> Optional[int]:
+        exchange_bytes, key_bytes = exchange.upper().encode(), key.encode()
+        mask = len(table) - 1
+        slot = _key_hash(exchange_bytes, key_bytes) & mask
+        while True:
+            row = int(table[slot])
+            if row == EMPTY_SLOT:
+                return None
+            if self._fields[field][row] == key_bytes and self._fields['exchange'][row] == exchange_bytes:
+                return row
+            slot = (slot + 1) & mask
+
+    def _instrument(self, row: int) -> Instrument:
+        record = dict(zip(self.records.dtype.names, self.records[row].item()))
+        return Instrument(
+            token=record['token'].decode(),
+            symbol=record['symbol'].decode(),
+            name=record['name'].decode(),
+            exchange=record['exchange'].decode(),
+            instrument_type=record['instrument_type'].decode(),
+            expiry=_to_date(record['expiry']) if record['expiry'] else None,
+            strike=record['strike'],
+            option_type=record['option_type'].decode(),
+            lot_size=record['lot_size'],
+            tick_size=record['tick_size']
+        )
+
+
+def _to_date(value) -> date:
+    value = int(value)
+    return date(value // 10000, value // 100 % 100, value % 100)
+
+
+_indexes: Dict[str, InstrumentIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def load(root: str) -> Optional[InstrumentIndex]:
+    """The current index under ``root``, mapped once per process and build"""
+    build = current_build(root)
+    if build is None:
+        return None
+
+    key = os.path.abspath(root)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None or index.build != build:
+            index = _indexes[key] = InstrumentIndex(build)
+        return index
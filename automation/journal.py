@@ -0,0 +1,178 @@
+"""
+Smart Hedge - Execution Journal
+===============================
+
+Append-only local record of every strategy execution, signal and order.
+
+Records go to a SQLite database in WAL mode, indexed by strategy and time,
+so writes are cheap and never wait on the network. ``JournalUploader``
+ships records that have not been uploaded yet to the Laravel API in
+gzip-compressed batches. Records carry a stable ``record_id``, so a batch
+that is resent after a lost response is not stored twice.
+"""
+
+import gzip
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+RECORD_KINDS = ('execution', 'signal', 'order')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    record_id TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    strategy_id INTEGER,
+    account_id INTEGER,
+    status TEXT,
+    message TEXT,
+    data TEXT,
+    recorded_at REAL NOT NULL,
+    uploaded INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS records_strategy_time ON records (strategy_id, recorded_at);
+CREATE INDEX IF NOT EXISTS records_time ON records (recorded_at);
+CREATE INDEX IF NOT EXISTS records_pending ON records (uploaded, seq);
+"""
+
+COLUMNS = ('seq', 'record_id', 'kind', 'strategy_id', 'account_id', 'status', 'message', 'data', 'recorded_at')
+
+
+class ExecutionJournal:
+    """SQLite journal shared by every strategy lane of the runner"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')  # durable across process crashes; WAL keeps it consistent
+        self._conn.executescript(SCHEMA)
+
+    def record(self, kind: str, strategy_id: Any = None, status: Optional[str] = None,
+               message: Optional[str] = None, data: Optional[Dict[str, Any]] = None,
+               account_id: Any = None) -> str:
+        """Append one record and return its id"""
+        if kind not in RECORD_KINDS:
+            raise ValueError(f"Unknown journal record kind: {kind}")
+
+        record_id = uuid.uuid4().hex
+        row = (record_id, kind, _int_or_none(strategy_id), _int_or_none(account_id), status, message,
+               json.dumps(data, default=str) if data is not None else None, time.time())
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO records (record_id, kind, strategy_id, account_id, status, message, data, recorded_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                row
+            )
+        return record_id
+
+    def query(self, strategy_id: Any = None, since: Optional[float] = None, kind: Optional[str] = None,
+              limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent records first, optionally for one strategy, kind or time window"""
+        clauses, args = [], []
+        if strategy_id is not None:
+            clauses.append('strategy_id = ?')
+            args.append(int(strategy_id))
+        if since is not None:
+            clauses.append('recorded_at >= ?')
+            args.append(since)
+        if kind is not None:
+            clauses.append('kind = ?')
+            args.append(kind)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        sql = f"SELECT {', '.join(COLUMNS)} FROM records {where} ORDER BY recorded_at DESC, seq DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, (*args, limit)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def pending(self, limit: int = 500) -> List[Dict[str, Any]]:
+        """Oldest records not yet uploaded"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM records WHERE uploaded = 0 ORDER BY seq LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def mark_uploaded(self, last_seq: int) -> None:
+        with self._lock:
+            self._conn.execute('UPDATE records SET uploaded = 1 WHERE uploaded = 0 AND seq <= ?', (last_seq,))
+
+    def prune(self, older_than: float) -> int:
+        """Delete uploaded records recorded before ``older_than`` (epoch seconds)"""
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM records WHERE uploaded = 1 AND recorded_at < ?', (older_than,))
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _to_dict(row) -> Dict[str, Any]:
+        record = dict(zip(COLUMNS, row))
+        record['data'] = json.loads(record['data']) if record['data'] else None
+        return record
+
+
+class JournalUploader:
+    """Ships pending journal records to the Laravel bulk ingest endpoint"""
+
+    def __init__(self, journal: ExecutionJournal, base_url: str, session: requests.Session,
+                 batch_size: int = 500, timeout: float = 30):
+        self.journal = journal
+        self.url = f"{base_url.rstrip('/')}/logs/batch"
+        self.session = session
+        self.batch_size = batch_size
+        self.timeout = timeout
+
+    def upload(self, max_batches: int = 20) -> int:
+        """Upload pending records in compressed batches and return how many were sent
+
+        Raises ``requests.RequestException`` when a batch is not accepted;
+        batches already accepted stay marked as uploaded.
+        """
+        sent = 0
+        for _ in range(max_batches):
+            batch = self.journal.pending(self.batch_size)
+            if not batch:
+                break
+
+            body = gzip.compress(json.dumps({'records': [self._payload(record) for record in batch]}).encode())
+            response = self.session.post(
+                self.url,
+                data=body,
+                headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+
+            self.journal.mark_uploaded(batch[-1]['seq'])
+            sent += len(batch)
+
+        if sent:
+            logger.info(f"Uploaded {sent} journal records")
+        return sent
+
+    @staticmethod
+    def _payload(record: Dict[str, Any]) -> Dict[str, Any]:
+        payload = {key: value for key, value in record.items() if key != 'seq'}
+        payload['recorded_at'] = round(record['recorded_at'], 6)
+        return payload
+
+
+def _int_or_none(value: Any) -> Optional[int]:
+    return int(value) if value is not None else None
@@ -0,0 +1,133 @@
+"""
+Smart Hedge - Strategy Run Memoization
+======================================
+
+Skips strategy runs whose inputs have not changed since the last run.
+
+A run is fingerprinted from:
+
+- the SHA-1 of the strategy script's content (cached per file until its
+  mtime or size changes),
+- the strategy parameters, serialised canonically,
+- the watermark of every candle series it reads, which changes whenever
+  the runner appends bars,
+- the quotes of its instruments in the cycle's snapshot,
+- the watermark of its symbols' aggregated bars, which changes with every
+  tick or bar folded into them,
+- the broker account it trades on.
+
+When the fingerprint matches the last successful run of the same strategy
+and account, the runner reuses that run's outcome instead of executing the
+strategy again. Signals and orders are not replayed: the original run
+already acted on them. Entries are kept in LRU order up to
+``max_entries``, and are dropped explicitly when one of their series
+receives new bars or when a run fails.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Series = Tuple[str, str, str]  # (exchange, symbol, interval)
+
+_script_digests: Dict[str, Tuple[Tuple[float, int], str]] = {}
+_script_lock = threading.Lock()
+
+
+def script_digest(path: str) -> str:
+    """SHA-1 of a script's content, re-read only when its mtime or size changes"""
+    stat = os.stat(path)
+    version = (stat.st_mtime, stat.st_size)
+    with _script_lock:
+        cached = _script_digests.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    with open(path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()
+    with _script_lock:
+        _script_digests[path] = (version, digest)
+    return digest
+
+
+def run_fingerprint(script: str, parameters: Dict[str, Any], watermarks: Dict[Series, Any],
+                    account_id: Any = None, quotes: Optional[Dict[Tuple[str, str], Any]] = None,
+                    bars: Optional[Dict[Tuple[str, str], Any]] = None) -> str:
+    """Stable digest of everything a strategy run depends on
+
+    ``quotes`` and ``bars`` map (exchange, symbol) to the quote and to the
+    aggregated-bars watermark the run would see.
+    """
+    payload = json.dumps({
+        'script': script,
+        'parameters': parameters,
+        'data': sorted([list(series), watermark] for series, watermark in watermarks.items()),
+        'quotes': sorted([list(instrument), quote] for instrument, quote in (quotes or {}).items()),
+        'bars': sorted([list(instrument), watermark] for instrument, watermark in (bars or {}).items()),
+        'account': account_id,
+    }, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+@dataclass
+class MemoEntry:
+    fingerprint: str
+    success: bool
+    series: Tuple[Series, ...]
+    stored_at: float
+
+
+class RunMemo:
+    """Last successful run per (strategy, account), bounded in LRU order"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, MemoEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def lookup(self, key: Hashable, fingerprint: str) -> Optional[MemoEntry]:
+        """The stored run for ``key`` if its inputs were identical, else None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.fingerprint != fingerprint:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def store(self, key: Hashable, fingerprint: str, success: bool, series: Iterable[Series] = ()) -> None:
+        with self._lock:
+            self._entries[key] = MemoEntry(fingerprint, success, tuple(series), time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._entries.pop(key, None) is not None
+
+    def invalidate_series(self, exchange: str, symbol: str, interval: str) -> int:
+        """Drop every entry that read a series; returns how many were dropped"""
+        series = (exchange, symbol, interval)
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if series in entry.series]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            logger.debug(f"New bars for {exchange}:{symbol} ({interval}) invalidated {len(stale)} memoized runs")
+        return len(stale)
@@ -0,0 +1,334 @@
+"""
+Smart Hedge - Runner Metrics
+============================
+
+Latency histograms, counters and timing spans for the runner's hot path,
+exported in the Prometheus text format.
+
+- ``span('stage')`` times a block into ``runner_stage_duration_seconds``
+  (fetch, login, spawn, strategy execution, order placement, ...).
+- Counters track strategy runs and failures per strategy and order
+  outcomes; histograms track cycle duration and signal-to-order latency.
+- ``MetricsServer`` serves ``/metrics`` on a local port, and
+  ``write_textfile`` writes the same text atomically for the node_exporter
+  textfile collector.
+- ``SlowCycleProfiler`` samples every thread's stack during a cycle and,
+  when the cycle runs longer than a threshold, writes the samples in the
+  collapsed-stack format understood by flamegraph tools.
+"""
+
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram with optional labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelKey, List[float]] = {}  # bucket counts..., sum, count
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> float:
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            return series[-1] if series else 0.0
+
+    def total(self, **labels) -> float:
+        """Sum of all observed values"""
+        with self._lock:
+            series = self._series.get(_label_key(labels))
+            return series[-2] if series else 0.0
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+
+        lines = []
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', _format_value(bound))])} "
+                             f"{_format_value(count)}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {_format_value(series[-1])}")
+        return lines
+
+
+class Registry:
+    """A named set of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._register(Gauge(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'runner_stage_duration_seconds', 'Duration of runner stages (login, fetch, prefetch, spawn, execute, broker order calls)')
+CYCLE_SECONDS = REGISTRY.histogram(
+    'runner_cycle_duration_seconds', 'Wall time of a full automation cycle')
+STRATEGY_RUNS = REGISTRY.counter(
+    'runner_strategy_runs_total', 'Strategy executions by outcome')
+ORDER_LATENCY = REGISTRY.histogram(
+    'runner_order_latency_seconds', 'Signal-to-order latency: strategy message received until the broker outcome')
+ROUTER_LATENCY = REGISTRY.histogram(
+    'runner_order_router_seconds', 'Router latency: router submission until the broker outcome')
+ORDER_QUEUE_SECONDS = REGISTRY.histogram(
+    'runner_order_queue_seconds', 'Time orders wait for a worker and the rate limiter')
+ORDERS = REGISTRY.counter(
+    'runner_orders_total', 'Orders routed by final status')
+SIGNALS = REGISTRY.counter(
+    'runner_strategy_signals_total', 'Signals emitted by strategies')
+STRATEGY_VALUES = REGISTRY.gauge(
+    'runner_strategy_metric', 'Latest values reported by strategies through metric messages')
+STRATEGY_POSITIONS = REGISTRY.gauge(
+    'runner_strategy_position', 'Net quantity attributed to each strategy by the risk book')
+RISK_REJECTIONS = REGISTRY.counter(
+    'runner_risk_rejections_total', 'Orders rejected by pre-trade risk checks')
+NETTED_ORDERS = REGISTRY.counter(
+    'runner_orders_netted_total', 'Broker orders saved by netting opposing orders')
+TRIGGERS = REGISTRY.counter(
+    'runner_triggers_total', 'Stop-loss and take-profit levels hit by the trigger monitor')
+
+
+@contextmanager
+def span(stage: str, **labels) -> Iterator[None]:
+    """Time a block of the runner's hot path"""
+    with STAGE_SECONDS.time(stage=stage, **labels):
+        yield
+
+
+def write_textfile(path: str, registry: Registry = REGISTRY) -> None:
+    """Atomically write the metrics, e.g. for node_exporter's textfile collector"""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(target.name + '.tmp')
+    tmp_path.write_text(registry.render())
+    os.replace(tmp_path, target)
+
+
+class MetricsServer:
+    """Serves ``/metrics`` from a background thread"""
+
+    def __init__(self, port: int, host: str = '127.0.0.1', registry: Registry = REGISTRY):
+        registry_ref = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry_ref.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self.server.serve_forever, name='metrics-server', daemon=True)
+        self._thread.start()
+        logger.info(f"Serving metrics on http://{self.server.server_address[0]}:{self.port}/metrics")
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class SamplingProfiler:
+    """Samples the stacks of all other threads at a fixed interval"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: StackCounter = StackCounter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.samples.clear()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> StackCounter:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        return self.samples
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[';'.join(reversed(stack))] += 1
+
+
+class SlowCycleProfiler:
+    """Profiles every cycle and keeps the samples of cycles slower than a threshold"""
+
+    def __init__(self, threshold: float, directory: str, interval: float = 0.01):
+        self.threshold = threshold
+        self.directory = Path(directory)
+        self.interval = interval
+
+    @contextmanager
+    def cycle(self) -> Iterator[None]:
+        profiler = SamplingProfiler(self.interval)
+        start = time.monotonic()
+        profiler.start()
+        try:
+            yield
+        finally:
+            samples = profiler.stop()
+            duration = time.monotonic() - start
+            if duration >= self.threshold and samples:
+                self._write(samples, duration)
+
+    def _write(self, samples: StackCounter, duration: float) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"cycle-{datetime.now():%Y%m%d-%H%M%S}.collapsed"
+        path.write_text(''.join(f"{stack} {count}\n" for stack, count in samples.most_common()))
+        logger.warning(f"Slow cycle ({duration:.1f}s); profile written to {path}")
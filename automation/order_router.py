@@ -0,0 +1,267 @@
+"""
+Smart Hedge - Order Router
+==========================
+
+Concurrent, rate-limited order placement for all strategies.
+
+- Orders are submitted to a worker pool and sent concurrently, but every
+  broker call first takes a token from a shared token bucket so the runner
+  stays under Angel One's per-second order limits.
+- Each order carries an idempotency key, sent to Angel One as ``ordertag``.
+  Before retrying a transient failure the router looks the tag up in the
+  order book, so an order that reached the exchange despite a timeout is
+  never placed twice. Submitting the same key again returns the original
+  result instead of a new order.
+- Every result records queueing and broker latency; ``latency_summary()``
+  reports percentiles and the same values feed the runner metrics.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Angel One error codes worth retrying
+TRANSIENT_ERROR_CODES = {'AB1004', 'AB2000'}
+
+# Angel One error codes for an invalid, expired or missing session token
+SESSION_ERROR_CODES = {'AG8001', 'AG8002', 'AG8003'}
+RATE_LIMIT_MESSAGE = 'exceeding access rate'
+
+# Angel One limits ordertag to 20 characters
+MAX_TAG_LENGTH = 20
+
+# Completed orders remembered for idempotent resubmission, and latency samples kept
+MAX_TRACKED_ORDERS = 10000
+
+STATUS_PLACED, STATUS_REJECTED, STATUS_FAILED = 'placed', 'rejected', 'failed'
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``rate`` tokens/second"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.clock = clock
+        self.sleep = sleep
+
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available; returns the time spent waiting"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+
+                delay = (tokens - self._tokens) / self.rate
+
+            self.sleep(delay)
+            waited += delay
+
+
+@dataclass
+class OrderResult:
+    key: str
+    status: str
+    order_id: Optional[str] = None
+    attempts: int = 0
+    queue_latency: float = 0.0  # Submission until the first broker call, including rate limiting
+    latency: float = 0.0  # Submission until the final outcome
+    response: Any = None
+    error: Optional[str] = None
+
+    @property
+    def placed(self) -> bool:
+        return self.status == STATUS_PLACED
+
+
+class TransientOrderError(Exception):
+    """A failure that may succeed on retry"""
+
+
+@dataclass
+class _Submission:
+    key: str
+    params: Dict[str, Any]
+    submitted_at: float = field(default_factory=time.monotonic)
+
+
+class OrderRouter:
+    """Routes orders to SmartConnect under a shared rate limit"""
+
+    def __init__(self, smart_api_provider: Callable[[], Any], rate_per_second: float = 10.0,
+                 max_workers: int = 4, max_retries: int = 3, retry_delay: float = 0.5,
+                 bucket: Optional[TokenBucket] = None, on_session_rejected: Optional[Callable[[], None]] = None):
+        self.smart_api_provider = smart_api_provider
+        self.on_session_rejected = on_session_rejected  # Called when the broker rejects the session token
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.bucket = bucket or TokenBucket(rate_per_second)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='order')
+        self._futures: 'OrderedDict[str, Future]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=MAX_TRACKED_ORDERS)
+
+    @staticmethod
+    def new_key() -> str:
+        return uuid.uuid4().hex[:MAX_TAG_LENGTH]
+
+    def submit(self, order_params: Dict[str, Any], key: Optional[str] = None) -> Future:
+        """Queue an order; the same key always maps to the same order"""
+        key = (key or order_params.get('ordertag') or self.new_key())[:MAX_TAG_LENGTH]
+
+        with self._lock:
+            if key in self._futures:
+                logger.info(f"Order {key} already submitted; returning existing result")
+                return self._futures[key]
+
+            params = {**order_params, 'ordertag': key}
+            future = self._executor.submit(self._route, _Submission(key, params))
+            self._futures[key] = future
+
+            # Forget the oldest finished orders once the history is full
+            while len(self._futures) > MAX_TRACKED_ORDERS and next(iter(self._futures.values())).done():
+                self._futures.popitem(last=False)
+            return future
+
+    def place(self, order_params: Dict[str, Any], key: Optional[str] = None) -> OrderResult:
+        """Submit an order and wait for its outcome"""
+        return self.submit(order_params, key).result()
+
+    def latency_summary(self) -> Dict[str, float]:
+        """Order latency percentiles in milliseconds"""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return {'count': 0}
+
+        def percentile(p: float) -> float:
+            return samples[min(len(samples) - 1, int(p * len(samples)))] * 1000
+
+        return {
+            'count': len(samples),
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'max_ms': samples[-1] * 1000,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _route(self, submission: _Submission) -> OrderResult:
+        result = OrderResult(key=submission.key, status=STATUS_FAILED)
+
+        for attempt in range(1, self.max_retries + 2):
+            result.attempts = attempt
+            self.bucket.acquire()
+            if attempt == 1:
+                result.queue_latency = time.monotonic() - submission.submitted_at
+
+            try:
+                with metrics.span('place_order'):
+                    response = self.smart_api_provider().placeOrder(submission.params)
+                order_id, error = self._parse(response)
+                result.response = response
+
+                if order_id:
+                    result.status, result.order_id = STATUS_PLACED, order_id
+                else:
+                    result.status, result.error = STATUS_REJECTED, error
+                    if self.on_session_rejected and isinstance(response, dict) \
+                            and response.get('errorcode') in SESSION_ERROR_CODES:
+                        self.on_session_rejected()
+                break
+
+            except TransientOrderError as e:
+                result.error = str(e)
+            except Exception as e:
+                result.error = f"{type(e).__name__}: {e}"
+
+            # The order may have reached the broker before the failure
+            existing = self._find_existing(submission.key)
+            if existing:
+                result.status, result.order_id, result.error = STATUS_PLACED, existing, None
+                logger.info(f"Order {submission.key} found in order book after error; not retrying")
+                break
+            if existing is None:
+                # Unknown outcome: retrying could duplicate the order
+                result.error = f"{result.error}; order book unavailable, not retrying"
+                break
+
+            if attempt <= self.max_retries:
+                logger.warning(f"Order {submission.key} attempt {attempt} failed ({result.error}); retrying")
+                time.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+        result.latency = time.monotonic() - submission.submitted_at
+        with self._lock:
+            self._latencies.append(result.latency)
+
+        metrics.ROUTER_LATENCY.observe(result.latency)
+        metrics.ORDER_QUEUE_SECONDS.observe(result.queue_latency)
+        metrics.ORDERS.inc(status=result.status)
+
+        if result.placed:
+            logger.info(f"Order placed successfully. Order ID: {result.order_id} "
+                        f"({result.latency * 1000:.1f} ms, {result.attempts} attempts)")
+        else:
+            logger.error(f"Order {submission.key} {result.status}: {result.error}")
+        return result
+
+    @staticmethod
+    def _parse(response: Any):
+        """Return (order_id, error) or raise TransientOrderError"""
+        # Newer SDK versions return the order id directly
+        if isinstance(response, str) and response:
+            return response, None
+
+        if not isinstance(response, dict):
+            raise TransientOrderError(f"Unexpected response: {response!r}")
+
+        if response.get('status'):
+            return (response.get('data') or {}).get('orderid'), None
+
+        message = str(response.get('message', ''))
+        if response.get('errorcode') in TRANSIENT_ERROR_CODES or RATE_LIMIT_MESSAGE in message.lower():
+            raise TransientOrderError(f"{response.get('errorcode')}: {message}")
+        return None, f"{response.get('errorcode')}: {message}"
+
+    def _find_existing(self, key: str) -> Optional[str]:
+        """Order id for ``key`` from the order book, '' if absent, None if unknown"""
+        try:
+            self.bucket.acquire()
+            book = self.smart_api_provider().orderBook()
+        except Exception as e:
+            logger.warning(f"Order book lookup failed: {e}")
+            return None
+
+        if not isinstance(book, dict) or not book.get('status'):
+            logger.warning(f"Order book lookup rejected: {book}")
+            return None
+
+        for order in book.get('data') or []:
+            if order.get('ordertag') == key:
+                return order.get('orderid')
+        return ''
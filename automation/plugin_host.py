@@ -0,0 +1,198 @@
+"""
+Smart Hedge - Strategy Plugin Host
+==================================
+
+Loads strategy modules into the runner process once and keeps them warm
+between automation cycles. A module is only re-imported when the
+``last_modified``/``file_size`` reported by ``/api/active-strategies``
+changes, so a warm run costs a function call instead of an interpreter
+start-up.
+
+Strategy interface
+------------------
+A strategy module opts in to in-process execution by defining::
+
+    def create_strategy(context: StrategyContext):
+        return MyStrategy(context)
+
+The returned object must provide ``run() -> bool``. Modules without
+``create_strategy`` are reported as unsupported and the runner falls back to
+executing them in a subprocess.
+
+A run given a timeout executes on its own daemon thread. A thread cannot be
+killed, so a run that overstays is abandoned: the caller gets
+``StrategyTimeout`` and the thread is left to finish in the background.
+"""
+
+import hashlib
+import importlib.util
+import logging
+import os
+import sys
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from types import ModuleType
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Name of the factory function a strategy module must expose
+FACTORY_NAME = 'create_strategy'
+
+
+class StrategyLoadError(Exception):
+    """Raised when a strategy module cannot be imported"""
+
+
+class StrategyTimeout(Exception):
+    """Raised when an in-process run is abandoned after its timeout"""
+
+
+@dataclass
+class StrategyContext:
+    """Everything a strategy needs from the runner for a single execution"""
+    strategy_id: Any
+    strategy_name: str
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    session_token: str = ''
+    api_key: str = ''
+    client_id: str = ''
+    smart_api: Any = None  # Live SmartConnect instance shared by the runner
+    order_router: Any = None  # Rate-limited OrderRouter for submitting orders
+    candle_store_dir: str = ''  # Shared candle cache refreshed by the runner
+    instrument_index_dir: str = ''  # Memory-mapped scrip master index refreshed by the runner
+    quotes: Any = None  # QuoteSnapshot fetched once per cycle for all strategies
+    bars: Any = None  # CandleAggregator with shared multi-timeframe bars, if enabled
+    account_id: Optional[int] = None  # Broker account traded on, None for the runner's own
+    emit: Optional[Callable[[Dict[str, Any]], None]] = None  # Sends strategy_protocol messages to the runner
+
+
+@dataclass
+class LoadedStrategy:
+    """A strategy module held warm by the host"""
+    module: ModuleType
+    fingerprint: Tuple[Any, Any]
+
+    @property
+    def supported(self) -> bool:
+        return callable(getattr(self.module, FACTORY_NAME, None))
+
+
+class PluginHost:
+    """Caches imported strategy modules and reloads them when they change"""
+
+    def __init__(self):
+        self._modules: Dict[str, LoadedStrategy] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(strategy: Dict[str, Any]) -> Tuple[Any, Any]:
+        """Version of a strategy script, preferring the values sent by the API"""
+        last_modified = strategy.get('last_modified')
+        file_size = strategy.get('file_size')
+
+        if last_modified is None or file_size is None:
+            stat = os.stat(strategy['python_file_path'])
+            last_modified, file_size = int(stat.st_mtime), stat.st_size
+
+        return last_modified, file_size
+
+    @staticmethod
+    def module_name(python_file: str) -> str:
+        """Stable, collision-free module name for a strategy script"""
+        digest = hashlib.sha1(os.path.abspath(python_file).encode()).hexdigest()[:12]
+        return f"smart_hedge_strategy_{digest}"
+
+    def load(self, strategy: Dict[str, Any]) -> LoadedStrategy:
+        """Return the warm module for a strategy, importing it if it changed"""
+        python_file = strategy['python_file_path']
+        fingerprint = self.fingerprint(strategy)
+
+        with self._lock:
+            loaded = self._modules.get(python_file)
+            if loaded and loaded.fingerprint == fingerprint:
+                return loaded
+
+            if loaded:
+                logger.info(f"Reloading changed strategy module: {python_file}")
+
+            loaded = LoadedStrategy(self._import(python_file), fingerprint)
+            self._modules[python_file] = loaded
+            return loaded
+
+    def supports(self, strategy: Dict[str, Any]) -> bool:
+        """Check whether a strategy implements the in-process interface"""
+        try:
+            return self.load(strategy).supported
+        except StrategyLoadError as e:
+            logger.error(str(e))
+            return False
+
+    def run(self, strategy: Dict[str, Any], context: StrategyContext, timeout: Optional[float] = None) -> bool:
+        """Execute a warm strategy with the given context
+
+        With a ``timeout`` (seconds) the run is abandoned, and
+        ``StrategyTimeout`` raised, once it takes longer than that.
+        """
+        loaded = self.load(strategy)
+        if not loaded.supported:
+            raise StrategyLoadError(
+                f"Strategy {strategy['python_file_path']} does not define {FACTORY_NAME}()"
+            )
+
+        def execute() -> bool:
+            instance = getattr(loaded.module, FACTORY_NAME)(context)
+            return bool(instance.run())
+
+        if timeout is None:
+            return execute()
+
+        future: Future = Future()
+
+        def worker():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(execute())
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=worker, name=f"strategy-{strategy['id']}", daemon=True).start()
+        try:
+            return future.result(timeout=max(timeout, 0))
+        except FutureTimeout:
+            raise StrategyTimeout(f"Strategy {strategy['python_file_path']} still running after {timeout:.1f}s") from None
+
+    def evict(self, python_file: str) -> None:
+        """Drop a cached module, e.g. when its strategy is deactivated"""
+        with self._lock:
+            loaded = self._modules.pop(python_file, None)
+            if loaded:
+                sys.modules.pop(loaded.module.__name__, None)
+
+    def loaded_files(self):
+        """Script paths currently held warm"""
+        return list(self._modules)
+
+    def _import(self, python_file: str) -> ModuleType:
+        name = self.module_name(python_file)
+        spec = importlib.util.spec_from_file_location(name, python_file)
+        if spec is None or spec.loader is None:
+            raise StrategyLoadError(f"Cannot load strategy module: {python_file}")
+
+        module = importlib.util.module_from_spec(spec)
+        previous: Optional[ModuleType] = sys.modules.get(name)
+        sys.modules[name] = module
+
+        try:
+            spec.loader.exec_module(module)
+        except (Exception, SystemExit) as e:  # a plain script may exit while being imported
+            if previous is not None:
+                sys.modules[name] = previous
+            else:
+                sys.modules.pop(name, None)
+            raise StrategyLoadError(f"Failed to import strategy {python_file}: {e}") from e
+
+        return module
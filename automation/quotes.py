@@ -0,0 +1,189 @@
+"""
+Smart Hedge - Coalesced Market Quotes
+=====================================
+
+One quote snapshot per cycle, shared by every strategy.
+
+The runner collects the instruments all due strategies trade, removes
+duplicates and fetches them through Angel One's ``getMarketData`` endpoint
+with up to ``MAX_TOKENS_PER_REQUEST`` tokens per call (mixed exchanges
+allowed). Calls share a token bucket, so cycles and the trigger monitor
+together stay under the endpoint's per-second limit.
+
+In-process strategies read the snapshot from ``context.quotes``; script
+strategies load the JSON file named by ``QUOTE_SNAPSHOT_FILE``, which is
+replaced atomically each cycle.
+"""
+
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import metrics
+from order_router import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+MODE_LTP, MODE_OHLC, MODE_FULL = 'LTP', 'OHLC', 'FULL'
+
+# Angel One accepts at most 50 tokens per getMarketData request
+MAX_TOKENS_PER_REQUEST = 50
+
+InstrumentKey = Tuple[str, str]  # (exchange, symboltoken)
+
+
+@dataclass(frozen=True)
+class Quote:
+    exchange: str
+    token: str
+    symbol: str
+    ltp: float
+    open: Optional[float] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
+    close: Optional[float] = None
+    volume: Optional[int] = None
+    exchange_time: str = ''
+
+    @classmethod
+    def from_response(cls, item: Dict[str, Any]) -> 'Quote':
+        def number(name):
+            value = item.get(name)
+            return float(value) if value not in (None, '') else None
+
+        volume = item.get('tradeVolume')
+        return cls(
+            exchange=str(item.get('exchange', '')).upper(),
+            token=str(item.get('symbolToken', '')),
+            symbol=str(item.get('tradingSymbol', '')),
+            ltp=float(item['ltp']),
+            open=number('open'),
+            high=number('high'),
+            low=number('low'),
+            close=number('close'),
+            volume=int(volume) if volume not in (None, '') else None,
+            exchange_time=str(item.get('exchFeedTime') or item.get('exchTradeTime') or '')
+        )
+
+
+class QuoteSnapshot:
+    """Quotes fetched together, looked up by token or trading symbol"""
+
+    def __init__(self, quotes: Iterable[Quote] = (), fetched_at: Optional[float] = None):
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self._by_token: Dict[InstrumentKey, Quote] = {}
+        self._by_symbol: Dict[Tuple[str, str], Quote] = {}
+        for quote in quotes:
+            self._by_token[(quote.exchange, quote.token)] = quote
+            if quote.symbol:
+                self._by_symbol[(quote.exchange, quote.symbol)] = quote
+
+    def __len__(self) -> int:
+        return len(self._by_token)
+
+    def __iter__(self):
+        return iter(self._by_token.values())
+
+    def get(self, exchange: str, token: str) -> Optional[Quote]:
+        return self._by_token.get((exchange.upper(), str(token)))
+
+    def by_symbol(self, exchange: str, symbol: str) -> Optional[Quote]:
+        return self._by_symbol.get((exchange.upper(), symbol))
+
+    def ltp(self, exchange: str, symbol: str) -> Optional[float]:
+        quote = self.by_symbol(exchange, symbol)
+        return quote.ltp if quote is not None else None
+
+    def save(self, path: str) -> None:
+        """Write the snapshot as JSON, replacing ``path`` atomically"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as handle:
+            json.dump({'fetched_at': self.fetched_at, 'quotes': [asdict(quote) for quote in self]}, handle)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['QuoteSnapshot']:
+        try:
+            with open(path) as handle:
+                payload = json.load(handle)
+        except (OSError, ValueError):
+            return None
+        return cls((Quote(**quote) for quote in payload.get('quotes', [])), payload.get('fetched_at'))
+
+
+def strategy_instruments(strategies: Iterable[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """(exchange, symbol) pairs quoted for a set of strategies
+
+    Each strategy's ``symbol`` is included, plus any ``EXCHANGE:SYMBOL``
+    entries in its optional ``quote_symbols`` parameter.
+    """
+    wanted = set()
+    for strategy in strategies:
+        params = strategy.get('parameters') or {}
+        if isinstance(params, str):
+            try:
+                params = json.loads(params)
+            except json.JSONDecodeError:
+                continue
+        if params.get('symbol'):
+            wanted.add((params.get('exchange', 'NSE').upper(), params['symbol']))
+        for entry in params.get('quote_symbols') or []:
+            exchange, _, symbol = str(entry).rpartition(':')
+            wanted.add(((exchange or 'NSE').upper(), symbol))
+    return sorted(wanted)
+
+
+class QuoteCoalescer:
+    """Batches quote requests for many instruments into few getMarketData calls"""
+
+    def __init__(self, smart_api_provider: Callable[[], Any], rate_per_second: float = 10.0,
+                 batch_size: int = MAX_TOKENS_PER_REQUEST, bucket: Optional[TokenBucket] = None):
+        self.smart_api_provider = smart_api_provider
+        self.batch_size = min(batch_size, MAX_TOKENS_PER_REQUEST)
+        self.bucket = bucket or TokenBucket(rate_per_second)
+
+    def fetch(self, instruments: Iterable[InstrumentKey], mode: str = MODE_FULL) -> QuoteSnapshot:
+        """Quotes for every (exchange, token); instruments that fail are left out"""
+        keys = sorted({(exchange.upper(), str(token)) for exchange, token in instruments if token})
+        quotes: List[Quote] = []
+        for start in range(0, len(keys), self.batch_size):
+            quotes.extend(self._request(keys[start:start + self.batch_size], mode))
+
+        if len(quotes) < len(keys):
+            logger.warning(f"Quotes missing for {len(keys) - len(quotes)} of {len(keys)} instruments")
+        return QuoteSnapshot(quotes)
+
+    def _request(self, keys: List[InstrumentKey], mode: str) -> List[Quote]:
+        exchange_tokens: Dict[str, List[str]] = {}
+        for exchange, token in keys:
+            exchange_tokens.setdefault(exchange, []).append(token)
+
+        smart_api = self.smart_api_provider()
+        if smart_api is None:
+            return []
+
+        self.bucket.acquire()
+        try:
+            with metrics.span('quote_request'):
+                response = smart_api.getMarketData(mode, exchange_tokens)
+        except Exception as e:
+            logger.error(f"Quote request for {len(keys)} instruments failed: {e}")
+            return []
+
+        if not response or not response.get('status'):
+            logger.error(f"Quote request for {len(keys)} instruments failed: "
+                         f"{(response or {}).get('message', 'empty response')}")
+            return []
+
+        data = response.get('data') or {}
+        quotes = []
+        for item in data.get('fetched') or []:
+            try:
+                quotes.append(Quote.from_response(item))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Skipping malformed quote {item}: {e}")
+        return quotes
@@ -0,0 +1,294 @@
+"""
+Smart Hedge - Position and Risk Book
+====================================
+
+Cross-strategy view of the orders the runner routes.
+
+- Every order a strategy sends through its message channel is checked
+  before routing against the strategy's ``max_position_size`` (maximum
+  absolute net quantity per symbol) and the runner-wide per-symbol limit
+  of its account. Checks are a few dictionary lookups under one lock.
+- With netting enabled, MARKET orders are held until the end of the cycle
+  and aggregated per account and instrument. Opposing orders cross
+  internally, and only the net quantity goes to the broker as a single
+  order. Other order types are routed immediately.
+- Positions are attributed to the strategies whose orders built them, so
+  per-strategy exposure stays visible after netting.
+
+Positions start at zero and only reflect orders routed since the runner
+started; broker-side positions are not imported.
+"""
+
+import hashlib
+import logging
+import threading
+import uuid
+from collections import defaultdict
+from concurrent.futures import Future, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import metrics
+from order_router import MAX_TAG_LENGTH, STATUS_PLACED, STATUS_REJECTED, OrderResult, OrderRouter
+
+logger = logging.getLogger(__name__)
+
+STATUS_NETTED = 'netted'  # crossed with an opposing order; nothing sent to the broker
+
+# Order parameters that must match for orders to be netted together
+NETTING_FIELDS = ('exchange', 'tradingsymbol', 'symboltoken', 'producttype')
+
+
+@dataclass
+class AllocatedOrder(OrderResult):
+    """Outcome of one strategy's order after netting
+
+    ``crossed`` is the quantity matched against opposing orders in the same
+    cycle, ``routed`` the quantity carried by the net order ``net_key``.
+    """
+    quantity: int = 0
+    crossed: int = 0
+    routed: int = 0
+    net_key: Optional[str] = None
+
+    @property
+    def placed(self) -> bool:
+        return self.status in (STATUS_PLACED, STATUS_NETTED)
+
+
+class RiskRejected(Exception):
+    """An order would breach a position limit"""
+
+
+@dataclass
+class _Intent:
+    strategy_id: Any
+    account_id: Any
+    router: OrderRouter
+    params: Dict[str, Any]
+    key: str
+    delta: int  # signed quantity, positive for BUY
+    future: Future = field(default_factory=Future)
+
+    @property
+    def instrument(self) -> Tuple[str, str]:
+        return self.params.get('exchange', ''), self.params.get('tradingsymbol', '')
+
+    @property
+    def netting_key(self) -> Tuple:
+        return (self.account_id, id(self.router)) + tuple(str(self.params.get(name, '')) for name in NETTING_FIELDS)
+
+
+def signed_quantity(params: Dict[str, Any]) -> int:
+    quantity = int(float(params.get('quantity') or 0))
+    side = str(params.get('transactiontype', '')).upper()
+    if quantity <= 0 or side not in ('BUY', 'SELL'):
+        raise ValueError(f"Order needs a positive quantity and BUY/SELL, got {quantity} {side or '?'}")
+    return quantity if side == 'BUY' else -quantity
+
+
+def nettable(params: Dict[str, Any]) -> bool:
+    return (str(params.get('ordertype', 'MARKET')).upper() == 'MARKET'
+            and str(params.get('variety', 'NORMAL')).upper() == 'NORMAL')
+
+
+class RiskBook:
+    """Positions, pending orders and limits for every account the runner trades"""
+
+    def __init__(self, max_symbol_quantity: int = 0, netting: bool = True):
+        self.max_symbol_quantity = max_symbol_quantity  # per account and symbol, 0 = unlimited
+        self.netting = netting
+
+        # (account_id, exchange, symbol) -> net quantity; strategy positions add strategy_id in front
+        self.positions: Dict[Tuple, int] = defaultdict(int)
+        self.strategy_positions: Dict[Tuple, int] = defaultdict(int)
+        self._pending: Dict[Tuple, int] = defaultdict(int)
+        self._pending_by_strategy: Dict[Tuple, int] = defaultdict(int)
+        self._held: List[_Intent] = []
+        self._outstanding: set = set()
+        self._stats: Dict[Any, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def submit(self, params: Dict[str, Any], key: Optional[str] = None, *, strategy_id: Any,
+               router: OrderRouter, account_id: Any = None, max_position: int = 0, hold: bool = True) -> Future:
+        """Check an order against the limits and route it, or hold it for netting
+
+        Returns a future resolving to an ``AllocatedOrder``; a rejected order
+        resolves immediately with status ``rejected``. ``hold=False`` routes
+        even a nettable order straight away (stop-loss/take-profit exits).
+        """
+        intent = _Intent(strategy_id, account_id, router, dict(params),
+                         (key or params.get('ordertag') or uuid.uuid4().hex)[:MAX_TAG_LENGTH], 0)
+        with self._lock:
+            self._outstanding.add(intent.future)
+        intent.future.add_done_callback(self._forget)
+
+        try:
+            intent.delta = signed_quantity(params)
+            with self._lock:
+                self._check(intent, max_position)
+                self._reserve(intent, intent.delta)
+                self._stats[strategy_id]['orders'] += 1
+                hold = hold and self.netting and nettable(params)
+                if hold:
+                    self._held.append(intent)
+        except (ValueError, RiskRejected) as e:
+            metrics.RISK_REJECTIONS.inc(strategy_id=strategy_id)
+            logger.warning(f"Order {intent.key} from strategy {strategy_id} rejected: {e}")
+            with self._lock:
+                self._stats[strategy_id]['rejected'] += 1
+            intent.future.set_result(AllocatedOrder(key=intent.key, status=STATUS_REJECTED, error=f"risk: {e}",
+                                                    quantity=abs(intent.delta)))
+            return intent.future
+
+        if not hold:
+            self._route([intent])
+        return intent.future
+
+    def flush(self) -> Dict[str, int]:
+        """Net the held orders per account and instrument and route the remainder"""
+        with self._lock:
+            held, self._held = self._held, []
+
+        groups: Dict[Tuple, List[_Intent]] = defaultdict(list)
+        for intent in held:
+            groups[intent.netting_key].append(intent)
+
+        routed = 0
+        for intents in groups.values():
+            routed += self._route(intents)
+
+        if held:
+            logger.info(f"Order netting: {len(held)} orders routed as {routed} "
+                        f"({len(held) - routed} saved)")
+            metrics.NETTED_ORDERS.inc(len(held) - routed)
+        return {'orders': len(held), 'routed': routed}
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """Wait for every submitted order to settle; returns how many are still pending"""
+        with self._lock:
+            outstanding = list(self._outstanding)
+        if not outstanding:
+            return 0
+        _, pending = wait(outstanding, timeout=timeout)
+        if pending:
+            logger.warning(f"{len(pending)} orders still pending after {timeout}s")
+        return len(pending)
+
+    def position(self, account_id: Any, exchange: str, symbol: str) -> int:
+        with self._lock:
+            return self.positions[(account_id, exchange, symbol)]
+
+    def strategy_position(self, strategy_id: Any, account_id: Any, exchange: str, symbol: str) -> int:
+        with self._lock:
+            return self.strategy_positions[(strategy_id, account_id, exchange, symbol)]
+
+    def attribution(self) -> Dict[Any, Dict[str, Any]]:
+        """Per-strategy order counts, crossed/routed quantities and open positions"""
+        with self._lock:
+            report = {strategy_id: dict(stats) for strategy_id, stats in self._stats.items()}
+            for (strategy_id, account_id, exchange, symbol), quantity in self.strategy_positions.items():
+                if quantity:
+                    positions = report.setdefault(strategy_id, {}).setdefault('positions', {})
+                    positions[f"{exchange}:{symbol}" if account_id is None else f"{account_id}/{exchange}:{symbol}"] = quantity
+            return report
+
+    def _forget(self, future: Future) -> None:
+        with self._lock:
+            self._outstanding.discard(future)
+
+    def _check(self, intent: _Intent, max_position: int) -> None:
+        exchange, symbol = intent.instrument
+        if max_position > 0:
+            strategy_key = (intent.strategy_id, intent.account_id, exchange, symbol)
+            projected = (self.strategy_positions[strategy_key] + self._pending_by_strategy[strategy_key]
+                         + intent.delta)
+            if abs(projected) > max_position:
+                raise RiskRejected(f"strategy position in {symbol} would be {projected}, limit {max_position}")
+
+        if self.max_symbol_quantity > 0:
+            account_key = (intent.account_id, exchange, symbol)
+            projected = self.positions[account_key] + self._pending[account_key] + intent.delta
+            if abs(projected) > self.max_symbol_quantity:
+                raise RiskRejected(f"account position in {symbol} would be {projected}, "
+                                   f"limit {self.max_symbol_quantity}")
+
+    def _reserve(self, intent: _Intent, delta: int) -> None:
+        exchange, symbol = intent.instrument
+        self._pending[(intent.account_id, exchange, symbol)] += delta
+        self._pending_by_strategy[(intent.strategy_id, intent.account_id, exchange, symbol)] += delta
+
+    def _route(self, intents: List[_Intent]) -> int:
+        """Cross opposing intents, route the net quantity; returns the number of broker orders"""
+        net = sum(intent.delta for intent in intents)
+
+        # The side with the smaller total is matched in full against the other, oldest orders first
+        crossable = min(sum(i.delta for i in intents if i.delta > 0), -sum(i.delta for i in intents if i.delta < 0))
+        allocations = []
+        for intent in intents:
+            if net == 0 or (intent.delta > 0) != (net > 0):
+                crossed = abs(intent.delta)
+            else:
+                crossed = min(abs(intent.delta), crossable)
+                crossable -= crossed
+            allocations.append((intent, crossed, abs(intent.delta) - crossed))
+
+        if net == 0:
+            self._settle(allocations, None)
+            return 0
+
+        lead = intents[0]
+        if len(intents) == 1:
+            net_key, params = lead.key, lead.params
+        else:
+            digest = hashlib.sha1('|'.join(sorted(intent.key for intent in intents)).encode()).hexdigest()
+            net_key = f"net{digest}"[:MAX_TAG_LENGTH]
+            params = {**lead.params, 'transactiontype': 'BUY' if net > 0 else 'SELL', 'quantity': str(abs(net))}
+            params.pop('ordertag', None)
+
+        future = lead.router.submit(params, net_key)
+        future.add_done_callback(lambda done: self._settle(allocations, done))
+        return 1
+
+    def _settle(self, allocations: List[Tuple[_Intent, int, int]], net_future: Optional[Future]) -> None:
+        """Apply fills to the books and resolve every strategy's future"""
+        net_result: Optional[OrderResult] = None
+        if net_future is not None:
+            try:
+                net_result = net_future.result()
+            except Exception as e:
+                net_result = OrderResult(key='', status='failed', error=f"{type(e).__name__}: {e}")
+
+        outcomes = []
+        with self._lock:
+            for intent, crossed, routed in allocations:
+                filled_routed = routed if net_result is not None and net_result.placed else 0
+                sign = 1 if intent.delta > 0 else -1
+                exchange, symbol = intent.instrument
+                filled = sign * (crossed + filled_routed)
+
+                self._reserve(intent, -intent.delta)
+                self.positions[(intent.account_id, exchange, symbol)] += filled
+                self.strategy_positions[(intent.strategy_id, intent.account_id, exchange, symbol)] += filled
+                stats = self._stats[intent.strategy_id]
+                stats['crossed'] += crossed
+                stats['routed'] += filled_routed
+
+                if routed and net_result is not None:
+                    outcome = AllocatedOrder(key=intent.key, status=net_result.status, order_id=net_result.order_id,
+                                             attempts=net_result.attempts, queue_latency=net_result.queue_latency,
+                                             latency=net_result.latency, response=net_result.response,
+                                             error=net_result.error, net_key=net_result.key)
+                else:
+                    outcome = AllocatedOrder(key=intent.key, status=STATUS_NETTED)
+                outcome.quantity, outcome.crossed, outcome.routed = abs(intent.delta), crossed, routed
+                outcomes.append((intent, outcome))
+
+            positions = {(intent.strategy_id, intent.account_id) + intent.instrument for intent, _, _ in allocations}
+            snapshot = {key: self.strategy_positions[key] for key in positions}
+
+        for (strategy_id, account_id, exchange, symbol), quantity in snapshot.items():
+            metrics.STRATEGY_POSITIONS.set(quantity, strategy_id=strategy_id, account_id=account_id or '',
+                                           symbol=f"{exchange}:{symbol}")
+        for intent, outcome in outcomes:
+            intent.future.set_result(outcome)
@@ -24,21 +24,44 @@ import os
 import sys
 import json
 import time
+import socket
 import logging
+import contextlib
+import functools
 import requests
 import subprocess
-import pyotp
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 
+import metrics
+import zygote
+from account_pool import AccountPool, AccountSession, BrokerAccountClient
+from candle_aggregator import DEFAULT_TIMEFRAMES, CandleAggregator
+from candle_store import AngelCandleFetcher, CandleStore, unique_series
+from instruments import SCRIP_MASTER_URL, load as load_instruments, refresh_index
+from journal import ExecutionJournal, JournalUploader
+from memo import RunMemo, run_fingerprint, script_digest
+from order_router import OrderRouter
+from plugin_host import PluginHost, StrategyContext, StrategyLoadError, StrategyTimeout
+from quotes import MODE_LTP, QuoteCoalescer, QuoteSnapshot, strategy_instruments
+from risk import RiskBook
+from scheduler import IST, MarketCalendar, Scheduler
+from session_manager import AngelSessionManager, SessionCache
+from sharding import LaravelLeaseStore, ShardCoordinator, SQLiteLeaseStore
+from strategy_manifest import ManifestSync
+from strategy_protocol import MessageDispatcher, StrategyOutput
+from tick_feed import LTP_MODE, TickReplay, quotes_from_ticks
+from triggers import TriggerMonitor
+
 # Add Angel One SDK (install with: pip install smartapi-python)
 try:
     from smartapi import SmartConnect
 except ImportError:
-    print("ERROR: Angel One SmartAPI not installed. Run: pip install smartapi-python")
-    sys.exit(1)
+    SmartConnect = None
 
 # Configuration
 @dataclass
@@ -47,6 +70,7 @@ class Config:
     # Laravel API Configuration
     api_base_url: str = os.getenv('LARAVEL_API_URL', 'http://localhost:8000/api')
     api_token: str = os.getenv('API_TOKEN', '')
+    manifest_cache_file: str = os.getenv('STRATEGY_MANIFEST_CACHE', '.cache/strategy_manifest.json')  # empty disables the cache
 
     # Angel One Configuration
     angel_api_key: str = os.getenv('ANGEL_API_KEY', '')
@@ -60,13 +84,115 @@ class Config:
     log_level: str = 'INFO'
     log_file: str = 'trading_automation.log'
 
+    # Multi-Account Configuration
+    multi_account: bool = os.getenv('MULTI_ACCOUNT', 'false').lower() == 'true'  # trade on each owner's broker accounts
+    account_workers: int = int(os.getenv('ACCOUNT_WORKERS', '32'))  # accounts executed concurrently
+    account_failure_backoff: int = int(os.getenv('ACCOUNT_FAILURE_BACKOFF', '300'))  # seconds
+
+    # Metrics Configuration
+    metrics_port: int = int(os.getenv('METRICS_PORT', '0'))  # local /metrics endpoint, 0 = disabled
+    metrics_file: str = os.getenv('METRICS_FILE', '')  # Prometheus textfile rewritten after every cycle
+    profile_slow_cycle_seconds: float = float(os.getenv('PROFILE_SLOW_CYCLE_SECONDS', '0'))  # 0 = disabled
+    profile_dir: str = os.getenv('PROFILE_DIR', 'logs/profiles')
+
+    # Journal Configuration
+    journal_file: str = os.getenv('EXECUTION_JOURNAL', 'logs/execution_journal.db')  # empty disables the journal
+    journal_batch_size: int = int(os.getenv('JOURNAL_BATCH_SIZE', '500'))  # records per upload request
+    journal_retention_days: int = int(os.getenv('JOURNAL_RETENTION_DAYS', '7'))  # uploaded records kept locally
+
+    # Session Configuration
+    session_cache_file: str = os.getenv('ANGEL_SESSION_CACHE', '.cache/angel_session.enc')
+    session_cache_key: str = os.getenv('ANGEL_SESSION_CACHE_KEY', '')  # defaults to a key derived from the Angel credentials
+    session_refresh_margin: int = int(os.getenv('ANGEL_SESSION_REFRESH_MARGIN', '600'))  # seconds before expiry
+
+    # Candle Cache Configuration
+    candle_store_dir: str = os.getenv('CANDLE_STORE_DIR', '.cache/candles')  # empty disables the cache
+    candle_store_max_mb: int = int(os.getenv('CANDLE_STORE_MAX_MB', '1024'))
+    candle_history_days: int = int(os.getenv('CANDLE_HISTORY_DAYS', '30'))
+
+    # Instrument Index Configuration
+    instrument_index_dir: str = os.getenv('INSTRUMENT_INDEX_DIR', '.cache/instruments')  # empty disables the index
+    instrument_master_url: str = os.getenv('INSTRUMENT_MASTER_URL', SCRIP_MASTER_URL)
+
+    # Candle Aggregation Configuration
+    aggregate_candles: bool = os.getenv('AGGREGATE_CANDLES', 'false').lower() == 'true'  # shared multi-timeframe bars
+    aggregate_timeframes: str = os.getenv('AGGREGATE_TIMEFRAMES', ','.join(DEFAULT_TIMEFRAMES))
+    aggregate_max_bars: int = int(os.getenv('AGGREGATE_MAX_BARS', '500'))  # closed bars kept per symbol and timeframe
+
+    # Market Quote Configuration
+    quote_rate_per_second: float = float(os.getenv('QUOTE_RATE_PER_SECOND', '10'))  # getMarketData calls
+    quote_snapshot_file: str = os.getenv('QUOTE_SNAPSHOT_FILE', '.cache/quotes.json')  # empty disables sharing with scripts
+
+    # Order Routing Configuration
+    order_rate_per_second: float = float(os.getenv('ORDER_RATE_PER_SECOND', '10'))
+    order_workers: int = int(os.getenv('ORDER_WORKERS', '4'))
+    order_max_retries: int = int(os.getenv('ORDER_MAX_RETRIES', '3'))
+    order_wait_timeout: int = int(os.getenv('ORDER_WAIT_TIMEOUT', '30'))  # seconds to await a cycle's orders
+
+    # Risk Configuration
+    order_netting: bool = os.getenv('ORDER_NETTING', 'true').lower() == 'true'  # net MARKET orders per cycle
+    risk_max_symbol_quantity: int = int(os.getenv('RISK_MAX_SYMBOL_QUANTITY', '0'))  # per account and symbol, 0 = unlimited
+
+    # Trigger Monitor Configuration
+    trigger_poll_seconds: float = float(os.getenv('TRIGGER_POLL_SECONDS', '1'))  # quote poll for SL/TP, 0 disables
+
+    # Tick Replay Configuration
+    tick_replay_file: str = os.getenv('TICK_REPLAY_FILE', '')  # recorded ticks drive the trigger monitor instead of polls
+    tick_replay_speed: float = float(os.getenv('TICK_REPLAY_SPEED', '1'))  # 1 = recorded pace, 0 = as fast as possible
+
+    # Scheduling Configuration
+    market_holidays_file: str = os.getenv('MARKET_HOLIDAYS_FILE', '')  # JSON list or one YYYY-MM-DD per line
+    missed_tick_policy: str = os.getenv('MISSED_TICK_POLICY', 'skip')  # skip | catchup
+    schedule_grace_seconds: int = int(os.getenv('SCHEDULE_GRACE_SECONDS', '60'))
+    schedule_offset_seconds: int = int(os.getenv('SCHEDULE_OFFSET_SECONDS', '2'))  # wait for the bar to settle
+
+    # Execution Configuration
+    execution_mode: str = os.getenv('STRATEGY_EXECUTION_MODE', 'subprocess')  # subprocess | inprocess | forkserver
+    zygote_preload: str = os.getenv('ZYGOTE_PRELOAD', ','.join(zygote.DEFAULT_PRELOAD))
+    max_workers: int = int(os.getenv('RUNNER_MAX_WORKERS', '1'))  # 1 = sequential
+    strategy_pause: float = float(os.getenv('STRATEGY_PAUSE_SECONDS', '2'))  # between sequential strategies
+    strategy_timeout: int = int(os.getenv('STRATEGY_TIMEOUT', '300'))  # seconds per strategy
+    cycle_deadline: int = int(os.getenv('CYCLE_DEADLINE', '0'))  # seconds per cycle, 0 = none
+    strategy_cpu_seconds: int = int(os.getenv('STRATEGY_CPU_SECONDS', '0'))  # 0 = unlimited
+    strategy_memory_mb: int = int(os.getenv('STRATEGY_MEMORY_MB', '0'))  # 0 = unlimited
+
+    # Sharding Configuration
+    shard_store: str = os.getenv('SHARD_STORE', '')  # empty = single runner, 'laravel' or a SQLite file path
+    shard_node_id: str = os.getenv('SHARD_NODE_ID', '')  # defaults to <hostname>-<pid>
+    shard_node_ttl: float = float(os.getenv('SHARD_NODE_TTL', '10'))  # seconds without heartbeat before failover
+    shard_lease_seconds: int = int(os.getenv('SHARD_LEASE_SECONDS', '0'))  # 0 = strategy_timeout + 60
+
+    # Memoization Configuration
+    memoize_strategies: bool = os.getenv('MEMOIZE_STRATEGIES', 'false').lower() == 'true'  # skip unchanged runs
+    memo_max_entries: int = int(os.getenv('MEMO_MAX_ENTRIES', '1024'))
+
 class TradingAutomation:
     """Main automation class for executing trading strategies"""
 
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, smart_connect_factory=None):
         self.config = config
+        # Injectable so benchmarks and tests can run against a mock broker
+        self.smart_connect_factory = smart_connect_factory or SmartConnect
+        if self.smart_connect_factory is None:
+            raise RuntimeError("Angel One SmartAPI not installed. Run: pip install smartapi-python")
+
         self.smart_api = None
         self.session_token = None
+        self.plugin_host = PluginHost()
+        self.zygote = None
+        self.candle_store = None
+        self.quotes: Optional[QuoteSnapshot] = None
+        self.scheduler = None
+        self.active_strategies: List[Dict[str, Any]] = []
+        self.account_pool = None
+        self.metrics_server = None
+        self.slow_cycle_profiler = None
+        self.journal = None
+        self.journal_uploader = None
+        self.run_memo = None
+        self.shard = None
+        self.leases: Optional[Dict[Any, Optional[str]]] = None  # run keys of this cycle's leased strategies
+        self.candle_aggregator = None
 
         # Setup logging
         self.setup_logging()
@@ -74,6 +200,91 @@ class TradingAutomation:
         # Validate configuration
         self.validate_config()
 
+        # Shared Angel One session, persisted across runs
+        self.session_manager = self.build_session_manager()
+
+        # Incremental strategy manifest over a keep-alive connection
+        self.manifest = ManifestSync(
+            self.config.api_base_url,
+            self.config.api_token,
+            cache_file=self.config.manifest_cache_file or None
+        )
+
+        # Shared order router, rate limited across all strategies
+        self.order_router = self.build_order_router(lambda: self.smart_api, self.session_manager.invalidate)
+
+        # One batched quote snapshot per cycle, shared by every strategy
+        self.quote_coalescer = QuoteCoalescer(lambda: self.smart_api, rate_per_second=self.config.quote_rate_per_second)
+
+        # Positions and pre-trade limits across all strategies and accounts
+        self.risk_book = RiskBook(
+            max_symbol_quantity=self.config.risk_max_symbol_quantity,
+            netting=self.config.order_netting
+        )
+
+        # Stop-loss / take-profit levels of open positions, watched between cycles
+        self.trigger_monitor = TriggerMonitor()
+        self.tick_replay: Optional[TickReplay] = None
+
+        # Per-account sessions for multi-account fan-out
+        if self.config.multi_account:
+            self.account_pool = self.build_account_pool()
+
+        # Trading sessions and holidays, shared by the scheduler, the aggregator and candle fetches
+        self.calendar = self.build_calendar()
+
+        # Shared candle cache read by every strategy
+        if self.config.candle_store_dir:
+            self.candle_store = CandleStore(
+                self.config.candle_store_dir,
+                max_bytes=self.config.candle_store_max_mb * 1024 * 1024
+            )
+
+        # Multi-timeframe bars built once per symbol and shared by every strategy
+        if self.config.aggregate_candles:
+            self.candle_aggregator = CandleAggregator(
+                self.calendar,
+                timeframes=[name.strip() for name in self.config.aggregate_timeframes.split(',') if name.strip()],
+                capacity=self.config.aggregate_max_bars
+            )
+
+        # Strategies split across runner instances by consistent hashing and leases
+        if self.config.shard_store:
+            self.shard = self.build_shard_coordinator()
+
+        # Outcomes of the last run per strategy, reused while its inputs are unchanged
+        if self.config.memoize_strategies:
+            self.run_memo = RunMemo(self.config.memo_max_entries)
+            if self.candle_aggregator is not None:
+                # Base bars also arrive outside prefetch, e.g. from replayed ticks
+                base = self.candle_aggregator.base
+                self.candle_aggregator.subscribe(
+                    base, lambda bar: self.run_memo.invalidate_series(bar.exchange, bar.symbol, base))
+
+        # Local execution journal, shipped to Laravel in batches
+        if self.config.journal_file:
+            self.journal = ExecutionJournal(self.config.journal_file)
+            self.journal_uploader = JournalUploader(
+                self.journal,
+                self.config.api_base_url,
+                self.manifest.session,
+                batch_size=self.config.journal_batch_size
+            )
+
+        # Metrics export and slow-cycle profiling
+        if self.config.metrics_port:
+            self.metrics_server = metrics.MetricsServer(self.config.metrics_port)
+            self.metrics_server.start()
+        if self.config.profile_slow_cycle_seconds > 0:
+            self.slow_cycle_profiler = metrics.SlowCycleProfiler(
+                self.config.profile_slow_cycle_seconds,
+                self.config.profile_dir
+            )
+
+        # Start the strategy template process up front
+        if self.config.execution_mode == 'forkserver':
+            self.start_zygote()
+
         self.logger.info("Trading automation system initialized")
 
     def setup_logging(self):
@@ -114,40 +325,74 @@ class TradingAutomation:
 
         self.logger.info("Configuration validation passed")
 
-    def generate_totp(self) -> str:
-        """Generate TOTP for Angel One 2FA"""
-        try:
-            totp = pyotp.TOTP(self.config.angel_totp_secret)
-            return totp.now()
-        except Exception as e:
-            self.logger.error(f"Failed to generate TOTP: {e}")
-            raise
+    def build_session_manager(self) -> AngelSessionManager:
+        """Create the session manager backed by the encrypted session cache"""
+        cache = SessionCache(
+            Path(self.config.session_cache_file),
+            secret=self.config.session_cache_key or f"{self.config.angel_mpin}:{self.config.angel_totp_secret}",
+            salt=self.config.angel_client_id
+        )
 
-    def connect_to_angel_one(self) -> bool:
-        """Establish connection to Angel One SmartAPI"""
-        try:
-            self.logger.info("Connecting to Angel One SmartAPI...")
+        return AngelSessionManager(
+            api_key=self.config.angel_api_key,
+            client_id=self.config.angel_client_id,
+            mpin=self.config.angel_mpin,
+            totp_secret=self.config.angel_totp_secret,
+            smart_connect_factory=self.smart_connect_factory,
+            cache=cache,
+            refresh_margin=self.config.session_refresh_margin,
+            retry_delay=self.config.retry_delay
+        )
 
-            # Initialize SmartConnect
-            self.smart_api = SmartConnect(api_key=self.config.angel_api_key)
+    def build_order_router(self, smart_api_provider, on_session_rejected=None) -> OrderRouter:
+        """Create a rate-limited order router for one SmartConnect session"""
+        return OrderRouter(
+            smart_api_provider,
+            rate_per_second=self.config.order_rate_per_second,
+            max_workers=self.config.order_workers,
+            max_retries=self.config.order_max_retries,
+            on_session_rejected=on_session_rejected
+        )
 
-            # Generate TOTP
-            totp = self.generate_totp()
+    def build_account_pool(self) -> AccountPool:
+        """Create the per-account session pool, writing refreshed tokens back to Laravel"""
+        self.account_client = BrokerAccountClient(self.config.api_base_url, self.manifest.session)
 
-            # Login
-            login_response = self.smart_api.generateSession(
-                clientCode=self.config.angel_client_id,
-                password=self.config.angel_mpin,
-                totp=totp
-            )
+        def store_tokens(account_id, session):
+            self.account_client.update_tokens(account_id, session)
+
+        return AccountPool(
+            smart_connect_factory=self.smart_connect_factory,
+            order_router_factory=self.build_order_router,
+            on_tokens=store_tokens,
+            refresh_margin=self.config.session_refresh_margin,
+            failure_backoff=self.config.account_failure_backoff
+        )
+
+    def sync_accounts(self) -> bool:
+        """Refresh the account pool from the Laravel API"""
+        try:
+            self.account_pool.sync(self.account_client.fetch())
+            return True
+        except (requests.RequestException, ValueError) as e:
+            self.logger.error(f"Failed to fetch broker accounts: {e}")
+            return False
+
+    def connect_to_angel_one(self) -> bool:
+        """Establish connection to Angel One SmartAPI
+
+        Reuses the cached or already-live session when it is still valid, so
+        this is cheap to call at the start of every cycle.
+        """
+        try:
+            self.smart_api = self.session_manager.get_session()
+            self.session_token = self.session_manager.session_token
 
-            if login_response['status']:
-                self.session_token = login_response['data']['jwtToken']
-                self.logger.info("Successfully connected to Angel One SmartAPI")
+            if self.smart_api and self.session_token:
                 return True
-            else:
-                self.logger.error(f"Angel One login failed: {login_response}")
-                return False
+
+            self.logger.error("Angel One login failed: no session established")
+            return False
 
         except Exception as e:
             self.logger.error(f"Angel One connection error: {e}")
@@ -158,28 +403,11 @@ class TradingAutomation:
         try:
             self.logger.info("Fetching active strategies from Laravel API...")
 
-            headers = {
-                'Authorization': f'Bearer {self.config.api_token}',
-                'Content-Type': 'application/json',
-                'User-Agent': 'SmartHedge-Automation/1.0'
-            }
-
-            response = requests.get(
-                f"{self.config.api_base_url}/active-strategies",
-                headers=headers,
-                timeout=30
-            )
-
-            response.raise_for_status()
-            data = response.json()
-
-            if data.get('success'):
-                strategies = data.get('data', [])
-                self.logger.info(f"Fetched {len(strategies)} active strategies")
-                return strategies
-            else:
-                self.logger.error(f"API returned error: {data.get('error', 'Unknown error')}")
-                return []
+            strategies = [self.normalize_strategy(strategy) for strategy in self.manifest.fetch()]
+            self.logger.info(f"Fetched {len(strategies)} active strategies")
+            self.evict_inactive_plugins(strategies)
+            self.cancel_inactive_brackets(strategies)
+            return strategies
 
         except requests.RequestException as e:
             self.logger.error(f"Failed to fetch strategies: {e}")
@@ -187,6 +415,150 @@ class TradingAutomation:
         except json.JSONDecodeError as e:
             self.logger.error(f"Invalid JSON response: {e}")
             return []
+        except ValueError as e:
+            self.logger.error(f"API returned error: {e}")
+            return []
+
+    def evict_inactive_plugins(self, strategies: List[Dict[str, Any]]):
+        """Unload warm strategy modules that no active strategy runs any more"""
+        active = {strategy.get('python_file_path') for strategy in strategies}
+        for python_file in self.plugin_host.loaded_files():
+            if python_file not in active:
+                self.logger.info(f"Unloading inactive strategy module {python_file}")
+                self.plugin_host.evict(python_file)
+
+    def cancel_inactive_brackets(self, strategies: List[Dict[str, Any]]):
+        """Stop watching the stop-loss / take-profit levels of deactivated strategies"""
+        for bracket in self.trigger_monitor.cancel_inactive(strategy['id'] for strategy in strategies):
+            self.logger.warning(f"Strategy {bracket.strategy_id} deactivated; bracket {bracket.id} on "
+                                f"{bracket.params.get('tradingsymbol')} is no longer watched")
+
+    def normalize_strategy(self, strategy: Dict[str, Any]) -> Dict[str, Any]:
+        """Map the API's field names onto the names used by the runner"""
+        strategy = dict(strategy)
+        if 'python_file_path' not in strategy and 'script_path' in strategy:
+            strategy['python_file_path'] = strategy['script_path']
+        if 'parameters' not in strategy and 'params' in strategy:
+            strategy['parameters'] = strategy['params']
+        return strategy
+
+    def build_token_resolver(self, strategies: List[Dict[str, Any]]):
+        """Map (exchange, symbol) to a symbol token for a set of strategies"""
+        # Tokens from the strategy parameters win over the instrument index
+        tokens = {}
+        for strategy in strategies:
+            params = strategy.get('parameters') or {}
+            if isinstance(params, dict) and params.get('symbol') and params.get('symboltoken'):
+                tokens[(params.get('exchange', 'NSE'), params['symbol'])] = str(params['symboltoken'])
+
+        index = load_instruments(self.config.instrument_index_dir) if self.config.instrument_index_dir else None
+
+        def resolve_token(exchange, symbol):
+            token = tokens.get((exchange, symbol))
+            if token is None and index is not None:
+                token = index.token(exchange, symbol)
+            return token
+
+        return resolve_token
+
+    def prefetch_candles(self, strategies: List[Dict[str, Any]]):
+        """Bring the shared candle cache up to date once for all strategies"""
+        if self.candle_store is None:
+            return
+
+        fetcher = AngelCandleFetcher(
+            self.smart_api,
+            self.build_token_resolver(strategies),
+            history_days=self.config.candle_history_days,
+            calendar=self.calendar
+        )
+
+        for exchange, symbol, interval in self.candle_series(strategies):
+            try:
+                added = self.candle_store.refresh(exchange, symbol, interval, fetcher)
+                if added and self.run_memo is not None:
+                    self.run_memo.invalidate_series(exchange, symbol, interval)
+            except Exception as e:
+                self.logger.error(f"Failed to refresh candles for {exchange}:{symbol} ({interval}): {e}")
+
+        self.candle_store.evict()
+
+    def candle_series(self, strategies: List[Dict[str, Any]]) -> List[tuple]:
+        """(exchange, symbol, interval) series the candle cache holds for the strategies
+
+        With the aggregator on, only its base series is fetched for an
+        interval it builds, as long as the strategy reads the aggregated
+        bars. Script strategies read the cache and keep their own interval.
+        """
+        aggregator = self.candle_aggregator
+        series = set()
+        for strategy in strategies:
+            for exchange, symbol, interval in unique_series([strategy]):
+                if aggregator is None:
+                    series.add((exchange, symbol, interval))
+                    continue
+                # The aggregator's finest timeframe feeds all the others
+                series.add((exchange, symbol, aggregator.base))
+                if interval not in aggregator.timeframes or not self.reads_shared_bars(strategy):
+                    series.add((exchange, symbol, interval))
+        return sorted(series)
+
+    def reads_shared_bars(self, strategy: Dict[str, Any]) -> bool:
+        """Whether a strategy runs in-process and so gets the aggregated bars"""
+        if self.candle_aggregator is None or self.config.execution_mode != 'inprocess':
+            return False
+        try:
+            return self.plugin_host.supports(strategy)
+        except (OSError, KeyError):
+            return False
+
+    def aggregate_candles(self, strategies: List[Dict[str, Any]]):
+        """Fold new base bars into the shared multi-timeframe bars"""
+        if self.candle_aggregator is None:
+            return
+
+        resolve_token = self.build_token_resolver(strategies)
+        now = time.time()
+        for exchange, symbol, _ in unique_series(strategies):
+            self.candle_aggregator.track(exchange, symbol, resolve_token(exchange, symbol))
+            candles = None
+            if self.candle_store is not None:
+                candles = self.candle_store.read(exchange, symbol, self.candle_aggregator.base)
+            if candles is not None:
+                self.candle_aggregator.on_candles(exchange, symbol, candles, now)
+        self.candle_aggregator.advance(now)
+
+    def fetch_quotes(self, strategies: List[Dict[str, Any]]):
+        """Fetch one quote snapshot for every instrument the strategies trade"""
+        resolve_token = self.build_token_resolver(strategies)
+        keys = []
+        for exchange, symbol in strategy_instruments(strategies):
+            token = resolve_token(exchange, symbol)
+            if token is None:
+                self.logger.warning(f"No symbol token for {exchange}:{symbol}; not quoted")
+            else:
+                keys.append((exchange, token))
+
+        self.quotes = self.quote_coalescer.fetch(keys)
+        if self.config.quote_snapshot_file:
+            try:
+                self.quotes.save(self.config.quote_snapshot_file)
+            except OSError as e:
+                self.logger.warning(f"Failed to write quote snapshot: {e}")
+
+    def refresh_instruments(self):
+        """Rebuild the instrument index from the scrip master once per trading day"""
+        if not self.config.instrument_index_dir:
+            return
+        try:
+            refresh_index(
+                self.config.instrument_index_dir,
+                url=self.config.instrument_master_url,
+                trading_date=datetime.now(IST).date()
+            )
+        except (requests.RequestException, ValueError, OSError) as e:
+            # Strategies keep using the previous day's index
+            self.logger.error(f"Failed to refresh instrument index: {e}")
 
     def validate_strategy(self, strategy: Dict[str, Any]) -> bool:
         """Validate strategy parameters before execution"""
@@ -213,129 +585,674 @@ class TradingAutomation:
 
         return True
 
-    def execute_strategy(self, strategy: Dict[str, Any]) -> bool:
-        """Execute a single trading strategy"""
+    def build_strategy_command(self, python_file: str) -> List[str]:
+        """Command line for a strategy process, wrapped to apply its CPU/memory limits"""
+        cpu_seconds = self.config.strategy_cpu_seconds
+        memory_bytes = self.config.strategy_memory_mb * 1024 * 1024
+        command = [sys.executable, python_file]
+
+        if not cpu_seconds and not memory_bytes:
+            return command
+
+        if zygote.resource is None:
+            self.logger.warning("Strategy resource limits are not supported on this platform")
+            return command
+
+        return zygote.limited_command(command, cpu_seconds, memory_bytes)
+
+    def start_zygote(self):
+        """Start the pre-forked template used by the forkserver execution mode"""
+        if not zygote.is_supported():
+            self.logger.warning("Fork-server execution is not supported on this platform; using subprocesses")
+            return
+
+        preload = [name.strip() for name in self.config.zygote_preload.split(',') if name.strip()]
+        self.zygote = zygote.ZygoteLauncher(preload)
+        self.zygote.start()
+
+    def execute_strategy(self, strategy: Dict[str, Any], deadline: Optional[float] = None,
+                         account: Optional[AccountSession] = None) -> bool:
+        """Execute a single trading strategy
+
+        ``deadline`` is an optional ``time.monotonic()`` value after which the
+        strategy is not started, or is killed if it is still running.
+        ``account`` selects the broker account to trade on; without it the
+        runner's own Angel One session is used.
+        """
         strategy_id = strategy['id']
         strategy_name = strategy['name']
 
+        timeout = self.config.strategy_timeout
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.logger.warning(f"Strategy {strategy_name} skipped: cycle deadline reached")
+                return False
+            timeout = min(timeout, remaining)
+
+        account_id = account.account.id if account is not None else None
+        memo_key = (strategy_id, account_id)
+        fingerprint = self.run_fingerprint(strategy, account_id)
+        if fingerprint is not None:
+            entry = self.run_memo.lookup(memo_key, fingerprint)
+            if entry is not None:
+                self.logger.info(f"Strategy {strategy_name} inputs unchanged since "
+                                 f"{datetime.fromtimestamp(entry.stored_at):%H:%M:%S}; reusing its result")
+                metrics.STRATEGY_RUNS.inc(strategy_id=strategy_id, result='memoized')
+                if self.journal is not None:
+                    self.journal.record('execution', strategy_id, status='memoized',
+                                        data={'mode': self.config.execution_mode, 'fingerprint': fingerprint},
+                                        account_id=account_id)
+                if self.scheduler is not None:
+                    self.scheduler.record(strategy_id)
+                return entry.success
+
+        if self.leases is not None and not self.shard.renew(strategy, self.leases.get(strategy_id)):
+            self.logger.warning(f"Strategy {strategy_name} skipped: its lease was lost")
+            return False
+
         self.logger.info(f"Executing strategy: {strategy_name} (ID: {strategy_id})")
 
+        started = time.monotonic()
+        with metrics.span('execute_strategy'):
+            success = self.dispatch_strategy(strategy, timeout, deadline, account)
+
+        if fingerprint is not None:
+            # Only successful runs are reused; a failure is retried next cycle
+            if success:
+                self.run_memo.store(memo_key, fingerprint, success, self.candle_series([strategy]))
+            else:
+                self.run_memo.discard(memo_key)
+
+        # Only a successful run marks its bar as done; anything else is due again next tick
+        if success and self.scheduler is not None:
+            self.scheduler.record(strategy_id)
+
+        metrics.STRATEGY_RUNS.inc(strategy_id=strategy_id, result='success' if success else 'failure')
+        if self.journal is not None:
+            self.journal.record(
+                'execution', strategy_id,
+                status='success' if success else 'failure',
+                data={'mode': self.config.execution_mode, 'duration_ms': round((time.monotonic() - started) * 1000, 3)},
+                account_id=account_id
+            )
+        return success
+
+    def run_fingerprint(self, strategy: Dict[str, Any], account_id: Any = None) -> Optional[str]:
+        """Fingerprint of a strategy run's inputs, or None when the run cannot be memoized
+
+        Memoization needs the candle cache, since only cached series have a
+        watermark. The aggregated bars of the strategy's instruments are part
+        of the fingerprint too, and so are the quote fields listed in a
+        ``quote_fields`` parameter; quotes move every cycle, so a strategy
+        that reads none of them is not fingerprinted on them. Strategies opt
+        out with a ``memoize: false`` parameter.
+        """
+        if self.run_memo is None or self.candle_store is None:
+            return None
+        try:
+            parameters = strategy.get('parameters') or {}
+            if isinstance(parameters, str):
+                parameters = json.loads(parameters)
+            if not parameters.get('memoize', True):
+                return None
+
+            watermarks = {}
+            for series in self.candle_series([strategy]):
+                watermark = self.candle_store.watermark(*series)
+                if watermark is None:
+                    return None
+                watermarks[series] = watermark
+            if not watermarks:
+                return None
+
+            # The run may also read this cycle's quotes and the aggregated bars, which move between appends
+            instruments = strategy_instruments([strategy])
+            quotes = None
+            quote_fields = parameters.get('quote_fields') or ()
+            if self.quotes is not None and quote_fields:
+                quotes = {}
+                for exchange, symbol in instruments:
+                    quote = self.quotes.by_symbol(exchange, symbol)
+                    quotes[(exchange, symbol)] = ([getattr(quote, field) for field in quote_fields]
+                                                  if quote is not None else None)
+            bars = None
+            if self.candle_aggregator is not None:
+                bars = {(exchange, symbol): self.candle_aggregator.watermark(exchange, symbol)
+                        for exchange, symbol in instruments}
+
+            return run_fingerprint(script_digest(strategy['python_file_path']), parameters, watermarks, account_id,
+                                   quotes=quotes, bars=bars)
+        except (OSError, ValueError, KeyError, AttributeError) as e:
+            self.logger.debug(f"Strategy {strategy.get('name')} not memoized: {e}")
+            return None
+
+    def dispatch_strategy(self, strategy: Dict[str, Any], timeout: float, deadline: Optional[float] = None,
+                          account: Optional[AccountSession] = None) -> bool:
+        """Validate a strategy and run it in the configured execution mode"""
         try:
             # Validate strategy
             if not self.validate_strategy(strategy):
                 return False
 
-            # Prepare environment variables for the strategy script
-            env = os.environ.copy()
-            env.update({
-                'STRATEGY_ID': str(strategy_id),
-                'STRATEGY_NAME': strategy_name,
-                'STRATEGY_PARAMETERS': json.dumps(strategy['parameters']),
-                'ANGEL_SESSION_TOKEN': self.session_token or '',
-                'ANGEL_API_KEY': self.config.angel_api_key,
-                'ANGEL_CLIENT_ID': self.config.angel_client_id
-            })
-
-            # Execute the Python strategy file
-            python_file = strategy['python_file_path']
-            self.logger.info(f"Running strategy script: {python_file}")
-
-            result = subprocess.run(
-                [sys.executable, python_file],
-                env=env,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5 minute timeout
-            )
+            if self.config.execution_mode == 'inprocess' and self.plugin_host.supports(strategy):
+                return self.run_strategy_in_process(strategy, timeout, deadline, account)
 
-            if result.returncode == 0:
-                self.logger.info(f"Strategy {strategy_name} executed successfully")
-                if result.stdout:
-                    self.logger.info(f"Strategy output: {result.stdout.strip()}")
-                return True
-            else:
-                self.logger.error(f"Strategy {strategy_name} failed with return code {result.returncode}")
-                if result.stderr:
-                    self.logger.error(f"Strategy error: {result.stderr.strip()}")
-                return False
+            if self.zygote is not None:
+                return self.run_strategy_forked(strategy, timeout, deadline, account)
+
+            return self.run_strategy_process(strategy, timeout, deadline, account)
 
-        except subprocess.TimeoutExpired:
-            self.logger.error(f"Strategy {strategy_name} timed out")
-            return False
         except Exception as e:
-            self.logger.error(f"Error executing strategy {strategy_name}: {e}")
+            self.logger.error(f"Error executing strategy {strategy['name']}: {e}")
             return False
 
-    def place_order(self, order_params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Place an order through Angel One SmartAPI"""
+    def build_strategy_context(self, strategy: Dict[str, Any], account: Optional[AccountSession] = None) -> StrategyContext:
+        """Build the context handed to in-process strategies"""
+        parameters = strategy['parameters']
+        if isinstance(parameters, str):
+            parameters = json.loads(parameters)
+
+        if account is not None:
+            session_token, api_key, client_id = (account.session_token, account.account.api_key,
+                                                 account.account.client_code)
+            smart_api, order_router = account.smart_api, account.order_router
+        else:
+            session_token, api_key, client_id = (self.session_token, self.config.angel_api_key,
+                                                 self.config.angel_client_id)
+            smart_api, order_router = self.smart_api, self.order_router
+
+        return StrategyContext(
+            strategy_id=strategy['id'],
+            strategy_name=strategy['name'],
+            parameters=parameters or {},
+            session_token=session_token or '',
+            api_key=api_key,
+            client_id=client_id,
+            smart_api=smart_api,
+            order_router=order_router,
+            candle_store_dir=self.config.candle_store_dir,
+            instrument_index_dir=self.config.instrument_index_dir,
+            quotes=self.quotes,
+            bars=self.candle_aggregator,
+            account_id=account.account.id if account is not None else None
+        )
+
+    def build_message_dispatcher(self, strategy: Dict[str, Any],
+                                 account: Optional[AccountSession] = None) -> MessageDispatcher:
+        """Handler for the messages a strategy emits, sending its orders through the risk book"""
+        router = account.order_router if account is not None else self.order_router
+        account_id = account.account.id if account is not None else None
+
+        parameters = strategy.get('parameters') or {}
+        if isinstance(parameters, str):
+            parameters = json.loads(parameters)
+
+        submit_order = functools.partial(
+            self.risk_book.submit,
+            strategy_id=strategy['id'],
+            router=router,
+            account_id=account_id,
+            max_position=int(parameters.get('max_position_size') or 0)
+        )
+        # Exits go out the moment a level trades instead of waiting for the cycle's netting
+        submit_exit = functools.partial(submit_order, hold=False)
+        return MessageDispatcher(strategy['id'], strategy['name'], submit_order, journal=self.journal,
+                                 account_id=account_id, triggers=self.trigger_monitor, submit_exit=submit_exit,
+                                 resolve_token=self.build_token_resolver([strategy]))
+
+    def finish_strategy_run(self, strategy_name: str, dispatcher: MessageDispatcher, succeeded: bool) -> bool:
+        """Combine the process outcome with the strategy's own verdict"""
+        if succeeded and not dispatcher.success:
+            self.logger.error(f"Strategy {strategy_name} reported failure: {dispatcher.result}")
+        return succeeded and dispatcher.success
+
+    def run_strategy_in_process(self, strategy: Dict[str, Any], timeout: float, deadline: Optional[float] = None,
+                                account: Optional[AccountSession] = None) -> bool:
+        """Run a strategy through the warm plugin host
+
+        A run that outlasts ``timeout`` is abandoned and counted as failed. Its
+        thread cannot be killed, so messages it emits afterwards are dropped.
+        """
+        strategy_name = strategy['name']
+        self.logger.info(f"Running strategy in-process: {strategy['python_file_path']}")
+
+        dispatcher = self.build_message_dispatcher(strategy, account)
+        context = self.build_strategy_context(strategy, account)
+        abandoned = threading.Event()
+
+        def emit(message: Dict[str, Any]):
+            if abandoned.is_set():
+                self.logger.warning(f"Dropped {message.get('type')} message from abandoned strategy {strategy_name}")
+                return
+            dispatcher(message)
+
+        context.emit = emit
+
         try:
-            if not self.smart_api or not self.session_token:
-                self.logger.error("Angel One connection not established")
-                return None
+            success = self.plugin_host.run(strategy, context, timeout=timeout)
+        except StrategyLoadError as e:
+            self.logger.error(f"Strategy {strategy_name} could not be loaded: {e}")
+            return False
+        except StrategyTimeout:
+            abandoned.set()
+            self.log_strategy_timeout(strategy_name, deadline)
+            return self.finish_strategy_run(strategy_name, dispatcher, False)
 
-            self.logger.info(f"Placing order: {order_params}")
+        if success:
+            self.logger.info(f"Strategy {strategy_name} executed successfully")
+        else:
+            self.logger.error(f"Strategy {strategy_name} reported failure")
+        return self.finish_strategy_run(strategy_name, dispatcher, success)
+
+    def build_strategy_env(self, strategy: Dict[str, Any], account: Optional[AccountSession] = None) -> Dict[str, str]:
+        """Prepare environment variables for the strategy script"""
+        context = self.build_strategy_context(strategy, account)
+
+        env = os.environ.copy()
+        env.update({
+            'STRATEGY_ID': str(strategy['id']),
+            'STRATEGY_NAME': strategy['name'],
+            'STRATEGY_PARAMETERS': json.dumps(strategy['parameters']),
+            'ANGEL_SESSION_TOKEN': context.session_token,
+            'ANGEL_API_KEY': context.api_key,
+            'ANGEL_CLIENT_ID': context.client_id,
+            'BROKER_ACCOUNT_ID': str(context.account_id or ''),
+            'CANDLE_STORE_DIR': os.path.abspath(self.config.candle_store_dir) if self.config.candle_store_dir else '',
+            'INSTRUMENT_INDEX_DIR': os.path.abspath(self.config.instrument_index_dir) if self.config.instrument_index_dir else '',
+            'QUOTE_SNAPSHOT_FILE': os.path.abspath(self.config.quote_snapshot_file) if self.config.quote_snapshot_file else ''
+        })
+
+        # Make the runner's shared modules importable from strategy scripts
+        automation_dir = os.path.dirname(os.path.abspath(__file__))
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [automation_dir, env.get('PYTHONPATH')]))
+        return env
+
+    def log_strategy_result(self, strategy_name: str, returncode: Optional[int], stdout: str, stderr: str) -> bool:
+        """Log the outcome of a strategy process and report success"""
+        if returncode == 0:
+            self.logger.info(f"Strategy {strategy_name} executed successfully")
+            if stdout:
+                self.logger.debug(f"Strategy output: {stdout.strip()}")
+            return True
+        else:
+            self.logger.error(f"Strategy {strategy_name} failed with return code {returncode}")
+            if stderr:
+                self.logger.error(f"Strategy error: {stderr.strip()}")
+            return False
 
-            # Place order through SmartAPI
-            order_response = self.smart_api.placeOrder(order_params)
+    def log_strategy_timeout(self, strategy_name: str, deadline: Optional[float] = None):
+        """Log a strategy killed by its timeout or the cycle deadline"""
+        if deadline is not None and time.monotonic() >= deadline:
+            self.logger.error(f"Strategy {strategy_name} cancelled: cycle deadline reached")
+        else:
+            self.logger.error(f"Strategy {strategy_name} timed out")
 
-            if order_response.get('status'):
-                order_id = order_response['data']['orderid']
-                self.logger.info(f"Order placed successfully. Order ID: {order_id}")
-                return order_response
-            else:
-                self.logger.error(f"Order placement failed: {order_response}")
-                return None
+    def run_strategy_process(self, strategy: Dict[str, Any], timeout: float, deadline: Optional[float] = None,
+                             account: Optional[AccountSession] = None) -> bool:
+        """Run a strategy script in a fresh Python interpreter
 
-        except Exception as e:
-            self.logger.error(f"Error placing order: {e}")
-            return None
+        Its output is streamed: messages are acted on as they are emitted and
+        only the last lines of plain output are kept for the result log.
+        """
+        strategy_name = strategy['name']
+        env = self.build_strategy_env(strategy, account)
+        dispatcher = self.build_message_dispatcher(strategy, account)
+        output = StrategyOutput(strategy_name, dispatcher)
+
+        # Execute the Python strategy file
+        python_file = strategy['python_file_path']
+        self.logger.info(f"Running strategy script: {python_file}")
+
+        with metrics.span('spawn_strategy'):
+            process = subprocess.Popen(
+                self.build_strategy_command(python_file),
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
 
-    def run_automation_cycle(self):
-        """Run a single automation cycle"""
+        try:
+            output.start(process.stdout.fileno(), process.stderr.fileno())
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                self.log_strategy_timeout(strategy_name, deadline)
+                return self.finish_strategy_run(strategy_name, dispatcher, False)
+            finally:
+                output.join(timeout=5)
+        finally:
+            process.stdout.close()
+            process.stderr.close()
+
+        succeeded = self.log_strategy_result(strategy_name, process.returncode, output.stdout, output.stderr)
+        return self.finish_strategy_run(strategy_name, dispatcher, succeeded)
+
+    def run_strategy_forked(self, strategy: Dict[str, Any], timeout: float, deadline: Optional[float] = None,
+                            account: Optional[AccountSession] = None) -> bool:
+        """Run a strategy script in a process forked from the zygote"""
+        strategy_name = strategy['name']
+        python_file = strategy['python_file_path']
+        self.logger.info(f"Forking strategy script: {python_file}")
+
+        dispatcher = self.build_message_dispatcher(strategy, account)
+        result = self.zygote.run(
+            python_file,
+            self.build_strategy_env(strategy, account),
+            timeout=timeout,
+            cpu_seconds=self.config.strategy_cpu_seconds,
+            memory_bytes=self.config.strategy_memory_mb * 1024 * 1024,
+            output=StrategyOutput(strategy_name, dispatcher)
+        )
+
+        if result.timed_out:
+            self.log_strategy_timeout(strategy_name, deadline)
+            return self.finish_strategy_run(strategy_name, dispatcher, False)
+
+        succeeded = self.log_strategy_result(strategy_name, result.returncode, result.stdout, result.stderr)
+        return self.finish_strategy_run(strategy_name, dispatcher, succeeded)
+
+    def execute_strategies(self, strategies: List[Dict[str, Any]], deadline: Optional[float] = None) -> List[bool]:
+        """Execute strategies, concurrently when more than one worker is configured
+
+        Results are returned in the same order as ``strategies``.
+        """
+        if self.config.max_workers <= 1:
+            results = []
+            for index, strategy in enumerate(strategies):
+                results.append(self.execute_strategy(strategy, deadline))
+
+                # Small delay between strategies, never after the last one or past the deadline
+                if index < len(strategies) - 1:
+                    pause = self.config.strategy_pause
+                    if deadline is not None:
+                        pause = min(pause, deadline - time.monotonic())
+                    if pause > 0:
+                        time.sleep(pause)
+            return results
+
+        workers = min(self.config.max_workers, len(strategies))
+        self.logger.info(f"Executing {len(strategies)} strategies with {workers} workers")
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='strategy') as executor:
+            futures = [executor.submit(self.execute_strategy, strategy, deadline) for strategy in strategies]
+            return [future.result() for future in futures]
+
+    def execute_account_strategies(self, strategies: List[Dict[str, Any]], deadline: Optional[float] = None) -> List[bool]:
+        """Run every strategy on each of its owner's broker accounts
+
+        Each account is a lane: its strategies run one after another on its
+        own session and order router, while lanes run concurrently. A lane
+        whose account cannot connect fails fast without holding up others.
+        Returns one result per (strategy, account) run.
+        """
+        lanes: Dict[int, List[Dict[str, Any]]] = {}
+        accounts: Dict[int, AccountSession] = {}
+        results: List[bool] = []
+
+        for strategy in strategies:
+            owner_accounts = self.account_pool.for_user(strategy.get('user_id'))
+            if not owner_accounts:
+                self.logger.warning(f"Strategy {strategy['name']} skipped: owner has no active Angel One account")
+                results.append(False)
+            for account in owner_accounts:
+                accounts[account.account.id] = account
+                lanes.setdefault(account.account.id, []).append(strategy)
+
+        if not lanes:
+            return results
+
+        def run_lane(account_id: int) -> List[bool]:
+            account = accounts[account_id]
+            if not self.account_pool.connect(account):
+                return [False] * len(lanes[account_id])
+            return [self.execute_strategy(strategy, deadline, account) for strategy in lanes[account_id]]
+
+        workers = min(self.config.account_workers, len(lanes))
+        self.logger.info(f"Executing strategies on {len(lanes)} accounts with {workers} workers")
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='account') as executor:
+            for lane_results in executor.map(run_lane, list(lanes)):
+                results.extend(lane_results)
+        return results
+
+    def build_shard_coordinator(self) -> ShardCoordinator:
+        """Create the shard coordinator for the configured lease store"""
+        if self.config.shard_store == 'laravel':
+            store = LaravelLeaseStore(self.config.api_base_url, self.config.api_token)
+        else:
+            store = SQLiteLeaseStore(self.config.shard_store)
+
+        node_id = self.config.shard_node_id or f"{socket.gethostname()}-{os.getpid()}"
+        lease_seconds = self.config.shard_lease_seconds or self.config.strategy_timeout + 60
+        self.logger.info(f"Sharded mode: runner {node_id}, lease {lease_seconds}s")
+        return ShardCoordinator(store, node_id, node_ttl=self.config.shard_node_ttl, lease_seconds=lease_seconds)
+
+    def run_keys(self, strategies: List[Dict[str, Any]], tick: Optional[float] = None) -> Dict[Any, Optional[str]]:
+        """Bar each strategy runs for this tick, so no two runners execute the same bar"""
+        if tick is None or self.scheduler is None:
+            return {strategy['id']: None for strategy in strategies}
+        return {strategy['id']: str(int(self.scheduler.pending[strategy['id']])) for strategy in strategies}
+
+    def completed_run_keys(self, run_keys: Dict[Any, Optional[str]]) -> Dict[Any, Optional[str]]:
+        """Run keys of the bars that ran successfully; failed ones stay open for any runner to retry"""
+        if self.scheduler is None:
+            return run_keys
+        ran = {strategy_id: str(int(boundary)) for strategy_id, boundary in self.scheduler.last_tick.items()}
+        return {strategy_id: run_key if run_key is not None and ran.get(strategy_id) == run_key else None
+                for strategy_id, run_key in run_keys.items()}
+
+    def build_calendar(self) -> MarketCalendar:
+        """NSE sessions and holidays shared by the scheduler and the candle aggregator"""
+        calendar = MarketCalendar()
+        if self.config.market_holidays_file:
+            calendar = MarketCalendar.from_file(self.config.market_holidays_file)
+            self.logger.info(f"Loaded {len(calendar.holidays)} market holidays")
+        return calendar
+
+    def build_scheduler(self, interval_minutes: int) -> Scheduler:
+        """Create the market-hours scheduler for continuous mode"""
+        return Scheduler(
+            self.calendar,
+            default_interval=interval_minutes,
+            missed_policy=self.config.missed_tick_policy,
+            grace_seconds=self.config.schedule_grace_seconds
+        )
+
+    def run_automation_cycle(self, tick: Optional[float] = None):
+        """Run a single automation cycle
+
+        With a scheduler ``tick`` (epoch seconds) only the strategies whose bar
+        has closed are executed; without one every active strategy runs.
+        """
         self.logger.info("Starting automation cycle")
 
+        profiler = self.slow_cycle_profiler.cycle() if self.slow_cycle_profiler else contextlib.nullcontext()
+        with profiler, metrics.CYCLE_SECONDS.time():
+            self.run_cycle_stages(tick)
+
+        self.export_metrics()
+        self.upload_journal()
+
+    def run_cycle_stages(self, tick: Optional[float] = None):
+        """Connect, fetch, schedule, prefetch and execute for one cycle"""
         try:
-            # Connect to Angel One if not connected
-            if not self.smart_api or not self.session_token:
-                if not self.connect_to_angel_one():
-                    self.logger.error("Failed to connect to Angel One. Skipping cycle.")
-                    return
+            # Connect to Angel One (reuses the live session when still valid)
+            with metrics.span('angel_login'):
+                connected = self.connect_to_angel_one()
+            if not connected:
+                self.logger.error("Failed to connect to Angel One. Skipping cycle.")
+                return
+
+            # Daily scrip master refresh (a no-op once today's index exists)
+            with metrics.span('refresh_instruments'):
+                self.refresh_instruments()
 
             # Fetch active strategies
-            strategies = self.fetch_active_strategies()
+            with metrics.span('fetch_strategies'):
+                strategies = self.fetch_active_strategies()
 
             if not strategies:
                 self.logger.info("No active strategies found")
                 return
 
-            # Execute each strategy
-            success_count = 0
-            for strategy in strategies:
-                if self.execute_strategy(strategy):
-                    success_count += 1
+            self.active_strategies = strategies
+            if self.shard is not None:
+                strategies = self.shard.owned(strategies)
+            if tick is not None and self.scheduler is not None:
+                strategies = self.scheduler.due(strategies, tick)
+                if not strategies:
+                    self.logger.info("No strategies due this tick")
+                    return
+
+            run_keys = None
+            if self.shard is not None:
+                run_keys = self.run_keys(strategies, tick)
+                leased_at = time.monotonic()
+                with metrics.span('acquire_leases'):
+                    strategies = self.shard.acquire(strategies, run_keys)
+                if not strategies:
+                    self.logger.info("No strategies leased to this runner")
+                    return
+
+            # Refresh shared market data once for all strategies
+            with metrics.span('prefetch_candles'):
+                self.prefetch_candles(strategies)
+            with metrics.span('aggregate_candles'):
+                self.aggregate_candles(strategies)
+            with metrics.span('fetch_quotes'):
+                self.fetch_quotes(strategies)
+
+            # Execute strategies within the cycle deadline
+            deadline = None
+            if self.config.cycle_deadline > 0:
+                deadline = time.monotonic() + self.config.cycle_deadline
+            if run_keys is not None:
+                # Nothing may still be running once the leases taken above could have expired
+                lease_end = leased_at + self.shard.lease_seconds
+                deadline = lease_end if deadline is None else min(deadline, lease_end)
+
+            self.leases = run_keys
+            if self.account_pool is not None:
+                # On a failed sync keep trading on the last known accounts
+                self.sync_accounts()
+                results = self.execute_account_strategies(strategies, deadline)
+            else:
+                results = self.execute_strategies(strategies, deadline)
+            success_count = sum(1 for result in results if result)
+
+            # Net the cycle's held orders and wait for everything routed to settle
+            with metrics.span('net_orders'):
+                self.settle_orders()
 
-                # Small delay between strategies
-                time.sleep(2)
+            if run_keys is not None:
+                self.leases = None
+                self.shard.complete(strategies, self.completed_run_keys(run_keys))
 
-            self.logger.info(f"Automation cycle completed. {success_count}/{len(strategies)} strategies executed successfully")
+            self.logger.info(f"Automation cycle completed. {success_count}/{len(results)} strategy runs executed successfully")
 
         except Exception as e:
             self.logger.error(f"Error in automation cycle: {e}")
 
+    def settle_orders(self):
+        """Route the orders held for netting and wait for this cycle's orders"""
+        self.risk_book.flush()
+        self.risk_book.wait(self.config.order_wait_timeout)
+        self.logger.debug(f"Strategy attribution: {self.risk_book.attribution()}")
+
+    def export_metrics(self):
+        """Write the metrics textfile, if configured"""
+        if not self.config.metrics_file:
+            return
+        try:
+            metrics.write_textfile(self.config.metrics_file)
+        except OSError as e:
+            self.logger.warning(f"Failed to write metrics file: {e}")
+
+    def upload_journal(self):
+        """Ship new journal records to Laravel and prune old uploaded ones"""
+        if self.journal_uploader is None:
+            return
+        try:
+            with metrics.span('upload_journal'):
+                self.journal_uploader.upload()
+        except requests.RequestException as e:
+            # Records stay pending and go out with the next cycle
+            self.logger.warning(f"Failed to upload execution journal: {e}")
+
+        self.journal.prune(time.time() - self.config.journal_retention_days * 86400)
+
+    def fetch_trigger_quotes(self, instruments: List[Tuple[str, str, str]]) -> List[Tuple[str, str, float]]:
+        """Last traded prices for the instruments with open brackets"""
+        snapshot = self.quote_coalescer.fetch(((exchange, token) for exchange, token, _ in instruments), MODE_LTP)
+        return [(quote.exchange, quote.token, quote.ltp) for quote in snapshot]
+
+    def on_replayed_ticks(self, feed: TickReplay, ticks) -> None:
+        self.trigger_monitor.on_quotes(quotes_from_ticks(ticks))
+        if self.candle_aggregator is not None:
+            self.candle_aggregator.on_ticks(ticks)
+
+    def start_tick_replay(self) -> TickReplay:
+        """Feed the trigger monitor from a tick recording instead of quote polls"""
+        feed = TickReplay(self.config.tick_replay_file, speed=self.config.tick_replay_speed)
+        feed.on_open = lambda ws: ws.subscribe('triggers', LTP_MODE, feed.tick_file.token_list())
+        feed.on_ticks = self.on_replayed_ticks
+        feed.on_error = lambda ws, error: self.logger.error(f"Tick replay callback failed: {error}")
+        feed.on_close = lambda ws: self.logger.info(f"Tick replay finished after {ws.replayed} ticks")
+        pace = f"{self.config.tick_replay_speed:g}x speed" if self.config.tick_replay_speed > 0 else 'maximum speed'
+        self.logger.info(f"Replaying {len(feed.tick_file)} recorded ticks from {self.config.tick_replay_file} "
+                         f"at {pace}")
+        feed.start()
+        return feed
+
     def run_continuous(self, interval_minutes: int = 15):
-        """Run automation continuously with specified interval"""
-        self.logger.info(f"Starting continuous automation (interval: {interval_minutes} minutes)")
+        """Run automation continuously on market-hours candle boundaries
+
+        ``interval_minutes`` is the default cadence for strategies that do
+        not set their own ``interval_minutes``/``interval`` parameter.
+        """
+        self.logger.info(f"Starting continuous automation (default interval: {interval_minutes} minutes)")
+
+        self.scheduler = self.build_scheduler(interval_minutes)
+
+        # Keep the Angel One session fresh between cycles
+        self.session_manager.start_background_refresh()
+
+        # Keep this runner's shard membership alive between cycles
+        if self.shard is not None:
+            self.shard.start()
+
+        # Watch stop-loss / take-profit levels between cycles
+        if self.config.tick_replay_file:
+            self.tick_replay = self.start_tick_replay()
+        elif self.config.trigger_poll_seconds > 0:
+            self.trigger_monitor.start(self.fetch_trigger_quotes, self.config.trigger_poll_seconds)
+
+        # Close bars of symbols that stopped trading (a replay's own clock does this for it)
+        if self.candle_aggregator is not None and not self.config.tick_replay_file:
+            self.candle_aggregator.start()
 
         while True:
             try:
-                self.run_automation_cycle()
+                self.run_automation_cycle(time.time())
 
-                # Wait for next cycle
-                self.logger.info(f"Waiting {interval_minutes} minutes for next cycle...")
-                time.sleep(interval_minutes * 60)
+                # Sleep until the next absolute boundary so cycles never drift
+                wakeup = self.scheduler.next_wakeup(self.active_strategies, time.time())
+                next_cycle = datetime.fromtimestamp(wakeup, IST)
+                self.logger.info(f"Next cycle at {next_cycle:%Y-%m-%d %H:%M} IST")
+                time.sleep(max(0.0, wakeup + self.config.schedule_offset_seconds - time.time()))
 
             except KeyboardInterrupt:
                 self.logger.info("Automation stopped by user")
+                self.trigger_monitor.stop()
+                if self.tick_replay is not None:
+                    self.tick_replay.close_connection()
+                if self.candle_aggregator is not None:
+                    self.candle_aggregator.stop()
+                if self.shard is not None:
+                    self.shard.stop()
                 break
             except Exception as e:
                 self.logger.error(f"Unexpected error in continuous loop: {e}")
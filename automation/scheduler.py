@@ -0,0 +1,181 @@
+"""
+Smart Hedge - Market-Hours Scheduler
+====================================
+
+Drift-free scheduling of strategy runs on candle boundaries.
+
+- Ticks are computed as absolute times aligned to the session open
+  (09:15 IST), so a 5-minute strategy fires at 09:20, 09:25, ... and a
+  15-minute one at 09:30, 09:45, ... right when each bar closes, no matter
+  how long the previous cycle took.
+- Every strategy may set its own cadence through its params
+  (``interval_minutes`` or an Angel ``interval`` name such as
+  ``FIVE_MINUTE``); others use the runner's default interval.
+- Weekends, exchange holidays and closed sessions are skipped.
+- When the runner falls behind, missed ticks are either caught up with a
+  single immediate run (``catchup``) or skipped explicitly (``skip``).
+"""
+
+import json
+import logging
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+# Angel One interval names expressed in minutes
+INTERVAL_MINUTES = {
+    'ONE_MINUTE': 1,
+    'THREE_MINUTE': 3,
+    'FIVE_MINUTE': 5,
+    'TEN_MINUTE': 10,
+    'FIFTEEN_MINUTE': 15,
+    'THIRTY_MINUTE': 30,
+    'ONE_HOUR': 60,
+    'ONE_DAY': 375,  # One full NSE session: fires once at the close
+}
+
+MISSED_CATCHUP, MISSED_SKIP = 'catchup', 'skip'
+
+
+class MarketCalendar:
+    """NSE trading days and session hours"""
+
+    def __init__(self, holidays: Optional[Iterable[date]] = None,
+                 open_time: dtime = dtime(9, 15), close_time: dtime = dtime(15, 30)):
+        self.holidays: Set[date] = set(holidays or [])
+        self.open_time = open_time
+        self.close_time = close_time
+
+    @classmethod
+    def from_file(cls, path: str) -> 'MarketCalendar':
+        """Load holidays from a JSON list or one ``YYYY-MM-DD`` per line"""
+        text = Path(path).read_text()
+        try:
+            entries = json.loads(text)
+        except json.JSONDecodeError:
+            entries = [line.split('#')[0].strip() for line in text.splitlines()]
+        return cls(date.fromisoformat(entry) for entry in entries if entry)
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+    def session(self, day: date):
+        """(open, close) datetimes for a day in IST"""
+        return (datetime.combine(day, self.open_time, IST), datetime.combine(day, self.close_time, IST))
+
+    def trading_days_from(self, day: date):
+        """Trading days starting at ``day``"""
+        while True:
+            if self.is_trading_day(day):
+                yield day
+            day += timedelta(days=1)
+
+
+class Scheduler:
+    """Decides which strategies are due and when the runner should wake"""
+
+    def __init__(self, calendar: MarketCalendar, default_interval: int = 15,
+                 missed_policy: str = MISSED_SKIP, grace_seconds: int = 60):
+        if missed_policy not in (MISSED_CATCHUP, MISSED_SKIP):
+            raise ValueError(f"Unknown missed tick policy: {missed_policy}")
+
+        self.calendar = calendar
+        self.default_interval = default_interval
+        self.missed_policy = missed_policy
+        self.grace_seconds = grace_seconds
+        self.last_tick: Dict[Any, float] = {}  # strategy id -> last boundary it ran for
+        self.pending: Dict[Any, float] = {}  # strategy id -> boundary it is due for, until it has run
+
+    def interval_for(self, strategy: Dict[str, Any]) -> int:
+        """Cadence in minutes from the strategy params, or the default"""
+        params = strategy.get('parameters') or {}
+        if isinstance(params, dict):
+            if params.get('interval_minutes'):
+                return max(1, int(params['interval_minutes']))
+            if params.get('interval') in INTERVAL_MINUTES:
+                return INTERVAL_MINUTES[params['interval']]
+        return self.default_interval
+
+    def latest_boundary(self, interval: int, now: float) -> Optional[float]:
+        """Most recent bar close at or before ``now`` (epoch seconds)
+
+        The session close always counts as a boundary, so a final partial
+        bar (e.g. 15:15-15:30 for hourly bars) still closes on time.
+        """
+        moment = datetime.fromtimestamp(now, IST)
+        day = moment.date()
+
+        for _ in range(15):  # Look back over weekends and holiday runs
+            if self.calendar.is_trading_day(day):
+                session_open, session_close = self.calendar.session(day)
+                if moment >= session_close:
+                    return session_close.timestamp()
+                if moment >= session_open + timedelta(minutes=interval):
+                    bars = int((moment - session_open).total_seconds() // (interval * 60))
+                    return (session_open + timedelta(minutes=bars * interval)).timestamp()
+            day -= timedelta(days=1)
+            moment = datetime.combine(day, dtime(23, 59, 59), IST)
+        return None
+
+    def next_boundary(self, interval: int, now: float) -> float:
+        """First bar close strictly after ``now``"""
+        moment = datetime.fromtimestamp(now, IST)
+        for day in self.calendar.trading_days_from(moment.date()):
+            session_open, session_close = self.calendar.session(day)
+            step = timedelta(minutes=interval)
+            candidate = session_open + step
+            if moment > session_open:
+                bars = int((moment - session_open).total_seconds() // step.total_seconds()) + 1
+                candidate = session_open + bars * step
+            if candidate > session_close and moment < session_close:
+                candidate = session_close
+            if candidate <= session_close and candidate > moment:
+                return candidate.timestamp()
+        raise RuntimeError("No trading session found")  # pragma: no cover - generator is unbounded
+
+    def next_wakeup(self, strategies: List[Dict[str, Any]], now: float) -> float:
+        """Earliest boundary any strategy (or the default cadence) is waiting for"""
+        intervals = {self.interval_for(strategy) for strategy in strategies} or {self.default_interval}
+        return min(self.next_boundary(interval, now) for interval in intervals)
+
+    def due(self, strategies: List[Dict[str, Any]], now: float) -> List[Dict[str, Any]]:
+        """Strategies whose bar has closed since they last ran
+
+        A due bar is only marked as run by ``record``, so a run that fails,
+        loses its lease or hits the deadline is due again on the next tick.
+        """
+        due = []
+        for strategy in strategies:
+            boundary = self.latest_boundary(self.interval_for(strategy), now)
+            if boundary is None:
+                continue
+
+            last = self.last_tick.get(strategy['id'])
+            if last is not None and boundary <= last:
+                continue
+
+            if now - boundary > self.grace_seconds:
+                when = f"{datetime.fromtimestamp(boundary, IST):%Y-%m-%d %H:%M}"
+                # A missed bar is only caught up while its session is still trading
+                session_close = self.calendar.session(datetime.fromtimestamp(boundary, IST).date())[1]
+                if self.missed_policy == MISSED_SKIP or now > session_close.timestamp():
+                    logger.warning(f"Skipping missed tick for strategy {strategy.get('name')} at {when}")
+                    self.last_tick[strategy['id']] = boundary
+                    self.pending.pop(strategy['id'], None)
+                    continue
+                logger.info(f"Catching up missed tick for strategy {strategy.get('name')} at {when}")
+
+            self.pending[strategy['id']] = boundary
+            due.append(strategy)
+
+        return due
+
+    def record(self, strategy_id: Any) -> None:
+        """Mark the bar a strategy was due for as run"""
+        boundary = self.pending.pop(strategy_id, None)
+        if boundary is not None:
+            self.last_tick[strategy_id] = max(boundary, self.last_tick.get(strategy_id, boundary))
@@ -0,0 +1,375 @@
+"""
+Smart Hedge - Angel One Session Manager
+=======================================
+
+Keeps one live Angel One SmartAPI session for the runner and every strategy
+it executes.
+
+- Sessions (JWT, refresh and feed tokens plus expiry) are persisted to an
+  encrypted local cache, so ``--once`` cron invocations reuse the previous
+  login instead of doing a full ``generateSession`` + TOTP round trip.
+- A background thread refreshes the JWT with the refresh token shortly
+  before it expires, keeping logins off the cycle's critical path. Broker
+  calls, in the background or not, are made without holding the session
+  lock, and a session the broker rejects is renewed on the next use.
+- A full login is only performed when no usable session or refresh token
+  exists.
+- Accounts without MPIN/TOTP credentials (e.g. user accounts stored by the
+  Laravel app) can be ``seed``-ed with existing tokens; they are refreshed
+  with the refresh token but never logged in from scratch.
+
+Encryption uses ``cryptography`` (Fernet). Without it the cache is disabled
+and the manager still works, logging in once per process.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
+
+import pyotp
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:
+    Fernet = None
+    InvalidToken = Exception
+
+logger = logging.getLogger(__name__)
+
+# Angel One sessions end at midnight IST when the JWT carries no expiry
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def strip_bearer(token: str) -> str:
+    """Remove the 'Bearer ' prefix SmartConnect adds to JWTs"""
+    return token[7:] if token and token.startswith('Bearer ') else token
+
+
+def jwt_expiry(token: str) -> Optional[float]:
+    """Read the ``exp`` claim from a JWT without verifying it"""
+    try:
+        payload = strip_bearer(token).split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except (IndexError, KeyError, ValueError, TypeError):
+        return None
+
+
+def next_session_end(now: Optional[float] = None) -> float:
+    """Epoch of the next midnight IST"""
+    current = datetime.fromtimestamp(now if now is not None else time.time(), IST)
+    midnight = (current + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight.timestamp()
+
+
+@dataclass
+class AngelSession:
+    """Tokens for a logged-in Angel One session"""
+    client_id: str
+    jwt_token: str
+    refresh_token: str
+    feed_token: str
+    expires_at: float
+
+    def expires_within(self, seconds: float) -> bool:
+        return time.time() + seconds >= self.expires_at
+
+
+class SessionCache:
+    """Encrypted on-disk store for a single session"""
+
+    def __init__(self, path: Path, secret: str, salt: str):
+        self.path = Path(path)
+        self._fernet = None
+
+        if Fernet is None:
+            logger.warning("cryptography not installed; Angel One session cache disabled")
+            return
+
+        key = hashlib.pbkdf2_hmac('sha256', secret.encode(), salt.encode(), 100_000)
+        self._fernet = Fernet(base64.urlsafe_b64encode(key))
+
+    @property
+    def enabled(self) -> bool:
+        return self._fernet is not None
+
+    def load(self) -> Optional[AngelSession]:
+        if not self.enabled or not self.path.exists():
+            return None
+        try:
+            data = json.loads(self._fernet.decrypt(self.path.read_bytes()))
+            return AngelSession(**data)
+        except (InvalidToken, ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable session cache: {e}")
+            return None
+
+    def save(self, session: AngelSession) -> None:
+        if not self.enabled:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(self._fernet.encrypt(json.dumps(asdict(session)).encode()))
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if self.path.exists():
+            self.path.unlink()
+
+
+class AngelSessionManager:
+    """Owns the shared SmartConnect session and keeps it fresh"""
+
+    def __init__(self, api_key: str, client_id: str, mpin: str, totp_secret: str,
+                 smart_connect_factory: Callable[..., Any], cache: Optional[SessionCache] = None,
+                 refresh_margin: int = 600, retry_delay: int = 5,
+                 on_session: Optional[Callable[[AngelSession], None]] = None):
+        self.api_key = api_key
+        self.client_id = client_id
+        self.mpin = mpin
+        self.totp_secret = totp_secret
+        self.smart_connect_factory = smart_connect_factory
+        self.cache = cache
+        self.refresh_margin = refresh_margin
+        self.retry_delay = retry_delay
+        self.on_session = on_session  # Called with every new or refreshed session
+
+        self.session: Optional[AngelSession] = None
+        self.smart_api = None
+
+        self._lock = threading.RLock()
+        self._renewing = threading.Lock()  # serialises broker renewals; always taken before _lock
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    @property
+    def session_token(self) -> Optional[str]:
+        return self.session.jwt_token if self.session else None
+
+    def get_session(self):
+        """Return a live SmartConnect, restoring, refreshing or logging in as needed"""
+        with self._lock:
+            if self.session is None:
+                self._restore()
+
+            if self.session is not None and not self.session.expires_within(self.refresh_margin):
+                return self.smart_api
+
+            refresher_running = self._refresher is not None and self._refresher.is_alive()
+            if refresher_running and self.session is not None and not self.session.expires_within(0):
+                # Still valid: refresh in the background rather than block the caller
+                self._wake.set()
+                return self.smart_api
+
+        self._renew()
+        return self.smart_api
+
+    def seed(self, jwt_token: str, refresh_token: str = '', feed_token: str = '',
+             expires_at: Optional[float] = None) -> None:
+        """Adopt tokens obtained elsewhere instead of logging in"""
+        with self._lock:
+            jwt_token = strip_bearer(jwt_token)
+            self.session = AngelSession(
+                client_id=self.client_id,
+                jwt_token=jwt_token,
+                refresh_token=refresh_token or '',
+                feed_token=feed_token or '',
+                expires_at=expires_at or jwt_expiry(jwt_token) or next_session_end()
+            )
+            self.smart_api = self.smart_connect_factory(
+                api_key=self.api_key,
+                access_token=jwt_token,
+                refresh_token=self.session.refresh_token,
+                feed_token=self.session.feed_token,
+                userId=self.client_id
+            )
+
+    def login(self) -> AngelSession:
+        """Full login with MPIN and TOTP"""
+        with self._renewing:
+            renewed = self._request_login()
+            with self._lock:
+                self._activate(*renewed)
+        logger.info("Angel One login successful")
+        return self.session
+
+    def refresh(self) -> bool:
+        """Renew the JWT using the refresh token"""
+        with self._renewing:
+            with self._lock:
+                session, smart_api = self.session, self.smart_api
+            renewed = self._request_refresh(session, smart_api)
+            if renewed is None:
+                return False
+            with self._lock:
+                self._activate(*renewed)
+        logger.info("Angel One session refreshed")
+        return True
+
+    def invalidate(self) -> None:
+        """Treat the current session as expired, e.g. after the broker rejects its token
+
+        The refresh token is kept, so the next ``get_session`` (or the
+        background refresh, woken here) renews with it before logging in.
+        """
+        with self._lock:
+            if self.session is not None and not self.session.expires_within(0):
+                logger.warning(f"Angel One rejected the session for {self.client_id}; renewing it")
+                self.session = replace(self.session, expires_at=0)
+            if self.cache:
+                self.cache.clear()
+        self._wake.set()
+
+    def start_background_refresh(self) -> None:
+        """Refresh the session shortly before it expires, off the caller's thread"""
+        if self._refresher and self._refresher.is_alive():
+            return
+
+        self._stop.clear()
+        self._refresher = threading.Thread(target=self._refresh_loop, name='angel-session-refresh', daemon=True)
+        self._refresher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                session = self.session
+
+            if session is None:
+                delay = self.retry_delay
+            else:
+                delay = max(0.0, session.expires_at - self.refresh_margin - time.time())
+
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+
+            with self._lock:
+                session, smart_api = self.session, self.smart_api
+            if session is None or not session.expires_within(self.refresh_margin):
+                continue
+
+            try:
+                self._renew(session)
+            except Exception as e:
+                logger.error(f"Background session refresh failed: {e}")
+                self._stop.wait(self.retry_delay)
+
+    def _restore(self) -> None:
+        if not self.cache:
+            return
+
+        session = self.cache.load()
+        if session is None or session.client_id != self.client_id or session.expires_within(0):
+            return
+
+        self.session = session
+        self.smart_api = self.smart_connect_factory(
+            api_key=self.api_key,
+            access_token=session.jwt_token,
+            refresh_token=session.refresh_token,
+            feed_token=session.feed_token,
+            userId=self.client_id
+        )
+        logger.info("Restored Angel One session from cache")
+
+    def _renew(self, session: Optional[AngelSession] = None) -> bool:
+        """Refresh or log in, talking to the broker without holding the lock
+
+        Callers keep reading the current session meanwhile; concurrent
+        renewals are serialised so the broker sees one at a time. Returns
+        False when the session was already renewed by someone else.
+        """
+        with self._renewing:
+            with self._lock:
+                if session is not None and self.session is not session:
+                    # Refreshed, re-seeded or invalidated meanwhile
+                    return False
+                session, smart_api = self.session, self.smart_api
+                if session is not None and not session.expires_within(self.refresh_margin):
+                    return False
+
+            renewed = self._request_refresh(session, smart_api) or self._request_login()
+
+            with self._lock:
+                self._activate(*renewed)
+        logger.info("Angel One session renewed")
+        return True
+
+    def _request_refresh(self, session: Optional[AngelSession], smart_api) -> Optional[Tuple[Any, dict]]:
+        """Ask the broker for a new JWT; needs no lock"""
+        if not session or not session.refresh_token:
+            return None
+
+        try:
+            if smart_api is None:
+                smart_api = self.smart_connect_factory(api_key=self.api_key)
+            response = smart_api.generateToken(session.refresh_token)
+        except Exception as e:
+            logger.warning(f"Angel One token refresh failed: {e}")
+            return None
+
+        if not response or not response.get('status'):
+            logger.warning(f"Angel One token refresh rejected: {response}")
+            return None
+
+        return smart_api, response['data']
+
+    def _request_login(self) -> Tuple[Any, dict]:
+        """Full login with MPIN and TOTP; needs no lock"""
+        if not self.mpin or not self.totp_secret:
+            raise ConnectionError(f"Angel One session for {self.client_id} expired and no login credentials are set")
+
+        logger.info("Logging in to Angel One SmartAPI...")
+        smart_api = self.smart_connect_factory(api_key=self.api_key)
+        response = smart_api.generateSession(
+            clientCode=self.client_id,
+            password=self.mpin,
+            totp=pyotp.TOTP(self.totp_secret).now()
+        )
+
+        if not response or not response.get('status'):
+            raise ConnectionError(f"Angel One login failed: {response}")
+
+        return smart_api, response['data']
+
+    def _activate(self, smart_api, data: dict) -> None:
+        jwt_token = strip_bearer(data['jwtToken'])
+        refresh_token = data.get('refreshToken') or (self.session.refresh_token if self.session else '')
+        feed_token = data.get('feedToken') or (self.session.feed_token if self.session else '')
+
+        self.smart_api = smart_api
+        self.session = AngelSession(
+            client_id=self.client_id,
+            jwt_token=jwt_token,
+            refresh_token=refresh_token,
+            feed_token=feed_token,
+            expires_at=jwt_expiry(jwt_token) or next_session_end()
+        )
+
+        if self.cache:
+            self.cache.save(self.session)
+
+        if self.on_session:
+            try:
+                self.on_session(self.session)
+            except Exception as e:
+                logger.warning(f"Session update callback failed: {e}")
+
+        # Let the background thread reschedule around the new expiry
+        self._wake.set()
@@ -0,0 +1,304 @@
+"""
+Smart Hedge - Sharded Runners
+=============================
+
+Spreads strategies over several runner instances without running any of
+them twice.
+
+- Every runner heartbeats into a shared lease store. Runners whose
+  heartbeat is older than the node TTL are considered dead.
+- Strategies are assigned to the live runners with a consistent hash ring
+  on the strategy id, so a runner joining or leaving moves only about
+  1/N of the strategies.
+- Before executing a strategy a runner takes a time-limited lease on it.
+  The lease is granted only if no other runner holds an unexpired lease and
+  the strategy has not already run for the same bar (``run_key``). While the
+  ring converges after a membership change, two runners may briefly both
+  consider themselves the owner; the lease makes sure only one executes.
+- Each lease is renewed right before its strategy is dispatched, so a long
+  cycle never runs a strategy on a lease that has already expired, and the
+  cycle itself is cut off at the lease length.
+- After the run the lease is released and, if the run succeeded, the bar
+  recorded, so when a runner dies its strategies move to the survivors as
+  soon as its heartbeat expires. A runner that dies mid-run blocks its
+  strategies only until the lease expires.
+
+Two stores are provided: ``LaravelLeaseStore`` (the Laravel database, via
+``/runners`` and ``/leases`` endpoints) and ``SQLiteLeaseStore`` (a shared
+file, for runners on one host and for tests).
+"""
+
+import bisect
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Virtual nodes per runner on the hash ring
+DEFAULT_REPLICAS = 64
+
+
+def _point(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes"""
+
+    def __init__(self, nodes: Iterable[str], replicas: int = DEFAULT_REPLICAS):
+        self.nodes = tuple(sorted(set(nodes)))
+        ring = sorted((_point(f"{node}#{replica}"), node) for node in self.nodes for replica in range(replicas))
+        self._points = [point for point, _ in ring]
+        self._owners = [node for _, node in ring]
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def owner(self, key: Any) -> Optional[str]:
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, _point(str(key))) % len(self._points)
+        return self._owners[index]
+
+
+class SQLiteLeaseStore:
+    """Lease store in a SQLite file shared by runners on one host"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS runner_nodes (node_id TEXT PRIMARY KEY, expires_at REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS strategy_leases (
+                strategy_id TEXT PRIMARY KEY,
+                holder TEXT,
+                token TEXT,
+                expires_at REAL,
+                last_run_key TEXT
+            );
+        """)
+
+    def heartbeat(self, node_id: str, ttl: float) -> List[str]:
+        """Renew a runner's liveness; returns the live runners"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("INSERT INTO runner_nodes (node_id, expires_at) VALUES (?, ?) "
+                         "ON CONFLICT(node_id) DO UPDATE SET expires_at = excluded.expires_at", (node_id, now + ttl))
+            conn.execute("DELETE FROM runner_nodes WHERE expires_at < ?", (now - 3600,))
+            rows = conn.execute("SELECT node_id FROM runner_nodes WHERE expires_at >= ? ORDER BY node_id", (now,))
+            return [row[0] for row in rows]
+
+    def acquire(self, node_id: str, leases: Dict[Any, Optional[str]], ttl: float) -> Set[str]:
+        """Lease strategies (id -> run key) to a runner; returns the granted ids as strings"""
+        if not leases:
+            return set()
+        now, token = time.time(), uuid.uuid4().hex
+        by_run_key = defaultdict(list)
+        for strategy_id, run_key in leases.items():
+            by_run_key[run_key].append(str(strategy_id))
+
+        with self._transaction() as conn:
+            conn.executemany("INSERT OR IGNORE INTO strategy_leases (strategy_id) VALUES (?)",
+                             [(str(strategy_id),) for strategy_id in leases])
+            for run_key, ids in by_run_key.items():
+                placeholders = ','.join('?' * len(ids))
+                conn.execute(
+                    f"UPDATE strategy_leases SET holder = ?, token = ?, expires_at = ? "
+                    f"WHERE strategy_id IN ({placeholders}) "
+                    f"AND (holder IS NULL OR holder = ? OR expires_at < ?) "
+                    f"AND (? IS NULL OR last_run_key IS NULL OR last_run_key != ?)",
+                    [node_id, token, now + ttl, *ids, node_id, now, run_key, run_key])
+            rows = conn.execute("SELECT strategy_id FROM strategy_leases WHERE token = ?", (token,))
+            return {row[0] for row in rows}
+
+    def complete(self, node_id: str, leases: Dict[Any, Optional[str]]) -> None:
+        """Release leases after a run, recording the bar each strategy ran for"""
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE strategy_leases SET holder = NULL, token = NULL, expires_at = NULL, "
+                "last_run_key = COALESCE(?, last_run_key) WHERE strategy_id = ? AND holder = ?",
+                [(run_key, str(strategy_id), node_id) for strategy_id, run_key in leases.items()])
+
+    def leave(self, node_id: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM runner_nodes WHERE node_id = ?", (node_id,))
+            conn.execute("UPDATE strategy_leases SET holder = NULL, token = NULL, expires_at = NULL "
+                         "WHERE holder = ?", (node_id,))
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def _transaction(self):
+        return _Transaction(self._conn, self._lock)
+
+
+class _Transaction:
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock):
+        self.conn = conn
+        self.lock = lock
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.lock.acquire()
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, *exc):
+        try:
+            self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            self.lock.release()
+
+
+class LaravelLeaseStore:
+    """Lease store in the Laravel database; expiry uses the server's clock"""
+
+    def __init__(self, base_url: str, api_token: str, timeout: float = 5):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Authorization': f'Bearer {api_token}',
+            'Accept': 'application/json'
+        })
+
+    def heartbeat(self, node_id: str, ttl: float) -> List[str]:
+        return self._post('runners/heartbeat', {'node_id': node_id, 'ttl': ttl})['nodes']
+
+    def acquire(self, node_id: str, leases: Dict[Any, Optional[str]], ttl: float) -> Set[str]:
+        if not leases:
+            return set()
+        payload = {'node_id': node_id, 'ttl': ttl, 'leases': self._leases(leases)}
+        return {str(strategy_id) for strategy_id in self._post('leases/acquire', payload)['granted']}
+
+    def complete(self, node_id: str, leases: Dict[Any, Optional[str]]) -> None:
+        if leases:
+            self._post('leases/complete', {'node_id': node_id, 'leases': self._leases(leases)})
+
+    def leave(self, node_id: str) -> None:
+        self._post('runners/leave', {'node_id': node_id})
+
+    @staticmethod
+    def _leases(leases: Dict[Any, Optional[str]]) -> List[Dict[str, Any]]:
+        return [{'strategy_id': strategy_id, 'run_key': run_key} for strategy_id, run_key in leases.items()]
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.session.post(f"{self.base_url}/{path}", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+
+class ShardCoordinator:
+    """One runner's view of the shard: membership, ownership and leases"""
+
+    def __init__(self, store, node_id: str, node_ttl: float = 10, lease_seconds: float = 360,
+                 replicas: int = DEFAULT_REPLICAS):
+        self.store = store
+        self.node_id = node_id
+        self.node_ttl = node_ttl
+        self.lease_seconds = lease_seconds
+        self.replicas = replicas
+        self.ring = HashRing([], replicas)
+        self._refreshed = 0.0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def heartbeat(self) -> HashRing:
+        """Renew this runner's liveness and rebuild the ring if membership changed"""
+        nodes = self.store.heartbeat(self.node_id, self.node_ttl)
+        with self._lock:
+            if tuple(sorted(set(nodes) | {self.node_id})) != self.ring.nodes:
+                self.ring = HashRing(set(nodes) | {self.node_id}, self.replicas)
+                logger.info(f"Shard membership: {', '.join(self.ring.nodes)}")
+            self._refreshed = time.monotonic()
+            return self.ring
+
+    def start(self) -> None:
+        """Heartbeat in the background every third of the node TTL"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._beat, name='shard-heartbeat', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop heartbeating and hand this runner's strategies over immediately"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        try:
+            self.store.leave(self.node_id)
+        except Exception as e:
+            logger.warning(f"Failed to leave the shard: {e}")
+
+    def owned(self, strategies: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Strategies this runner owns on the current ring"""
+        with self._lock:
+            ring, stale = self.ring, time.monotonic() - self._refreshed > self.node_ttl / 2
+        if stale or not len(ring):
+            try:
+                ring = self.heartbeat()
+            except Exception as e:
+                # Without a fresh membership view nothing is safe to claim
+                logger.error(f"Shard heartbeat failed: {e}")
+                return []
+        return [strategy for strategy in strategies if ring.owner(strategy['id']) == self.node_id]
+
+    def acquire(self, strategies: Sequence[Dict[str, Any]],
+                run_keys: Dict[Any, Optional[str]]) -> List[Dict[str, Any]]:
+        """Lease strategies for this run; returns those granted"""
+        if not strategies:
+            return []
+        try:
+            granted = self.store.acquire(
+                self.node_id, {strategy['id']: run_keys.get(strategy['id']) for strategy in strategies},
+                self.lease_seconds)
+        except Exception as e:
+            logger.error(f"Failed to acquire strategy leases: {e}")
+            return []
+
+        leased = [strategy for strategy in strategies if str(strategy['id']) in granted]
+        if len(leased) < len(strategies):
+            logger.info(f"{len(strategies) - len(leased)} strategies leased by another runner or already run")
+        return leased
+
+    def renew(self, strategy: Dict[str, Any], run_key: Optional[str]) -> bool:
+        """Extend this runner's lease on a strategy right before running it
+
+        Returns False when the lease was lost (expired and taken by another
+        runner, or the bar already recorded), in which case it must not run.
+        """
+        try:
+            granted = self.store.acquire(self.node_id, {strategy['id']: run_key}, self.lease_seconds)
+        except Exception as e:
+            logger.error(f"Failed to renew the lease on strategy {strategy['id']}: {e}")
+            return False
+        return str(strategy['id']) in granted
+
+    def complete(self, strategies: Sequence[Dict[str, Any]], run_keys: Dict[Any, Optional[str]]) -> None:
+        """Release this run's leases; unreleased leases expire on their own"""
+        try:
+            self.store.complete(self.node_id, {strategy['id']: run_keys.get(strategy['id'])
+                                               for strategy in strategies})
+        except Exception as e:
+            logger.warning(f"Failed to release strategy leases: {e}")
+
+    def _beat(self) -> None:
+        while True:
+            try:
+                self.heartbeat()
+            except Exception as e:
+                logger.warning(f"Shard heartbeat failed: {e}")
+            if self._stop.wait(self.node_ttl / 3):
+                break
@@ -7,35 +7,116 @@ This is a sample strategy that demonstrates how to integrate with
 the Smart Hedge automation system and Angel One SmartAPI.
 
 This example implements a simple moving average crossover strategy.
+
+It can run either as a standalone script (configured through environment
+variables) or warm inside the runner's plugin host via ``create_strategy``.
 """
 
 import os
 import sys
 import json
 import logging
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, Any, List
 
+# Shared candle cache and indicators from the runner (on PYTHONPATH when run by it)
+try:
+    from candle_store import CandleStore
+except ImportError:
+    CandleStore = None
+
+try:
+    import numpy as np
+    from indicators import crossover, sma
+except ImportError:
+    np = None
+
+try:
+    from streaming_indicators import CrossoverDetector, RollingSMA
+except ImportError:
+    CrossoverDetector = None
+
+try:
+    import strategy_protocol
+except ImportError:
+    strategy_protocol = None
+
+try:
+    import instruments
+except ImportError:
+    instruments = None
+
+try:
+    from quotes import QuoteSnapshot
+except ImportError:
+    QuoteSnapshot = None
+
+# Warm crossover state, kept alive by the runner's plugin host until it evicts
+# this module. Keyed on (strategy_id, exchange, symbol, interval,
+# short_ma_period, long_ma_period); the least recently used streams beyond
+# MAX_CROSSOVER_STREAMS are dropped, so renamed symbols or changed periods
+# do not pile up
+MAX_CROSSOVER_STREAMS = 256
+_crossover_streams: 'OrderedDict[tuple, CrossoverStream]' = OrderedDict()
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class CrossoverStream:
+    """Streaming crossover averages plus the last bar folded into them"""
+
+    def __init__(self, short_period: int, long_period: int):
+        self.detector = CrossoverDetector(RollingSMA(short_period), RollingSMA(long_period))
+        self.last_timestamp = None
+        self.signal = None
+
 class MovingAverageCrossoverStrategy:
     """Example strategy: Moving Average Crossover"""
 
-    def __init__(self):
-        # Get strategy parameters from environment
-        self.strategy_id = os.getenv('STRATEGY_ID')
-        self.strategy_name = os.getenv('STRATEGY_NAME')
-        self.parameters = json.loads(os.getenv('STRATEGY_PARAMETERS', '{}'))
-
-        # Angel One connection details
-        self.session_token = os.getenv('ANGEL_SESSION_TOKEN')
-        self.api_key = os.getenv('ANGEL_API_KEY')
-        self.client_id = os.getenv('ANGEL_CLIENT_ID')
+    def __init__(self, context=None):
+        if context is not None:
+            # Running inside the runner's plugin host
+            self.strategy_id = context.strategy_id
+            self.strategy_name = context.strategy_name
+            self.parameters = dict(context.parameters)
+
+            self.session_token = context.session_token
+            self.api_key = context.api_key
+            self.client_id = context.client_id
+            self.candle_store_dir = context.candle_store_dir
+            self.instrument_index_dir = context.instrument_index_dir
+            self.quotes = context.quotes
+            self.bars = context.bars
+            self.emit = context.emit
+            self.warm = True
+        else:
+            # Get strategy parameters from environment
+            self.strategy_id = os.getenv('STRATEGY_ID')
+            self.strategy_name = os.getenv('STRATEGY_NAME')
+            self.parameters = json.loads(os.getenv('STRATEGY_PARAMETERS', '{}'))
+
+            # Angel One connection details
+            self.session_token = os.getenv('ANGEL_SESSION_TOKEN')
+            self.api_key = os.getenv('ANGEL_API_KEY')
+            self.client_id = os.getenv('ANGEL_CLIENT_ID')
+            self.candle_store_dir = os.getenv('CANDLE_STORE_DIR', '')
+            self.instrument_index_dir = os.getenv('INSTRUMENT_INDEX_DIR', '')
+            quote_file = os.getenv('QUOTE_SNAPSHOT_FILE', '')
+            self.quotes = QuoteSnapshot.load(quote_file) if QuoteSnapshot is not None and quote_file else None
+            self.bars = None
+            self.emit = self.emit_to_runner if strategy_protocol is not None else None
+            self.warm = False
 
         logger.info(f"Initialized strategy: {self.strategy_name} (ID: {self.strategy_id})")
 
+    @staticmethod
+    def emit_to_runner(message: Dict[str, Any]) -> None:
+        """Send a message over stdout when running as a script"""
+        message = dict(message)
+        strategy_protocol.emit(message.pop('type'), **message)
+
     def get_strategy_parameters(self) -> Dict[str, Any]:
         """Extract and validate strategy parameters"""
         default_params = {
@@ -46,7 +127,9 @@ class MovingAverageCrossoverStrategy:
             'long_ma_period': 20,
             'max_position_size': 10000,
             'stop_loss_percent': 2.0,
-            'take_profit_percent': 4.0
+            'take_profit_percent': 4.0,
+            'interval': 'ONE_DAY',
+            'live_orders': False
         }
 
         # Merge with provided parameters
@@ -55,14 +138,19 @@ class MovingAverageCrossoverStrategy:
         logger.info(f"Strategy parameters: {params}")
         return params
 
-    def fetch_historical_data(self, symbol: str, exchange: str, days: int = 30) -> List[Dict]:
+    def fetch_historical_data(self, symbol: str, exchange: str, days: int = 30,
+                              interval: str = 'ONE_DAY') -> List[Dict]:
         """
         Fetch historical data for the symbol
-        Note: In production, this would use Angel One SmartAPI
-        For this example, we'll simulate data
+        Reads the runner's aggregated bars or shared candle cache when
+        available, otherwise falls back to simulated data
         """
         logger.info(f"Fetching historical data for {symbol} on {exchange}")
 
+        candles = self.load_candles(symbol, exchange, interval)
+        if candles is not None:
+            return candles.tail(days).to_records()
+
         # Simulated historical data (in production, use SmartAPI)
         # This would be replaced with actual API calls to Angel One
         simulated_data = []
@@ -84,11 +172,39 @@ class MovingAverageCrossoverStrategy:
 
         return simulated_data
 
+    def load_candles(self, symbol: str, exchange: str, interval: str):
+        """Real candles from the runner's aggregated bars or shared candle cache, or None"""
+        if self.bars is not None and interval in self.bars.timeframes:
+            candles = self.bars.candles(exchange, symbol, interval)
+            if candles is not None and len(candles) > 0:
+                return candles
+
+        if CandleStore is not None and self.candle_store_dir:
+            candles = CandleStore(self.candle_store_dir).read(exchange, symbol, interval)
+            if candles is not None and len(candles) > 0:
+                return candles
+
+        return None
+
+    def resolve_symbol_token(self, symbol: str, exchange: str) -> str:
+        """Symbol token from the runner's instrument index ('' when unavailable)"""
+        if instruments is None or not self.instrument_index_dir:
+            return ''
+        index = instruments.load(self.instrument_index_dir)
+        token = index.token(exchange, symbol) if index is not None else None
+        if token is None:
+            logger.warning(f"No instrument token found for {exchange}:{symbol}")
+        return token or ''
+
     def calculate_moving_average(self, data: List[Dict], period: int) -> List[float]:
         """Calculate simple moving average"""
         if len(data) < period:
             return []
 
+        if np is not None:
+            closes = np.fromiter((float(bar['close']) for bar in data), dtype=np.float64, count=len(data))
+            return sma(closes, period)[period - 1:].tolist()
+
         ma_values = []
         for i in range(period - 1, len(data)):
             avg = sum(float(data[j]['close']) for j in range(i - period + 1, i + 1)) / period
@@ -110,11 +226,21 @@ class MovingAverageCrossoverStrategy:
         current_long_ma = long_ma[-1]
         previous_long_ma = long_ma[-2]
 
-        current_price = float(data[-1]['close'])
-
         # Check for crossover signals
+        crossed = 0
         if (previous_short_ma <= previous_long_ma and
             current_short_ma > current_long_ma):
+            crossed = 1
+        elif (previous_short_ma >= previous_long_ma and
+              current_short_ma < current_long_ma):
+            crossed = -1
+
+        return self.crossover_signal(crossed, float(data[-1]['close']), current_short_ma, current_long_ma, params)
+
+    def crossover_signal(self, crossed: int, current_price: float, short_ma: float, long_ma: float,
+                         params: Dict[str, Any]) -> Dict[str, Any]:
+        """Signal for a crossover (+1 bullish, -1 bearish, 0 none) at the current price"""
+        if crossed == 1:
             # Bullish crossover - short MA crosses above long MA
             return {
                 'signal': 'BUY',
@@ -124,8 +250,7 @@ class MovingAverageCrossoverStrategy:
                 'take_profit': current_price * (1 + params['take_profit_percent'] / 100),
                 'quantity': params['quantity']
             }
-        elif (previous_short_ma >= previous_long_ma and
-              current_short_ma < current_long_ma):
+        elif crossed == -1:
             # Bearish crossover - short MA crosses below long MA
             return {
                 'signal': 'SELL',
@@ -140,10 +265,59 @@ class MovingAverageCrossoverStrategy:
                 'signal': 'HOLD',
                 'reason': 'No crossover signal detected',
                 'current_price': current_price,
-                'short_ma': current_short_ma,
-                'long_ma': current_long_ma
+                'short_ma': short_ma,
+                'long_ma': long_ma
             }
 
+    def streaming_signal(self, params: Dict[str, Any]):
+        """Crossover signal from warm streaming averages, or None
+
+        The first run warms the averages from the cached candles; later runs
+        in the same plugin host only fold in the bars closed since. Without
+        cached candles there is nothing to warm up from and None is returned.
+        """
+        if CrossoverDetector is None:
+            return None
+        candles = self.load_candles(params['symbol'], params['exchange'], params['interval'])
+        if candles is None:
+            return None
+
+        key = (self.strategy_id, params['exchange'], params['symbol'], params['interval'],
+               params['short_ma_period'], params['long_ma_period'])
+        stream = _crossover_streams.get(key)
+        if stream is None or (stream.last_timestamp is not None and stream.last_timestamp < candles.timestamp[0]):
+            # New, or bars were dropped from the history since the last run
+            stream = CrossoverStream(params['short_ma_period'], params['long_ma_period'])
+            _crossover_streams[key] = stream
+        _crossover_streams.move_to_end(key)
+        while len(_crossover_streams) > MAX_CROSSOVER_STREAMS:
+            _crossover_streams.popitem(last=False)
+
+        new_bars = candles if stream.last_timestamp is None else candles.after(stream.last_timestamp)
+        for timestamp, close in zip(new_bars.timestamp, new_bars.close):
+            stream.signal = self.on_bar(stream, float(close), params)
+            stream.last_timestamp = int(timestamp)
+
+        if stream.signal is None or stream.detector.slow.value is None:
+            return {'signal': 'HOLD', 'reason': 'Insufficient data for analysis'}
+        return dict(stream.signal)
+
+    def on_bar(self, stream: CrossoverStream, close: float, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Fold one closed bar into the warm averages in O(1)"""
+        crossed = stream.detector.update(close)
+        return self.crossover_signal(crossed, close, stream.detector.fast.value, stream.detector.slow.value, params)
+
+    def anchor_to_quote(self, signal: Dict[str, Any], params: Dict[str, Any]) -> None:
+        """Move entry, stop-loss and take-profit to the runner's live quote, if there is one"""
+        if signal['signal'] == 'HOLD' or self.quotes is None:
+            return
+        ltp = self.quotes.ltp(params['exchange'], params['symbol'])
+        if not ltp or not signal.get('entry_price'):
+            return
+        ratio = ltp / signal['entry_price']
+        for name in ('entry_price', 'stop_loss', 'take_profit'):
+            signal[name] *= ratio
+
     def place_order(self, signal: Dict[str, Any], params: Dict[str, Any]) -> bool:
         """
         Place order based on signal
@@ -159,7 +333,7 @@ class MovingAverageCrossoverStrategy:
         order_params = {
             'variety': 'NORMAL',
             'tradingsymbol': params['symbol'],
-            'symboltoken': '',  # Would be fetched from Angel One
+            'symboltoken': str(params.get('symboltoken') or self.resolve_symbol_token(params['symbol'], params['exchange'])),
             'transactiontype': signal['signal'],
             'exchange': params['exchange'],
             'ordertype': 'MARKET',
@@ -171,6 +345,18 @@ class MovingAverageCrossoverStrategy:
             'quantity': str(signal['quantity'])
         }
 
+        if self.emit is not None:
+            # The runner places an attached order through its order router as soon as it reads the signal,
+            # then watches stop_loss/take_profit and exits as soon as either level trades
+            message = {'type': 'signal', 'action': signal['signal'], 'symbol': params['symbol'],
+                       'reason': signal['reason'], 'price': signal['entry_price'],
+                       'stop_loss': round(signal['stop_loss'], 2), 'take_profit': round(signal['take_profit'], 2)}
+            if params['live_orders']:
+                message['order'] = order_params
+            self.emit(message)
+            if params['live_orders']:
+                return True
+
         # Simulate order placement (in production, use SmartAPI)
         logger.info(f"SIMULATED ORDER: {order_params}")
         logger.info(f"Entry Price: {signal['entry_price']}")
@@ -190,21 +376,30 @@ class MovingAverageCrossoverStrategy:
             # Get strategy parameters
             params = self.get_strategy_parameters()
 
-            # Fetch historical data
-            historical_data = self.fetch_historical_data(
-                params['symbol'],
-                params['exchange']
-            )
+            # Warm in-process runs only fold in the bars closed since the last run
+            signal = self.streaming_signal(params) if self.warm else None
 
-            if not historical_data:
-                logger.error("No historical data available")
-                return False
+            if signal is None:
+                # Fetch historical data
+                historical_data = self.fetch_historical_data(
+                    params['symbol'],
+                    params['exchange'],
+                    interval=params['interval']
+                )
+
+                if not historical_data:
+                    logger.error("No historical data available")
+                    return False
 
-            # Generate trading signals
-            signal = self.generate_signals(historical_data, params)
+                # Generate trading signals
+                signal = self.generate_signals(historical_data, params)
+
+            self.anchor_to_quote(signal, params)
 
             # Place order based on signal
             success = self.place_order(signal, params)
+            if self.emit is not None:
+                self.emit({'type': 'result', 'success': success, 'signal': signal['signal']})
 
             if success:
                 logger.info("Strategy execution completed successfully")
@@ -217,6 +412,15 @@ class MovingAverageCrossoverStrategy:
             logger.error(f"Strategy execution error: {e}")
             return False
 
+def signal_array(candles, params: Dict[str, Any]):
+    """Backtest hook: +1/-1/0 crossover signal for every bar of ``candles``"""
+    params = {'short_ma_period': 5, 'long_ma_period': 20, **params}
+    return crossover(sma(candles.close, params['short_ma_period']), sma(candles.close, params['long_ma_period']))
+
+def create_strategy(context):
+    """Plugin host entry point for in-process execution"""
+    return MovingAverageCrossoverStrategy(context)
+
 def main():
     """Main entry point for the strategy"""
     try:
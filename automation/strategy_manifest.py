@@ -0,0 +1,140 @@
+"""
+Smart Hedge - Strategy Manifest Sync
+====================================
+
+Incremental sync of the active strategy list from the Laravel API.
+
+- Requests go over one pooled ``requests.Session``, so every poll reuses
+  the same keep-alive connection.
+- The last manifest is cached on disk together with its ETag and version.
+  Polls send ``If-None-Match`` and ``since=<version>``; an unchanged
+  manifest costs a single empty 304, and a changed one returns only the
+  strategies that changed plus the ids of all active strategies.
+- Deltas are merged into the cached manifest; strategies missing from the
+  id list are dropped. If a delta references a strategy the cache does not
+  know, the next request falls back to a full download.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class ManifestSync:
+    """Keeps a local copy of the active strategy manifest in sync"""
+
+    def __init__(self, base_url: str, api_token: str, cache_file: Optional[str] = None,
+                 timeout: float = 30, session: Optional[requests.Session] = None):
+        self.url = f"{base_url.rstrip('/')}/active-strategies"
+        self.cache_file = Path(cache_file) if cache_file else None
+        self.timeout = timeout
+
+        self.session = session or requests.Session()
+        self.session.headers.update({
+            'Authorization': f'Bearer {api_token}',
+            'Accept': 'application/json',
+            'User-Agent': 'SmartHedge-Automation/1.0'
+        })
+
+        self.etag: Optional[str] = None
+        self.version: Optional[int] = None
+        self.strategies: Dict[str, Dict[str, Any]] = {}  # str(id) -> strategy, in server order
+        self._load()
+
+    def fetch(self) -> List[Dict[str, Any]]:
+        """Return the current active strategies, downloading only what changed
+
+        Raises ``requests.RequestException`` on transport errors and
+        ``ValueError`` when the API reports a failure.
+        """
+        response = self._get(incremental=self.version is not None)
+
+        if response.status_code == 304:
+            logger.info("Strategy manifest unchanged")
+            return self.active()
+
+        response.raise_for_status()
+        data = response.json()
+        if not data.get('success'):
+            raise ValueError(data.get('error', 'Unknown error'))
+
+        meta = data.get('meta') or {}
+        if meta.get('delta') and not self._merge(data.get('data') or [], meta.get('ids') or []):
+            logger.warning("Strategy manifest delta did not match the local cache; fetching in full")
+            response = self._get(incremental=False)
+            response.raise_for_status()
+            data = response.json()
+            if not data.get('success'):
+                raise ValueError(data.get('error', 'Unknown error'))
+            meta = data.get('meta') or {}
+
+        if not meta.get('delta'):
+            self.strategies = {str(strategy['id']): strategy for strategy in data.get('data') or []}
+
+        self.etag = response.headers.get('ETag')
+        self.version = meta.get('version')
+        self._save()
+
+        logger.info(f"Strategy manifest updated: {len(data.get('data') or [])} changed, "
+                    f"{len(self.strategies)} active")
+        return self.active()
+
+    def active(self) -> List[Dict[str, Any]]:
+        return list(self.strategies.values())
+
+    def _get(self, incremental: bool) -> requests.Response:
+        headers, params = {}, {}
+        if incremental:
+            if self.etag:
+                headers['If-None-Match'] = self.etag
+            params['since'] = self.version
+        return self.session.get(self.url, headers=headers, params=params, timeout=self.timeout)
+
+    def _merge(self, changed: List[Dict[str, Any]], ids: List[Any]) -> bool:
+        """Apply a delta; False if the result would be incomplete"""
+        merged = dict(self.strategies)
+        for strategy in changed:
+            merged[str(strategy['id'])] = strategy
+
+        ordered = {}
+        for strategy_id in map(str, ids):
+            if strategy_id not in merged:
+                return False
+            ordered[strategy_id] = merged[strategy_id]
+
+        self.strategies = ordered
+        return True
+
+    def _load(self) -> None:
+        if not self.cache_file:
+            return
+        try:
+            state = json.loads(self.cache_file.read_text())
+            self.etag = state.get('etag')
+            self.version = state.get('version')
+            self.strategies = {str(strategy['id']): strategy for strategy in state.get('strategies', [])}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable strategy manifest cache {self.cache_file}: {e}")
+
+    def _save(self) -> None:
+        if not self.cache_file:
+            return
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_file.with_name(self.cache_file.name + '.tmp')
+            tmp_path.write_text(json.dumps({
+                'etag': self.etag,
+                'version': self.version,
+                'strategies': self.active()
+            }))
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            logger.warning(f"Could not write strategy manifest cache {self.cache_file}: {e}")
@@ -0,0 +1,363 @@
+"""
+Smart Hedge - Strategy Message Protocol
+=======================================
+
+Line-delimited JSON messages from strategies to the runner.
+
+A strategy reports what it does as one JSON object per line on stdout,
+prefixed with ``MESSAGE_PREFIX`` so ordinary prints and log output never
+get mistaken for messages::
+
+    @@smart-hedge {"type": "signal", "action": "BUY", "symbol": "SBIN-EQ"}
+
+Message types:
+
+- ``signal``: a trading decision; with an ``order`` object it is placed
+  through the runner's order router the moment it arrives, and its
+  ``stop_loss``/``take_profit`` levels are then watched by the runner.
+- ``order``: order parameters (``params``, optional idempotency ``key``) to
+  place immediately.
+- ``metric``: a named numeric value, exported as a runner metric.
+- ``log``: a message logged by the runner at ``level``.
+- ``result``: the strategy's own verdict (``success``) and summary.
+
+Strategies use the ``emit`` helpers (or ``context.emit`` in-process). The
+runner reads stdout and stderr as they are produced, with a cap on line
+length and only the last lines kept for error reports, so a chatty strategy
+cannot grow the runner's memory.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import metrics
+from triggers import Bracket
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_PREFIX = '@@smart-hedge '
+
+# Longest line read from a strategy; longer lines are dropped
+MAX_LINE_BYTES = 64 * 1024
+
+# Lines of plain stdout/stderr kept for the result log
+TAIL_LINES = 50
+
+MESSAGE_TYPES = ('signal', 'order', 'metric', 'log', 'result')
+
+_emit_lock = threading.Lock()
+
+
+def encode(message_type: str, **fields) -> str:
+    if message_type not in MESSAGE_TYPES:
+        raise ValueError(f"Unknown message type: {message_type}")
+    return MESSAGE_PREFIX + json.dumps({'type': message_type, **fields}, default=str)
+
+
+def decode(line: str) -> Optional[Dict[str, Any]]:
+    """Message carried by a line, or None for ordinary output"""
+    if not line.startswith(MESSAGE_PREFIX):
+        return None
+    message = json.loads(line[len(MESSAGE_PREFIX):])
+    if not isinstance(message, dict) or message.get('type') not in MESSAGE_TYPES:
+        raise ValueError(f"Not a strategy message: {line[:200]}")
+    return message
+
+
+def emit(message_type: str, **fields) -> None:
+    """Send a message to the runner (strategy side)"""
+    line = encode(message_type, **fields)
+    with _emit_lock:
+        sys.stdout.write(line + '\n')
+        sys.stdout.flush()
+
+
+def signal(action: str, **fields) -> None:
+    emit('signal', action=action, **fields)
+
+
+def order(params: Dict[str, Any], key: Optional[str] = None) -> None:
+    emit('order', params=params, key=key)
+
+
+def metric(name: str, value: float) -> None:
+    emit('metric', name=name, value=value)
+
+
+def log(message: str, level: str = 'INFO') -> None:
+    emit('log', level=level, message=message)
+
+
+def result(success: bool, **fields) -> None:
+    emit('result', success=success, **fields)
+
+
+class LineSplitter:
+    """Splits a byte stream into lines, dropping any longer than ``max_line_bytes``"""
+
+    def __init__(self, on_line: Callable[[str], None], max_line_bytes: int = MAX_LINE_BYTES):
+        self.on_line = on_line
+        self.max_line_bytes = max_line_bytes
+        self.dropped = 0
+        self._buffer = bytearray()
+        self._discarding = False
+
+    def feed(self, data: bytes) -> None:
+        self._buffer += data
+        while True:
+            end = self._buffer.find(b'\n')
+            if end < 0:
+                if len(self._buffer) > self.max_line_bytes:
+                    self._buffer.clear()
+                    if not self._discarding:
+                        self.dropped += 1
+                        self._discarding = True
+                return
+
+            line = bytes(self._buffer[:end])
+            del self._buffer[:end + 1]
+            if self._discarding:
+                self._discarding = False
+                continue
+            self.on_line(line.decode('utf-8', 'replace').rstrip('\r'))
+
+    def close(self) -> None:
+        if self._buffer and not self._discarding:
+            self.on_line(self._buffer.decode('utf-8', 'replace'))
+        self._buffer.clear()
+
+
+class StrategyOutput:
+    """Consumes a strategy's stdout and stderr while it runs"""
+
+    def __init__(self, strategy_name: str, on_message: Callable[[Dict[str, Any]], None]):
+        self.strategy_name = strategy_name
+        self.on_message = on_message
+        self.stdout_tail: deque = deque(maxlen=TAIL_LINES)
+        self.stderr_tail: deque = deque(maxlen=TAIL_LINES)
+        self._splitters = [LineSplitter(self._stdout_line), LineSplitter(self.stderr_tail.append)]
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def stdout(self) -> str:
+        return '\n'.join(self.stdout_tail)
+
+    @property
+    def stderr(self) -> str:
+        return '\n'.join(self.stderr_tail)
+
+    def start(self, stdout_fd: int, stderr_fd: int) -> None:
+        """Read both streams on background threads until EOF"""
+        for fd, splitter in zip((stdout_fd, stderr_fd), self._splitters):
+            thread = threading.Thread(target=self._pump, args=(fd, splitter), daemon=True,
+                                      name=f'strategy-output-{fd}')
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        for thread in self._threads:
+            thread.join(timeout)
+        dropped = sum(splitter.dropped for splitter in self._splitters)
+        if dropped:
+            logger.warning(f"Strategy {self.strategy_name}: dropped {dropped} lines over {MAX_LINE_BYTES} bytes")
+
+    @staticmethod
+    def _pump(fd: int, splitter: LineSplitter) -> None:
+        while True:
+            try:
+                data = os.read(fd, 65536)
+            except OSError:
+                break
+            if not data:
+                break
+            splitter.feed(data)
+        splitter.close()
+
+    def _stdout_line(self, line: str) -> None:
+        try:
+            message = decode(line)
+        except ValueError as e:
+            logger.warning(f"Strategy {self.strategy_name} sent an invalid message: {e}")
+            return
+
+        if message is None:
+            self.stdout_tail.append(line)
+            return
+
+        try:
+            self.on_message(message)
+        except Exception as e:
+            logger.error(f"Strategy {self.strategy_name}: failed to handle {message.get('type')} message: {e}")
+
+
+class MessageDispatcher:
+    """Acts on a strategy's messages as they arrive
+
+    Orders (and signals carrying an order) are submitted to the order router
+    immediately; the runner waits for them once the whole cycle has run.
+    Signals and order outcomes are written to ``journal`` when given.
+
+    A signal with an order and ``stop_loss``/``take_profit`` levels opens a
+    bracket on ``triggers`` once the entry is placed; its exit goes through
+    ``submit_exit`` (``submit_order`` when not given). An order on the
+    opposite side first closes this strategy's brackets on the instrument,
+    and only the quantity left over opens a new bracket, so a flip from long
+    to short never leaves the old stop-loss armed. ``resolve_token(exchange,
+    symbol)`` fills in a missing ``symboltoken``, which brackets need.
+    """
+
+    def __init__(self, strategy_id: Any, strategy_name: str,
+                 submit_order: Optional[Callable[[Dict[str, Any], Optional[str]], Future]] = None,
+                 journal=None, account_id: Any = None, triggers=None,
+                 submit_exit: Optional[Callable[[Dict[str, Any], Optional[str]], Future]] = None,
+                 resolve_token: Optional[Callable[[str, str], Optional[str]]] = None):
+        self.strategy_id = strategy_id
+        self.strategy_name = strategy_name
+        self.submit_order = submit_order
+        self.journal = journal
+        self.account_id = account_id
+        self.triggers = triggers
+        self.submit_exit = submit_exit or submit_order
+        self.resolve_token = resolve_token
+        self.result: Optional[Dict[str, Any]] = None
+        self.signals = 0
+
+    def __call__(self, message: Dict[str, Any]) -> None:
+        handler = getattr(self, f"_on_{message['type']}")
+        handler(message)
+
+    @property
+    def success(self) -> bool:
+        """The strategy's own verdict; True when it did not report one"""
+        return bool(self.result.get('success', True)) if self.result is not None else True
+
+    def _on_signal(self, message: Dict[str, Any]) -> None:
+        self.signals += 1
+        action = message.get('action', 'UNKNOWN')
+        metrics.SIGNALS.inc(strategy_id=self.strategy_id, action=action)
+        logger.info(f"Signal from {self.strategy_name}: {action} {message.get('symbol', '')} "
+                    f"{message.get('reason', '')}".rstrip())
+        if self.journal is not None:
+            self.journal.record('signal', self.strategy_id, status=action, message=message.get('reason'),
+                                data={k: v for k, v in message.items() if k not in ('type', 'order')},
+                                account_id=self.account_id)
+
+        if isinstance(message.get('order'), dict):
+            future, closed = self._submit(message['order'], message.get('key'))
+            if future is not None and self.triggers is not None and (
+                    message.get('stop_loss') is not None or message.get('take_profit') is not None):
+                future.add_done_callback(lambda done: self._open_bracket(message, closed, done))
+
+    def _on_order(self, message: Dict[str, Any]) -> None:
+        if not isinstance(message.get('params'), dict):
+            raise ValueError("order message without params")
+        self._submit(message['params'], message.get('key'))
+
+    def _on_metric(self, message: Dict[str, Any]) -> None:
+        metrics.STRATEGY_VALUES.set(float(message['value']), strategy_id=self.strategy_id, name=message['name'])
+
+    def _on_log(self, message: Dict[str, Any]) -> None:
+        level = logging.getLevelName(str(message.get('level', 'INFO')).upper())
+        logger.log(level if isinstance(level, int) else logging.INFO,
+                   f"[{self.strategy_name}] {message.get('message', '')}")
+
+    def _on_result(self, message: Dict[str, Any]) -> None:
+        self.result = message
+
+    def _submit(self, params: Dict[str, Any], key: Optional[str]) -> Tuple[Optional[Future], int]:
+        """Route an order; returns its future and the bracketed quantity it closes"""
+        if self.submit_order is None:
+            logger.error(f"Strategy {self.strategy_name} sent an order but no order router is available")
+            return None, 0
+        logger.info(f"Routing order from {self.strategy_name}: {params}")
+        received = time.monotonic()
+
+        # Disarm the opposing brackets before the order can be held for netting,
+        # so their levels cannot fire an exit for a position this order closes
+        changes = self._close_brackets(params)
+        future = self.submit_order(params, key)
+        future.add_done_callback(lambda done: self._order_done(params, done, received))
+        if changes:
+            future.add_done_callback(lambda done: self._restore_brackets(changes, done))
+        return future, sum(removed for _, removed in changes)
+
+    def _close_brackets(self, params: Dict[str, Any]) -> List[Tuple[Bracket, int]]:
+        if self.triggers is None:
+            return []
+        try:
+            params = self._with_token(params)
+            instrument = (str(params.get('exchange', '')).upper(), str(params.get('symboltoken', '')))
+            return self.triggers.reduce(self.strategy_id, self.account_id, instrument,
+                                        str(params.get('transactiontype', 'BUY')), int(float(params['quantity'])))
+        except Exception as e:
+            logger.error(f"Strategy {self.strategy_name}: failed to close opposing brackets: {e}")
+            return []
+
+    def _restore_brackets(self, changes: List[Tuple[Bracket, int]], future: Future) -> None:
+        try:
+            placed = future.result().placed
+        except Exception:
+            placed = False
+        if not placed:
+            self.triggers.restore(changes)
+
+    def _with_token(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Order params with their symboltoken filled in when the strategy left it out"""
+        if params.get('symboltoken') or self.resolve_token is None:
+            return params
+        token = self.resolve_token(str(params.get('exchange', 'NSE')), str(params.get('tradingsymbol', '')))
+        return {**params, 'symboltoken': token} if token else params
+
+    def _open_bracket(self, message: Dict[str, Any], closed: int, future: Future) -> None:
+        """Watch the signal's exit levels once its entry order is placed"""
+        try:
+            if not future.result().placed:
+                return
+            params = self._with_token(message['order'])
+            quantity = int(float(params['quantity'])) - closed
+            if quantity <= 0:
+                return  # the order only closed an existing position
+            self.triggers.add(Bracket(
+                self.strategy_id, params, quantity,
+                stop_loss=_level(message.get('stop_loss')), take_profit=_level(message.get('take_profit')),
+                submit=self._submit_exit, account_id=self.account_id))
+        except Exception as e:
+            logger.error(f"Strategy {self.strategy_name}: failed to open bracket: {e}")
+
+    def _submit_exit(self, params: Dict[str, Any], key: Optional[str]) -> Future:
+        received = time.monotonic()
+        future = self.submit_exit(params, key)
+        future.add_done_callback(lambda done: self._order_done(params, done, received))
+        return future
+
+    def _order_done(self, params: Dict[str, Any], future: Future, received: float) -> None:
+        """Log and journal an order outcome, whenever the order settles"""
+        try:
+            # From the strategy's message, so the netting hold is included
+            metrics.ORDER_LATENCY.observe(time.monotonic() - received)
+            outcome = future.result()
+            if not outcome.placed:
+                logger.error(f"Order {outcome.key} from strategy {self.strategy_name} {outcome.status}: {outcome.error}")
+            if self.journal is None:
+                return
+
+            data = {'key': outcome.key, 'order_id': outcome.order_id, 'attempts': outcome.attempts,
+                    'latency_ms': round(outcome.latency * 1000, 3), 'params': params}
+            for name in ('quantity', 'crossed', 'routed', 'net_key'):
+                if hasattr(outcome, name):
+                    data[name] = getattr(outcome, name)
+            self.journal.record('order', self.strategy_id, status=outcome.status, message=outcome.error,
+                                data=data, account_id=self.account_id)
+        except Exception as e:
+            logger.error(f"Strategy {self.strategy_name}: failed to record order outcome: {e}")
+
+
+def _level(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
@@ -0,0 +1,288 @@
+"""
+Smart Hedge - Streaming Indicators
+==================================
+
+Stateful indicators that update in O(1) per new bar or tick, for strategies
+that stay warm between candles instead of re-scanning their history.
+
+Each indicator keeps only a ring buffer and running totals, returns its
+current value from ``update()`` (``None`` until warmed up) and produces the
+same numbers as the vectorized functions in ``indicators.py``.
+
+State is checkpointable: ``state()`` returns a JSON-serializable dict and
+``restore(state)`` rebuilds the indicator, so a strategy process can persist
+its indicators between runs with ``save_checkpoint``/``load_checkpoint``.
+"""
+
+import json
+import math
+import os
+from typing import Any, Dict, List, Optional
+
+
+class RollingWindow:
+    """Fixed-size ring buffer of the last ``size`` values"""
+
+    def __init__(self, size: int):
+        if size < 1:
+            raise ValueError(f"window size must be positive, got {size}")
+        self.size = size
+        self.values: List[float] = []
+        self.head = 0  # Index of the oldest value once the window is full
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def push(self, value: float) -> Optional[float]:
+        """Add a value and return the one it replaced, if any"""
+        if not self.full:
+            self.values.append(value)
+            return None
+
+        evicted = self.values[self.head]
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.size
+        return evicted
+
+    def state(self) -> Dict[str, Any]:
+        return {'size': self.size, 'values': list(self.values), 'head': self.head}
+
+    @classmethod
+    def restore(cls, state: Dict[str, Any]) -> 'RollingWindow':
+        window = cls(state['size'])
+        window.values = list(state['values'])
+        window.head = state['head']
+        return window
+
+
+class StreamingIndicator:
+    """Base class providing checkpoint support"""
+
+    value: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def state(self) -> Dict[str, Any]:
+        state = {'type': type(self).__name__}
+        for key, item in vars(self).items():
+            state[key] = item.state() if hasattr(item, 'state') else item
+        return state
+
+    @classmethod
+    def restore(cls, state: Dict[str, Any]) -> 'StreamingIndicator':
+        indicator = cls.__new__(cls)
+        for key, item in state.items():
+            if key == 'type':
+                continue
+            if isinstance(item, dict) and 'type' in item:
+                item = restore_indicator(item)
+            elif isinstance(item, dict) and 'values' in item:
+                item = RollingWindow.restore(item)
+            setattr(indicator, key, item)
+        return indicator
+
+
+class RollingSMA(StreamingIndicator):
+    """Simple moving average over a ring buffer with a running sum"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.window = RollingWindow(period)
+        self.total = 0.0
+        self.value = None
+
+    def update(self, price: float) -> Optional[float]:
+        evicted = self.window.push(price)
+        self.total += price - (evicted or 0.0)
+
+        if self.window.full:
+            # Re-sum once per lap to stop floating-point drift (amortized O(1))
+            if self.window.head == 0:
+                self.total = math.fsum(self.window.values)
+            self.value = self.total / self.period
+        return self.value
+
+
+class StreamingEMA(StreamingIndicator):
+    """Exponential moving average, seeded with the SMA of the first period"""
+
+    def __init__(self, period: int, alpha: Optional[float] = None):
+        self.period = period
+        self.alpha = alpha if alpha is not None else 2.0 / (period + 1)
+        self.count = 0
+        self.seed_total = 0.0
+        self.value = None
+
+    def update(self, price: float) -> Optional[float]:
+        if self.value is None:
+            self.count += 1
+            self.seed_total += price
+            if self.count == self.period:
+                self.value = self.seed_total / self.period
+            return self.value
+
+        self.value += self.alpha * (price - self.value)
+        return self.value
+
+
+class StreamingRSI(StreamingIndicator):
+    """Relative Strength Index with Wilder smoothing"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.previous: Optional[float] = None
+        self.gain = StreamingEMA(period, alpha=1.0 / period)
+        self.loss = StreamingEMA(period, alpha=1.0 / period)
+        self.value = None
+
+    def update(self, price: float) -> Optional[float]:
+        if self.previous is not None:
+            change = price - self.previous
+            gain = self.gain.update(max(change, 0.0))
+            loss = self.loss.update(max(-change, 0.0))
+
+            if gain is not None:
+                if loss == 0:
+                    self.value = 50.0 if gain == 0 else 100.0
+                else:
+                    self.value = 100.0 - 100.0 / (1.0 + gain / loss)
+
+        self.previous = price
+        return self.value
+
+
+class StreamingATR(StreamingIndicator):
+    """Average True Range with Wilder smoothing"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.previous_close: Optional[float] = None
+        self.average = StreamingEMA(period, alpha=1.0 / period)
+        self.value = None
+
+    def update(self, high: float, low: float, close: float) -> Optional[float]:
+        previous = self.previous_close if self.previous_close is not None else close
+        true_range = max(high, previous) - min(low, previous)
+        self.previous_close = close
+        self.value = self.average.update(true_range)
+        return self.value
+
+
+class RollingBollinger(StreamingIndicator):
+    """Bollinger bands from running sums of centred values and squares"""
+
+    offset = 0.0  # Checkpoints written before centring summed the raw values
+
+    def __init__(self, period: int = 20, num_std: float = 2.0):
+        self.period = period
+        self.num_std = num_std
+        self.window = RollingWindow(period)
+        self.offset: Optional[float] = None  # Values are summed relative to this to limit cancellation error
+        self.total = 0.0
+        self.total_squares = 0.0
+        self.value = None  # Middle band
+        self.lower: Optional[float] = None
+        self.upper: Optional[float] = None
+
+    def update(self, price: float) -> Optional[float]:
+        if self.offset is None:
+            self.offset = price
+        evicted = self.window.push(price)
+        shifted = price - self.offset
+        dropped = evicted - self.offset if evicted is not None else 0.0
+        self.total += shifted - dropped
+        self.total_squares += shifted * shifted - dropped * dropped
+
+        if self.window.full:
+            if self.window.head == 0:
+                # Re-centre on the current window so the offset follows the price
+                self.offset = self.window.values[0]
+                self.total = math.fsum(v - self.offset for v in self.window.values)
+                self.total_squares = math.fsum((v - self.offset) ** 2 for v in self.window.values)
+
+            mean = self.total / self.period
+            deviation = math.sqrt(max(self.total_squares / self.period - mean * mean, 0.0))
+            self.value = mean + self.offset
+            self.lower = self.value - self.num_std * deviation
+            self.upper = self.value + self.num_std * deviation
+        return self.value
+
+
+class StreamingVWAP(StreamingIndicator):
+    """Session VWAP of the typical price; call ``reset()`` at session start"""
+
+    def __init__(self):
+        self.price_volume = 0.0
+        self.volume = 0.0
+        self.value = None
+
+    def reset(self) -> None:
+        self.price_volume = 0.0
+        self.volume = 0.0
+        self.value = None
+
+    def update(self, high: float, low: float, close: float, volume: float) -> Optional[float]:
+        self.price_volume += (high + low + close) / 3.0 * volume
+        self.volume += volume
+        if self.volume > 0:
+            self.value = self.price_volume / self.volume
+        return self.value
+
+
+class CrossoverDetector(StreamingIndicator):
+    """Emits +1/-1 when a fast average crosses above/below a slow one"""
+
+    def __init__(self, fast: StreamingIndicator, slow: StreamingIndicator):
+        self.fast = fast
+        self.slow = slow
+        self.previous_fast: Optional[float] = None
+        self.previous_slow: Optional[float] = None
+        self.value = None
+
+    def update(self, price: float) -> int:
+        fast = self.fast.update(price)
+        slow = self.slow.update(price)
+
+        signal = 0
+        if None not in (fast, slow, self.previous_fast, self.previous_slow):
+            if self.previous_fast <= self.previous_slow and fast > slow:
+                signal = 1
+            elif self.previous_fast >= self.previous_slow and fast < slow:
+                signal = -1
+
+        self.previous_fast, self.previous_slow = fast, slow
+        self.value = signal
+        return signal
+
+
+INDICATORS = {
+    cls.__name__: cls
+    for cls in (RollingSMA, StreamingEMA, StreamingRSI, StreamingATR,
+                RollingBollinger, StreamingVWAP, CrossoverDetector)
+}
+
+
+def restore_indicator(state: Dict[str, Any]) -> StreamingIndicator:
+    """Rebuild an indicator from ``state()`` output"""
+    return INDICATORS[state['type']].restore(state)
+
+
+def save_checkpoint(path: str, indicators: Dict[str, StreamingIndicator]) -> None:
+    """Atomically write a set of named indicators to a JSON checkpoint"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({name: indicator.state() for name, indicator in indicators.items()}, f)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str) -> Dict[str, StreamingIndicator]:
+    """Load indicators written by ``save_checkpoint`` (empty if missing)"""
+    try:
+        with open(path) as f:
+            states = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {name: restore_indicator(state) for name, state in states.items()}
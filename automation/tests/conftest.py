@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Make the automation modules importable as top-level modules, as they are for runner.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,90 @@
+import time
+
+from account_pool import AccountPool, BrokerAccount
+from order_router import OrderRouter
+
+
+class FakeSmartConnect:
+    refresh_ok = {}
+
+    def __init__(self, api_key, access_token=None, refresh_token=None, feed_token=None, userId=None):
+        self.api_key = api_key
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+
+    def generateToken(self, refresh_token):
+        if not self.refresh_ok.get(self.api_key, True):
+            return {'status': False, 'message': 'Invalid refresh token'}
+        return {'status': True, 'data': {'jwtToken': f'fresh-{self.api_key}', 'refreshToken': 'r2'}}
+
+
+def account(account_id, user_id, expiry, api_key=None):
+    return BrokerAccount(account_id, user_id, f'C{account_id}', api_key or f'key{account_id}',
+                         access_token=f'jwt{account_id}', refresh_token='r1', token_expiry=expiry)
+
+
+def build_pool(stored):
+    return AccountPool(
+        smart_connect_factory=FakeSmartConnect,
+        order_router_factory=lambda provider, on_rejected: OrderRouter(provider, max_workers=1,
+                                                                     on_session_rejected=on_rejected),
+        on_tokens=lambda account_id, session: stored.append((account_id, session.jwt_token)),
+        failure_backoff=60
+    )
+
+
+def test_accounts_are_grouped_by_owner_and_seeded():
+    pool = build_pool([])
+    later = time.time() + 3600
+    pool.sync([account(1, 10, later), account(2, 10, later), account(3, 20, later)])
+
+    assert [s.account.id for s in pool.for_user(10)] == [1, 2]
+    assert [s.account.id for s in pool.for_user('20')] == [3]
+    assert pool.for_user(30) == []
+
+    session = pool.for_user(20)[0]
+    assert pool.connect(session)
+    assert session.session_token == 'jwt3'
+    assert session.order_router is not pool.for_user(10)[0].order_router
+    pool.shutdown()
+
+
+def test_expired_token_is_refreshed_and_written_back():
+    stored = []
+    pool = build_pool(stored)
+    pool.sync([account(1, 10, time.time() - 1)])
+
+    session = pool.for_user(10)[0]
+    assert pool.connect(session)
+    assert session.session_token == 'fresh-key1'
+    assert stored == [(1, 'fresh-key1')]
+    pool.shutdown()
+
+
+def test_failing_account_backs_off_without_affecting_others():
+    FakeSmartConnect.refresh_ok = {'bad': False}
+    pool = build_pool([])
+    pool.sync([account(1, 10, time.time() - 1, api_key='bad'), account(2, 10, time.time() + 3600)])
+
+    bad, good = pool.for_user(10)
+    assert not pool.connect(bad)
+    assert bad.failed_until > time.monotonic()
+    assert pool.connect(good)
+
+    # While backing off the broker is not contacted again
+    FakeSmartConnect.refresh_ok = {}
+    assert not pool.connect(bad)
+    pool.shutdown()
+
+
+def test_sync_keeps_unchanged_sessions_and_drops_removed():
+    pool = build_pool([])
+    later = time.time() + 3600
+    pool.sync([account(1, 10, later), account(2, 20, later)])
+    first = pool.sessions[1]
+
+    pool.sync([account(1, 10, later)])
+
+    assert pool.sessions[1] is first
+    assert pool.for_user(20) == []
+    pool.shutdown()
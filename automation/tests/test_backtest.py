@@ -0,0 +1,68 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from backtest import EXIT_END, EXIT_SIGNAL, EXIT_STOP, EXIT_TARGET, backtest, expand_grid, simulate, sweep
+from candle_store import Candles
+
+EXAMPLE_STRATEGY = str(Path(__file__).resolve().parent.parent / 'strategies' / 'example_strategy.py')
+
+
+def make_candles(close, spread=0.0):
+    close = np.asarray(close, dtype=float)
+    return Candles(np.arange(len(close), dtype=np.int64), close, close + spread, close - spread,
+                   close, np.ones(len(close)))
+
+
+def test_opposite_signal_closes_and_reverses():
+    candles = make_candles([100, 101, 102, 103, 104])
+    signals = np.array([1, 0, 0, -1, 0])
+
+    trades = simulate(candles, signals, {'quantity': 2})
+
+    assert [(t.direction, t.entry_index, t.exit_index, t.exit_reason) for t in trades] == [
+        (1, 0, 3, EXIT_SIGNAL), (-1, 3, 4, EXIT_END)
+    ]
+    assert trades[0].pnl == pytest.approx(6.0)
+    assert trades[1].pnl == pytest.approx(-2.0)
+
+
+def test_stop_loss_takes_priority_over_target_in_same_bar():
+    candles = make_candles([100, 100, 100], spread=10)
+    trades = simulate(candles, np.array([1, 0, 0]), {'stop_loss_percent': 5, 'take_profit_percent': 5})
+
+    assert trades[0].exit_reason == EXIT_STOP
+    assert trades[0].exit_price == pytest.approx(95)
+
+
+def test_take_profit_exit_then_waits_for_next_signal():
+    candles = make_candles([100, 102, 110, 108, 107, 106])
+    signals = np.array([1, 1, 0, 0, -1, 0])
+
+    trades = simulate(candles, signals, {'take_profit_percent': 5, 'stop_loss_percent': 50})
+
+    assert trades[0].exit_reason == EXIT_TARGET and trades[0].exit_index == 2
+    assert trades[1].direction == -1 and trades[1].entry_index == 4
+
+
+def test_expand_grid_merges_base_params():
+    combos = expand_grid({'a': [1, 2], 'b': [3]}, {'c': 0})
+    assert combos == [{'c': 0, 'a': 1, 'b': 3}, {'c': 0, 'a': 2, 'b': 3}]
+
+
+def test_sweep_matches_serial_backtests():
+    rng = np.random.default_rng(3)
+    candles = make_candles(500 + np.cumsum(rng.normal(0, 3, 2000)), spread=1.5)
+    grid = {'short_ma_period': [5, 10], 'long_ma_period': [20, 50], 'stop_loss_percent': [1.0, 2.0]}
+    base = {'take_profit_percent': 4.0, 'quantity': 1}
+
+    from backtest import load_signal_function
+    signal_function = load_signal_function(EXAMPLE_STRATEGY)
+    expected = [backtest(candles, signal_function, params) for params in expand_grid(grid, base)]
+
+    results = sweep(candles, EXAMPLE_STRATEGY, grid, base, processes=2)
+
+    assert [r.params for r in results] == [e.params for e in expected]
+    assert [r.total_pnl for r in results] == pytest.approx([e.total_pnl for e in expected])
+    assert all(r.trades > 0 for r in results)
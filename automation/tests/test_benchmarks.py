@@ -0,0 +1,47 @@
+import time
+
+from benchmarks.harness import compare
+from benchmarks.mock_api import MockLaravelApi
+from benchmarks.mock_broker import RATE_LIMIT_RESPONSE, MockBroker
+from benchmarks.synthetic import write_strategies
+from session_manager import jwt_expiry
+from strategy_manifest import ManifestSync
+
+
+def test_compare_flags_slower_times_and_lower_throughput():
+    baseline = {'cycle.warm_cycle_s': 1.0, 'cycle.strategies_per_s': 100.0, 'cycle.peak_rss_mb': 50.0}
+    current = {'cycle.warm_cycle_s': 1.5, 'cycle.strategies_per_s': 60.0, 'cycle.peak_rss_mb': 51.0}
+
+    regressions = compare(current, baseline, tolerance=0.25)
+
+    assert [line.split(':')[0] for line in regressions] == ['cycle.strategies_per_s', 'cycle.warm_cycle_s']
+
+
+def test_mock_broker_enforces_rate_limits():
+    broker = MockBroker(rate_limits={'placeOrder': 2})
+    client = broker.factory('key')
+
+    responses = [client.placeOrder({'tradingsymbol': 'SBIN-EQ'}) for _ in range(3)]
+
+    assert [r['status'] for r in responses] == [True, True, False]
+    assert responses[-1] == RATE_LIMIT_RESPONSE
+    assert len(broker.orders) == 2
+
+
+def test_mock_broker_sessions_carry_an_expiry():
+    client = MockBroker().factory('key')
+    response = client.generateSession('C1', '0000', '123456')
+
+    assert jwt_expiry(response['data']['jwtToken']) > time.time()
+
+
+def test_mock_api_serves_the_manifest_protocol(tmp_path):
+    strategies = write_strategies(str(tmp_path), 3)
+    api = MockLaravelApi(strategies).start()
+    try:
+        sync = ManifestSync(api.url, api.api_token)
+        assert [s['id'] for s in sync.fetch()] == [1, 2, 3]
+        assert [s['id'] for s in sync.fetch()] == [1, 2, 3]
+        assert api.not_modified == 1
+    finally:
+        api.stop()
@@ -0,0 +1,115 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from candle_aggregator import BarRing, CandleAggregator
+from candle_store import Candles
+from scheduler import IST
+from tick_feed import TICK_DTYPE
+
+
+def at(hour, minute, second=0, day=21):
+    return datetime(2025, 7, day, hour, minute, second, tzinfo=IST).timestamp()
+
+
+def aggregator(**kwargs):
+    bars = CandleAggregator(**kwargs)
+    bars.track('NSE', 'SBIN-EQ', '3045')
+    return bars
+
+
+def test_ticks_build_session_aligned_bars_in_every_timeframe():
+    bars = aggregator(timeframes=('ONE_MINUTE', 'FIVE_MINUTE'))
+    closes = []
+    bars.subscribe('FIVE_MINUTE', closes.append)
+
+    for minute, price in [(15, 100), (16, 103), (17, 98), (19, 101), (20, 105)]:
+        bars.on_tick('NSE', 'SBIN-EQ', at(9, minute, 30), price, quantity=10)
+
+    assert len(bars.candles('NSE', 'SBIN-EQ', 'ONE_MINUTE')) == 4
+    assert len(closes) == 1
+    five = closes[0]
+    assert five.timestamp == int(at(9, 15))
+    assert (five.open, five.high, five.low, five.close, five.volume) == (100, 103, 98, 101, 40)
+
+    forming = bars.forming('NSE', 'SBIN-EQ', 'FIVE_MINUTE')
+    assert forming.timestamp == int(at(9, 20)) and forming.close == 105
+
+
+def test_idle_symbols_close_on_advance_including_the_partial_last_hour():
+    bars = aggregator(timeframes=('ONE_MINUTE', 'ONE_HOUR', 'ONE_DAY'))
+    closes = []
+    bars.subscribe('ONE_HOUR', closes.append)
+    bars.subscribe('ONE_DAY', closes.append, 'NSE', 'SBIN-EQ')
+
+    bars.on_tick('NSE', 'SBIN-EQ', at(9, 0), 90)  # pre-open, ignored
+    bars.on_tick('NSE', 'SBIN-EQ', at(9, 20), 100)
+    bars.on_tick('NSE', 'SBIN-EQ', at(15, 20), 110)
+    bars.advance(at(15, 29))
+    assert [(bar.timeframe, bar.timestamp) for bar in closes] == [('ONE_HOUR', int(at(9, 15)))]
+
+    bars.advance(at(15, 30))
+    assert [(bar.timeframe, bar.timestamp) for bar in closes[1:]] == [
+        ('ONE_HOUR', int(at(15, 15))), ('ONE_DAY', int(at(9, 15)))]
+    assert (closes[-1].open, closes[-1].close) == (100, 110)
+
+
+def test_one_minute_candles_are_folded_once_and_in_progress_bars_wait():
+    bars = aggregator(timeframes=('ONE_MINUTE', 'THREE_MINUTE'))
+    candles = Candles.from_rows([[int(at(9, 15 + i)), 100 + i, 101 + i, 99 + i, 100.5 + i, 10] for i in range(4)])
+
+    assert bars.on_candles('NSE', 'SBIN-EQ', candles, now=at(9, 18, 30)) == 3  # 09:18 bar still open
+    assert bars.on_candles('NSE', 'SBIN-EQ', candles, now=at(9, 19)) == 1
+    assert bars.on_candles('NSE', 'SBIN-EQ', candles, now=at(9, 19)) == 0
+
+    three = bars.candles('NSE', 'SBIN-EQ', 'THREE_MINUTE')
+    assert three.timestamp.tolist() == [int(at(9, 15))]
+    assert (three.open[0], three.high[0], three.low[0], three.close[0], three.volume[0]) == (100, 103, 99, 102.5, 30)
+
+
+def test_tick_batches_map_tokens_to_tracked_symbols():
+    bars = aggregator(timeframes=('ONE_MINUTE',))
+    ticks = np.zeros(4, dtype=TICK_DTYPE)
+    ticks['exchange_type'] = 1
+    ticks['token'] = [3045, 3045, 1594, 3045]
+    ticks['exchange_timestamp'] = [int(at(9, 15, s) * 1000) for s in (1, 2, 3, 4)]
+    ticks['ltp'] = [10000, 10250, 50000, 9900]
+    ticks['quantity'] = 5
+
+    bars.on_ticks(ticks)
+    forming = bars.forming('NSE', 'SBIN-EQ', 'ONE_MINUTE')
+    assert (forming.open, forming.high, forming.low, forming.close, forming.volume) == (100, 102.5, 99, 99, 15)
+
+    later = ticks[:1].copy()
+    later['exchange_timestamp'] = int(at(9, 16, 1) * 1000)
+    bars.on_ticks(later)
+    assert bars.candles('NSE', 'SBIN-EQ', 'ONE_MINUTE').close.tolist() == [99]
+
+
+def test_memory_is_bounded_per_symbol():
+    ring = BarRing(3)
+    for index in range(5):
+        ring.push((index, 1, 2, 0.5, 1.5, 10))
+    assert ring.candles().timestamp.tolist() == [2, 3, 4]
+
+    with pytest.raises(ValueError):
+        CandleAggregator(timeframes=('THREE_MINUTE', 'FIVE_MINUTE'))
+    with pytest.raises(ValueError):
+        CandleAggregator(timeframes=('SEVEN_MINUTE',))
+
+
+def test_watermark_moves_with_every_tick_and_closed_bar():
+    bars = aggregator(timeframes=('ONE_MINUTE', 'FIVE_MINUTE'))
+    assert bars.watermark('NSE', 'UNKNOWN') is None
+
+    seen = {bars.watermark('NSE', 'SBIN-EQ')}
+    for second, price in [(5, 100), (20, 101), (20, 101.5)]:
+        bars.on_tick('NSE', 'SBIN-EQ', at(9, 15, second), price)
+        seen.add(bars.watermark('NSE', 'SBIN-EQ'))
+    bars.advance(at(9, 16))
+    seen.add(bars.watermark('NSE', 'SBIN-EQ'))
+
+    assert len(seen) == 5
+    bars.advance(at(9, 17))
+    assert bars.watermark('NSE', 'SBIN-EQ') in seen  # nothing new folded in
@@ -0,0 +1,107 @@
+import os
+import time
+
+import numpy as np
+
+from candle_store import COLUMNS, AngelCandleFetcher, Candles, CandleStore
+
+SERIES = ('NSE', 'SBIN-EQ', 'FIVE_MINUTE')
+OPEN = 1753069500  # 2025-07-21 09:15 IST
+
+
+def bars(*starts):
+    return Candles.from_rows([[start, 100, 101, 99, 100.5, 10] for start in starts])
+
+
+class RecordingBroker:
+    def __init__(self, rows):
+        self.rows = rows
+        self.requests = []
+
+    def getCandleData(self, params):
+        self.requests.append(params)
+        return {'status': True, 'data': self.rows}
+
+
+def test_appends_only_bars_newer_than_the_cached_tail(tmp_path):
+    store = CandleStore(str(tmp_path))
+    assert store.append(*SERIES, bars(OPEN, OPEN + 300)) == 2
+    assert store.append(*SERIES, bars(OPEN + 300, OPEN + 600, OPEN + 900)) == 2
+
+    candles = store.read(*SERIES)
+    assert candles.timestamp.tolist() == [OPEN + step * 300 for step in range(4)]
+    assert store.last_timestamp(*SERIES) == OPEN + 900
+
+
+def test_torn_column_writes_are_truncated_on_the_next_append(tmp_path):
+    store = CandleStore(str(tmp_path))
+    store.append(*SERIES, bars(OPEN))
+    path = store.series_path(*SERIES)
+    with open(path / 'close.bin', 'ab') as f:
+        f.write(b'\x01\x02\x03')  # interrupted append, meta never updated
+
+    store.append(*SERIES, bars(OPEN + 300))
+    for name, dtype in COLUMNS:
+        assert os.path.getsize(path / f"{name}.bin") == 2 * dtype.itemsize
+    assert store.read(*SERIES).close.tolist() == [100.5, 100.5]
+
+
+def test_least_recently_used_series_are_evicted_first(tmp_path):
+    store = CandleStore(str(tmp_path), max_bytes=1)
+    for symbol in ('A-EQ', 'B-EQ', 'C-EQ'):
+        store.append('NSE', symbol, 'ONE_DAY', bars(OPEN))
+        time.sleep(0.01)
+    store.touch('NSE', 'A-EQ', 'ONE_DAY')
+    store.max_bytes = store.disk_usage() - 1
+
+    evicted = store.evict()
+
+    assert [path.parent.name for path in evicted] == ['B-EQ']
+    assert store.read('NSE', 'B-EQ', 'ONE_DAY') is None
+    assert store.read('NSE', 'A-EQ', 'ONE_DAY') is not None
+
+
+def test_fetch_skips_the_bar_still_forming_and_asks_in_exchange_time(tmp_path, monkeypatch):
+    now = OPEN + 620  # 09:25:20 IST, the 09:25 bar is still open
+    monkeypatch.setattr(time, 'time', lambda: now)
+    broker = RecordingBroker([[OPEN, 1, 2, 0.5, 1.5, 10], [OPEN + 300, 1, 2, 0.5, 1.5, 10],
+                              [OPEN + 600, 1, 2, 0.5, 1.2, 3]])
+    fetch = AngelCandleFetcher(broker, lambda exchange, symbol: '3045')
+
+    candles = fetch(*SERIES, since=OPEN - 300)
+
+    assert candles.timestamp.tolist() == [OPEN, OPEN + 300]
+    assert broker.requests[0]['fromdate'] == '2025-07-21 09:15'
+    assert broker.requests[0]['todate'] == '2025-07-21 09:25'
+
+    # A refresh caches the 09:25 bar only once it has closed, with its final close
+    store = CandleStore(str(tmp_path))
+    assert store.refresh(*SERIES, fetch) == 2
+    broker.rows[-1][4] = 1.8
+    monkeypatch.setattr(time, 'time', lambda: OPEN + 905)
+    assert store.refresh(*SERIES, fetch) == 1
+    assert store.read(*SERIES).close.tolist() == [1.5, 1.5, 1.8]
+
+
+def test_bars_ending_at_the_session_close_are_fetched_at_the_close(monkeypatch):
+    close = OPEN + 375 * 60  # 15:30 IST
+    monkeypatch.setattr(time, 'time', lambda: close)
+    midnight = OPEN - 33300  # Angel One stamps daily bars at 00:00 IST
+
+    daily = RecordingBroker([[midnight - 3 * 86400, 1, 2, 0.5, 1.5, 10], [midnight, 1, 2, 0.5, 1.5, 10]])
+    candles = AngelCandleFetcher(daily, lambda exchange, symbol: '3045')('NSE', 'SBIN-EQ', 'ONE_DAY', None)
+    assert candles.timestamp.tolist() == [midnight - 3 * 86400, midnight]
+
+    hourly = RecordingBroker([[OPEN + hour * 3600, 1, 2, 0.5, 1.5, 10] for hour in range(7)])
+    candles = AngelCandleFetcher(hourly, lambda exchange, symbol: '3045')('NSE', 'SBIN-EQ', 'ONE_HOUR', None)
+    assert candles.timestamp[-1] == OPEN + 6 * 3600  # the 15:15-15:30 bar
+
+    monkeypatch.setattr(time, 'time', lambda: close - 1)
+    candles = AngelCandleFetcher(hourly, lambda exchange, symbol: '3045')('NSE', 'SBIN-EQ', 'ONE_HOUR', None)
+    assert candles.timestamp[-1] == OPEN + 5 * 3600
+
+
+def test_records_carry_exchange_time():
+    record = bars(OPEN).to_records()[0]
+    assert record['date'] == '2025-07-21 09:15:00'
+    assert np.isclose(record['close'], 100.5)
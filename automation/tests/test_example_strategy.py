@@ -0,0 +1,93 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from candle_store import Candles, CandleStore
+from plugin_host import PluginHost, StrategyContext
+
+EXAMPLE_STRATEGY = str(Path(__file__).resolve().parent.parent / 'strategies' / 'example_strategy.py')
+OPEN = 1753069500  # 2025-07-21 09:15 IST
+
+
+@pytest.fixture
+def example():
+    module = PluginHost().load({'python_file_path': EXAMPLE_STRATEGY, 'last_modified': 0, 'file_size': 0}).module
+    module._crossover_streams.clear()
+    return module
+
+
+def daily(close, start=0):
+    return Candles.from_rows([[OPEN + (start + i) * 86400, c, c + 1, c - 1, c, 1000] for i, c in enumerate(close)])
+
+
+def strategy(example, store_dir, **parameters):
+    context = StrategyContext(1, 'Crossover', parameters={'symbol': 'SBIN-EQ', **parameters},
+                              candle_store_dir=str(store_dir))
+    return example.create_strategy(context)
+
+
+def test_warm_streaming_signals_match_the_batch_rule(example, tmp_path):
+    close = 500 + np.cumsum(np.random.default_rng(3).normal(0, 5, 120))
+    store = CandleStore(str(tmp_path))
+    store.append('NSE', 'SBIN-EQ', 'ONE_DAY', daily(close[:40]))
+
+    signals = []
+    for index in range(40, len(close)):
+        store.append('NSE', 'SBIN-EQ', 'ONE_DAY', daily(close[index:index + 1], start=index))
+        run = strategy(example, tmp_path)  # a new instance every cycle, as the plugin host does
+        params = run.get_strategy_parameters()
+
+        streamed = run.streaming_signal(params)
+        batch = run.generate_signals(run.fetch_historical_data('SBIN-EQ', 'NSE'), params)
+        assert streamed['signal'] == batch['signal']
+        assert streamed.get('entry_price') == pytest.approx(batch.get('entry_price'))
+        signals.append(streamed['signal'])
+
+    assert {'BUY', 'SELL'} <= set(signals)
+    (key, stream), = example._crossover_streams.items()
+    assert key == (1, 'NSE', 'SBIN-EQ', 'ONE_DAY', 5, 20)
+    assert stream.last_timestamp == OPEN + (len(close) - 1) * 86400
+
+
+def test_streams_are_keyed_per_symbol_and_periods(example, tmp_path):
+    store = CandleStore(str(tmp_path))
+    for symbol in ('SBIN-EQ', 'INFY-EQ'):
+        store.append('NSE', symbol, 'ONE_DAY', daily(np.linspace(500, 520, 30)))
+
+    strategy(example, tmp_path).run()
+    strategy(example, tmp_path, symbol='INFY-EQ').run()
+    strategy(example, tmp_path, short_ma_period=3).run()
+
+    assert sorted(key[2:] for key in example._crossover_streams) == [
+        ('INFY-EQ', 'ONE_DAY', 5, 20), ('SBIN-EQ', 'ONE_DAY', 3, 20), ('SBIN-EQ', 'ONE_DAY', 5, 20)]
+
+
+def test_least_recently_used_streams_are_dropped_beyond_the_cap(example, tmp_path, monkeypatch):
+    monkeypatch.setattr(example, 'MAX_CROSSOVER_STREAMS', 2)
+    store = CandleStore(str(tmp_path))
+    store.append('NSE', 'SBIN-EQ', 'ONE_DAY', daily(np.linspace(500, 520, 30)))
+
+    for short in (3, 4, 3, 5):
+        strategy(example, tmp_path, short_ma_period=short).run()
+
+    assert [key[4] for key in example._crossover_streams] == [3, 5]
+
+
+def test_no_warm_up_without_cached_candles(example, tmp_path):
+    run = strategy(example, tmp_path)
+
+    assert run.streaming_signal(run.get_strategy_parameters()) is None
+    assert run.run()  # falls back to the batch rule
+    assert example._crossover_streams == {}
+
+
+def test_backtest_hook_agrees_with_the_live_rule(example, tmp_path):
+    close = 500 + np.cumsum(np.random.default_rng(5).normal(0, 5, 80))
+    run = strategy(example, tmp_path)
+    params = run.get_strategy_parameters()
+
+    signals = example.signal_array(daily(close), params)
+    for end in range(25, len(close)):
+        live = run.generate_signals(daily(close[:end]).to_records(), params)
+        assert {1: 'BUY', -1: 'SELL'}.get(int(signals[end - 1]), 'HOLD') == live['signal']
@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+from indicators import atr, bollinger, crossover, ema, rsi, sma, vwap
+
+
+def reference_moving_average(data, period):
+    """The per-bar loop from example_strategy.calculate_moving_average"""
+    if len(data) < period:
+        return []
+
+    ma_values = []
+    for i in range(period - 1, len(data)):
+        avg = sum(float(data[j]['close']) for j in range(i - period + 1, i + 1)) / period
+        ma_values.append(avg)
+
+    return ma_values
+
+
+def reference_wilder(values, period, alpha):
+    out = [float('nan')] * len(values)
+    if len(values) < period:
+        return out
+    current = sum(values[:period]) / period
+    out[period - 1] = current
+    for i in range(period, len(values)):
+        current = current + alpha * (values[i] - current)
+        out[i] = current
+    return out
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(42)
+    close = 500 + np.cumsum(rng.normal(0, 5, 250))
+    high = close + rng.uniform(0, 4, 250)
+    low = close - rng.uniform(0, 4, 250)
+    volume = rng.integers(1_000, 100_000, 250).astype(float)
+    return high, low, close, volume
+
+
+@pytest.mark.parametrize('period', [1, 5, 20, 50])
+def test_sma_matches_reference_loop(prices, period):
+    close = prices[2]
+    data = [{'close': value} for value in close]
+
+    result = sma(close, period)
+
+    assert np.isnan(result[:period - 1]).all()
+    np.testing.assert_allclose(result[period - 1:], reference_moving_average(data, period), rtol=1e-10)
+
+
+def test_sma_shorter_than_period_is_all_nan():
+    assert np.isnan(sma([1.0, 2.0], 5)).all()
+
+
+def test_sma_rejects_non_positive_period():
+    with pytest.raises(ValueError):
+        sma([1.0, 2.0], 0)
+
+
+def test_ema_matches_reference(prices):
+    close = prices[2]
+    expected = reference_wilder(list(close), 10, 2.0 / 11)
+    np.testing.assert_allclose(ema(close, 10), expected, rtol=1e-10)
+
+
+def test_rsi_matches_reference(prices):
+    close = prices[2]
+    change = np.diff(close)
+    gains = reference_wilder(list(np.clip(change, 0, None)), 14, 1 / 14)
+    losses = reference_wilder(list(np.clip(-change, 0, None)), 14, 1 / 14)
+    expected = [float('nan')] + [100 - 100 / (1 + g / l) for g, l in zip(gains, losses)]
+
+    result = rsi(close, 14)
+
+    np.testing.assert_allclose(result, expected, rtol=1e-10)
+    assert np.nanmin(result) >= 0 and np.nanmax(result) <= 100
+
+
+def test_rsi_without_losses_is_100():
+    assert rsi(np.arange(30.0), 14)[-1] == 100.0
+
+
+def test_atr_matches_reference(prices):
+    high, low, close, _ = prices
+    tr = [high[0] - low[0]] + [
+        max(high[i], close[i - 1]) - min(low[i], close[i - 1]) for i in range(1, len(close))
+    ]
+    np.testing.assert_allclose(atr(high, low, close, 14), reference_wilder(tr, 14, 1 / 14), rtol=1e-10)
+
+
+def test_bollinger_matches_reference(prices):
+    close = prices[2]
+    lower, middle, upper = bollinger(close, 20, 2.0)
+
+    for i in range(19, len(close)):
+        window = close[i - 19:i + 1]
+        assert middle[i] == pytest.approx(window.mean(), rel=1e-10)
+        assert upper[i] == pytest.approx(window.mean() + 2 * window.std(), rel=1e-9)
+        assert lower[i] == pytest.approx(window.mean() - 2 * window.std(), rel=1e-9)
+
+
+def test_vwap_restarts_each_session(prices):
+    high, low, close, volume = prices
+    session = np.repeat(np.arange(5), 50)
+
+    result = vwap(high, low, close, volume, session)
+
+    typical = (high + low + close) / 3
+    for day in range(5):
+        bars = slice(day * 50, day * 50 + 50)
+        expected = np.cumsum(typical[bars] * volume[bars]) / np.cumsum(volume[bars])
+        np.testing.assert_allclose(result[bars], expected, rtol=1e-10)
+
+
+def test_batched_rows_match_single_symbol(prices):
+    high, low, close, volume = prices
+    batch = np.vstack([close, close * 1.5, close[::-1]])
+
+    for function in (lambda x: sma(x, 20), lambda x: ema(x, 20), lambda x: rsi(x, 14)):
+        batched = function(batch)
+        for row in range(batch.shape[0]):
+            np.testing.assert_allclose(batched[row], function(batch[row]), rtol=1e-12)
+
+
+def test_crossover_signals():
+    fast = np.array([1.0, 2.0, 3.0, 2.0, 1.0])
+    slow = np.array([2.0, 2.0, 2.0, 2.0, 2.0])
+    np.testing.assert_array_equal(crossover(fast, slow), [0, 0, 1, 0, -1])
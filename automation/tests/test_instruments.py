@@ -0,0 +1,96 @@
+import json
+from datetime import date
+
+import pytest
+
+import instruments
+from instruments import compile_index, current_build, load, refresh_index
+
+
+def equity(token, symbol, exchange='NSE'):
+    return {'token': token, 'symbol': symbol, 'name': symbol.split('-')[0], 'expiry': '', 'strike': '-1.000000',
+            'lotsize': '1', 'instrumenttype': '', 'exch_seg': exchange, 'tick_size': '5.000000'}
+
+
+def option(token, expiry, strike, option_type, name='NIFTY'):
+    return {'token': token, 'symbol': f"{name}{expiry[:5]}{expiry[-2:]}{strike}{option_type}", 'name': name,
+            'expiry': expiry, 'strike': f"{strike * 100}.000000", 'lotsize': '75', 'instrumenttype': 'OPTIDX',
+            'exch_seg': 'NFO', 'tick_size': '5.000000'}
+
+
+@pytest.fixture
+def scrip_master():
+    entries = [equity('3045', 'SBIN-EQ'), equity('500112', 'SBIN', 'BSE'), equity('2885', 'RELIANCE-EQ')]
+    for expiry in ('04DEC2036', '27NOV2036'):
+        for strike in (24100, 24000, 24200):
+            entries += [option(f"{expiry[:2]}{strike}1", expiry, strike, 'CE'),
+                        option(f"{expiry[:2]}{strike}2", expiry, strike, 'PE')]
+    entries.append(option('99', '27NOV2036', 50000, 'CE', name='BANKNIFTY'))
+    return entries
+
+
+def test_lookup_by_symbol_and_token(tmp_path, scrip_master):
+    compile_index(scrip_master, str(tmp_path))
+    index = load(str(tmp_path))
+
+    assert len(index) == len(scrip_master)
+    sbin = index.lookup('NSE', 'SBIN-EQ')
+    assert (sbin.token, sbin.tick_size, sbin.expiry) == ('3045', 0.05, None)
+    assert index.token('bse', 'SBIN') == '500112'
+    assert index.by_token('NSE', '2885').symbol == 'RELIANCE-EQ'
+    assert index.lookup('NSE', 'SBIN') is None
+    assert index.token('NFO', 'SBIN-EQ') is None
+
+
+def test_option_chain_is_sorted_by_expiry_and_strike(tmp_path, scrip_master):
+    compile_index(scrip_master, str(tmp_path))
+    index = load(str(tmp_path))
+
+    assert index.expiries('NIFTY') == [date(2036, 11, 27), date(2036, 12, 4)]
+
+    chain = index.option_chain('NIFTY')  # nearest expiry
+    assert [(option.strike, option.option_type) for option in chain] == [
+        (24000.0, 'CE'), (24000.0, 'PE'), (24100.0, 'CE'), (24100.0, 'PE'), (24200.0, 'CE'), (24200.0, 'PE')]
+    assert {option.expiry for option in chain} == {date(2036, 11, 27)}
+    assert chain[0].lot_size == 75
+
+    window = index.option_chain('nifty', expiry=date(2036, 12, 4), min_strike=24050, max_strike=24200)
+    assert [option.symbol for option in window] == ['NIFTY04DEC3624100CE', 'NIFTY04DEC3624100PE',
+                                                    'NIFTY04DEC3624200CE', 'NIFTY04DEC3624200PE']
+    assert [option.strike for option in index.option_chain('BANKNIFTY')] == [50000.0]
+    assert index.option_chain('FINNIFTY') == []
+
+
+def test_refresh_builds_once_per_trading_day(tmp_path, scrip_master):
+    calls = []
+
+    class Session:
+        def get(self, url, timeout):
+            calls.append(url)
+
+            class Response:
+                def raise_for_status(self):
+                    pass
+
+                def json(self):
+                    return scrip_master
+            return Response()
+
+    root = str(tmp_path)
+    assert refresh_index(root, session=Session(), trading_date=date(2036, 11, 2)) is True
+    first = current_build(root)
+    assert refresh_index(root, session=Session(), trading_date=date(2036, 11, 2)) is False
+    assert refresh_index(root, session=Session(), trading_date=date(2036, 11, 3)) is True
+
+    assert len(calls) == 2
+    assert current_build(root) != first
+    assert json.loads((current_build(root) / 'meta.json').read_text())['trading_date'] == '2036-11-03'
+    assert load(root).build == current_build(root)
+
+
+def test_old_builds_are_pruned(tmp_path, scrip_master):
+    for _ in range(instruments.KEEP_BUILDS + 3):
+        compile_index(scrip_master, str(tmp_path))
+
+    builds = [path for path in tmp_path.iterdir() if path.is_dir()]
+    assert len(builds) == instruments.KEEP_BUILDS + 1
@@ -0,0 +1,109 @@
+import gzip
+import json
+import time
+from concurrent.futures import Future
+
+import pytest
+import requests
+
+from journal import ExecutionJournal, JournalUploader
+from order_router import OrderResult
+from strategy_protocol import MessageDispatcher
+
+
+class RecordingSession:
+    """Captures posted batches; fails the requests listed in ``failures``"""
+
+    def __init__(self, failures=()):
+        self.failures = set(failures)
+        self.batches = []
+        self.calls = 0
+
+    def post(self, url, data, headers, timeout):
+        self.calls += 1
+        if self.calls in self.failures:
+            raise requests.ConnectionError('connection reset')
+        assert headers['Content-Encoding'] == 'gzip'
+        self.batches.append(json.loads(gzip.decompress(data))['records'])
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = ExecutionJournal(str(tmp_path / 'journal.db'))
+    yield journal
+    journal.close()
+
+
+def test_journal_uses_wal_and_queries_by_strategy(journal):
+    journal.record('execution', 1, status='success', data={'duration_ms': 12.5})
+    journal.record('signal', 2, status='BUY', message='crossover')
+    journal.record('order', 1, status='placed', account_id=9)
+
+    mode = journal._conn.execute('PRAGMA journal_mode').fetchone()[0]
+    assert mode == 'wal'
+
+    records = journal.query(strategy_id=1)
+    assert [record['kind'] for record in records] == ['order', 'execution']
+    assert records[0]['account_id'] == 9
+    assert records[1]['data'] == {'duration_ms': 12.5}
+    assert journal.query(kind='signal')[0]['message'] == 'crossover'
+
+
+def test_unknown_kind_is_rejected(journal):
+    with pytest.raises(ValueError):
+        journal.record('trade', 1)
+
+
+def test_uploader_sends_batches_and_marks_them(journal):
+    for index in range(5):
+        journal.record('execution', index, status='success')
+    session = RecordingSession()
+
+    sent = JournalUploader(journal, 'http://api/api', session, batch_size=2).upload()
+
+    assert sent == 5
+    assert [len(batch) for batch in session.batches] == [2, 2, 1]
+    assert 'seq' not in session.batches[0][0]
+    assert journal.pending() == []
+
+
+def test_failed_batch_stays_pending(journal):
+    for index in range(3):
+        journal.record('execution', index)
+    session = RecordingSession(failures={2})
+    uploader = JournalUploader(journal, 'http://api/api', session, batch_size=2)
+
+    with pytest.raises(requests.ConnectionError):
+        uploader.upload()
+    assert len(journal.pending()) == 1
+
+    assert uploader.upload() == 1
+    ids = [record['record_id'] for batch in session.batches for record in batch]
+    assert len(ids) == len(set(ids)) == 3
+
+
+def test_prune_only_removes_uploaded_records(journal):
+    journal.record('execution', 1)
+    journal.mark_uploaded(1)
+    journal.record('execution', 2)
+
+    assert journal.prune(time.time() + 1) == 1
+    assert [record['strategy_id'] for record in journal.query()] == [2]
+
+
+def test_dispatcher_journals_signals_and_order_outcomes(journal):
+    def submit(params, key):
+        future = Future()
+        future.set_result(OrderResult(key=key, status='placed', order_id='ORD1', attempts=1))
+        return future
+
+    dispatcher = MessageDispatcher(3, 'Test', submit, journal=journal, account_id=4)
+    dispatcher({'type': 'signal', 'action': 'BUY', 'reason': 'crossover', 'order': {'quantity': '1'}, 'key': 'k1'})
+
+    order, signal = journal.query(strategy_id=3)
+    assert (signal['kind'], signal['status'], signal['account_id']) == ('signal', 'BUY', 4)
+    assert (order['kind'], order['status']) == ('order', 'placed')
+    assert order['data']['order_id'] == 'ORD1'
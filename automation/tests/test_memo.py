@@ -0,0 +1,76 @@
+import os
+
+from candle_store import Candles, CandleStore
+from memo import RunMemo, run_fingerprint, script_digest
+
+SERIES = ('NSE', 'SBIN-EQ', 'ONE_DAY')
+
+
+def test_fingerprint_changes_with_any_input():
+    base = run_fingerprint('abc', {'symbol': 'SBIN-EQ', 'quantity': 1}, {SERIES: (10, 1.0)})
+
+    assert base == run_fingerprint('abc', {'quantity': 1, 'symbol': 'SBIN-EQ'}, {SERIES: (10, 1.0)})
+    assert base != run_fingerprint('abd', {'symbol': 'SBIN-EQ', 'quantity': 1}, {SERIES: (10, 1.0)})
+    assert base != run_fingerprint('abc', {'symbol': 'SBIN-EQ', 'quantity': 2}, {SERIES: (10, 1.0)})
+    assert base != run_fingerprint('abc', {'symbol': 'SBIN-EQ', 'quantity': 1}, {SERIES: (11, 2.0)})
+    assert base != run_fingerprint('abc', {'symbol': 'SBIN-EQ', 'quantity': 1}, {SERIES: (10, 1.0)}, account_id=2)
+
+
+def test_fingerprint_covers_quotes_and_aggregated_bars():
+    instrument = ('NSE', 'SBIN-EQ')
+    base = run_fingerprint('abc', {}, {SERIES: (10, 1.0)}, quotes={instrument: 100.0}, bars={instrument: (60, 1)})
+
+    assert base != run_fingerprint('abc', {}, {SERIES: (10, 1.0)}, quotes={instrument: 100.5}, bars={instrument: (60, 1)})
+    assert base != run_fingerprint('abc', {}, {SERIES: (10, 1.0)}, quotes={instrument: 100.0}, bars={instrument: (120, 2)})
+    assert base != run_fingerprint('abc', {}, {SERIES: (10, 1.0)})
+
+
+def test_script_digest_follows_file_changes(tmp_path):
+    script = tmp_path / 'strategy.py'
+    script.write_text('print(1)\n')
+    first = script_digest(str(script))
+    assert script_digest(str(script)) == first
+
+    script.write_text('print(22)\n')
+    os.utime(script, (1, 1))
+    assert script_digest(str(script)) != first
+
+
+def test_lookup_requires_the_same_fingerprint():
+    memo = RunMemo()
+    memo.store((1, None), 'f1', True, [SERIES])
+
+    assert memo.lookup((1, None), 'f1').success is True
+    assert memo.lookup((1, None), 'f2') is None
+    assert memo.lookup((2, None), 'f1') is None
+    assert (memo.hits, memo.misses) == (1, 2)
+
+
+def test_entries_are_evicted_least_recently_used_first():
+    memo = RunMemo(max_entries=2)
+    memo.store(1, 'a', True)
+    memo.store(2, 'b', True)
+    memo.lookup(1, 'a')
+    memo.store(3, 'c', True)
+
+    assert len(memo) == 2
+    assert memo.lookup(2, 'b') is None
+    assert memo.lookup(1, 'a') is not None
+
+
+def test_new_bars_invalidate_dependent_entries(tmp_path):
+    store = CandleStore(str(tmp_path))
+    assert store.watermark(*SERIES) is None
+
+    store.append(*SERIES, Candles.from_rows([['2025-07-21T09:15:00+05:30', 1, 2, 0.5, 1.5, 100]]))
+    watermark = store.watermark(*SERIES)
+    assert watermark[0] == 1
+
+    memo = RunMemo()
+    memo.store(1, 'a', True, [SERIES])
+    memo.store(2, 'b', True, [('NSE', 'INFY-EQ', 'ONE_DAY')])
+    assert memo.invalidate_series(*SERIES) == 1
+    assert memo.lookup(1, 'a') is None and memo.lookup(2, 'b') is not None
+
+    store.append(*SERIES, Candles.from_rows([['2025-07-22T09:15:00+05:30', 1, 2, 0.5, 1.5, 100]]))
+    assert store.watermark(*SERIES) != watermark
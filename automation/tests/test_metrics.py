@@ -0,0 +1,61 @@
+import time
+import urllib.request
+
+from metrics import MetricsServer, Registry, SlowCycleProfiler
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.histogram('stage_seconds', 'Stage latency', buckets=(0.1, 1.0))
+    latency.observe(0.05, stage='fetch')
+    latency.observe(0.5, stage='fetch')
+    latency.observe(5.0, stage='fetch')
+
+    text = registry.render()
+    assert '# TYPE stage_seconds histogram' in text
+    assert 'stage_seconds_bucket{stage="fetch",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="fetch",le="1"} 2' in text
+    assert 'stage_seconds_bucket{stage="fetch",le="+Inf"} 3' in text
+    assert 'stage_seconds_count{stage="fetch"} 3' in text
+    assert 'stage_seconds_sum{stage="fetch"} 5.55' in text
+
+
+def test_counter_labels_are_escaped():
+    registry = Registry()
+    runs = registry.counter('runs_total', 'Runs')
+    runs.inc(strategy='say "hi"', result='failure')
+    runs.inc(strategy='say "hi"', result='failure')
+
+    assert runs.value(result='failure', strategy='say "hi"') == 2
+    assert 'runs_total{result="failure",strategy="say \\"hi\\""} 2' in registry.render()
+
+
+def test_server_exposes_metrics():
+    registry = Registry()
+    registry.counter('cycles_total', 'Cycles').inc()
+    server = MetricsServer(0, registry=registry)
+    server.start()
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{server.port}/metrics') as response:
+            assert 'cycles_total 1' in response.read().decode()
+    finally:
+        server.stop()
+
+
+def test_slow_cycle_profile_is_written(tmp_path):
+    profiler = SlowCycleProfiler(threshold=0.05, directory=str(tmp_path), interval=0.005)
+
+    with profiler.cycle():
+        time.sleep(0.01)
+    assert list(tmp_path.iterdir()) == []
+
+    def busy_strategy():
+        end = time.monotonic() + 0.1
+        while time.monotonic() < end:
+            pass
+
+    with profiler.cycle():
+        busy_strategy()
+
+    [profile] = list(tmp_path.iterdir())
+    assert 'busy_strategy' in profile.read_text()
@@ -0,0 +1,156 @@
+import threading
+import time
+
+import pytest
+
+import metrics
+from order_router import STATUS_FAILED, STATUS_PLACED, STATUS_REJECTED, OrderRouter, TokenBucket
+
+
+class MockSmartConnect:
+    """Stand-in for SmartConnect recording orders and injecting failures"""
+
+    def __init__(self, latency=0.0, failures=None):
+        self.latency = latency
+        self.failures = list(failures or [])  # per-call: None, 'timeout_after_place', 'timeout', 'rate', 'reject'
+        self.orders = []
+        self.calls = []
+        self.order_book_available = True
+        self._lock = threading.Lock()
+
+    def placeOrder(self, params):
+        with self._lock:
+            self.calls.append(time.monotonic())
+            failure = self.failures.pop(0) if self.failures else None
+        time.sleep(self.latency)
+
+        if failure == 'timeout':
+            raise TimeoutError('read timed out')
+        if failure == 'rate':
+            return {'status': False, 'message': 'Access denied because of exceeding access rate', 'errorcode': ''}
+        if failure == 'reject':
+            return {'status': False, 'message': 'Invalid symbol', 'errorcode': 'AB1019'}
+
+        with self._lock:
+            order_id = f"ORD{len(self.orders) + 1}"
+            self.orders.append({'orderid': order_id, 'ordertag': params.get('ordertag')})
+
+        if failure == 'timeout_after_place':
+            raise TimeoutError('read timed out')
+        return {'status': True, 'data': {'orderid': order_id}}
+
+    def orderBook(self):
+        if not self.order_book_available:
+            raise ConnectionError('unavailable')
+        with self._lock:
+            return {'status': True, 'data': list(self.orders)}
+
+
+ORDER = {'tradingsymbol': 'SBIN-EQ', 'transactiontype': 'BUY', 'quantity': '1'}
+
+
+def make_router(api, **kwargs):
+    kwargs.setdefault('rate_per_second', 1000)
+    kwargs.setdefault('retry_delay', 0)
+    return OrderRouter(lambda: api, **kwargs)
+
+
+def test_places_order_with_idempotency_tag():
+    api = MockSmartConnect()
+    router = make_router(api)
+
+    result = router.place(ORDER, key='abc')
+
+    assert result.status == STATUS_PLACED and result.order_id == 'ORD1'
+    assert api.orders[0]['ordertag'] == 'abc'
+    assert result.latency >= result.queue_latency >= 0
+
+
+def test_resubmitting_same_key_does_not_duplicate():
+    api = MockSmartConnect()
+    router = make_router(api)
+
+    first = router.submit(ORDER, key='dup').result()
+    second = router.submit(ORDER, key='dup').result()
+
+    assert first is second
+    assert len(api.orders) == 1
+
+
+def test_retries_transient_failures():
+    api = MockSmartConnect(failures=['timeout', 'rate'])
+    router = make_router(api, max_retries=3)
+    calls = metrics.STAGE_SECONDS.count(stage='place_order')
+
+    result = router.place(ORDER)
+
+    assert result.status == STATUS_PLACED
+    assert result.attempts == 3
+    assert len(api.orders) == 1
+    assert metrics.STAGE_SECONDS.count(stage='place_order') == calls + 3  # every broker call is timed
+
+
+def test_timeout_after_placement_is_not_retried():
+    api = MockSmartConnect(failures=['timeout_after_place'])
+    router = make_router(api)
+
+    result = router.place(ORDER)
+
+    assert result.status == STATUS_PLACED and result.order_id == 'ORD1'
+    assert result.attempts == 1
+    assert len(api.orders) == 1
+
+
+def test_unknown_outcome_is_not_retried():
+    api = MockSmartConnect(failures=['timeout'])
+    api.order_book_available = False
+    router = make_router(api)
+
+    result = router.place(ORDER)
+
+    assert result.status == STATUS_FAILED
+    assert len(api.calls) == 1
+
+
+def test_rejection_is_not_retried():
+    api = MockSmartConnect(failures=['reject'])
+    router = make_router(api)
+
+    result = router.place(ORDER)
+
+    assert result.status == STATUS_REJECTED and 'AB1019' in result.error
+    assert len(api.calls) == 1
+
+
+def test_orders_run_concurrently_under_rate_limit():
+    api = MockSmartConnect(latency=0.05)
+    router = make_router(api, rate_per_second=20, max_workers=8, bucket=TokenBucket(20, capacity=1))
+
+    started = time.monotonic()
+    results = [f.result() for f in [router.submit(ORDER) for _ in range(10)]]
+    elapsed = time.monotonic() - started
+
+    assert all(r.placed for r in results)
+    # Rate limit: 10 orders at 20/s from an empty bucket need ~0.45s...
+    assert elapsed >= 0.4
+    # ...but broker latency overlaps instead of adding up to 10 * 0.05s on top
+    assert elapsed < 0.45 + 10 * 0.05
+    gaps = [b - a for a, b in zip(api.calls, api.calls[1:])]
+    assert min(gaps) >= 0.04
+
+    summary = router.latency_summary()
+    assert summary['count'] == 10 and summary['p50_ms'] > 0
+
+
+def test_token_bucket_with_fake_clock():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(2, capacity=2, clock=lambda: now[0], sleep=sleep)
+    assert bucket.acquire() == 0 and bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert sleeps == [pytest.approx(0.5)]
@@ -0,0 +1,88 @@
+import sys
+import threading
+
+import pytest
+
+from plugin_host import PluginHost, StrategyContext, StrategyLoadError, StrategyTimeout
+
+STRATEGY = """
+class Strategy:
+    def __init__(self, context):
+        self.context = context
+
+    def run(self):
+        {body}
+        return True
+
+
+def create_strategy(context):
+    return Strategy(context)
+"""
+
+
+def write(path, body='pass'):
+    path.write_text(STRATEGY.format(body=body))
+    return {'id': 1, 'name': 'Test', 'python_file_path': str(path)}
+
+
+def test_modules_stay_warm_until_the_api_fingerprint_changes(tmp_path):
+    host = PluginHost()
+    path = tmp_path / 'strategy.py'
+    strategy = write(path, body="self.context.parameters['version'] = 1")
+    strategy.update(last_modified=100, file_size=10)
+    context = StrategyContext(1, 'Test')
+
+    first = host.load(strategy)
+    write(path, body="self.context.parameters['version'] = 20")
+    assert host.load(strategy) is first  # same (last_modified, size): no re-import
+    host.run(strategy, context)
+    assert context.parameters['version'] == 1
+
+    strategy['file_size'] = 11
+    assert host.run(strategy, context)
+    assert context.parameters['version'] == 20
+    assert host.loaded_files() == [str(path)]
+
+
+def test_fingerprint_falls_back_to_the_file(tmp_path):
+    strategy = write(tmp_path / 'strategy.py')
+    size = (tmp_path / 'strategy.py').stat().st_size
+
+    assert PluginHost.fingerprint(strategy)[1] == size
+    assert PluginHost.fingerprint({**strategy, 'last_modified': 5, 'file_size': 7}) == (5, 7)
+
+
+def test_unsupported_and_broken_modules(tmp_path):
+    host = PluginHost()
+    plain = tmp_path / 'plain.py'
+    plain.write_text("print('hello')\n")
+    plain_strategy = {'id': 2, 'python_file_path': str(plain), 'last_modified': 1, 'file_size': 1}
+    assert not host.supports(plain_strategy)
+    with pytest.raises(StrategyLoadError):
+        host.run(plain_strategy, StrategyContext(2, 'Plain'))
+
+    strategy = write(tmp_path / 'strategy.py')
+    strategy.update(last_modified=1, file_size=1)
+    working = host.load(strategy).module
+    (tmp_path / 'strategy.py').write_text("raise RuntimeError('broken')\n")
+    strategy['file_size'] = 2
+    assert not host.supports(strategy)
+
+    assert sys.modules[PluginHost.module_name(strategy['python_file_path'])] is working
+
+
+def test_a_run_past_its_timeout_is_abandoned(tmp_path):
+    host = PluginHost()
+    release = threading.Event()
+    strategy = write(tmp_path / 'strategy.py', body="self.context.parameters['release'].wait(5)")
+    context = StrategyContext(1, 'Test', parameters={'release': release})
+
+    with pytest.raises(StrategyTimeout):
+        host.run(strategy, context, timeout=0.1)
+    release.set()
+
+    assert host.run(strategy, context, timeout=1)
+
+    failing = write(tmp_path / 'failing.py', body="raise ValueError('bad input')")
+    with pytest.raises(ValueError):
+        host.run(failing, StrategyContext(1, 'Test'), timeout=1)
@@ -0,0 +1,71 @@
+from order_router import TokenBucket
+from quotes import MODE_LTP, Quote, QuoteCoalescer, QuoteSnapshot, strategy_instruments
+
+
+class QuoteApi:
+    """SmartConnect stand-in recording getMarketData calls"""
+
+    def __init__(self, missing=()):
+        self.calls = []
+        self.missing = set(missing)
+
+    def getMarketData(self, mode, exchangeTokens):
+        self.calls.append((mode, exchangeTokens))
+        fetched = [{'exchange': exchange, 'symbolToken': token, 'tradingSymbol': f"S{token}",
+                    'ltp': float(token), 'open': '1.5', 'tradeVolume': '10', 'exchFeedTime': '21-Jul-2025 10:00:00'}
+                   for exchange, tokens in exchangeTokens.items() for token in tokens if token not in self.missing]
+        return {'status': True, 'data': {'fetched': fetched, 'unfetched': []}}
+
+
+def coalescer(api, **kwargs):
+    return QuoteCoalescer(lambda: api, bucket=TokenBucket(1000), **kwargs)
+
+
+def test_instruments_are_deduplicated_and_batched():
+    api = QuoteApi()
+    keys = [('NSE', str(token)) for token in range(1, 121)] + [('nfo', '7'), ('NSE', '1')]
+
+    snapshot = coalescer(api).fetch(keys)
+
+    assert len(snapshot) == 121
+    assert [sum(len(tokens) for tokens in request.values()) for _, request in api.calls] == [50, 50, 21]
+    assert {exchange for _, request in api.calls for exchange in request} == {'NSE', 'NFO'}
+    quote = snapshot.get('nfo', '7')
+    assert (quote.exchange, quote.ltp, quote.open, quote.volume) == ('NFO', 7.0, 1.5, 10)
+    assert snapshot.ltp('NSE', 'S42') == 42.0
+
+
+def test_failed_and_missing_quotes_are_left_out():
+    class FailingApi(QuoteApi):
+        def getMarketData(self, mode, exchangeTokens):
+            if len(self.calls) == 0:
+                self.calls.append((mode, exchangeTokens))
+                return {'status': False, 'message': 'Access denied because of exceeding access rate'}
+            return super().getMarketData(mode, exchangeTokens)
+
+    api = FailingApi(missing={'1060'})
+    snapshot = coalescer(api).fetch([('NSE', str(token)) for token in range(1001, 1061)], MODE_LTP)
+
+    assert len(snapshot) == 9
+    assert snapshot.get('NSE', '1060') is None and snapshot.get('NSE', '1051') is not None
+    assert api.calls[1][0] == MODE_LTP
+    assert len(coalescer(None).fetch([('NSE', '1')])) == 0
+
+
+def test_snapshot_round_trips_through_a_file(tmp_path):
+    path = str(tmp_path / 'cache' / 'quotes.json')
+    QuoteSnapshot([Quote('NSE', '3045', 'SBIN-EQ', 812.5, close=800.0)], fetched_at=1.0).save(path)
+
+    loaded = QuoteSnapshot.load(path)
+    assert loaded.fetched_at == 1.0
+    assert loaded.by_symbol('NSE', 'SBIN-EQ') == Quote('NSE', '3045', 'SBIN-EQ', 812.5, close=800.0)
+    assert QuoteSnapshot.load(str(tmp_path / 'missing.json')) is None
+
+
+def test_strategy_instruments_include_extra_quote_symbols():
+    strategies = [
+        {'parameters': {'symbol': 'SBIN-EQ'}},
+        {'parameters': '{"symbol": "SBIN-EQ", "exchange": "nse", "quote_symbols": ["NFO:NIFTY27NOV36FUT", "INFY-EQ"]}'},
+        {'parameters': {}},
+    ]
+    assert strategy_instruments(strategies) == [('NFO', 'NIFTY27NOV36FUT'), ('NSE', 'INFY-EQ'), ('NSE', 'SBIN-EQ')]
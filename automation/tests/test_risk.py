@@ -0,0 +1,125 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from order_router import STATUS_PLACED, STATUS_REJECTED, OrderResult
+from risk import STATUS_NETTED, RiskBook
+
+
+class RecordingRouter:
+    """Order router stand-in that places every order immediately"""
+
+    def __init__(self, status=STATUS_PLACED):
+        self.status = status
+        self.orders = []
+        self._lock = threading.Lock()
+
+    def submit(self, params, key=None):
+        with self._lock:
+            self.orders.append((params, key))
+        future = Future()
+        future.set_result(OrderResult(key=key, status=self.status, order_id=f"ORD{len(self.orders)}"))
+        return future
+
+
+def market(side, quantity, symbol='SBIN-EQ'):
+    return {'variety': 'NORMAL', 'tradingsymbol': symbol, 'symboltoken': '3045', 'transactiontype': side,
+            'exchange': 'NSE', 'ordertype': 'MARKET', 'producttype': 'INTRADAY', 'quantity': str(quantity)}
+
+
+def test_opposing_orders_are_netted_into_one():
+    router = RecordingRouter()
+    book = RiskBook()
+
+    buy = book.submit(market('BUY', 10), 'a', strategy_id=1, router=router)
+    sell = book.submit(market('SELL', 4), 'b', strategy_id=2, router=router)
+    other = book.submit(market('BUY', 1, symbol='INFY-EQ'), 'c', strategy_id=2, router=router)
+    assert router.orders == [] and not buy.done()
+
+    assert book.flush() == {'orders': 3, 'routed': 2}
+
+    params = [params for params, _ in router.orders]
+    assert {(p['tradingsymbol'], p['transactiontype'], p['quantity']) for p in params} == {
+        ('SBIN-EQ', 'BUY', '6'), ('INFY-EQ', 'BUY', '1')}
+
+    buy_result, sell_result = buy.result(), sell.result()
+    assert (buy_result.status, buy_result.crossed, buy_result.routed) == (STATUS_PLACED, 4, 6)
+    assert (sell_result.status, sell_result.crossed, sell_result.routed) == (STATUS_NETTED, 4, 0)
+    assert sell_result.placed and other.result().placed
+
+    assert book.position(None, 'NSE', 'SBIN-EQ') == 6
+    assert book.strategy_position(1, None, 'NSE', 'SBIN-EQ') == 10
+    assert book.strategy_position(2, None, 'NSE', 'SBIN-EQ') == -4
+    assert book.attribution()[2]['crossed'] == 4
+
+
+def test_fully_offsetting_orders_send_nothing():
+    router = RecordingRouter()
+    book = RiskBook()
+
+    futures = [book.submit(market('BUY', 5), 'a', strategy_id=1, router=router),
+               book.submit(market('SELL', 5), 'b', strategy_id=2, router=router)]
+    book.flush()
+
+    assert router.orders == []
+    assert [future.result().status for future in futures] == [STATUS_NETTED, STATUS_NETTED]
+    assert book.position(None, 'NSE', 'SBIN-EQ') == 0
+    assert book.wait(0) == 0
+
+
+def test_orders_on_different_accounts_are_not_netted():
+    first, second = RecordingRouter(), RecordingRouter()
+    book = RiskBook()
+
+    book.submit(market('BUY', 5), 'a', strategy_id=1, router=first, account_id=1)
+    book.submit(market('SELL', 5), 'b', strategy_id=2, router=second, account_id=2)
+    book.flush()
+
+    assert len(first.orders) == len(second.orders) == 1
+
+
+def test_limit_orders_and_disabled_netting_route_immediately():
+    router = RecordingRouter()
+    limit = {**market('BUY', 2), 'ordertype': 'LIMIT', 'price': '500'}
+
+    assert RiskBook().submit(limit, 'a', strategy_id=1, router=router).result().placed
+    assert RiskBook(netting=False).submit(market('SELL', 1), 'b', strategy_id=1, router=router).result().placed
+    assert len(router.orders) == 2
+
+
+def test_position_limits_count_pending_orders():
+    router = RecordingRouter()
+    book = RiskBook(max_symbol_quantity=8)
+
+    assert not book.submit(market('BUY', 5), 'a', strategy_id=1, router=router, max_position=5).done()
+    rejected = book.submit(market('BUY', 1), 'b', strategy_id=1, router=router, max_position=5).result()
+    assert rejected.status == STATUS_REJECTED
+    assert 'limit 5' in rejected.error
+
+    # Another strategy is within its own limit but would breach the account limit
+    assert book.submit(market('BUY', 4), 'c', strategy_id=2, router=router).result().status == STATUS_REJECTED
+    assert not book.submit(market('SELL', 3), 'd', strategy_id=2, router=router).done()
+
+    book.flush()
+    assert book.position(None, 'NSE', 'SBIN-EQ') == 2
+    assert book.attribution()[1] == {'orders': 1, 'rejected': 1, 'crossed': 3, 'routed': 2,
+                                     'positions': {'NSE:SBIN-EQ': 5}}
+
+
+def test_failed_net_order_only_applies_crossed_quantity():
+    router = RecordingRouter(status='failed')
+    book = RiskBook()
+
+    buy = book.submit(market('BUY', 3), 'a', strategy_id=1, router=router)
+    book.submit(market('SELL', 1), 'b', strategy_id=2, router=router)
+    book.flush()
+
+    assert buy.result().status == 'failed' and not buy.result().placed
+    assert book.strategy_position(1, None, 'NSE', 'SBIN-EQ') == 1
+    assert book.position(None, 'NSE', 'SBIN-EQ') == 0
+
+
+@pytest.mark.parametrize('params', [market('HOLD', 1), market('BUY', 0)])
+def test_malformed_orders_are_rejected(params):
+    assert RiskBook().submit(params, strategy_id=1, router=RecordingRouter()).result().status == STATUS_REJECTED
@@ -0,0 +1,197 @@
+import sys
+import time
+
+import pyotp
+import pytest
+import requests
+
+import metrics
+from benchmarks.mock_broker import MockBroker
+from candle_store import Candles
+from quotes import Quote, QuoteSnapshot
+from runner import Config, TradingAutomation
+
+OPEN = 1753069500  # 2025-07-21 09:15 IST
+
+SCRIPT = """
+import sys, time
+time.sleep({sleep})
+sys.exit({code})
+"""
+
+PLUGIN = """
+import time
+
+
+class Plugin:
+    def __init__(self, context):
+        self.context = context
+
+    def run(self):
+        time.sleep({sleep})
+        self.context.emit({{'type': 'result', 'success': True}})
+        return True
+
+
+def create_strategy(context):
+    return Plugin(context)
+"""
+
+
+@pytest.fixture
+def automation(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def build(**overrides):
+        settings = dict(
+            api_base_url='http://127.0.0.1:9', api_token='token', angel_api_key='key', angel_client_id='C1',
+            angel_mpin='0000', angel_totp_secret=pyotp.random_base32(), log_level='WARNING',
+            session_cache_file=str(tmp_path / 'session.enc'), manifest_cache_file='', candle_store_dir='',
+            instrument_index_dir='', quote_snapshot_file='', execution_mode='subprocess'
+        )
+        config = Config(**{**settings, **overrides})
+        return TradingAutomation(config, smart_connect_factory=MockBroker().factory)
+    return build
+
+
+def strategy(tmp_path, index, sleep=0.0, code=0):
+    path = tmp_path / f"strategy_{index}.py"
+    path.write_text(SCRIPT.format(sleep=sleep, code=code))
+    return {'id': index, 'name': f"Strategy {index}", 'python_file_path': str(path), 'parameters': {}}
+
+
+def test_strategies_run_concurrently_and_results_keep_their_order(automation, tmp_path):
+    runner = automation(max_workers=4)
+    strategies = [strategy(tmp_path, 1, sleep=0.6), strategy(tmp_path, 2, code=1),
+                  strategy(tmp_path, 3, sleep=0.3), strategy(tmp_path, 4, sleep=0.6)]
+
+    start = time.monotonic()
+    results = runner.execute_strategies(strategies)
+    elapsed = time.monotonic() - start
+
+    assert results == [True, False, True, True]
+    assert elapsed < 1.2  # 1.5 s of sleeping if run one after another
+
+
+def test_the_cycle_deadline_kills_running_strategies_and_skips_late_ones(automation, tmp_path):
+    runner = automation(max_workers=2)
+    strategies = [strategy(tmp_path, 1, sleep=5), strategy(tmp_path, 2, sleep=5), strategy(tmp_path, 3)]
+
+    start = time.monotonic()
+    results = runner.execute_strategies(strategies, deadline=time.monotonic() + 0.5)
+
+    assert results == [False, False, False]
+    assert time.monotonic() - start < 2
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="resource limits are POSIX only")
+def test_resource_limits_are_applied_without_a_pre_exec_hook(automation, tmp_path):
+    runner = automation(max_workers=2, strategy_cpu_seconds=1)
+    spin = tmp_path / 'spin.py'
+    spin.write_text("while True:\n    pass\n")
+    strategies = [{'id': 1, 'name': 'Spin', 'python_file_path': str(spin), 'parameters': {}},
+                  strategy(tmp_path, 2, sleep=0.1)]
+
+    start = time.monotonic()
+    results = runner.execute_strategies(strategies)
+
+    assert results == [False, True]
+    assert time.monotonic() - start < 4
+    assert runner.build_strategy_command('x.py')[-2:] == [sys.executable, 'x.py']
+
+
+def test_in_process_runs_are_abandoned_at_the_deadline(automation, tmp_path):
+    runner = automation(execution_mode='inprocess', max_workers=2)
+    strategies = []
+    for index, sleep in ((1, 1), (2, 0)):
+        path = tmp_path / f"plugin_{index}.py"
+        path.write_text(PLUGIN.format(sleep=sleep))
+        strategies.append({'id': index, 'name': f"Plugin {index}", 'python_file_path': str(path), 'parameters': {}})
+
+    start = time.monotonic()
+    results = runner.execute_strategies(strategies, deadline=time.monotonic() + 0.3)
+
+    assert results == [False, True]
+    assert time.monotonic() - start < 0.9
+
+
+def test_intervals_the_aggregator_builds_only_fetch_its_base_series(automation, tmp_path):
+    runner = automation(execution_mode='inprocess', aggregate_candles=True,
+                        aggregate_timeframes='ONE_MINUTE,FIVE_MINUTE,ONE_DAY')
+    plugin = tmp_path / 'plugin.py'
+    plugin.write_text(PLUGIN.format(sleep=0))
+    strategies = [
+        {'id': 1, 'python_file_path': str(plugin), 'parameters': {'symbol': 'SBIN-EQ', 'interval': 'FIVE_MINUTE'}},
+        {'id': 2, 'python_file_path': str(plugin), 'parameters': {'symbol': 'INFY-EQ', 'interval': 'TEN_MINUTE'}},
+        dict(strategy(tmp_path, 3), parameters={'symbol': 'TCS-EQ', 'interval': 'ONE_DAY'}),
+    ]
+
+    assert runner.candle_series(strategies) == [
+        ('NSE', 'INFY-EQ', 'ONE_MINUTE'), ('NSE', 'INFY-EQ', 'TEN_MINUTE'),  # not built by the aggregator
+        ('NSE', 'SBIN-EQ', 'ONE_MINUTE'),
+        ('NSE', 'TCS-EQ', 'ONE_DAY'), ('NSE', 'TCS-EQ', 'ONE_MINUTE'),  # a script reads the cache itself
+    ]
+
+
+def test_memoized_runs_follow_the_quote_fields_they_read_and_aggregated_bars(automation, tmp_path):
+    runner = automation(execution_mode='inprocess', aggregate_candles=True, memoize_strategies=True,
+                        aggregate_timeframes='ONE_MINUTE,FIVE_MINUTE', candle_store_dir=str(tmp_path / 'candles'))
+    plugin = tmp_path / 'plugin.py'
+    plugin.write_text(PLUGIN.format(sleep=0))
+    strategy = {'id': 1, 'name': 'Plugin', 'python_file_path': str(plugin),
+                'parameters': {'symbol': 'SBIN-EQ', 'interval': 'FIVE_MINUTE'}}
+    quoted = dict(strategy, id=2, parameters={**strategy['parameters'], 'quote_fields': ['ltp']})
+    runner.candle_store.append('NSE', 'SBIN-EQ', 'ONE_MINUTE', Candles.from_rows([[OPEN, 1, 2, 0.5, 1.5, 10]]))
+    runner.candle_aggregator.track('NSE', 'SBIN-EQ', '3045')
+
+    runner.quotes = QuoteSnapshot([Quote('NSE', '3045', 'SBIN-EQ', 100.0, volume=10)])
+    assert runner.execute_strategy(strategy) and runner.execute_strategy(quoted)
+    first = runner.run_fingerprint(quoted)
+
+    # Next cycle: same bars, new quotes; only the strategy reading the LTP runs again
+    runner.quotes = QuoteSnapshot([Quote('NSE', '3045', 'SBIN-EQ', 100.5, volume=25)])
+    runs = metrics.STRATEGY_RUNS.value(strategy_id=1, result='memoized')
+    assert runner.execute_strategy(strategy)
+    assert metrics.STRATEGY_RUNS.value(strategy_id=1, result='memoized') == runs + 1
+    assert runner.run_fingerprint(quoted) != first
+
+    cached = runner.run_fingerprint(strategy)
+    runner.candle_aggregator.on_tick('NSE', 'SBIN-EQ', OPEN + 65, 101.0)
+    assert runner.run_fingerprint(strategy) != cached
+
+    runner.candle_aggregator.advance(OPEN + 120)  # the base bar closes
+    assert runner.run_memo.lookup((1, None), cached) is None
+
+
+def test_modules_of_deactivated_strategies_are_unloaded_after_a_manifest_sync(automation, tmp_path, monkeypatch):
+    runner = automation(execution_mode='inprocess', max_workers=2)
+    strategies = []
+    for index in (1, 2):
+        path = tmp_path / f"plugin_{index}.py"
+        path.write_text(PLUGIN.format(sleep=0))
+        strategies.append({'id': index, 'name': f"Plugin {index}", 'python_file_path': str(path), 'parameters': {}})
+    assert runner.execute_strategies(strategies) == [True, True]
+    assert sorted(runner.plugin_host.loaded_files()) == [s['python_file_path'] for s in strategies]
+
+    monkeypatch.setattr(runner.manifest, 'fetch', lambda: strategies[1:])
+    assert runner.fetch_active_strategies() == strategies[1:]
+    assert runner.plugin_host.loaded_files() == [strategies[1]['python_file_path']]
+
+    def unreachable():
+        raise requests.ConnectionError('down')
+    monkeypatch.setattr(runner.manifest, 'fetch', unreachable)
+    assert runner.fetch_active_strategies() == []
+    assert runner.plugin_host.loaded_files() == [strategies[1]['python_file_path']]  # kept on a failed sync
+
+
+def test_sequential_runs_pause_only_between_strategies_and_not_past_the_deadline(automation, tmp_path):
+    runner = automation(max_workers=1, strategy_pause=0.5)
+    strategies = [strategy(tmp_path, 1), strategy(tmp_path, 2)]
+
+    start = time.monotonic()
+    assert runner.execute_strategies(strategies) == [True, True]
+    assert 0.5 <= time.monotonic() - start < 0.9  # one pause, none after the last strategy
+
+    start = time.monotonic()
+    assert runner.execute_strategies(strategies, deadline=time.monotonic() + 0.3) == [True, False]
+    assert time.monotonic() - start < 0.5
@@ -0,0 +1,78 @@
+from datetime import date, datetime
+
+import pytest
+
+from scheduler import IST, MISSED_CATCHUP, MISSED_SKIP, MarketCalendar, Scheduler
+
+
+def at(*args):
+    return datetime(*args, tzinfo=IST).timestamp()
+
+
+@pytest.fixture
+def scheduler():
+    # 2025-08-15 (Friday) is a holiday
+    return Scheduler(MarketCalendar([date(2025, 8, 15)]), default_interval=15)
+
+
+def strategy(id, **params):
+    return {'id': id, 'name': f"s{id}", 'parameters': params}
+
+
+def test_next_boundary_aligns_to_session_open(scheduler):
+    assert scheduler.next_boundary(15, at(2025, 8, 13, 9, 0)) == at(2025, 8, 13, 9, 30)
+    assert scheduler.next_boundary(15, at(2025, 8, 13, 9, 31, 20)) == at(2025, 8, 13, 9, 45)
+    assert scheduler.next_boundary(5, at(2025, 8, 13, 9, 45)) == at(2025, 8, 13, 9, 50)
+
+
+def test_partial_last_bar_closes_at_session_close(scheduler):
+    assert scheduler.next_boundary(60, at(2025, 8, 13, 15, 16)) == at(2025, 8, 13, 15, 30)
+    assert scheduler.latest_boundary(60, at(2025, 8, 13, 15, 30, 1)) == at(2025, 8, 13, 15, 30)
+
+
+def test_next_boundary_skips_closed_sessions_and_holidays(scheduler):
+    # Thursday after close -> Friday is a holiday -> Monday's first bar
+    assert scheduler.next_boundary(15, at(2025, 8, 14, 16, 0)) == at(2025, 8, 18, 9, 30)
+
+
+def test_per_strategy_cadence(scheduler):
+    strategies = [strategy(1, interval='FIVE_MINUTE'), strategy(2, interval_minutes=30), strategy(3)]
+    assert [scheduler.interval_for(s) for s in strategies] == [5, 30, 15]
+
+    now = at(2025, 8, 13, 9, 30, 1)
+    assert [s['id'] for s in scheduler.due(strategies, now)] == [1, 3]
+    assert scheduler.next_wakeup(strategies, now) == at(2025, 8, 13, 9, 35)
+    scheduler.record(1)
+    scheduler.record(3)
+    assert scheduler.due(strategies, now) == []
+
+
+def test_missed_ticks_skip_or_catch_up():
+    calendar = MarketCalendar()
+    late = at(2025, 8, 13, 10, 7)
+
+    skip = Scheduler(calendar, 15, MISSED_SKIP)
+    skip.last_tick[1] = at(2025, 8, 13, 9, 30)
+    assert skip.due([strategy(1)], late) == []
+    assert skip.last_tick[1] == at(2025, 8, 13, 10, 0)
+
+    catchup = Scheduler(calendar, 15, MISSED_CATCHUP)
+    catchup.last_tick[1] = at(2025, 8, 13, 9, 30)
+    assert len(catchup.due([strategy(1)], late)) == 1
+    catchup.record(1)
+    assert catchup.due([strategy(1)], late) == []
+
+
+def test_failed_runs_stay_due_but_missed_bars_are_not_caught_up_after_the_close():
+    catchup = Scheduler(MarketCalendar(), 15, MISSED_CATCHUP)
+    now = at(2025, 8, 13, 9, 45, 10)
+
+    assert len(catchup.due([strategy(1)], now)) == 1
+    assert len(catchup.due([strategy(1)], now + 30)) == 1  # not recorded: the run failed
+    catchup.record(1)
+    assert catchup.due([strategy(1)], now + 30) == []
+
+    # Starting up in the evening: the 15:30 bar is left alone until the next session
+    evening = at(2025, 8, 13, 20, 0)
+    assert catchup.due([strategy(2, interval='ONE_DAY')], evening) == []
+    assert catchup.last_tick[2] == at(2025, 8, 13, 15, 30)
@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pyotp
+import pytest
+
+from benchmarks.mock_broker import MockBroker, MockSmartConnect, fake_jwt
+from order_router import OrderRouter
+from session_manager import AngelSession, AngelSessionManager, SessionCache
+
+pytest.importorskip('cryptography')
+
+
+def manager(broker, cache=None, **kwargs):
+    return AngelSessionManager('key', 'C1', '0000', pyotp.random_base32(), broker.factory, cache=cache, **kwargs)
+
+
+def test_sessions_round_trip_through_the_encrypted_cache(tmp_path):
+    path = tmp_path / 'session.enc'
+    session = AngelSession('C1', fake_jwt('C1'), 'refresh', 'feed', time.time() + 3600)
+
+    SessionCache(path, secret='0000:secret', salt='C1').save(session)
+
+    assert b'refresh' not in path.read_bytes()
+    assert SessionCache(path, secret='0000:secret', salt='C1').load() == session
+    assert SessionCache(path, secret='other', salt='C1').load() is None
+
+
+def test_a_cached_session_is_reused_without_logging_in(tmp_path):
+    broker = MockBroker(rate_limits={})
+    cache = SessionCache(tmp_path / 'session.enc', secret='s', salt='C1')
+    manager(broker, cache).get_session()
+    assert broker.calls['generateSession'] == 1
+
+    restored = manager(broker, cache)
+    assert restored.get_session() is not None
+    assert broker.calls['generateSession'] == 1
+    assert restored.session == cache.load()
+
+
+class BlockingSmartConnect(MockSmartConnect):
+    """Holds generateToken until released"""
+    release = threading.Event()
+    entered = threading.Event()
+
+    def generateToken(self, refresh_token):
+        self.entered.set()
+        self.release.wait(5)
+        return super().generateToken(refresh_token)
+
+
+def test_sessions_are_refreshed_before_expiry_without_holding_the_lock():
+    broker = MockBroker(rate_limits={})
+    sessions = []
+    angel = AngelSessionManager('key', 'C1', '', '', lambda **kwargs: BlockingSmartConnect(broker, **kwargs),
+                                refresh_margin=600, on_session=sessions.append)
+    angel.seed(fake_jwt('C1', lifetime=300), refresh_token='refresh')  # inside the refresh margin
+    expiring = angel.session
+
+    angel.start_background_refresh()
+    try:
+        assert BlockingSmartConnect.entered.wait(2)
+        # The refresh is in flight; callers are not blocked on it
+        assert angel._lock.acquire(timeout=0.5)
+        angel._lock.release()
+        assert angel.session is expiring
+
+        BlockingSmartConnect.release.set()
+        deadline = time.monotonic() + 2
+        while angel.session is expiring and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        angel.stop()
+
+    assert angel.session is not expiring
+    assert not angel.session.expires_within(600)
+    assert broker.calls['generateToken'] == 1 and broker.calls['generateSession'] == 0
+    assert sessions == [angel.session]
+
+
+def test_a_caller_renewing_the_session_does_not_hold_the_lock():
+    BlockingSmartConnect.entered.clear()
+    BlockingSmartConnect.release.clear()
+    broker = MockBroker(rate_limits={})
+    angel = AngelSessionManager('key', 'C1', '', '', lambda **kwargs: BlockingSmartConnect(broker, **kwargs))
+    angel.seed(fake_jwt('C1', lifetime=-1), refresh_token='refresh')  # already expired
+    expired = angel.session
+
+    caller = threading.Thread(target=angel.get_session)
+    caller.start()
+    assert BlockingSmartConnect.entered.wait(2)
+    assert angel._lock.acquire(timeout=0.5)
+    angel._lock.release()
+
+    BlockingSmartConnect.release.set()
+    caller.join(2)
+    assert angel.session is not expired and not angel.session.expires_within(0)
+    assert broker.calls['generateToken'] == 1
+
+
+class RejectingSmartConnect(MockSmartConnect):
+    """Rejects orders placed with the first JWT it hands out"""
+
+    def placeOrder(self, params):
+        if self.access_token == 'stale':
+            return {'status': False, 'message': 'Invalid Token', 'errorcode': 'AG8001'}
+        return super().placeOrder(params)
+
+
+def test_a_rejected_token_is_renewed_on_the_next_use():
+    broker = MockBroker(rate_limits={})
+    angel = AngelSessionManager('key', 'C1', '', '', lambda **kwargs: RejectingSmartConnect(broker, **kwargs))
+    angel.seed('stale', refresh_token='refresh', expires_at=time.time() + 3600)
+    router = OrderRouter(lambda: angel.smart_api, max_workers=1, on_session_rejected=angel.invalidate)
+
+    assert not router.place({'tradingsymbol': 'SBIN-EQ'}).placed
+    assert angel.session.expires_within(0) and angel.session.refresh_token == 'refresh'
+
+    assert angel.get_session() is not None
+    assert broker.calls['generateToken'] == 1 and broker.calls['generateSession'] == 0
+    assert angel.session.jwt_token != 'stale'
@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+from sharding import HashRing, ShardCoordinator, SQLiteLeaseStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteLeaseStore(str(tmp_path / 'leases.db'))
+    yield store
+    store.close()
+
+
+def strategies(count):
+    return [{'id': strategy_id, 'name': f"S{strategy_id}"} for strategy_id in range(1, count + 1)]
+
+
+def test_ring_spreads_keys_and_moves_few_on_membership_change():
+    before = HashRing(['a', 'b', 'c'])
+    owners = {key: before.owner(key) for key in range(3000)}
+    counts = {node: list(owners.values()).count(node) for node in 'abc'}
+    assert min(counts.values()) > 600
+
+    after = HashRing(['a', 'b', 'c', 'd'])
+    moved = [key for key in owners if after.owner(key) != owners[key]]
+    assert all(after.owner(key) == 'd' for key in moved)
+    assert len(moved) < 1200
+    assert HashRing([]).owner(1) is None
+
+
+def test_lease_is_exclusive_until_released_or_expired(store):
+    assert store.acquire('a', {1: None, 2: None}, ttl=30) == {'1', '2'}
+    assert store.acquire('b', {1: None, 3: None}, ttl=30) == {'3'}
+    assert store.acquire('a', {1: None}, ttl=30) == {'1'}  # the holder renews
+
+    store.complete('a', {1: None})
+    assert store.acquire('b', {1: None}, ttl=0.05) == {'1'}
+    time.sleep(0.1)
+    assert store.acquire('a', {1: None}, ttl=30) == {'1'}  # b's lease expired
+
+
+def test_a_bar_runs_once_across_runners(store):
+    assert store.acquire('a', {1: '900'}, ttl=30) == {'1'}
+    store.complete('a', {1: '900'})
+
+    assert store.acquire('b', {1: '900'}, ttl=30) == set()
+    assert store.acquire('b', {1: '1800'}, ttl=30) == {'1'}
+
+
+def test_dead_runner_strategies_fail_over(store):
+    first = ShardCoordinator(store, 'a', node_ttl=0.3)
+    second = ShardCoordinator(store, 'b', node_ttl=0.3)
+    first.heartbeat()
+    second.heartbeat()
+    first.heartbeat()
+
+    owned_first, owned_second = first.owned(strategies(40)), second.owned(strategies(40))
+    assert owned_first and owned_second
+    assert {s['id'] for s in owned_first}.isdisjoint(s['id'] for s in owned_second)
+    assert len(owned_first) + len(owned_second) == 40
+
+    # "a" stops heartbeating; once its TTL passes "b" owns everything
+    time.sleep(0.35)
+    assert len(second.owned(strategies(40))) == 40
+    assert second.ring.nodes == ('b',)
+
+
+def test_overlapping_owners_execute_once(store):
+    first, second = ShardCoordinator(store, 'a'), ShardCoordinator(store, 'b')
+    run_keys = {strategy['id']: '900' for strategy in strategies(5)}
+
+    leased = first.acquire(strategies(5), run_keys)
+    assert len(leased) == 5
+    assert second.acquire(strategies(5), run_keys) == []
+
+    first.complete(leased, run_keys)
+    assert second.acquire(strategies(5), run_keys) == []
+
+
+def test_leaving_releases_leases(store):
+    first, second = ShardCoordinator(store, 'a'), ShardCoordinator(store, 'b')
+    first.heartbeat()
+    first.acquire(strategies(3), {})
+    first.stop()
+
+    assert len(second.acquire(strategies(3), {})) == 3
+    assert second.heartbeat().nodes == ('b',)
+
+
+def test_leases_are_renewed_before_each_run_and_lost_ones_are_not(store):
+    first = ShardCoordinator(store, 'a', lease_seconds=0.3)
+    second = ShardCoordinator(store, 'b', lease_seconds=0.3)
+    held, lost = strategies(2)
+    run_keys = {held['id']: '900', lost['id']: '900'}
+    assert len(first.acquire([held, lost], run_keys)) == 2
+
+    time.sleep(0.2)
+    assert first.renew(held, '900')  # pushed out to 0.5 s
+    time.sleep(0.15)
+    assert second.acquire([held, lost], run_keys) == [lost]  # only the unrenewed lease expired
+
+    assert not first.renew(lost, '900')
+    assert first.renew(held, '900')
@@ -0,0 +1,94 @@
+import json
+
+from strategy_manifest import ManifestSync
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None, etag=None):
+        self.status_code = status_code
+        self.payload = payload
+        self.headers = {'ETag': etag} if etag else {}
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(self.status_code)
+
+
+class FakeApi:
+    """Minimal server side of the manifest protocol"""
+
+    def __init__(self, strategies):
+        self.strategies = strategies
+        self.requests = []
+        self.headers = {}
+
+    @property
+    def etag(self):
+        return f'"{hash(json.dumps(self.strategies, sort_keys=True))}"'
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.requests.append((dict(headers or {}), dict(params or {})))
+        if (headers or {}).get('If-None-Match') == self.etag:
+            return FakeResponse(304)
+
+        since = (params or {}).get('since')
+        data = [s for s in self.strategies if since is None or s['version'] >= since]
+        meta = {
+            'version': max((s['version'] for s in self.strategies), default=0),
+            'delta': since is not None,
+            'ids': [s['id'] for s in self.strategies],
+        }
+        return FakeResponse(200, {'success': True, 'data': data, 'meta': meta}, self.etag)
+
+
+def strategy(strategy_id, version, name=None):
+    return {'id': strategy_id, 'name': name or f's{strategy_id}', 'version': version}
+
+
+def test_unchanged_manifest_costs_one_conditional_request(tmp_path):
+    api = FakeApi([strategy(1, 100), strategy(2, 105)])
+    sync = ManifestSync('http://api', 'token', str(tmp_path / 'manifest.json'), session=api)
+
+    assert [s['id'] for s in sync.fetch()] == [1, 2]
+    assert [s['id'] for s in sync.fetch()] == [1, 2]
+
+    headers, params = api.requests[-1]
+    assert headers['If-None-Match'] == api.etag
+    assert params == {'since': 105}
+
+
+def test_delta_merges_changes_and_drops_removed(tmp_path):
+    api = FakeApi([strategy(1, 100), strategy(2, 105), strategy(3, 106)])
+    sync = ManifestSync('http://api', 'token', str(tmp_path / 'manifest.json'), session=api)
+    sync.fetch()
+
+    api.strategies = [strategy(1, 110, name='renamed'), strategy(3, 106), strategy(4, 111)]
+    active = sync.fetch()
+
+    assert [(s['id'], s['name']) for s in active] == [(1, 'renamed'), (3, 's3'), (4, 's4')]
+    assert len(api.requests) == 2
+
+
+def test_cache_survives_restart(tmp_path):
+    cache_file = str(tmp_path / 'manifest.json')
+    api = FakeApi([strategy(1, 100)])
+    ManifestSync('http://api', 'token', cache_file, session=api).fetch()
+
+    restarted = ManifestSync('http://api', 'token', cache_file, session=api)
+    assert [s['id'] for s in restarted.fetch()] == [1]
+    assert api.requests[-1][0]['If-None-Match'] == api.etag
+
+
+def test_incomplete_delta_falls_back_to_full_fetch(tmp_path):
+    api = FakeApi([strategy(1, 100), strategy(3, 101)])
+    sync = ManifestSync('http://api', 'token', None, session=api)
+    sync.fetch()
+
+    sync.strategies.clear()  # Local copy lost strategy 1
+    api.strategies = [strategy(1, 100), strategy(2, 120)]
+
+    assert [s['id'] for s in sync.fetch()] == [1, 2]
+    assert api.requests[-1][1] == {}
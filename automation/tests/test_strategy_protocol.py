@@ -0,0 +1,110 @@
+import subprocess
+import sys
+import textwrap
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+
+import metrics
+from benchmarks.mock_broker import MockBroker
+from order_router import OrderRouter
+from risk import RiskBook
+from strategy_protocol import (MESSAGE_PREFIX, TAIL_LINES, LineSplitter, MessageDispatcher, StrategyOutput,
+                               decode, encode)
+
+AUTOMATION_DIR = str(Path(__file__).resolve().parent.parent)
+
+
+def test_encode_decode_round_trip():
+    line = encode('signal', action='BUY', symbol='SBIN-EQ')
+    assert line.startswith(MESSAGE_PREFIX)
+    assert decode(line) == {'type': 'signal', 'action': 'BUY', 'symbol': 'SBIN-EQ'}
+    assert decode('plain output') is None
+
+
+def test_decode_rejects_unknown_types():
+    with pytest.raises(ValueError):
+        decode(MESSAGE_PREFIX + '{"type": "shutdown"}')
+    with pytest.raises(ValueError):
+        encode('shutdown')
+
+
+def test_line_splitter_handles_partial_and_oversized_lines():
+    lines = []
+    splitter = LineSplitter(lines.append, max_line_bytes=16)
+    splitter.feed(b'first\nsec')
+    splitter.feed(b'ond\n' + b'x' * 20)
+    splitter.feed(b'x' * 20 + b'\nthird\nlast')
+    splitter.close()
+
+    assert lines == ['first', 'second', 'third', 'last']
+    assert splitter.dropped == 1
+
+
+def test_dispatcher_routes_orders_as_they_arrive():
+    submitted = []
+
+    def submit(params, key):
+        submitted.append((params, key))
+        future = Future()
+        future.set_result(key)
+        return future
+
+    dispatcher = MessageDispatcher(7, 'Test', submit)
+    dispatcher({'type': 'signal', 'action': 'BUY', 'symbol': 'SBIN-EQ', 'order': {'quantity': '1'}, 'key': 'k1'})
+    assert submitted == [({'quantity': '1'}, 'k1')]
+
+    dispatcher({'type': 'order', 'params': {'quantity': '2'}})
+    dispatcher({'type': 'metric', 'name': 'pnl', 'value': 12.5})
+    dispatcher({'type': 'result', 'success': False, 'reason': 'no data'})
+
+    assert submitted == [({'quantity': '1'}, 'k1'), ({'quantity': '2'}, None)]
+    assert dispatcher.signals == 1
+    assert dispatcher.success is False
+    assert metrics.STRATEGY_VALUES.value(strategy_id=7, name='pnl') == 12.5
+
+
+def test_order_latency_counts_from_the_message_including_the_netting_hold():
+    broker = MockBroker(rate_limits={})
+    router = OrderRouter(lambda: broker.factory('key'))
+    book = RiskBook()
+    dispatcher = MessageDispatcher(7, 'Test', lambda params, key: book.submit(params, key, strategy_id=7, router=router))
+    signal_total, router_total = metrics.ORDER_LATENCY.total(), metrics.ROUTER_LATENCY.total()
+
+    dispatcher({'type': 'order', 'params': {'exchange': 'NSE', 'symboltoken': '3045', 'tradingsymbol': 'SBIN-EQ',
+                                            'transactiontype': 'BUY', 'ordertype': 'MARKET', 'quantity': '1'}})
+    time.sleep(0.2)  # held until the cycle's strategies have all run
+    book.flush()
+    assert book.wait(2) == 0
+    router.shutdown()
+
+    assert metrics.ORDER_LATENCY.total() - signal_total >= 0.2
+    assert metrics.ROUTER_LATENCY.total() - router_total < 0.2
+
+
+def test_strategy_output_streams_messages_from_a_process():
+    script = textwrap.dedent('''
+        import sys
+        import strategy_protocol
+        for i in range(200):
+            print(f"line {i}")
+        strategy_protocol.signal('SELL', symbol='INFY-EQ')
+        print('oops', file=sys.stderr)
+        strategy_protocol.result(True, trades=1)
+    ''')
+    messages = []
+    output = StrategyOutput('Test', messages.append)
+    process = subprocess.Popen([sys.executable, '-c', script], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               env={'PYTHONPATH': AUTOMATION_DIR})
+    output.start(process.stdout.fileno(), process.stderr.fileno())
+    process.wait(timeout=10)
+    output.join(timeout=5)
+    process.stdout.close()
+    process.stderr.close()
+
+    assert [message['type'] for message in messages] == ['signal', 'result']
+    assert len(output.stdout_tail) == TAIL_LINES
+    assert output.stdout_tail[-1] == 'line 199'
+    assert output.stderr == 'oops'
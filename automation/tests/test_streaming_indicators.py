@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from indicators import atr, bollinger, crossover, ema, rsi, sma
+from streaming_indicators import (
+    CrossoverDetector,
+    RollingBollinger,
+    RollingSMA,
+    StreamingATR,
+    StreamingEMA,
+    StreamingRSI,
+    StreamingVWAP,
+    load_checkpoint,
+    save_checkpoint,
+)
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(7)
+    close = 500 + np.cumsum(rng.normal(0, 5, 300))
+    high = close + rng.uniform(0, 4, 300)
+    low = close - rng.uniform(0, 4, 300)
+    return high, low, close
+
+
+def stream(indicator, values):
+    return np.array([np.nan if v is None else v for v in map(indicator.update, values)], dtype=float)
+
+
+@pytest.mark.parametrize('indicator, reference', [
+    (lambda: RollingSMA(20), lambda close: sma(close, 20)),
+    (lambda: StreamingEMA(10), lambda close: ema(close, 10)),
+    (lambda: StreamingRSI(14), lambda close: rsi(close, 14)),
+])
+def test_streaming_matches_vectorized(prices, indicator, reference):
+    close = prices[2]
+    np.testing.assert_allclose(stream(indicator(), close), reference(close), rtol=1e-9)
+
+
+def test_streaming_atr_matches_vectorized(prices):
+    high, low, close = prices
+    indicator = StreamingATR(14)
+    result = [indicator.update(h, l, c) for h, l, c in zip(high, low, close)]
+    result = np.array([np.nan if v is None else v for v in result])
+    np.testing.assert_allclose(result, atr(high, low, close, 14), rtol=1e-9)
+
+
+def test_rolling_bollinger_matches_vectorized(prices):
+    close = prices[2]
+    lower, middle, upper = bollinger(close, 20, 2.0)
+    indicator = RollingBollinger(20, 2.0)
+    for i, price in enumerate(close):
+        indicator.update(price)
+    assert indicator.value == pytest.approx(middle[-1], rel=1e-9)
+    assert indicator.lower == pytest.approx(lower[-1], rel=1e-9)
+    assert indicator.upper == pytest.approx(upper[-1], rel=1e-9)
+
+
+def test_bollinger_keeps_precision_far_from_zero():
+    close = 1e6 + np.random.default_rng(11).normal(0, 0.01, 500)
+    indicator = RollingBollinger(20, 2.0)
+    for price in close:
+        indicator.update(price)
+    assert indicator.upper - indicator.value == pytest.approx(2 * np.std(close[-20:]), rel=1e-6)
+
+
+def test_vwap_resets_per_session():
+    indicator = StreamingVWAP()
+    indicator.update(11, 9, 10, 100)
+    assert indicator.update(21, 19, 20, 100) == pytest.approx(15)
+    indicator.reset()
+    assert indicator.update(31, 29, 30, 50) == pytest.approx(30)
+
+
+def test_crossover_detector_matches_vectorized(prices):
+    close = prices[2]
+    detector = CrossoverDetector(RollingSMA(5), RollingSMA(20))
+    signals = [detector.update(price) for price in close]
+    np.testing.assert_array_equal(signals, crossover(sma(close, 5), sma(close, 20)))
+
+
+def test_checkpoint_round_trip_continues_identically(prices, tmp_path):
+    close = prices[2]
+    live = {'cross': CrossoverDetector(RollingSMA(5), StreamingEMA(20)), 'rsi': StreamingRSI(14)}
+    for price in close[:150]:
+        for indicator in live.values():
+            indicator.update(price)
+
+    path = str(tmp_path / 'state.json')
+    save_checkpoint(path, live)
+    restored = load_checkpoint(path)
+
+    for price in close[150:]:
+        for name in live:
+            assert restored[name].update(price) == live[name].update(price)
+
+
+def test_load_missing_checkpoint_is_empty(tmp_path):
+    assert load_checkpoint(str(tmp_path / 'missing.json')) == {}
@@ -0,0 +1,115 @@
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from benchmarks.synthetic import write_ticks
+from order_router import STATUS_PLACED, OrderResult
+from tick_feed import HEADER, LTP_MODE, QUOTE, TICK_DTYPE, TickFile, TickReplay, TickWriter, quotes_from_ticks
+from triggers import Bracket, TriggerMonitor
+
+
+def message(token, ltp, exchange_type=1, **extra):
+    return {'exchange_type': exchange_type, 'token': str(token), 'exchange_timestamp': 1753069500000,
+            'last_traded_price': ltp, **extra}
+
+
+def test_recorded_messages_round_trip_through_the_memory_map(tmp_path):
+    path = str(tmp_path / 'ticks.bin')
+    with TickWriter(path, flush_every=2) as writer:
+        writer.record(message(3045, 81250, last_traded_quantity=10, volume_trade_for_the_day=500), time_us=100)
+        writer.record(message(1594, 150010), time_us=90)  # clock stepped back
+        writer.record(message(3045, 81300, exchange_type=2), time_us=300)
+
+    ticks = TickFile(path)
+    assert len(ticks) == 3
+    assert ticks.ticks['time_us'].tolist() == [100, 100, 300]
+    assert ticks.ticks['ltp'].tolist() == [81250, 150010, 81300]
+    assert ticks.ticks[0]['volume'] == 500
+    assert ticks.instruments() == [(1, '1594'), (1, '3045'), (2, '3045')]
+    assert len(ticks.between(100, 300)) == 2
+
+
+def test_appends_extend_the_file_and_torn_records_are_dropped(tmp_path):
+    path = tmp_path / 'ticks.bin'
+    with TickWriter(str(path)) as writer:
+        writer.record(message(3045, 100), time_us=1)
+    with open(path, 'ab') as f:
+        f.write(b'\x00' * 10)  # crash mid-record
+
+    reader = TickFile(str(path))
+    with TickWriter(str(path)) as writer:
+        writer.record(message(3045, 200), time_us=2)
+    assert path.stat().st_size == HEADER.size + 2 * TICK_DTYPE.itemsize
+    assert reader.refresh() == 2
+
+    path.write_bytes(b'not a recording' * 4)
+    with pytest.raises(ValueError):
+        TickFile(str(path))
+
+
+def test_replay_speaks_the_websocket_interface(tmp_path):
+    path = str(tmp_path / 'ticks.bin')
+    with TickWriter(path) as writer:
+        for index in range(6):
+            writer.record(message(3045 if index % 2 else 1594, 1000 + index, volume_trade_for_the_day=index),
+                          time_us=index)
+
+    feed = TickReplay(path, speed=0)
+    events, received = [], []
+    feed.on_open = lambda ws: (events.append('open'),
+                               ws.subscribe('c1', QUOTE, [{'exchangeType': 1, 'tokens': ['3045']}]))
+    feed.on_data = lambda ws, data: received.append(data)
+    feed.on_close = lambda ws: events.append('close')
+    feed.connect()
+
+    assert events == ['open', 'close']
+    assert [data['last_traded_price'] for data in received] == [1001, 1003, 1005]
+    assert received[0] == {
+        'subscription_mode': QUOTE, 'exchange_type': 1, 'token': '3045', 'sequence_number': 1,
+        'exchange_timestamp': 1753069500000, 'last_traded_price': 1001, 'subscription_mode_val': 'QUOTE',
+        'last_traded_quantity': 0, 'volume_trade_for_the_day': 1,
+    }
+    assert (feed.replayed, feed.delivered) == (6, 3)
+
+
+def test_replay_follows_the_recorded_pace(tmp_path):
+    # 2000 ticks over 0.2 s of recorded time, replayed at 2x
+    path = write_ticks(str(tmp_path / 'ticks.bin'), 2000, instruments=5, ticks_per_second=10000)
+    feed = TickReplay(path, speed=2)
+    feed.on_open = lambda ws: ws.subscribe('c1', LTP_MODE, ws.tick_file.token_list())
+    feed.on_ticks = lambda ws, ticks: None
+
+    start = time.perf_counter()
+    feed.connect()
+    elapsed = time.perf_counter() - start
+
+    assert feed.delivered == 2000
+    assert 0.09 <= elapsed < 0.5
+
+
+def test_replay_drives_the_trigger_monitor(tmp_path):
+    path = str(tmp_path / 'ticks.bin')
+    with TickWriter(path) as writer:
+        for index, ltp in enumerate([10000, 9950, 9890, 9950]):
+            writer.record(message(3045, ltp), time_us=index)
+
+    orders = []
+
+    def submit(params, key):
+        orders.append(params)
+        future = Future()
+        future.set_result(OrderResult(key=key, status=STATUS_PLACED))
+        return future
+
+    monitor = TriggerMonitor()
+    monitor.add(Bracket(1, {'exchange': 'NSE', 'symboltoken': '3045', 'tradingsymbol': 'SBIN-EQ',
+                            'transactiontype': 'BUY'}, 1, stop_loss=99.0, take_profit=105.0,
+                        submit=submit))
+
+    feed = TickReplay(path, speed=0)
+    feed.on_open = lambda ws: ws.subscribe('c1', LTP_MODE, ws.tick_file.token_list())
+    feed.on_ticks = lambda ws, ticks: monitor.on_quotes(quotes_from_ticks(ticks))
+    feed.connect()
+
+    assert [order['transactiontype'] for order in orders] == ['SELL']
@@ -0,0 +1,189 @@
+from concurrent.futures import Future
+
+import pytest
+
+from order_router import STATUS_PLACED, OrderResult
+from risk import RiskBook
+from strategy_protocol import MessageDispatcher
+from triggers import MAX_EXIT_ATTEMPTS, Bracket, TriggerMonitor
+
+
+class RecordingRouter:
+    """Order router stand-in that resolves every order with one status"""
+
+    def __init__(self, status=STATUS_PLACED):
+        self.status = status
+        self.orders = []
+
+    def submit(self, params, key=None):
+        self.orders.append((params, key))
+        future = Future()
+        future.set_result(OrderResult(key=key, status=self.status, order_id=f"ORD{len(self.orders)}"))
+        return future
+
+
+def entry(side, quantity=10, token='3045', symbol='SBIN-EQ'):
+    return {'variety': 'NORMAL', 'tradingsymbol': symbol, 'symboltoken': token, 'transactiontype': side,
+            'exchange': 'NSE', 'ordertype': 'MARKET', 'producttype': 'INTRADAY', 'duration': 'DAY',
+            'quantity': str(quantity)}
+
+
+def bracket(router, side='BUY', stop_loss=95.0, take_profit=110.0, **kwargs):
+    params = entry(side, **kwargs)
+    return Bracket(1, params, int(params['quantity']), stop_loss=stop_loss, take_profit=take_profit,
+                   submit=router.submit)
+
+
+def test_long_and_short_levels_fire_on_the_right_side():
+    router = RecordingRouter()
+    monitor = TriggerMonitor()
+    monitor.add(bracket(router, 'BUY', stop_loss=95, take_profit=110))
+    monitor.add(bracket(router, 'SELL', stop_loss=105, take_profit=90))
+
+    assert monitor.on_quote('NSE', '3045', 100) == []
+    fired = monitor.on_quote('nse', '3045', 94.5)  # long stop-loss
+    assert [(b.side, b.quantity) for b in fired] == [('BUY', 10)]
+    assert monitor.on_quote('NSE', '3045', 106)[0].side == 'SELL'  # short stop-loss
+
+    assert [(p['transactiontype'], p['ordertype'], p['quantity']) for p, _ in router.orders] == [
+        ('SELL', 'MARKET', '10'), ('BUY', 'MARKET', '10')]
+    assert len(monitor) == 0 and monitor.instruments() == []
+
+
+def test_brackets_of_inactive_strategies_are_cancelled():
+    router = RecordingRouter()
+    monitor = TriggerMonitor()
+    monitor.add(bracket(router, 'BUY', stop_loss=95, take_profit=110))
+    kept = bracket(router, 'BUY', stop_loss=95, take_profit=110, token='1594', symbol='INFY-EQ')
+    kept.strategy_id = 2
+    monitor.add(kept)
+
+    assert [b.strategy_id for b in monitor.cancel_inactive(['2'])] == [1]
+    assert monitor.on_quote('NSE', '3045', 90) == []
+    assert len(monitor.on_quote('NSE', '1594', 90)) == 1
+    assert monitor.cancel_inactive([2]) == [] and len(monitor) == 0
+
+
+def test_one_leg_cancels_the_other():
+    router = RecordingRouter()
+    monitor = TriggerMonitor()
+    monitor.add(bracket(router, 'BUY', stop_loss=95, take_profit=110))
+
+    assert len(monitor.on_quote('NSE', '3045', 111)) == 1
+    assert monitor.on_quote('NSE', '3045', 90) == []
+    assert len(router.orders) == 1
+
+
+def test_only_crossed_levels_fire_among_many_brackets():
+    router = RecordingRouter()
+    monitor = TriggerMonitor()
+    for level in range(1, 5001):
+        monitor.add(bracket(router, 'BUY', stop_loss=float(level), take_profit=None))
+
+    fired = monitor.on_quote('NSE', '3045', 4990.5)
+    assert sorted(b.stop_loss for b in fired) == [float(level) for level in range(4991, 5001)]
+    assert len(monitor) == 4990
+    assert monitor.on_quote('NSE', '2885', 1) == []  # other instruments are not touched
+
+
+def test_cancelled_brackets_are_dropped_and_compacted():
+    router = RecordingRouter()
+    monitor = TriggerMonitor()
+    for level in range(100):
+        watched = bracket(router, stop_loss=float(level), take_profit=None)
+        watched.strategy_id = level
+        monitor.add(watched)
+    assert len(monitor.cancel_inactive(range(90, 100))) == 90
+    assert monitor.cancel_inactive(range(90, 100)) == []
+
+    assert len(monitor.on_quote('NSE', '3045', 1000)) == 0
+    book = monitor._books[('NSE', '3045')]
+    assert len(book.below) == 10
+    assert len(monitor.on_quote('NSE', '3045', 0)) == 10
+
+
+def test_failed_exits_are_retried_then_given_up():
+    router = RecordingRouter(status='failed')
+    monitor = TriggerMonitor()
+    monitor.add(bracket(router, stop_loss=95, take_profit=None))
+
+    for _ in range(MAX_EXIT_ATTEMPTS + 2):
+        monitor.on_quote('NSE', '3045', 90)
+    assert len(router.orders) == MAX_EXIT_ATTEMPTS
+    assert len({key for _, key in router.orders}) == MAX_EXIT_ATTEMPTS
+
+
+@pytest.mark.parametrize('levels', [{}, {'stop_loss': None, 'take_profit': None}])
+def test_bracket_needs_a_level(levels):
+    with pytest.raises(ValueError):
+        TriggerMonitor().add(Bracket(1, entry('BUY'), 10, submit=RecordingRouter().submit, **levels))
+
+
+def test_signal_levels_open_a_bracket_after_the_entry_is_placed():
+    router = RecordingRouter()
+    book = RiskBook()
+    monitor = TriggerMonitor()
+    dispatcher = MessageDispatcher(
+        7, 'sma', lambda params, key: book.submit(params, key, strategy_id=7, router=router),
+        triggers=monitor,
+        submit_exit=lambda params, key: book.submit(params, key, strategy_id=7, router=router, hold=False))
+
+    dispatcher({'type': 'signal', 'action': 'BUY', 'order': entry('BUY'), 'stop_loss': 95, 'take_profit': 110})
+    assert len(monitor) == 0  # the entry is still held for netting
+    book.flush()
+    assert len(monitor) == 1
+
+    monitor.on_quote('NSE', '3045', 94)
+    assert len(router.orders) == 2  # the exit was routed without waiting for a flush
+    assert book.strategy_position(7, None, 'NSE', 'SBIN-EQ') == 0
+
+
+def test_bracket_needs_a_token():
+    with pytest.raises(ValueError):
+        TriggerMonitor().add(bracket(RecordingRouter(), token=''))
+
+
+def test_an_opposing_entry_closes_the_strategys_brackets():
+    router = RecordingRouter()
+    monitor = TriggerMonitor()
+    dispatcher = MessageDispatcher(7, 'sma', router.submit, triggers=monitor)
+
+    dispatcher({'type': 'signal', 'action': 'BUY', 'order': entry('BUY'), 'stop_loss': 95, 'take_profit': 110})
+    dispatcher({'type': 'signal', 'action': 'SELL', 'order': entry('SELL'), 'stop_loss': 105, 'take_profit': 90})
+    assert len(monitor) == 0  # flat: the long bracket is gone and no short one was opened
+
+    monitor.on_quote('NSE', '3045', 94)  # the old long stop-loss level
+    assert len(router.orders) == 2
+
+    # A larger opposing entry flips the position and brackets only the excess
+    dispatcher({'type': 'signal', 'action': 'BUY', 'order': entry('BUY'), 'stop_loss': 95, 'take_profit': 110})
+    dispatcher({'type': 'signal', 'action': 'SELL', 'order': entry('SELL', quantity=15),
+                'stop_loss': 105, 'take_profit': 90})
+    assert [(b.side, b.quantity) for b in monitor._brackets.values()] == [('SELL', 5)]
+
+
+def test_brackets_come_back_when_the_opposing_entry_fails():
+    router = RecordingRouter()
+    monitor = TriggerMonitor()
+    MessageDispatcher(7, 'sma', router.submit, triggers=monitor)(
+        {'type': 'signal', 'action': 'BUY', 'order': entry('BUY'), 'stop_loss': 95, 'take_profit': 110})
+    other = MessageDispatcher(8, 'other', router.submit, triggers=monitor)
+    other({'type': 'order', 'params': entry('SELL')})
+    assert len(monitor) == 1  # another strategy's order leaves it alone
+
+    router.status = 'failed'
+    MessageDispatcher(7, 'sma', router.submit, triggers=monitor)({'type': 'order', 'params': entry('SELL', quantity=4)})
+    assert [(b.side, b.quantity) for b in monitor._brackets.values()] == [('BUY', 10)]
+    assert len(monitor.on_quote('NSE', '3045', 94)) == 1
+
+
+def test_missing_tokens_are_resolved_before_a_bracket_opens():
+    router = RecordingRouter()
+    monitor = TriggerMonitor()
+    dispatcher = MessageDispatcher(7, 'sma', router.submit, triggers=monitor,
+                                   resolve_token=lambda exchange, symbol: '3045' if symbol == 'SBIN-EQ' else None)
+
+    dispatcher({'type': 'signal', 'action': 'BUY', 'order': entry('BUY', token=''), 'stop_loss': 95})
+    dispatcher({'type': 'signal', 'action': 'BUY', 'order': entry('BUY', token='', symbol='XYZ-EQ'), 'stop_loss': 95})
+
+    assert monitor.instruments() == [('NSE', '3045', 'SBIN-EQ')]
@@ -0,0 +1,324 @@
+"""
+Smart Hedge - Recorded Tick Feed
+================================
+
+Offline stand-in for Angel One's live market-data websocket.
+
+Ticks are recorded to a compact, append-only binary file: a 32-byte header
+followed by fixed 48-byte little-endian records (``TICK_DTYPE``). Readers
+memory-map the records, so a file of millions of ticks opens instantly and
+is sliced by time with a binary search instead of being parsed.
+
+``TickReplay`` plays a file back through the same interface as
+``SmartWebSocketV2`` (``connect``, ``subscribe``, ``unsubscribe``,
+``close_connection`` and the ``on_open``/``on_data``/``on_error``/
+``on_close`` callbacks), with the same message dicts, so code written
+against the live feed runs unchanged against a recording. Playback follows
+the recorded arrival times at real speed, a multiple of it, or as fast as
+possible (``speed=0``). Consumers that can take NumPy batches set
+``on_ticks`` instead of ``on_data`` and skip the per-tick dicts, which is
+what keeps replays above 100k ticks per second.
+
+``TickWriter.record`` accepts the live feed's message dicts, so a session
+is captured by calling it from the live ``on_data`` callback.
+"""
+
+import logging
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SHTICKS1'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sHH20x')  # magic, version, record size
+
+TICK_DTYPE = np.dtype({
+    'names': ['time_us', 'exchange_timestamp', 'token', 'ltp', 'volume', 'quantity', 'exchange_type'],
+    'formats': ['<i8', '<i8', '<u8', '<i8', '<i8', '<i4', 'u1'],
+    'offsets': [0, 8, 16, 24, 32, 40, 44],
+    'itemsize': 48,
+})
+# time_us: arrival time (epoch microseconds), non-decreasing; drives replay pacing
+# exchange_timestamp: exchange time (epoch milliseconds), as sent by the feed
+# ltp: last traded price in paise; volume: traded today; quantity: last trade size
+
+# SmartWebSocketV2 subscription modes
+LTP_MODE, QUOTE, SNAP_QUOTE = 1, 2, 3
+MODE_NAMES = {LTP_MODE: 'LTP', QUOTE: 'QUOTE', SNAP_QUOTE: 'SNAP_QUOTE'}
+
+# SmartWebSocketV2 exchange types
+EXCHANGE_TYPES = {'NSE': 1, 'NFO': 2, 'BSE': 3, 'BFO': 4, 'MCX': 5, 'NCDEX': 7, 'CDS': 13}
+EXCHANGE_NAMES = {code: name for name, code in EXCHANGE_TYPES.items()}
+
+_EXCHANGE_LOOKUP = np.array([EXCHANGE_NAMES.get(code, str(code)) for code in range(256)], dtype=object)
+
+# Largest slice of feed time delivered as one batch during paced playback
+PACING_SLICE_SECONDS = 0.001
+
+
+def _subscription_keys(exchange_types: np.ndarray, tokens: np.ndarray) -> np.ndarray:
+    return (tokens.astype(np.uint64) << np.uint64(8)) | exchange_types.astype(np.uint64)
+
+
+class TickWriter:
+    """Appends ticks to a recording, creating it if needed
+
+    One writer per file. A record torn by a crash mid-write is truncated
+    when the file is next opened for writing.
+    """
+
+    def __init__(self, path: str, flush_every: int = 4096):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, 'ab+')
+        size = self._file.seek(0, os.SEEK_END)
+        if size == 0:
+            self._file.write(HEADER.pack(MAGIC, FORMAT_VERSION, TICK_DTYPE.itemsize))
+            self._file.flush()
+        else:
+            self._file.seek(0)
+            _check_header(self._file.read(HEADER.size), path)
+            torn = (size - HEADER.size) % TICK_DTYPE.itemsize
+            if torn:
+                logger.warning(f"Truncating {torn} bytes of a torn tick record in {path}")
+                self._file.truncate(size - torn)
+        self._buffer = np.zeros(flush_every, dtype=TICK_DTYPE)
+        self._pending = 0
+        self._last_time_us = 0
+
+    def append(self, ticks: np.ndarray) -> None:
+        """Write an array of ``TICK_DTYPE`` records after any buffered ones"""
+        self.flush()
+        self._file.write(np.ascontiguousarray(ticks, dtype=TICK_DTYPE).tobytes())
+        if len(ticks):
+            self._last_time_us = max(self._last_time_us, int(ticks['time_us'][-1]))
+
+    def record(self, message: Dict[str, Any], time_us: Optional[int] = None) -> None:
+        """Buffer one ``SmartWebSocketV2`` tick message"""
+        if time_us is None:
+            time_us = time.time_ns() // 1000
+        # Keep arrival times non-decreasing across wall-clock steps
+        self._last_time_us = max(self._last_time_us, time_us)
+
+        row = self._buffer[self._pending]
+        row['time_us'] = self._last_time_us
+        row['exchange_timestamp'] = message.get('exchange_timestamp', 0)
+        row['token'] = int(message['token'])
+        row['ltp'] = message.get('last_traded_price', 0)
+        row['volume'] = message.get('volume_trade_for_the_day', 0)
+        row['quantity'] = message.get('last_traded_quantity', 0)
+        row['exchange_type'] = message['exchange_type']
+        self._pending += 1
+        if self._pending == len(self._buffer):
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            self._file.write(self._buffer[:self._pending].tobytes())
+            self._pending = 0
+        self._file.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+    def __enter__(self) -> 'TickWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _check_header(header: bytes, path: str) -> None:
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} is not a tick recording (short header)")
+    magic, version, record_size = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a tick recording")
+    if version != FORMAT_VERSION or record_size != TICK_DTYPE.itemsize:
+        raise ValueError(f"{path} uses tick format v{version} ({record_size}-byte records), "
+                         f"expected v{FORMAT_VERSION} ({TICK_DTYPE.itemsize}-byte records)")
+
+
+class TickFile:
+    """Read-only memory-mapped view of a recording"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            _check_header(f.read(HEADER.size), path)
+        self.ticks = self._map()
+
+    def _map(self) -> np.ndarray:
+        count = (os.path.getsize(self.path) - HEADER.size) // TICK_DTYPE.itemsize
+        if count <= 0:
+            return np.zeros(0, dtype=TICK_DTYPE)
+        return np.memmap(self.path, dtype=TICK_DTYPE, mode='r', offset=HEADER.size, shape=(count,))
+
+    def refresh(self) -> int:
+        """Re-map after a writer appended; returns the new tick count"""
+        self.ticks = self._map()
+        return len(self.ticks)
+
+    def __len__(self) -> int:
+        return len(self.ticks)
+
+    def between(self, start_us: int, end_us: int) -> np.ndarray:
+        """Ticks that arrived in ``[start_us, end_us)``, as a view"""
+        times = self.ticks['time_us']
+        return self.ticks[np.searchsorted(times, start_us):np.searchsorted(times, end_us)]
+
+    def instruments(self) -> List[Tuple[int, str]]:
+        """Distinct (exchange type, token) pairs in the recording"""
+        if not len(self.ticks):
+            return []
+        keys = np.unique(_subscription_keys(self.ticks['exchange_type'], self.ticks['token']))
+        return [(int(key & 0xFF), str(int(key >> 8))) for key in keys]
+
+    def token_list(self) -> List[Dict[str, Any]]:
+        """Every instrument in the recording, as a ``subscribe`` token list"""
+        grouped: Dict[int, List[str]] = {}
+        for exchange_type, token in self.instruments():
+            grouped.setdefault(exchange_type, []).append(token)
+        return [{'exchangeType': exchange_type, 'tokens': tokens} for exchange_type, tokens in grouped.items()]
+
+
+def quotes_from_ticks(ticks: np.ndarray) -> Iterable[Tuple[str, str, float]]:
+    """(exchange, token, price in rupees) per tick, for ``TriggerMonitor.on_quotes``"""
+    return zip(_EXCHANGE_LOOKUP[ticks['exchange_type']].tolist(),
+               map(str, ticks['token'].tolist()),
+               (ticks['ltp'] / 100.0).tolist())
+
+
+class TickReplay:
+    """Plays a recording through the ``SmartWebSocketV2`` interface
+
+    ``speed`` is a multiple of the recorded pace: 1 replays in real time,
+    10 ten times faster, 0 as fast as the callbacks allow.
+    """
+
+    def __init__(self, source: Union[str, TickFile], speed: float = 1.0, batch_size: int = 8192):
+        self.tick_file = source if isinstance(source, TickFile) else TickFile(source)
+        self.speed = speed
+        self.batch_size = batch_size
+        self.on_open: Optional[Callable[[Any], None]] = None
+        self.on_data: Optional[Callable[[Any, Dict[str, Any]], None]] = None
+        self.on_ticks: Optional[Callable[[Any, np.ndarray], None]] = None
+        self.on_error: Optional[Callable[[Any, Exception], None]] = None
+        self.on_close: Optional[Callable[[Any], None]] = None
+        self.replayed = 0  # ticks read from the recording
+        self.delivered = 0  # ticks passed to a callback
+        self._modes: Dict[int, int] = {}  # subscription key -> mode
+        self._keys = np.zeros(0, dtype=np.uint64)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, correlation_id: str, mode: int, token_list: List[Dict[str, Any]]) -> None:
+        for group in token_list:
+            for token in group['tokens']:
+                self._modes[(int(token) << 8) | int(group['exchangeType'])] = mode
+        self._keys = np.fromiter(self._modes, dtype=np.uint64, count=len(self._modes))
+
+    def unsubscribe(self, correlation_id: str, mode: int, token_list: List[Dict[str, Any]]) -> None:
+        for group in token_list:
+            for token in group['tokens']:
+                self._modes.pop((int(token) << 8) | int(group['exchangeType']), None)
+        self._keys = np.fromiter(self._modes, dtype=np.uint64, count=len(self._modes))
+
+    def connect(self) -> None:
+        """Replay the whole recording in the calling thread, like the live feed's blocking connect"""
+        self._stop.clear()
+        if self.on_open:
+            self.on_open(self)
+        try:
+            self._play()
+        finally:
+            if self.on_close:
+                self.on_close(self)
+
+    def start(self) -> threading.Thread:
+        """Replay in a background thread"""
+        self._thread = threading.Thread(target=self.connect, name='tick-replay', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def close_connection(self) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _play(self) -> None:
+        ticks = self.tick_file.ticks
+        count = len(ticks)
+        if not count:
+            return
+        times = ticks['time_us']
+        first_us = int(times[0])
+        slice_us = PACING_SLICE_SECONDS * 1e6 * self.speed
+        started = time.perf_counter()
+
+        start = 0
+        while start < count and not self._stop.is_set():
+            end = min(start + self.batch_size, count)
+            if self.speed > 0:
+                batch_us = int(times[start])
+                end = max(start + 1, min(end, int(np.searchsorted(times, batch_us + slice_us, 'right'))))
+                delay = started + (batch_us - first_us) / 1e6 / self.speed - time.perf_counter()
+                if delay > 0 and self._stop.wait(delay):
+                    break
+
+            batch = ticks[start:end]
+            self._deliver(batch, start)
+            self.replayed += end - start
+            start = end
+
+    def _deliver(self, batch: np.ndarray, offset: int) -> None:
+        if not len(self._keys):
+            return
+        keys = _subscription_keys(batch['exchange_type'], batch['token'])
+        selected = np.isin(keys, self._keys)
+        if not selected.any():
+            return
+        subscribed = batch[selected]
+        try:
+            if self.on_ticks:
+                self.on_ticks(self, subscribed)
+            if self.on_data:
+                sequence = (np.flatnonzero(selected) + offset).tolist()
+                for message in self._messages(subscribed, keys[selected].tolist(), sequence):
+                    self.on_data(self, message)
+        except Exception as e:
+            if self.on_error is None:
+                raise
+            self.on_error(self, e)
+        self.delivered += len(subscribed)
+
+    def _messages(self, ticks: np.ndarray, keys: List[int], sequence: List[int]) -> Iterable[Dict[str, Any]]:
+        """``SmartWebSocketV2``-shaped tick dicts"""
+        modes = self._modes
+        for key, number, exchange_type, token, timestamp, ltp, quantity, volume in zip(
+                keys, sequence, ticks['exchange_type'].tolist(), ticks['token'].tolist(),
+                ticks['exchange_timestamp'].tolist(), ticks['ltp'].tolist(),
+                ticks['quantity'].tolist(), ticks['volume'].tolist()):
+            mode = modes.get(key, LTP_MODE)
+            message = {
+                'subscription_mode': mode,
+                'exchange_type': exchange_type,
+                'token': str(token),
+                'sequence_number': number,
+                'exchange_timestamp': timestamp,
+                'last_traded_price': ltp,
+                'subscription_mode_val': MODE_NAMES.get(mode, 'LTP'),
+            }
+            if mode != LTP_MODE:
+                message['last_traded_quantity'] = quantity
+                message['volume_trade_for_the_day'] = volume
+            yield message
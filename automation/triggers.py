@@ -0,0 +1,319 @@
+"""
+Smart Hedge - Stop-Loss / Take-Profit Trigger Monitor
+=====================================================
+
+Resident watcher for the exit levels of open positions.
+
+Every bracket (a position with a stop-loss and/or take-profit level) is
+indexed per instrument in two heaps:
+
+- ``below``: levels that fire when the price falls to them (stop-loss of a
+  long, take-profit of a short), as a max-heap;
+- ``above``: levels that fire when the price rises to them (take-profit of
+  a long, stop-loss of a short), as a min-heap.
+
+A quote only looks at the top of each heap, so it costs O(1) when nothing
+fires and O(log n) per level that does, however many brackets are open.
+The two legs of a bracket are one-cancels-other: when one fires the
+bracket closes, and the other leg is dropped lazily the next time it
+reaches the top of its heap.
+
+Exit orders are sent the moment a level is crossed, through the submit
+function the bracket was opened with. Quotes come from ``on_quote`` (for a
+streaming feed) or from the polling thread started with ``start``.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+LEG_STOP_LOSS, LEG_TAKE_PROFIT = 'stop_loss', 'take_profit'
+
+# Exit orders retried on the next crossing quote before a bracket is given up
+MAX_EXIT_ATTEMPTS = 3
+
+# Heap entries left behind by closed brackets are compacted past this ratio
+COMPACT_RATIO = 4
+
+InstrumentKey = Tuple[str, str]  # (exchange, symboltoken)
+
+
+@dataclass
+class Bracket:
+    """Exit levels for one open position
+
+    ``params`` are the entry order's parameters; ``side`` is the entry side,
+    so a BUY bracket is a long position exited by selling.
+    """
+    strategy_id: Any
+    params: Dict[str, Any]
+    quantity: int
+    stop_loss: Optional[float] = None
+    take_profit: Optional[float] = None
+    submit: Optional[Callable[[Dict[str, Any], Optional[str]], Future]] = None
+    account_id: Any = None
+    id: int = 0
+    active: bool = True
+    version: int = 0
+    attempts: int = 0
+    exit_future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def side(self) -> str:
+        return str(self.params.get('transactiontype', 'BUY')).upper()
+
+    @property
+    def instrument(self) -> InstrumentKey:
+        return str(self.params.get('exchange', '')).upper(), str(self.params.get('symboltoken', ''))
+
+    def exit_params(self) -> Dict[str, Any]:
+        params = {name: self.params[name] for name in ('variety', 'tradingsymbol', 'symboltoken', 'exchange',
+                                                        'producttype', 'duration') if name in self.params}
+        params.update(transactiontype='SELL' if self.side == 'BUY' else 'BUY', ordertype='MARKET',
+                      price='0', quantity=str(self.quantity))
+        return params
+
+
+class _InstrumentBook:
+    __slots__ = ('below', 'above', 'live', 'tradingsymbol')
+
+    def __init__(self, tradingsymbol: str):
+        self.below: List[Tuple[float, int, int, str]] = []  # (-level, bracket id, version, leg)
+        self.above: List[Tuple[float, int, int, str]] = []  # (level, bracket id, version, leg)
+        self.live = 0
+        self.tradingsymbol = tradingsymbol
+
+
+class TriggerMonitor:
+    """Price-indexed SL/TP brackets with OCO exits"""
+
+    def __init__(self):
+        self._books: Dict[InstrumentKey, _InstrumentBook] = {}
+        self._brackets: Dict[int, Bracket] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._brackets)
+
+    def add(self, bracket: Bracket) -> int:
+        """Start watching a bracket; returns its id"""
+        if bracket.stop_loss is None and bracket.take_profit is None:
+            raise ValueError("Bracket needs a stop-loss or a take-profit level")
+        if bracket.submit is None:
+            raise ValueError("Bracket needs a submit function for its exit order")
+        if not bracket.instrument[0] or not bracket.instrument[1]:
+            # Quotes are matched by token; a bracket without one would be priced from another instrument
+            raise ValueError("Bracket needs the exchange and symboltoken of its instrument")
+
+        with self._lock:
+            bracket.id = next(self._ids)
+            self._brackets[bracket.id] = bracket
+            book = self._books.get(bracket.instrument)
+            if book is None:
+                book = self._books[bracket.instrument] = _InstrumentBook(str(bracket.params.get('tradingsymbol', '')))
+            book.live += 1
+            self._arm(book, bracket)
+
+        logger.info(f"Watching bracket {bracket.id} for strategy {bracket.strategy_id}: "
+                    f"{bracket.side} {bracket.quantity} {bracket.params.get('tradingsymbol')} "
+                    f"SL {bracket.stop_loss} TP {bracket.take_profit}")
+        return bracket.id
+
+    def cancel_inactive(self, active_strategy_ids: Iterable[Any]) -> List[Bracket]:
+        """Stop watching the brackets of strategies no longer active; returns those cancelled"""
+        active = {str(strategy_id) for strategy_id in active_strategy_ids}
+        with self._lock:
+            cancelled = [bracket for bracket in self._brackets.values() if str(bracket.strategy_id) not in active]
+            for bracket in cancelled:
+                self._close(bracket)
+        return cancelled
+
+    def reduce(self, strategy_id: Any, account_id: Any, instrument: InstrumentKey, side: str,
+               quantity: int) -> List[Tuple[Bracket, int]]:
+        """Shrink a strategy's brackets that an opposing entry closes, oldest first
+
+        Returns (bracket, quantity removed) pairs, for ``restore`` when the
+        opposing entry is not placed. Brackets shrunk to zero are cancelled.
+        """
+        side, changes = side.upper(), []
+        with self._lock:
+            for bracket in sorted(self._brackets.values(), key=lambda b: b.id):
+                if quantity <= 0:
+                    break
+                if bracket.side == side or (bracket.strategy_id, bracket.account_id, bracket.instrument) != (
+                        strategy_id, account_id, instrument):
+                    continue
+                removed = min(quantity, bracket.quantity)
+                bracket.quantity -= removed
+                quantity -= removed
+                if bracket.quantity == 0:
+                    self._close(bracket)
+                changes.append((bracket, removed))
+
+        for bracket, removed in changes:
+            logger.info(f"Bracket {bracket.id}: {removed} closed by an opposing entry from strategy "
+                        f"{bracket.strategy_id}; {bracket.quantity} still watched")
+        return changes
+
+    def restore(self, changes: Iterable[Tuple[Bracket, int]]) -> None:
+        """Undo ``reduce`` after the opposing entry was not placed"""
+        with self._lock:
+            for bracket, removed in changes:
+                if bracket.active:
+                    bracket.quantity += removed
+                elif bracket.quantity == 0:
+                    bracket.quantity = removed
+                    self._activate(bracket)
+                else:
+                    logger.warning(f"Bracket {bracket.id} exited meanwhile; {removed} "
+                                   f"{bracket.params.get('tradingsymbol')} is unprotected")
+
+    def instruments(self) -> List[Tuple[str, str, str]]:
+        """(exchange, symboltoken, tradingsymbol) of every instrument with open brackets"""
+        with self._lock:
+            return [(exchange, token, book.tradingsymbol)
+                    for (exchange, token), book in self._books.items() if book.live]
+
+    def on_quote(self, exchange: str, token: str, price: float) -> List[Bracket]:
+        """Evaluate one quote and send exits for every level it crosses"""
+        fired: List[Tuple[Bracket, str]] = []
+        with self._lock:
+            book = self._books.get((exchange.upper(), str(token)))
+            if book is None or not book.live:
+                return []
+
+            while book.below and -book.below[0][0] >= price:
+                _, bracket_id, version, leg = heapq.heappop(book.below)
+                self._claim(bracket_id, version, leg, fired)
+            while book.above and book.above[0][0] <= price:
+                _, bracket_id, version, leg = heapq.heappop(book.above)
+                self._claim(bracket_id, version, leg, fired)
+
+            self._compact(book)
+
+        for bracket, leg in fired:
+            self._fire(bracket, leg, price)
+        return [bracket for bracket, _ in fired]
+
+    def on_quotes(self, quotes: Iterable[Tuple[str, str, float]]) -> List[Bracket]:
+        fired = []
+        for exchange, token, price in quotes:
+            fired.extend(self.on_quote(exchange, token, price))
+        return fired
+
+    def start(self, fetch_quotes: Callable[[List[Tuple[str, str, str]]], Iterable[Tuple[str, str, float]]],
+              interval: float = 1.0) -> None:
+        """Poll quotes for the watched instruments every ``interval`` seconds"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll, args=(fetch_quotes, interval),
+                                        name='trigger-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _poll(self, fetch_quotes, interval: float) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            instruments = self.instruments()
+            if instruments:
+                try:
+                    self.on_quotes(fetch_quotes(instruments))
+                except Exception as e:
+                    logger.error(f"Trigger monitor quote poll failed: {e}")
+            self._stop.wait(max(0.0, interval - (time.monotonic() - started)))
+
+    def _arm(self, book: _InstrumentBook, bracket: Bracket) -> None:
+        long = bracket.side == 'BUY'
+        if bracket.stop_loss is not None:
+            self._push(book, bracket, LEG_STOP_LOSS, float(bracket.stop_loss), below=long)
+        if bracket.take_profit is not None:
+            self._push(book, bracket, LEG_TAKE_PROFIT, float(bracket.take_profit), below=not long)
+
+    @staticmethod
+    def _push(book: _InstrumentBook, bracket: Bracket, leg: str, level: float, below: bool) -> None:
+        if below:
+            heapq.heappush(book.below, (-level, bracket.id, bracket.version, leg))
+        else:
+            heapq.heappush(book.above, (level, bracket.id, bracket.version, leg))
+
+    def _claim(self, bracket_id: int, version: int, leg: str, fired: List[Tuple[Bracket, str]]) -> None:
+        bracket = self._brackets.get(bracket_id)
+        if bracket is None or not bracket.active or bracket.version != version:
+            return  # the other leg already fired, or the bracket was cancelled or re-armed
+        self._close(bracket)
+        fired.append((bracket, leg))
+
+    def _close(self, bracket: Bracket) -> None:
+        bracket.active = False
+        bracket.version += 1
+        del self._brackets[bracket.id]
+        self._books[bracket.instrument].live -= 1
+
+    def _compact(self, book: _InstrumentBook) -> None:
+        if len(book.below) + len(book.above) <= COMPACT_RATIO * max(book.live, 8):
+            return
+        for heap in (book.below, book.above):
+            heap[:] = [entry for entry in heap
+                       if entry[1] in self._brackets and self._brackets[entry[1]].version == entry[2]]
+            heapq.heapify(heap)
+
+    def _fire(self, bracket: Bracket, leg: str, price: float) -> None:
+        bracket.attempts += 1
+        metrics.TRIGGERS.inc(leg=leg)
+        logger.info(f"Bracket {bracket.id} {leg} hit at {price} for strategy {bracket.strategy_id}; "
+                    f"exiting {bracket.quantity} {bracket.params.get('tradingsymbol')}")
+
+        key = f"x{leg[0]}{bracket.id}-{bracket.attempts}"
+        try:
+            bracket.exit_future = bracket.submit(bracket.exit_params(), key)
+        except Exception as e:
+            logger.error(f"Bracket {bracket.id}: exit order could not be submitted: {e}")
+            self._rearm(bracket)
+            return
+        bracket.exit_future.add_done_callback(lambda done: self._exit_done(bracket, done))
+
+    def _exit_done(self, bracket: Bracket, future: Future) -> None:
+        try:
+            outcome = future.result()
+            if outcome.placed:
+                return
+            error = outcome.error
+        except Exception as e:
+            error = str(e)
+        logger.error(f"Bracket {bracket.id}: exit order failed: {error}")
+        self._rearm(bracket)
+
+    def _rearm(self, bracket: Bracket) -> None:
+        """Watch a bracket again after its exit order failed, a limited number of times"""
+        if bracket.attempts >= MAX_EXIT_ATTEMPTS:
+            logger.error(f"Bracket {bracket.id}: giving up after {bracket.attempts} exit attempts; "
+                         f"position in {bracket.params.get('tradingsymbol')} is unprotected")
+            return
+        with self._lock:
+            self._activate(bracket)
+
+    def _activate(self, bracket: Bracket) -> None:
+        bracket.active = True
+        self._brackets[bracket.id] = bracket
+        book = self._books[bracket.instrument]
+        book.live += 1
+        self._arm(book, bracket)
@@ -0,0 +1,172 @@
+"""
+Smart Hedge - Zygote Strategy Launcher
+======================================
+
+Launches isolated strategy processes from a pre-forked template process.
+
+The template (a ``multiprocessing`` fork server) imports the heavy common
+dependencies once. Every strategy is then forked from it, so each child
+starts with smartapi, requests, numpy, ... already imported and shares
+their pages copy-on-write, while still running in its own process with its
+own environment, resource limits and crash containment.
+
+Only available on POSIX platforms that support the ``forkserver`` start
+method.
+"""
+
+import logging
+import multiprocessing
+import os
+import runpy
+import sys
+from dataclasses import dataclass
+from multiprocessing import forkserver
+from typing import Dict, List, Optional
+
+from strategy_protocol import StrategyOutput
+
+# Per-process resource limits are only available on POSIX systems
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Modules imported once by the template process
+DEFAULT_PRELOAD = ['json', 'logging', 'requests', 'pyotp', 'smartapi', 'numpy']
+
+
+def is_supported() -> bool:
+    """Whether the platform supports fork-server launches"""
+    return 'forkserver' in multiprocessing.get_all_start_methods()
+
+
+def apply_resource_limits(cpu_seconds: int = 0, memory_bytes: int = 0) -> None:
+    """Apply CPU time and address space limits to the current process"""
+    if resource is None:
+        return
+    if cpu_seconds:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+    if memory_bytes:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+
+
+# Sets the limits on itself, then becomes the real command
+_LIMIT_AND_EXEC = (
+    "import os, resource, sys\n"
+    "cpu, memory = int(sys.argv[1]), int(sys.argv[2])\n"
+    "if cpu: resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))\n"
+    "if memory: resource.setrlimit(resource.RLIMIT_AS, (memory, memory))\n"
+    "os.execv(sys.argv[3], sys.argv[3:])\n"
+)
+
+
+def limited_command(argv: List[str], cpu_seconds: int = 0, memory_bytes: int = 0) -> List[str]:
+    """Command line running ``argv`` under CPU time and address space limits
+
+    The limits are applied by a small wrapper interpreter that then execs
+    ``argv``, instead of a ``preexec_fn``: a pre-exec hook runs Python code
+    between fork and exec, which is unsafe when the parent has other threads
+    (the runner launches strategies from a thread pool). ``argv[0]`` must be
+    an absolute path.
+    """
+    if resource is None or not (cpu_seconds or memory_bytes):
+        return list(argv)
+    return [sys.executable, '-I', '-S', '-c', _LIMIT_AND_EXEC, str(int(cpu_seconds)), str(int(memory_bytes)), *argv]
+
+
+@dataclass
+class LaunchResult:
+    """Outcome of a forked strategy run"""
+    returncode: Optional[int]
+    stdout: str
+    stderr: str
+    timed_out: bool = False
+
+
+def _run_strategy(python_file: str, env: Dict[str, str], stdout_pipe, stderr_pipe,
+                  cpu_seconds: int, memory_bytes: int) -> None:
+    """Child entry point: become the strategy script"""
+    apply_resource_limits(cpu_seconds, memory_bytes)
+
+    # Inject the runner's environment exactly as a subprocess would see it
+    os.environ.clear()
+    os.environ.update(env)
+
+    # Stream the child's output to the launcher as it is written
+    os.dup2(stdout_pipe.fileno(), 1)
+    os.dup2(stderr_pipe.fileno(), 2)
+    stdout_pipe.close()
+    stderr_pipe.close()
+    sys.stdout = open(1, 'w', buffering=1, closefd=False)
+    sys.stderr = open(2, 'w', buffering=1, closefd=False)
+
+    sys.argv = [python_file]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(python_file)))
+
+    # SystemExit from the script becomes the process exit code
+    runpy.run_path(python_file, run_name='__main__')
+
+
+class ZygoteLauncher:
+    """Forks strategy processes from a template with dependencies preloaded"""
+
+    def __init__(self, preload: Optional[List[str]] = None):
+        if not is_supported():
+            raise RuntimeError("Fork-server launches are not supported on this platform")
+
+        self.preload = list(preload if preload is not None else DEFAULT_PRELOAD)
+        self._context = multiprocessing.get_context('forkserver')
+
+        # The main module and the launcher are imported once too, so children
+        # can resolve _run_strategy without re-running the runner's imports
+        self._context.set_forkserver_preload(['__main__', __name__] + self.preload)
+
+    def start(self) -> None:
+        """Start the template process ahead of the first launch"""
+        forkserver.ensure_running()
+        logger.info(f"Strategy zygote started with preloaded modules: {', '.join(self.preload)}")
+
+    def run(self, python_file: str, env: Dict[str, str], timeout: Optional[float] = None,
+            cpu_seconds: int = 0, memory_bytes: int = 0, output: Optional[StrategyOutput] = None) -> LaunchResult:
+        """Fork a strategy from the template and wait for it to finish
+
+        ``output`` consumes stdout/stderr while the strategy runs, so its
+        messages are handled as soon as they are written.
+        """
+        output = output or StrategyOutput(os.path.basename(python_file), lambda message: None)
+        stdout_reader, stdout_writer = self._context.Pipe(duplex=False)
+        stderr_reader, stderr_writer = self._context.Pipe(duplex=False)
+
+        try:
+            process = self._context.Process(
+                target=_run_strategy,
+                args=(python_file, env, stdout_writer, stderr_writer, cpu_seconds, memory_bytes)
+            )
+            process.start()
+        finally:
+            # Only the child keeps the write ends, so EOF arrives when it exits
+            stdout_writer.close()
+            stderr_writer.close()
+
+        try:
+            output.start(stdout_reader.fileno(), stderr_reader.fileno())
+            process.join(timeout)
+
+            timed_out = process.is_alive()
+            if timed_out:
+                process.kill()
+                process.join()
+
+            output.join(timeout=5)
+        finally:
+            stdout_reader.close()
+            stderr_reader.close()
+
+        return LaunchResult(
+            returncode=process.exitcode,
+            stdout=output.stdout,
+            stderr=output.stderr,
+            timed_out=timed_out
+        )
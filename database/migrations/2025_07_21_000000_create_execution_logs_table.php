@@ -0,0 +1,39 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    /**
+     * Run the migrations.
+     */
+    public function up(): void
+    {
+        Schema::create('execution_logs', function (Blueprint $table) {
+            $table->id();
+            $table->string('record_id', 32)->unique(); // Runner-generated id, makes batch retries idempotent
+            $table->string('kind', 16); // execution, signal or order
+            $table->unsignedBigInteger('strategy_id')->nullable(); // No foreign key: history outlives deleted strategies
+            $table->unsignedBigInteger('account_id')->nullable();
+            $table->string('status', 32)->nullable();
+            $table->text('message')->nullable();
+            $table->json('data')->nullable();
+            $table->timestamp('recorded_at', 6);
+            $table->timestamps();
+
+            // Logs API reads the newest records, optionally for one strategy
+            $table->index(['strategy_id', 'recorded_at']);
+            $table->index('recorded_at');
+        });
+    }
+
+    /**
+     * Reverse the migrations.
+     */
+    public function down(): void
+    {
+        Schema::dropIfExists('execution_logs');
+    }
+};
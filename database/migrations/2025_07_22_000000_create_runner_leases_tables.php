@@ -0,0 +1,47 @@
+<?php
+
+use Illuminate\Database\Migrations\Migration;
+use Illuminate\Database\Schema\Blueprint;
+use Illuminate\Support\Facades\Schema;
+
+return new class extends Migration
+{
+    /**
+     * Run the migrations.
+     */
+    public function up(): void
+    {
+        // Automation runners of a sharded deployment, kept alive by heartbeats
+        Schema::create('runner_nodes', function (Blueprint $table) {
+            $table->id();
+            $table->string('node_id', 128)->unique();
+            $table->timestamp('expires_at', 6);
+            $table->timestamps();
+
+            $table->index('expires_at');
+        });
+
+        // Which runner may execute a strategy, and the last bar it ran for
+        Schema::create('strategy_leases', function (Blueprint $table) {
+            $table->id();
+            $table->unsignedBigInteger('strategy_id')->unique(); // No foreign key: rows are created on first lease
+            $table->string('holder', 128)->nullable();
+            $table->string('token', 36)->nullable(); // Identifies the leases granted by one acquire request
+            $table->timestamp('expires_at', 6)->nullable();
+            $table->string('last_run_key', 32)->nullable();
+            $table->timestamps();
+
+            $table->index('holder');
+            $table->index('token');
+        });
+    }
+
+    /**
+     * Reverse the migrations.
+     */
+    public function down(): void
+    {
+        Schema::dropIfExists('strategy_leases');
+        Schema::dropIfExists('runner_nodes');
+    }
+};
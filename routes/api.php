@@ -3,6 +3,9 @@
 use Illuminate\Http\Request;
 use Illuminate\Support\Facades\Route;
 use App\Http\Controllers\Api\ActiveStrategyController;
+use App\Http\Controllers\Api\BrokerAccountController;
+use App\Http\Controllers\Api\ExecutionLogController;
+use App\Http\Controllers\Api\RunnerLeaseController;
 
 // API Routes for automated trading system
 Route::middleware(['api.token'])->group(function () {
@@ -12,6 +15,20 @@
     // Get active strategies for automation
     Route::get('/active-strategies', [ActiveStrategyController::class, 'index']);
 
+    // Broker accounts of strategy owners, and tokens refreshed by the runner
+    Route::get('/broker-accounts', [BrokerAccountController::class, 'index']);
+    Route::post('/broker-accounts/{account}/tokens', [BrokerAccountController::class, 'updateTokens']);
+
+    // Execution journal: batches uploaded by the runner, read back for monitoring
+    Route::get('/logs', [ActiveStrategyController::class, 'logs']);
+    Route::post('/logs/batch', [ExecutionLogController::class, 'store']);
+
+    // Sharded runners: heartbeats and strategy leases
+    Route::post('/runners/heartbeat', [RunnerLeaseController::class, 'heartbeat']);
+    Route::post('/runners/leave', [RunnerLeaseController::class, 'leave']);
+    Route::post('/leases/acquire', [RunnerLeaseController::class, 'acquire']);
+    Route::post('/leases/complete', [RunnerLeaseController::class, 'complete']);
+
     // Get specific strategy details
     Route::get('/strategies/{strategy}', [ActiveStrategyController::class, 'show']);
 });
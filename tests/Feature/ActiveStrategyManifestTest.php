@@ -0,0 +1,77 @@
+<?php
+
+use App\Models\Strategy;
+use App\Models\User;
+use Illuminate\Support\Facades\Storage;
+
+beforeEach(function () {
+    config(['app.api_token' => 'test-token']);
+    Storage::fake();
+
+    $this->user = User::factory()->create();
+    $this->headers = ['Authorization' => 'Bearer test-token'];
+});
+
+function activeStrategy(User $user, string $name): Strategy
+{
+    $path = "strategies/{$name}.py";
+    Storage::put($path, 'print("hello")');
+
+    return Strategy::create([
+        'user_id' => $user->id,
+        'name' => $name,
+        'script_file' => $path,
+        'params_json' => '{}',
+        'is_active' => true,
+    ]);
+}
+
+test('active strategies response carries an etag and version', function () {
+    activeStrategy($this->user, 'alpha');
+
+    $response = $this->getJson('/api/active-strategies', $this->headers);
+
+    $response->assertOk()
+        ->assertHeader('ETag')
+        ->assertJsonCount(1, 'data')
+        ->assertJsonPath('meta.delta', false);
+
+    expect($response->json('meta.version'))->toBeGreaterThan(0);
+});
+
+test('unchanged manifest returns not modified', function () {
+    activeStrategy($this->user, 'alpha');
+
+    $etag = $this->getJson('/api/active-strategies', $this->headers)->headers->get('ETag');
+
+    $this->getJson('/api/active-strategies', $this->headers + ['If-None-Match' => $etag])
+        ->assertStatus(304);
+});
+
+test('saving a strategy invalidates the manifest', function () {
+    $strategy = activeStrategy($this->user, 'alpha');
+
+    $etag = $this->getJson('/api/active-strategies', $this->headers)->headers->get('ETag');
+
+    $strategy->update(['is_active' => false]);
+
+    $this->getJson('/api/active-strategies', $this->headers + ['If-None-Match' => $etag])
+        ->assertOk()
+        ->assertJsonCount(0, 'data')
+        ->assertJsonPath('meta.ids', []);
+});
+
+test('since cursor returns only changed strategies with all active ids', function () {
+    $alpha = activeStrategy($this->user, 'alpha');
+    $this->travel(10)->seconds();
+    $beta = activeStrategy($this->user, 'beta');
+
+    $since = $beta->updated_at->getTimestamp();
+
+    $this->getJson("/api/active-strategies?since={$since}", $this->headers)
+        ->assertOk()
+        ->assertJsonPath('meta.delta', true)
+        ->assertJsonCount(1, 'data')
+        ->assertJsonPath('data.0.id', $beta->id)
+        ->assertJsonPath('meta.ids', [$alpha->id, $beta->id]);
+});
@@ -0,0 +1,78 @@
+<?php
+
+use App\Models\Broker;
+use App\Models\Strategy;
+use App\Models\User;
+use App\Models\UserBrokerAccount;
+use Illuminate\Support\Facades\Storage;
+
+beforeEach(function () {
+    config(['app.api_token' => 'test-token']);
+    Storage::fake();
+
+    $this->angel = Broker::create(['name' => 'Angel One', 'code' => 'angel', 'is_active' => true]);
+    $this->headers = ['Authorization' => 'Bearer test-token'];
+});
+
+function brokerAccount(Broker $broker, bool $strategyActive = true, bool $accountActive = true): UserBrokerAccount
+{
+    $user = User::factory()->create();
+
+    Strategy::create([
+        'user_id' => $user->id,
+        'name' => "strategy-{$user->id}",
+        'script_file' => "strategies/strategy-{$user->id}.py",
+        'params_json' => '{}',
+        'is_active' => $strategyActive,
+    ]);
+
+    return UserBrokerAccount::create([
+        'user_id' => $user->id,
+        'broker_id' => $broker->id,
+        'client_code' => "C{$user->id}",
+        'api_key' => "key-{$user->id}",
+        'access_token' => "jwt-{$user->id}",
+        'refresh_token' => "refresh-{$user->id}",
+        'token_expiry' => now()->addHour(),
+        'is_active' => $accountActive,
+    ]);
+}
+
+test('only active angel accounts of users with active strategies are listed', function () {
+    $listed = brokerAccount($this->angel);
+    brokerAccount($this->angel, accountActive: false);
+    brokerAccount($this->angel, strategyActive: false);
+    brokerAccount(Broker::create(['name' => 'Zerodha', 'code' => 'zerodha', 'is_active' => true]));
+
+    $this->getJson('/api/broker-accounts', $this->headers)
+        ->assertOk()
+        ->assertJsonPath('meta.count', 1)
+        ->assertJsonCount(1, 'data')
+        ->assertJsonPath('data.0.id', $listed->id)
+        ->assertJsonPath('data.0.client_code', $listed->client_code)
+        ->assertJsonPath('data.0.api_key', "key-{$listed->user_id}")
+        ->assertJsonPath('data.0.access_token', "jwt-{$listed->user_id}")
+        ->assertJsonPath('data.0.refresh_token', "refresh-{$listed->user_id}")
+        ->assertJsonPath('data.0.token_expiry', $listed->token_expiry->getTimestamp());
+});
+
+test('accounts on an inactive broker are not listed', function () {
+    brokerAccount($this->angel);
+    $this->angel->update(['is_active' => false]);
+
+    $this->getJson('/api/broker-accounts', $this->headers)
+        ->assertOk()
+        ->assertJsonCount(0, 'data');
+});
+
+test('the account listing requires the api token', function () {
+    brokerAccount($this->angel);
+
+    $this->getJson('/api/broker-accounts')
+        ->assertUnauthorized()
+        ->assertJsonPath('error', 'API token required');
+
+    $this->getJson('/api/broker-accounts', ['Authorization' => 'Bearer wrong-token'])
+        ->assertUnauthorized()
+        ->assertJsonPath('error', 'Invalid API token');
+});
@@ -0,0 +1,81 @@
+<?php
+
+use App\Models\ExecutionLog;
+
+beforeEach(function () {
+    config(['app.api_token' => 'test-token']);
+
+    $this->headers = ['Authorization' => 'Bearer test-token'];
+});
+
+function journalRecord(string $id, int $strategyId, float $recordedAt, string $kind = 'execution'): array
+{
+    return [
+        'record_id' => $id,
+        'kind' => $kind,
+        'strategy_id' => $strategyId,
+        'account_id' => null,
+        'status' => 'success',
+        'message' => null,
+        'data' => ['duration_ms' => 12.5],
+        'recorded_at' => $recordedAt,
+    ];
+}
+
+function postGzippedBatch($test, array $records)
+{
+    return $test->call('POST', '/api/logs/batch', [], [], [], [
+        'HTTP_AUTHORIZATION' => 'Bearer test-token',
+        'HTTP_CONTENT_ENCODING' => 'gzip',
+        'CONTENT_TYPE' => 'application/json',
+        'HTTP_ACCEPT' => 'application/json',
+    ], gzencode(json_encode(['records' => $records])));
+}
+
+test('gzipped journal batches are stored once', function () {
+    $records = [
+        journalRecord('a1', 1, 1700000000.25),
+        journalRecord('a2', 2, 1700000001.5, 'signal'),
+    ];
+
+    postGzippedBatch($this, $records)
+        ->assertOk()
+        ->assertJsonPath('inserted', 2);
+
+    // A resent batch is acknowledged without duplicating records
+    postGzippedBatch($this, $records)
+        ->assertOk()
+        ->assertJsonPath('accepted', 2)
+        ->assertJsonPath('inserted', 0);
+
+    expect(ExecutionLog::count())->toBe(2);
+    expect(ExecutionLog::where('record_id', 'a1')->first()->data)->toBe(['duration_ms' => 12.5]);
+});
+
+test('invalid journal batches are rejected', function () {
+    $this->postJson('/api/logs/batch', ['records' => [['record_id' => 'x', 'kind' => 'trade']]], $this->headers)
+        ->assertStatus(422);
+});
+
+test('logs are read newest first and filtered by strategy', function () {
+    postGzippedBatch($this, [
+        journalRecord('a1', 1, 1700000000),
+        journalRecord('a2', 2, 1700000001),
+        journalRecord('a3', 1, 1700000002, 'order'),
+    ])->assertOk();
+
+    $this->getJson('/api/logs?strategy_id=1', $this->headers)
+        ->assertOk()
+        ->assertJsonCount(2, 'data')
+        ->assertJsonPath('data.0.id', 'a3')
+        ->assertJsonPath('data.1.id', 'a1');
+
+    $this->getJson('/api/logs?kind=order&limit=1', $this->headers)
+        ->assertOk()
+        ->assertJsonCount(1, 'data')
+        ->assertJsonPath('meta.limit', 1);
+
+    $this->getJson('/api/logs?since=1700000001', $this->headers)
+        ->assertOk()
+        ->assertJsonCount(2, 'data');
+});
@@ -0,0 +1,78 @@
+<?php
+
+use App\Models\StrategyLease;
+
+beforeEach(function () {
+    config(['app.api_token' => 'test-token']);
+
+    $this->headers = ['Authorization' => 'Bearer test-token'];
+});
+
+function leases(array $strategyIds, ?string $runKey = null): array
+{
+    return array_map(fn ($id) => ['strategy_id' => $id, 'run_key' => $runKey], $strategyIds);
+}
+
+test('heartbeats list live runners until they expire', function () {
+    $this->postJson('/api/runners/heartbeat', ['node_id' => 'b', 'ttl' => 10], $this->headers)->assertOk();
+    $this->postJson('/api/runners/heartbeat', ['node_id' => 'a', 'ttl' => 30], $this->headers)
+        ->assertOk()
+        ->assertJsonPath('nodes', ['a', 'b']);
+
+    $this->travel(20)->seconds();
+
+    $this->postJson('/api/runners/heartbeat', ['node_id' => 'a', 'ttl' => 30], $this->headers)
+        ->assertOk()
+        ->assertJsonPath('nodes', ['a']);
+});
+
+test('a lease is granted to one runner at a time', function () {
+    $this->postJson('/api/leases/acquire', ['node_id' => 'a', 'ttl' => 60, 'leases' => leases([1, 2])], $this->headers)
+        ->assertOk()
+        ->assertJsonPath('granted', [1, 2]);
+
+    $this->postJson('/api/leases/acquire', ['node_id' => 'b', 'ttl' => 60, 'leases' => leases([1, 3])], $this->headers)
+        ->assertOk()
+        ->assertJsonPath('granted', [3]);
+
+    // Expired leases can be taken over
+    $this->travel(61)->seconds();
+
+    $this->postJson('/api/leases/acquire', ['node_id' => 'b', 'ttl' => 60, 'leases' => leases([1])], $this->headers)
+        ->assertOk()
+        ->assertJsonPath('granted', [1]);
+});
+
+test('a strategy runs once per run key', function () {
+    $this->postJson('/api/leases/acquire', ['node_id' => 'a', 'ttl' => 60, 'leases' => leases([1], '900')], $this->headers)
+        ->assertJsonPath('granted', [1]);
+    $this->postJson('/api/leases/complete', ['node_id' => 'a', 'leases' => leases([1], '900')], $this->headers)
+        ->assertOk()
+        ->assertJsonPath('released', 1);
+
+    expect(StrategyLease::where('strategy_id', 1)->first())
+        ->holder->toBeNull()
+        ->last_run_key->toBe('900');
+
+    $this->postJson('/api/leases/acquire', ['node_id' => 'b', 'ttl' => 60, 'leases' => leases([1], '900')], $this->headers)
+        ->assertJsonPath('granted', []);
+    $this->postJson('/api/leases/acquire', ['node_id' => 'b', 'ttl' => 60, 'leases' => leases([1], '1800')], $this->headers)
+        ->assertJsonPath('granted', [1]);
+});
+
+test('leaving releases a runner\'s leases', function () {
+    $this->postJson('/api/runners/heartbeat', ['node_id' => 'a', 'ttl' => 10], $this->headers);
+    $this->postJson('/api/leases/acquire', ['node_id' => 'a', 'ttl' => 60, 'leases' => leases([1, 2])], $this->headers);
+
+    $this->postJson('/api/runners/leave', ['node_id' => 'a'], $this->headers)->assertOk();
+
+    $this->postJson('/api/leases/acquire', ['node_id' => 'b', 'ttl' => 60, 'leases' => leases([1, 2])], $this->headers)
+        ->assertJsonPath('granted', [1, 2]);
+    $this->postJson('/api/runners/heartbeat', ['node_id' => 'b', 'ttl' => 10], $this->headers)
+        ->assertJsonPath('nodes', ['b']);
+});
+
+test('lease requests are validated', function () {
+    $this->postJson('/api/leases/acquire', ['node_id' => 'a', 'leases' => leases([1])], $this->headers)
+        ->assertStatus(422);
+});